@@ -0,0 +1,76 @@
+"""Benchmark for the time and number of modules needed to import PyTables.
+
+Every measure is taken in a fresh Python interpreter, so that module
+caches do not interfere.  Usage:
+
+    python import-bench.py [-n niter] [-s statement]
+
+The default statement is ``import tables``.  Other statements (e.g.
+``import tables; tables.open_file('file.h5').close()``) can be used to
+track the modules loaded on first use.
+
+"""
+
+from __future__ import print_function
+import sys
+import getopt
+import subprocess
+
+
+# Executed in the child interpreter: it prints the elapsed time and the
+# number of modules loaded by the statement.
+child_code = """\
+import sys, time
+before = set(sys.modules)
+tref = time.time()
+exec(%r)
+elapsed = time.time() - tref
+loaded = [name for name in set(sys.modules) - before
+          if sys.modules[name] is not None]
+print(elapsed, len(loaded), ' '.join(sorted(loaded)))
+"""
+
+
+def measure(statement):
+    code = child_code % statement
+    out = subprocess.check_output([sys.executable, '-c', code])
+    elapsed, nmodules, names = out.decode('ascii').split(' ', 2)
+    return float(elapsed), int(nmodules), names.split()
+
+
+if __name__ == '__main__':
+    usage = """usage: %s [-v] [-n niter] [-s statement]
+            -v verbose (list the loaded PyTables modules)
+            -n number of imports to be measured
+            -s statement to be measured\n""" % sys.argv[0]
+
+    try:
+        opts, pargs = getopt.getopt(sys.argv[1:], 'vn:s:')
+    except getopt.GetoptError:
+        sys.stderr.write(usage)
+        sys.exit(1)
+
+    verbose = False
+    niter = 10
+    statement = 'import tables'
+    for option in opts:
+        if option[0] == '-v':
+            verbose = True
+        elif option[0] == '-n':
+            niter = int(option[1])
+        elif option[0] == '-s':
+            statement = option[1]
+
+    times = []
+    for i in range(niter):
+        elapsed, nmodules, names = measure(statement)
+        times.append(elapsed)
+
+    times.sort()
+    print("Statement: %s" % statement)
+    print("Import time (best/median of %d): %.1f/%.1f ms"
+          % (niter, times[0] * 1e3, times[len(times) // 2] * 1e3))
+    tbnames = [name for name in names if name.startswith('tables')]
+    print("Modules loaded: %d (%d from PyTables)" % (nmodules, len(tbnames)))
+    if verbose:
+        print("PyTables modules:", ' '.join(tbnames))
@@ -394,6 +394,178 @@ PyObject *Giterate(hid_t parent_id, hid_t loc_id, const char *name) {
   return t;
 }
 
+/****************************************************************
+**
+**  litercb_page(): Link iteration callback routine that stops once
+**  a page of links has been visited.
+**
+****************************************************************/
+typedef struct {
+  PyObject *info[4];
+  hsize_t  remaining;
+} literpage_t;
+
+static herr_t litercb_page(hid_t loc_id, const char *name,
+                           const H5L_info_t *info, void *data) {
+  literpage_t *page=(literpage_t *)data;
+  herr_t      ret;
+
+  ret = litercb(loc_id, name, info, page->info);
+  if (ret < 0)
+    return ret;
+
+  if (--page->remaining == 0)
+    return 1;  /* Short-circuit: the page is complete */
+  return 0;
+}
+
+
+/****************************************************************
+**
+**  Giterate_page(): Iterate over (at most) `count` childs of
+**  `loc_id`, in name order, starting at link index `start`.
+**
+**  Returns a tuple of lists with the names of groups, leaves, links
+**  and unknown nodes, plus the index where the next page starts.
+**
+****************************************************************/
+PyObject *Giterate_page(hid_t loc_id, hsize_t start, hsize_t count) {
+  hsize_t     idx=start;
+  PyObject    *t;
+  literpage_t page;
+  int         i;
+  herr_t      ret;
+
+  for (i=0; i<4; i++)
+    page.info[i] = PyList_New(0);
+  page.remaining = count;
+
+  if (count > 0) {
+    ret = H5Literate(loc_id, H5_INDEX_NAME, H5_ITER_INC, &idx,
+                     litercb_page, &page);
+    if (ret < 0) {
+      for (i=0; i<4; i++)
+        Py_DECREF(page.info[i]);
+      PyErr_SetString(PyExc_RuntimeError, "Can't iterate over group links");
+      return NULL;
+    }
+  }
+
+  /* Create the tuple with the lists of children and the next index */
+  t = PyTuple_New(5);
+  for (i=0; i<4; i++)
+    PyTuple_SetItem(t, i, page.info[i]);
+  PyTuple_SetItem(t, 4, PyLong_FromUnsignedLongLong(idx));
+
+  return t;
+}
+
+/****************************************************************
+**
+**  is_hidden_path(): Check whether any component of a relative path
+**  is hidden, i.e. starts with "_i_" or "_p_".
+**
+****************************************************************/
+static int is_hidden_path(const char *path) {
+  const char *c = path;
+
+  for (;;) {
+    if (c[0] == '_' && (c[1] == 'i' || c[1] == 'p') && c[2] == '_')
+      return 1;
+    c = strchr(c, '/');
+    if (c == NULL)
+      return 0;
+    c++;
+  }
+}
+
+/****************************************************************
+**
+**  lvisitcb(): Link visiting callback routine that records the
+**  path and kind of each visited link.  Hidden links and everything
+**  below them are skipped without opening the objects.
+**
+****************************************************************/
+static herr_t lvisitcb(hid_t loc_id, const char *name,
+                       const H5L_info_t *info, void *data) {
+  PyObject   *out=(PyObject *)data;
+  PyObject   *item;
+  const char *kind;
+  H5G_stat_t oinfo;
+
+  if (is_hidden_path(name))
+    return 0;
+
+  switch(info->type) {
+    case H5L_TYPE_SOFT:
+      kind = "SoftLink";
+      break;
+    case H5L_TYPE_EXTERNAL:
+      kind = "ExternalLink";
+      break;
+    case H5L_TYPE_HARD:
+      /* Get type of the object and check it */
+      if (H5Gget_objinfo(loc_id, name, FALSE, &oinfo) < 0)
+        return -1;
+
+      switch(oinfo.type) {
+        case H5G_GROUP:
+          kind = "Group";
+          break;
+        case H5G_DATASET:
+          kind = "Leaf";
+          break;
+        case H5G_TYPE:
+          return 0;  /* Named datatypes are not nodes */
+        default:
+          kind = "Unknown";
+      }
+      break;
+    default:
+      kind = "Unknown";
+  }
+
+  item = Py_BuildValue("(ss)", name, kind);
+  if (item == NULL)
+    return -1;
+  if (PyList_Append(out, item) < 0) {
+    Py_DECREF(item);
+    return -1;  /* Stop iterating, the Python error is already set */
+  }
+  Py_DECREF(item);
+
+  return 0;
+}
+
+
+/****************************************************************
+**
+**  Gvisit(): Recursively visit all the links below `loc_id`, in
+**  depth-first name order.
+**
+**  Returns a list of (path, kind) tuples, where the path is relative
+**  to `loc_id` and the kind is one of "Group", "Leaf", "SoftLink",
+**  "ExternalLink" or "Unknown".  Hidden nodes are not listed.
+**
+****************************************************************/
+PyObject *Gvisit(hid_t loc_id) {
+  PyObject *out;
+  herr_t   ret;
+
+  out = PyList_New(0);
+  if (out == NULL)
+    return NULL;
+  ret = H5Lvisit(loc_id, H5_INDEX_NAME, H5_ITER_INC, lvisitcb, out);
+  if (ret < 0) {
+    Py_DECREF(out);
+    if (!PyErr_Occurred())
+      PyErr_SetString(PyExc_RuntimeError, "Can't visit group links");
+    return NULL;
+  }
+
+  return out;
+}
+
 /****************************************************************
 **
 **  aitercb(): Custom attribute iteration callback routine.
@@ -1012,3 +1184,17 @@ herr_t pt_H5free_memory(void *buf) {
 }
 
 #endif
+
+
+#if H5_VERSION_LE(1,8,15)
+
+herr_t pt_H5is_library_threadsafe(hbool_t *is_ts) {
+#ifdef H5_HAVE_THREADSAFE
+ *is_ts = 1;
+#else
+ *is_ts = 0;
+#endif
+ return 0;
+}
+
+#endif
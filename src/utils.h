@@ -92,6 +92,10 @@ int get_linkinfo(hid_t loc_id, const char *name);
 
 PyObject *Giterate(hid_t parent_id, hid_t loc_id, const char *name);
 
+PyObject *Giterate_page(hid_t loc_id, hsize_t start, hsize_t count);
+
+PyObject *Gvisit(hid_t loc_id);
+
 PyObject *Aiterate(hid_t loc_id);
 
 H5T_class_t getHDF5ClassID(hid_t loc_id,
@@ -159,3 +163,10 @@ herr_t pt_H5free_memory(void *buf);
 #else
 #define pt_H5free_memory H5free_memory
 #endif
+
+#if H5_VERSION_LE(1,8,15)
+/* HDF5 version < 1.8.16 */
+herr_t pt_H5is_library_threadsafe(hbool_t *is_ts);
+#else
+#define pt_H5is_library_threadsafe H5is_library_threadsafe
+#endif
@@ -120,7 +120,8 @@ from tables.filters import Filters
 
 # Import the user classes from the proper modules
 from tables.exceptions import *
-from tables.file import File, open_file, copy_file, openFile, copyFile
+from tables.file import (File, FilePool, open_file, copy_file, openFile,
+                         copyFile)
 from tables.node import Node
 from tables.group import Group
 from tables.leaf import Leaf
@@ -129,9 +130,38 @@ from tables.array import Array
 from tables.carray import CArray
 from tables.earray import EArray
 from tables.vlarray import VLArray
+from tables.raggedarray import RaggedArray
 from tables.unimplemented import UnImplemented, Unknown
+
 from tables.expression import Expr
-from tables.tests import print_versions, test
+
+
+# The test suite helpers import all of Numexpr and the compression
+# filters, so they are only loaded when these are called.
+def print_versions():
+    """Print all the versions of software that PyTables relies on."""
+
+    from tables.tests import print_versions
+    print_versions()
+
+
+def test(verbose=False, heavy=False):
+    """Run all the tests in the test suite.
+
+    If *verbose* is set, the test suite will emit messages with full
+    verbosity (not recommended unless you are looking into a certain
+    problem).
+
+    If *heavy* is set, the test suite will be run in *heavy* mode (you
+    should be careful with this because it can take a lot of time and
+    resources from your computer).
+
+    Return 0 (os.EX_OK) if all tests pass, 1 in case of failure
+
+    """
+
+    from tables.tests import test
+    return test(verbose, heavy)
 
 
 # List here only the objects we want to be publicly available
@@ -150,7 +180,7 @@ __all__ = [
     'split_type', 'restrict_flavors', 'set_blosc_max_threads',
     'silence_hdf5_messages',
     # Helper classes:
-    'IsDescription', 'Description', 'Filters', 'Cols', 'Column',
+    'IsDescription', 'Description', 'Filters', 'Cols', 'Column', 'FilePool',
     # Types:
     'Enum',
     # Atom types:
@@ -162,6 +192,7 @@ __all__ = [
     'TimeAtom', 'Time32Atom', 'Time64Atom',
     'EnumAtom',
     'PseudoAtom', 'ObjectAtom', 'VLStringAtom', 'VLUnicodeAtom',
+    'ObjectCodec', 'register_object_codec',
     # Column types:
     'Col', 'StringCol', 'BoolCol',
     'IntCol', 'UIntCol', 'Int8Col', 'UInt8Col', 'Int16Col', 'UInt16Col',
@@ -172,7 +203,7 @@ __all__ = [
     'EnumCol',
     # Node classes:
     'Node', 'Group', 'Leaf', 'Table', 'Array', 'CArray', 'EArray', 'VLArray',
-    'UnImplemented', 'Unknown',
+    'RaggedArray', 'UnImplemented', 'Unknown',
     # The File class:
     'File',
     # Expr class
@@ -21,7 +21,7 @@ from tables.filters import Filters
 from tables.flavor import flavor_of, array_as_internal, internal_to_flavor
 
 from tables.utils import (is_idx, convert_to_np_atom2, SizeType, lazyattr,
-                          byteorders, quantize)
+                          byteorders, quantize, ReadAhead)
 from tables.leaf import Leaf
 
 from tables._past import previous_api, previous_api_property
@@ -169,6 +169,8 @@ class Array(hdf5extension.Array, Leaf):
         """Whether we are in the middle of an iteration or not (sentinel)."""
         self.listarr = None
         """Current buffer in iterators."""
+        self._readahead = None
+        """Background reader of buffers in prefetching iterators."""
 
         # Documented (*public*) attributes.
         self.atom = _atom
@@ -255,7 +257,7 @@ class Array(hdf5extension.Array, Leaf):
 
     getEnum = previous_api(get_enum)
 
-    def iterrows(self, start=None, stop=None, step=None):
+    def iterrows(self, start=None, stop=None, step=None, prefetch=0):
         """Iterate over the rows of the array.
 
         This method returns an iterator yielding an object of the current
@@ -267,6 +269,13 @@ class Array(hdf5extension.Array, Leaf):
         that purpose.  If you only want to iterate over a given *range of rows*
         in the array, you may use the start, stop and step parameters.
 
+        If *prefetch* is greater than 0, up to that number of buffers of
+        :attr:`Leaf.nrowsinbuf` rows are read by a background thread while
+        the current one is being processed.  This is only done when the
+        HDF5 library was built thread-safe, which is not the default:
+        otherwise each buffer is read when it is needed, as if *prefetch*
+        was 0.
+
         Examples
         --------
 
@@ -279,6 +288,9 @@ class Array(hdf5extension.Array, Leaf):
            array is iterated from *start* to the last line.
            In PyTables < 3.0 only one element was returned.
 
+        .. versionchanged:: 3.1.2
+           Added the *prefetch* argument.
+
         """
 
         try:
@@ -288,6 +300,8 @@ class Array(hdf5extension.Array, Leaf):
             # If problems with indexes, silently return the null tuple
             return ()
         self._init_loop()
+        if prefetch > 0 and self.shape and self._start < self._stop:
+            self._start_readahead(prefetch)
         return self
 
     def __iter__(self):
@@ -321,6 +335,7 @@ class Array(hdf5extension.Array, Leaf):
     def _init_loop(self):
         """Initialization for the __iter__ iterator."""
 
+        self._close_readahead()
         self._nrowsread = self._start
         self._startb = self._start
         self._row = -1   # Sentinel
@@ -329,6 +344,26 @@ class Array(hdf5extension.Array, Leaf):
 
     _initLoop = previous_api(_init_loop)
 
+    def _start_readahead(self, nbuffers):
+        """Start reading the buffers of the current iteration in advance."""
+
+        (start, stop, step) = (self._start, self._stop, self._step)
+        bufsize = step * self.nrowsinbuf
+
+        def read(startb):
+            return self._read(startb, min(startb + bufsize, stop), step)
+
+        self._readahead = ReadAhead(read, xrange(start, stop, bufsize),
+                                    nbuffers)
+        self._v_readaheads[self._readahead] = None
+
+    def _close_readahead(self):
+        """Stop the background reader of the current iteration, if any."""
+
+        if self._readahead is not None:
+            self._readahead.close()
+            self._readahead = None
+
     def next(self):
         """Get the next element of the array during an iteration.
 
@@ -341,6 +376,7 @@ class Array(hdf5extension.Array, Leaf):
         if self._nrowsread >= self._stop:
             self._init = False
             self.listarr = None        # fixes issue #308
+            self._close_readahead()
             raise StopIteration        # end of iteration
         else:
             # Read a chunk of rows
@@ -349,7 +385,12 @@ class Array(hdf5extension.Array, Leaf):
                 # Protection for reading more elements than needed
                 if self._stopb > self._stop:
                     self._stopb = self._stop
-                listarr = self._read(self._startb, self._stopb, self._step)
+                if self._readahead is not None:
+                    (startb, listarr) = self._readahead.get()
+                    assert startb == self._startb
+                else:
+                    listarr = self._read(self._startb, self._stopb,
+                                         self._step)
                 # Swap the axes to easy the return of elements
                 if self.extdim > 0:
                     listarr = listarr.swapaxes(self.extdim, 0)
@@ -45,6 +45,9 @@ Otherwise, the kind maps directly to the atom class.
 deftype_from_kind = {}  # filled as atom classes are created
 """Maps atom kinds to their default atom type (if any)."""
 
+object_codecs = {}  # filled as codecs are registered
+"""Maps codec names to the codecs used by `ObjectAtom` instances."""
+
 
 # Public functions
 # ================
@@ -1048,6 +1051,17 @@ class PseudoAtom(object):
 
         raise NotImplementedError
 
+    def fromflat(self, values, offsets):
+        """Convert flat `values` and `offsets` into a list of objects.
+
+        Row ``i`` is made of ``values[offsets[i]:offsets[i+1]]``, as
+        returned by ``VLArray.read(as_flat=True)``.
+
+        """
+
+        return [self.fromarray(values[start:stop])
+                for start, stop in zip(offsets[:-1], offsets[1:])]
+
 
 class _BufferedAtom(PseudoAtom):
     """Pseudo-atom which stores data as a buffer (flat array of uints)."""
@@ -1154,6 +1168,124 @@ class VLUnicodeAtom(_BufferedAtom):
         return array.view('U%d' % length).item()
 
 
+class ObjectCodec(object):
+    """Serializer of the objects stored in `ObjectAtom` rows.
+
+    Subclasses must set a unique `name` (which is saved along with the
+    data so that it can be decoded later) and implement the
+    :meth:`dumps` and :meth:`loads` methods.  The batch methods may be
+    overridden to encode or decode many objects at once.  Codecs are
+    made available to `ObjectAtom` with :func:`register_object_codec`.
+
+    .. versionadded:: 3.1.2
+
+    """
+
+    name = None
+    """The name under which the codec is registered."""
+
+    def dumps(self, object_):
+        """Encode an `object_` into a byte string."""
+
+        raise NotImplementedError
+
+    def loads(self, data):
+        """Decode an object from the byte string `data`."""
+
+        raise NotImplementedError
+
+    def dumps_batch(self, objects):
+        """Encode a sequence of `objects` into flat values and offsets.
+
+        A ``(values, offsets)`` tuple is returned, where `values` is a
+        ``uint8`` array and `offsets` an ``int64`` array so that object
+        ``i`` is encoded in ``values[offsets[i]:offsets[i+1]]``.
+
+        """
+
+        buffers = [self.dumps(object_) for object_ in objects]
+        offsets = numpy.zeros(len(buffers) + 1, dtype=numpy.int64)
+        numpy.cumsum([len(buffer_) for buffer_ in buffers], out=offsets[1:])
+        values = numpy.frombuffer(b''.join(buffers), dtype=numpy.uint8)
+        return values, offsets
+
+    def loads_batch(self, values, offsets):
+        """Decode a list of objects from flat `values` and `offsets`.
+
+        Empty objects are decoded as ``None``.
+
+        """
+
+        data = numpy.asarray(values, dtype=numpy.uint8).tostring()
+        offsets = numpy.asarray(offsets).tolist()
+        return [self.loads(data[start:stop]) if stop > start else None
+                for start, stop in zip(offsets[:-1], offsets[1:])]
+
+
+class PickleCodec(ObjectCodec):
+    """Codec which serializes objects with pickle (the default one)."""
+
+    name = 'pickle'
+
+    def dumps(self, object_):
+        return cPickle.dumps(object_, cPickle.HIGHEST_PROTOCOL)
+
+    def loads(self, data):
+        return cPickle.loads(data)
+
+
+class CompactCodec(ObjectCodec):
+    """Codec with a compact binary encoding of common objects.
+
+    ``None``, booleans, numbers, byte and unicode strings, lists, tuples,
+    dictionaries and NumPy arrays and scalars of simple types are
+    encoded natively, which is faster and smaller than pickling them.
+    Other objects are embedded as pickles.
+
+    """
+
+    name = 'compact'
+
+    def dumps(self, object_):
+        from tables.utilsextension import compact_dumps
+        return compact_dumps(object_)
+
+    def loads(self, data):
+        from tables.utilsextension import compact_loads
+        return compact_loads(data)
+
+    def dumps_batch(self, objects):
+        from tables.utilsextension import compact_dumps_batch
+        return compact_dumps_batch(objects)
+
+    def loads_batch(self, values, offsets):
+        from tables.utilsextension import compact_loads_batch
+        return compact_loads_batch(values, offsets)
+
+
+def register_object_codec(codec):
+    """Register the `codec` to be used by `ObjectAtom` instances.
+
+    The `codec` must be an instance of an `ObjectCodec` subclass.  It
+    replaces any codec previously registered with the same name.  Codecs
+    must be registered before reading data which was saved with them.
+
+    .. versionadded:: 3.1.2
+
+    """
+
+    if not isinstance(codec, ObjectCodec):
+        raise TypeError("codec must be an instance of ``ObjectCodec``: %r"
+                        % (codec,))
+    if not codec.name:
+        raise ValueError("codec has no name: %r" % (codec,))
+    object_codecs[codec.name] = codec
+
+
+register_object_codec(PickleCodec())
+register_object_codec(CompactCodec())
+
+
 class ObjectAtom(_BufferedAtom):
     """Defines an atom of type object.
 
@@ -1164,9 +1296,22 @@ class ObjectAtom(_BufferedAtom):
     fit *one object per row*. However, you can still group several objects in a
     single tuple or list and pass it to the :meth:`VLArray.append` method.
 
-    Object atoms do not accept parameters and they cause the reads of rows to
-    always return Python objects. You can regard object atoms as an easy way to
-    save an arbitrary number of generic Python objects in a VLArray dataset.
+    Object atoms cause the reads of rows to always return Python objects.
+    You can regard object atoms as an easy way to save an arbitrary number
+    of generic Python objects in a VLArray dataset.
+
+    Parameters
+    ----------
+    codec : str
+        The name of the codec used to serialize the objects.  It defaults
+        to ``'pickle'``.  The ``'compact'`` codec encodes nested lists,
+        dictionaries, strings and NumPy arrays natively and is much faster
+        for them.  Other codecs can be added with
+        :func:`register_object_codec`.  The codec name is saved in the
+        node, so that data is always decoded with the same codec.
+
+    .. versionchanged:: 3.1.2
+       Added the `codec` parameter.
 
     """
 
@@ -1174,8 +1319,39 @@ class ObjectAtom(_BufferedAtom):
     type = 'object'
     base = UInt8Atom()
 
+    def __init__(self, codec='pickle'):
+        self.codec = codec
+        self._get_codec()
+
+    @classmethod
+    def _from_saved_codec(cls, codec):
+        """Get an atom for the `codec` saved in a node.
+
+        The codec may not be registered (yet), since it is only looked up
+        when objects are read or written, so that the node can be loaded
+        anyway.
+
+        """
+
+        atom = cls.__new__(cls)
+        atom.codec = codec
+        return atom
+
+    def __repr__(self):
+        if self.codec == 'pickle':
+            return 'ObjectAtom()'
+        return 'ObjectAtom(codec=%r)' % (self.codec,)
+
+    def _get_codec(self):
+        try:
+            return object_codecs[self.codec]
+        except KeyError:
+            raise ValueError("unknown object codec ``%s``; it must be "
+                             "registered with ``register_object_codec()``"
+                             % (self.codec,))
+
     def _tobuffer(self, object_):
-        return cPickle.dumps(object_, cPickle.HIGHEST_PROTOCOL)
+        return self._get_codec().dumps(object_)
 
     def fromarray(self, array):
         # We have to check for an empty array because of a possible
@@ -1183,4 +1359,16 @@ class ObjectAtom(_BufferedAtom):
         # record when in fact it is empty.
         if array.size == 0:
             return None
-        return cPickle.loads(array.tostring())
+        return self._get_codec().loads(array.tostring())
+
+    def toflat(self, objects):
+        """Convert a sequence of `objects` into flat values and offsets.
+
+        The result can be saved with ``VLArray.append_flat()``.
+
+        """
+
+        return self._get_codec().dumps_batch(objects)
+
+    def fromflat(self, values, offsets):
+        return self._get_codec().loads_batch(values, offsets)
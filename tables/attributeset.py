@@ -169,6 +169,13 @@ class AttributeSet(hdf5extension.AttributeSet, object):
     If an attribute is set on a target node that already has a large
     number of attributes, a PerformanceWarning will be issued.
 
+    Attributes are read from disk by name when they are first accessed,
+    and their values are kept in the instance afterwards.  The list of
+    attribute names is only read when one of the ``_v_attrnames*`` lists
+    is needed, so accessing a few attributes of a node with many of them
+    is cheap.  Use :meth:`AttributeSet._f_get_many` for getting several
+    attributes at once.
+
 
     .. rubric:: AttributeSet attributes
 
@@ -200,7 +207,7 @@ class AttributeSet(hdf5extension.AttributeSet, object):
     def __init__(self, node):
         """Create the basic structures to keep the attribute information.
 
-        Reads all the HDF5 attributes (if any) on disk for the node "node".
+        Attribute names and values are read from disk lazily, as needed.
 
         Parameters
         ----------
@@ -218,7 +225,6 @@ class AttributeSet(hdf5extension.AttributeSet, object):
         self._g_new(node)
         dict_["_v__nodefile"] = node._v_file
         dict_["_v__nodepath"] = node._v_pathname
-        dict_["_v_attrnames"] = self._g_list_attr(node)
         # The list of unimplemented attribute names
         dict_["_v_unimplemented"] = []
 
@@ -234,22 +240,49 @@ class AttributeSet(hdf5extension.AttributeSet, object):
             else:
                 parsed_version = tuple(map(int, format_version.split('.')))
         dict_["_v__format_version"] = parsed_version
+
+    def _g_list_attrnames(self):
+        """Read the attribute names of the node and classify them."""
+
+        dict_ = self.__dict__
+        attrnames = self._g_list_attr(self._v_node)
         # Split the attribute list in system and user lists
-        dict_["_v_attrnamessys"] = []
-        dict_["_v_attrnamesuser"] = []
-        for attr in self._v_attrnames:
-            # put the attributes on the local dictionary to allow
-            # tab-completion
-            self.__getattr__(attr)
+        attrnamessys = []
+        attrnamesuser = []
+        for attr in attrnames:
             if issysattrname(attr):
-                self._v_attrnamessys.append(attr)
+                attrnamessys.append(attr)
             else:
-                self._v_attrnamesuser.append(attr)
+                attrnamesuser.append(attr)
 
         # Sort the attributes
-        self._v_attrnames.sort()
-        self._v_attrnamessys.sort()
-        self._v_attrnamesuser.sort()
+        attrnames.sort()
+        attrnamessys.sort()
+        attrnamesuser.sort()
+        dict_["_v_attrnames"] = attrnames
+        dict_["_v_attrnamessys"] = attrnamessys
+        dict_["_v_attrnamesuser"] = attrnamesuser
+
+    def _g_exists(self, name, node=None):
+        """Is there an attribute with that name?
+
+        The name is looked up on disk if attribute names have not been
+        read yet.  The `node` can be given to avoid looking it up.
+
+        """
+
+        if '_v_attrnames' in self.__dict__:
+            return name in self._v_attrnames
+        if node is None:
+            node = self._v_node
+        return self._g_has_attr(node, name)
+
+    def _g_nattrs(self):
+        """Get the number of attributes of the node."""
+
+        if '_v_attrnames' in self.__dict__:
+            return len(self._v_attrnames)
+        return self._g_num_attrs(self._v_node)
 
     def _g_update_node_location(self, node):
         """Updates the location information about the associated `node`."""
@@ -279,20 +312,43 @@ class AttributeSet(hdf5extension.AttributeSet, object):
         elif attrset == "all":
             return self._v_attrnames[:]
 
+    def __dir__(self):
+        """Return the names of the members and attributes of the set.
+
+        This allows tab-completion of attribute names.
+
+        """
+
+        names = set(dir(self.__class__))
+        names.update(self.__dict__)
+        names.update(self._v_attrnames)
+        return sorted(names)
+
     def __getattr__(self, name):
         """Get the attribute named "name"."""
 
+        # Attribute names are listed on demand
+        if name in ('_v_attrnames', '_v_attrnamessys', '_v_attrnamesuser'):
+            self._g_list_attrnames()
+            return self.__dict__[name]
+
         # If attribute does not exist, raise AttributeError
-        if not name in self._v_attrnames:
+        node = self._v_node
+        if not self._g_exists(name, node):
             raise AttributeError("Attribute '%s' does not exist in node: "
                                  "'%s'" % (name, self._v__nodepath))
 
+        return self._g_read(name, node)
+
+    def _g_read(self, name, node):
+        """Read the attribute `name` from disk and cache its value."""
+
         # Read the attribute from disk. This is an optimization to read
         # quickly system attributes that are _string_ values, but it
         # takes care of other types as well as for example NROWS for
         # Tables and EXTDIM for EArrays
         format_version = self._v__format_version
-        value = self._g_getattr(self._v_node, name)
+        value = self._g_getattr(node, name)
 
         # Check whether the value is pickled
         # Pickled values always seems to end with a "."
@@ -363,6 +419,32 @@ class AttributeSet(hdf5extension.AttributeSet, object):
         self.__dict__[name] = retval
         return retval
 
+    def _f_get_many(self, names):
+        """Get the values of several attributes at once.
+
+        Returns a dictionary mapping each attribute in the `names`
+        sequence to its value.  Names of attributes which do not exist
+        are left out of the result.  Values which have already been read
+        are not read again, and the rest are read from disk looking up
+        the node only once.
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        dict_ = self.__dict__
+        node = None
+        values = {}
+        for name in names:
+            if name in dict_:
+                values[name] = dict_[name]
+                continue
+            if node is None:
+                node = self._v_node
+            if self._g_exists(name, node):
+                values[name] = self._g_read(name, node)
+        return values
+
     def _g__setattr(self, name, value):
         """Set a PyTables attribute.
 
@@ -407,7 +489,8 @@ class AttributeSet(hdf5extension.AttributeSet, object):
         self.__dict__[name] = value
 
         # Finally, add this attribute to the list if not present
-        attrnames = self._v_attrnames
+        # (unless names have not been listed yet)
+        attrnames = self.__dict__.get('_v_attrnames', [name])
         if not name in attrnames:
             attrnames.append(name)
             attrnames.sort()
@@ -436,7 +519,6 @@ class AttributeSet(hdf5extension.AttributeSet, object):
         """
 
         nodefile = self._v__nodefile
-        attrnames = self._v_attrnames
 
         # Check for name validity
         check_name_validity(name)
@@ -445,7 +527,7 @@ class AttributeSet(hdf5extension.AttributeSet, object):
 
         # Check if there are too many attributes.
         max_node_attrs = nodefile.params['MAX_NODE_ATTRS']
-        if len(attrnames) >= max_node_attrs:
+        if self._g_nattrs() >= max_node_attrs:
             warnings.warn("""\
 node ``%s`` is exceeding the recommended maximum number of attributes (%d);\
 be ready to see PyTables asking for *lots* of memory and possibly slow I/O"""
@@ -454,7 +536,7 @@ be ready to see PyTables asking for *lots* of memory and possibly slow I/O"""
 
         undo_enabled = nodefile.is_undo_enabled()
         # Log old attribute removal (if any).
-        if undo_enabled and (name in attrnames):
+        if undo_enabled and self._g_exists(name):
             self._g_del_and_log(name)
 
         # Set the attribute.
@@ -490,16 +572,17 @@ be ready to see PyTables asking for *lots* of memory and possibly slow I/O"""
         # Delete the attribute from disk
         self._g_remove(self._v_node, name)
 
-        # Delete the attribute from local lists
-        self._v_attrnames.remove(name)
-        if name in self._v_attrnamessys:
-            self._v_attrnamessys.remove(name)
-        else:
-            self._v_attrnamesuser.remove(name)
+        # Delete the attribute from local lists (if already listed)
+        if '_v_attrnames' in self.__dict__:
+            self._v_attrnames.remove(name)
+            if name in self._v_attrnamessys:
+                self._v_attrnamessys.remove(name)
+            else:
+                self._v_attrnamesuser.remove(name)
 
         # Delete the attribute from the local directory
         # closes (#1049285)
-        del self.__dict__[name]
+        self.__dict__.pop(name, None)
 
     def __delattr__(self, name):
         """Delete a PyTables attribute.
@@ -513,7 +596,7 @@ be ready to see PyTables asking for *lots* of memory and possibly slow I/O"""
         nodefile = self._v__nodefile
 
         # Check if attribute exists
-        if name not in self._v_attrnames:
+        if not self._g_exists(name):
             raise AttributeError(
                 "Attribute ('%s') does not exist in node '%s'"
                 % (name, self._v__nodepath))
@@ -561,7 +644,7 @@ be ready to see PyTables asking for *lots* of memory and possibly slow I/O"""
 
         """
 
-        return name in self._v_attrnames
+        return self._g_exists(name)
 
     def _f_rename(self, oldattrname, newattrname):
         """Rename an attribute from oldattrname to newattrname."""
@@ -605,9 +688,11 @@ be ready to see PyTables asking for *lots* of memory and possibly slow I/O"""
             set_attr = newset._g__setattr
 
         for attrname in self._v_attrnamesuser:
-            # Do not copy the unimplemented attributes.
+            # Do not copy the unimplemented attributes
+            # (which are known once they have been read).
+            value = getattr(self, attrname)
             if attrname not in self._v_unimplemented:
-                set_attr(attrname, getattr(self, attrname))
+                set_attr(attrname, value)
         # Copy the system attributes that we are allowed to.
         if copysysattrs:
             for attrname in self._v_attrnamessys:
@@ -176,6 +176,8 @@ class CArray(Array):
         """Whether we are in the middle of an iteration or not (sentinel)."""
         self.listarr = None
         """Current buffer in iterators."""
+        self._readahead = None
+        """Background reader of buffers in prefetching iterators."""
 
         if new:
             if not isinstance(atom, Atom):
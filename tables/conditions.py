@@ -20,23 +20,76 @@ Classes:
 
 `CompileCondition`
     Container for a compiled condition.
+`CompiledConditionCache`
+    Size-bounded cache of compiled conditions shared by all tables.
 
 Functions:
 
 `compile_condition`
     Compile a condition and extract usable index conditions.
+`copy_function`
+    Copy a compiled condition function for use in another thread.
 `call_on_recarr`
     Evaluate a function over a structured array.
 
 """
 
 import re
+import sys
+import threading
+
+import numpy
 from numexpr.necompiler import typecode_to_kind
 from numexpr.necompiler import expressionToAST, typeCompileAst
-from numexpr.necompiler import stringToExpression, NumExpr
+from numexpr.necompiler import stringToExpression, NumExpr, double
 from numexpr.expressions import ExpressionNode
+from numexpr import interpreter
 from tables.utilsextension import get_nested_field
-from tables.utils import lazyattr
+from tables.utils import lazyattr, load_numexpr
+from tables import parameters
+
+# Numexpr is only loaded when needed, apply the settings of open files.
+load_numexpr()
+
+try:
+    # int_, long_ are only available in numexpr >= 2.1
+    from numexpr.necompiler import int_, long_
+except ImportError:
+    int_ = int
+    long_ = long
+
+# Maps NumPy types to the types used by Numexpr.
+_nxtype_from_nptype = {
+    numpy.bool_: bool,
+    numpy.int8: int_,
+    numpy.int16: int_,
+    numpy.int32: int_,
+    numpy.int64: long_,
+    numpy.uint8: int_,
+    numpy.uint16: int_,
+    numpy.uint32: long_,
+    numpy.uint64: long_,
+    numpy.float32: float,
+    numpy.float64: double,
+    numpy.complex64: complex,
+    numpy.complex128: complex,
+    numpy.bytes_: bytes,
+}
+
+if sys.version_info[0] > 2:
+    _nxtype_from_nptype[numpy.str_] = str
+
+if hasattr(numpy, 'float16'):
+    _nxtype_from_nptype[numpy.float16] = float    # XXX: check
+if hasattr(numpy, 'float96'):
+    _nxtype_from_nptype[numpy.float96] = double   # XXX: check
+if hasattr(numpy, 'float128'):
+    _nxtype_from_nptype[numpy.float128] = double  # XXX: check
+if hasattr(numpy, 'complec192'):
+    _nxtype_from_nptype[numpy.complex192] = complex  # XXX: check
+if hasattr(numpy, 'complex256'):
+    _nxtype_from_nptype[numpy.complex256] = complex  # XXX: check
+
 
 _no_matching_opcode = re.compile(r"[^a-z]([a-z]+)_([a-z]+)[^a-z]")
 # E.g. "gt" and "bfc" from "couldn't find matching opcode for 'gt_bfc'".
@@ -206,7 +259,10 @@ def _get_idx_expr_recurse(exprnode, indexedcols, idxexprs, strexpr):
     if idxcmp[0]:
         if invert:
             var, op, value = idxcmp
-            if op == 'eq' and value in [True, False]:
+            if op == 'eq':
+                if not isinstance(value, (bool, numpy.bool_)):
+                    # ``~(var == value)`` is not a range of ``var``.
+                    return not_indexable
                 # ``var`` must be a boolean index.  Flip its value.
                 value ^= True
             else:
@@ -370,6 +426,91 @@ class CompiledCondition(object):
         return newcc
 
 
+class CompiledConditionCache(object):
+    """Size-bounded cache of compiled conditions shared by all tables.
+
+    Entries are keyed by the condition string, the Numexpr types of its
+    variables and the set of indexed columns, so that tables with
+    identical descriptions share them, and they survive the tables
+    being closed or reopened.  When more than `maxentries` conditions
+    are stored, the least recently used 10% of them are evicted.  If
+    `maxentries` is `None`, the ``COND_SHARED_CACHE_SLOTS`` parameter
+    is used.
+
+    The number of lookups finding (or not) a condition in the cache is
+    kept in the ``hits`` (and ``misses``) attribute.
+
+    Since a Numexpr function can not be run by several threads at a
+    time, `get()` returns a condition with its own copy of the cached
+    function (see `copy_function()`).
+
+    """
+
+    def __init__(self, maxentries=None):
+        self.maxentries = maxentries
+        self.hits = 0
+        """The number of lookups which found a condition in the cache."""
+        self.misses = 0
+        """The number of lookups which did not find a condition."""
+        self._cache = {}
+        self._tick = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._cache)
+
+    def __repr__(self):
+        return ("%s(entries=%d, hits=%d, misses=%d)"
+                % (self.__class__.__name__, len(self._cache),
+                   self.hits, self.misses))
+
+    def get(self, key):
+        """Get a copy of the condition for `key`, or `None` if not cached."""
+
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._tick += 1
+            entry[0] = self._tick
+            compiled = entry[1]
+        return CompiledCondition(
+            copy_function(compiled.function), compiled.parameters,
+            compiled.index_expressions, compiled.string_expression)
+
+    def put(self, key, compiled):
+        """Store the `compiled` condition under `key`."""
+
+        maxentries = self.maxentries
+        if maxentries is None:
+            maxentries = parameters.COND_SHARED_CACHE_SLOTS
+        if maxentries <= 0:
+            return
+        with self._lock:
+            cache = self._cache
+            if key not in cache and len(cache) >= maxentries:
+                # Evict the least recently used entries in one go.
+                nentries = max(maxentries // 10, len(cache) - maxentries + 1)
+                lru = sorted(cache, key=lambda k: cache[k][0])
+                for k in lru[:nentries]:
+                    del cache[k]
+            self._tick += 1
+            cache[key] = [self._tick, compiled]
+
+    def clear(self):
+        """Remove all conditions and reset the statistics."""
+
+        with self._lock:
+            self._cache.clear()
+            self.hits = self.misses = 0
+
+
+condition_cache = CompiledConditionCache()
+"""The cache of compiled conditions used by `compile_condition()`."""
+
+
 def _get_variable_names(expression):
     """Return the list of variable names in the Numexpr `expression`."""
 
@@ -398,8 +539,17 @@ def compile_condition(condition, typemap, indexedcols):
     instance is a Numexpr function object, and the ``parameters`` list
     indicates the order of its parameters.
 
+    Compiled conditions are kept in the process-wide `condition_cache`
+    and reused on later calls with the same arguments.
+
     """
 
+    indexedcols = frozenset(indexedcols)
+    condkey = (condition, tuple(sorted(typemap.items())), indexedcols)
+    compiled = condition_cache.get(condkey)
+    if compiled is not None:
+        return compiled
+
     # Get the expression tree and extract index conditions.
     expr = stringToExpression(condition, typemap, {})
     if expr.astKind != 'bool':
@@ -431,7 +581,22 @@ def compile_condition(condition, typemap, indexedcols):
     params = varnames
 
     # This is more comfortable to handle about than a tuple.
-    return CompiledCondition(func, params, idxexprs, strexpr)
+    compiled = CompiledCondition(func, params, idxexprs, strexpr)
+    condition_cache.put(condkey, compiled)
+    return compiled
+
+
+def copy_function(func):
+    """Copy a compiled condition function for use in another thread.
+
+    Numexpr function objects keep their scratch memory in themselves,
+    so the same one must not be run by several threads at a time.  The
+    copy shares the (read-only) program of `func`.
+
+    """
+
+    return interpreter.NumExpr(func.signature, func.tempsig, func.program,
+                               func.constants, func.input_names)
 
 
 def call_on_recarr(func, params, recarr, param2arg=None):
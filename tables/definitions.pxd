@@ -259,6 +259,12 @@ cdef extern from "hdf5.h" nogil:
   ctypedef herr_t (*H5E_walk_t)(unsigned n, H5E_error_t *err, void *data)
   ctypedef herr_t (*H5E_auto_t)(hid_t estack, void *data)
 
+  # group info
+  ctypedef struct H5G_info_t:
+    hsize_t     nlinks          # Number of links in group
+    int64_t     max_corder      # Current max. creation order value for group
+    hbool_t     mounted         # Whether group has a file mounted on it
+
   # object info
   ctypedef struct H5O_info_t:
     unsigned long       fileno      # Number of file where object is located
@@ -307,6 +313,7 @@ cdef extern from "hdf5.h" nogil:
                    hid_t gapl_id)
   hid_t  H5Gopen(hid_t loc_id, char *name, hid_t gapl_id)
   herr_t H5Gclose(hid_t group_id)
+  herr_t H5Gget_info(hid_t loc_id, H5G_info_t *ginfo)
 
   # Operations with links
   herr_t H5Ldelete(hid_t file_id, char *name, hid_t lapl_id)
@@ -364,6 +371,7 @@ cdef extern from "hdf5.h" nogil:
   int    H5Tget_nmembers(hid_t type_id)
   char  *H5Tget_member_name(hid_t type_id, unsigned membno)
   hid_t  H5Tget_member_type(hid_t type_id, unsigned membno)
+  int    H5Tget_member_index(hid_t type_id, char *name)
   hid_t  H5Tget_native_type(hid_t type_id, H5T_direction_t direction)
   herr_t H5Tget_member_value(hid_t type_id, int membno, void *value)
   int    H5Tget_offset(hid_t type_id)
@@ -382,6 +390,7 @@ cdef extern from "hdf5.h" nogil:
 
   # Operations with attributes
   herr_t H5Adelete(hid_t loc_id, char *name)
+  htri_t H5Aexists(hid_t obj_id, char *attr_name)
   int    H5Aget_num_attrs(hid_t loc_id)
   size_t H5Aget_name(hid_t attr_id, size_t buf_size, char *buf)
   hid_t  H5Aopen_idx(hid_t loc_id, unsigned int idx)
@@ -451,6 +460,8 @@ cdef extern from "hdf5.h" nogil:
 
   # Onject interface
   herr_t H5Oget_info(hid_t object_id, H5O_info_t *object_info)
+  hid_t H5Oopen(hid_t loc_id, char *name, hid_t lapl_id)
+  herr_t H5Oclose(hid_t object_id)
 
   # Operations with filters and compression interface
   ctypedef int H5Z_filter_t
@@ -513,12 +524,15 @@ cdef extern from "utils.h" nogil:
   herr_t pt_H5Pset_file_image(hid_t fapl_id, void *buf_ptr, size_t buf_len)
   ssize_t pt_H5Fget_file_image(hid_t file_id, void *buf_ptr, size_t buf_len)
   herr_t pt_H5free_memory(void *buf)
+  herr_t pt_H5is_library_threadsafe(hbool_t *is_ts)
 
   int H5_HAVE_DIRECT_DRIVER, H5_HAVE_WINDOWS_DRIVER, H5_HAVE_IMAGE_FILE
 
 
 cdef extern from "utils.h":
   object Giterate(hid_t parent_id, hid_t loc_id, char *name)
+  object Giterate_page(hid_t loc_id, hsize_t start, hsize_t count)
+  object Gvisit(hid_t loc_id)
   object Aiterate(hid_t loc_id)
   object H5UIget_info(hid_t loc_id, char *name, char *byteorder)
 
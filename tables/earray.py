@@ -16,6 +16,7 @@ import numpy
 
 from tables.utils import convert_to_np_atom2, SizeType
 from tables.carray import CArray
+from tables.leaf import Leaf
 
 from tables._past import previous_api, previous_api_property
 
@@ -132,6 +133,29 @@ class EArray(CArray):
 
     _c_classId = previous_api_property('_c_classid')
 
+    # Properties
+    # ~~~~~~~~~~
+    write_behind = property(
+        Leaf._g_get_write_behind, Leaf._g_set_write_behind, None,
+        """The maximum number of appended batches waiting to be written.
+
+        When this is greater than 0, the data passed to
+        :meth:`EArray.append` is queued (up to this number of batches) and
+        a background thread compresses and writes it, so that the caller
+        does not wait for the filters.  :meth:`EArray.flush` waits for the
+        queue to be drained and raises any error found while writing;
+        queued data is not visible (e.g. in :attr:`EArray.nrows`) until
+        then.  Set it to 0 (the default) to write synchronously again.
+
+        Background writes are only done when the HDF5 library was built
+        thread-safe, which is not the default.  Otherwise no background
+        thread is used and the data are written at once, so the caller
+        still waits for them.
+
+        .. versionadded:: 3.1.2
+
+        """)
+
     # Special methods
     # ~~~~~~~~~~~~~~~
     def __init__(self, parentnode, name,
@@ -211,7 +235,11 @@ class EArray(CArray):
         self._check_shape_append(nparr)
         # If the size of the nparr is zero, don't do anything else
         if nparr.size > 0:
-            self._append(nparr)
+            if self._v_writebehind is not None:
+                # The caller may reuse `sequence` while the data is queued
+                self._v_writebehind.put(self._append, (nparr.copy(),))
+            else:
+                self._append(nparr)
 
     def _g_copy_with_stats(self, group, name, start, stop, step,
                            title, filters, chunkshape, _log, **kwargs):
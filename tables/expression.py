@@ -13,19 +13,84 @@
 """Here is defined the Expr class."""
 
 from __future__ import print_function
+import re
 import sys
 import warnings
 
 import numpy as np
 import tables as tb
-from numexpr.necompiler import getContext, getExprNames, getType, NumExpr
-from numexpr.expressions import functions as numexpr_functions
 from tables.exceptions import PerformanceWarning
 from tables.parameters import IO_BUFFER_SIZE, BUFFER_TIMES
+from tables.utils import load_numexpr, ReadAhead, WriteBehind
 
 from tables._past import previous_api
 
 
+def _sum_float(array, axis=None):
+    """Sum the elements of `array` in (at least) double precision."""
+
+    dtype = np.result_type(array.dtype, np.float64)
+    return np.sum(array, axis=axis, dtype=dtype)
+
+
+def _count(array, axis=None):
+    """Count the elements of `array` which are true (non-zero)."""
+
+    return np.sum(np.asarray(array) != 0, axis=axis)
+
+
+_reductions = {
+    # name: (function reducing a block, function combining partial results)
+    'sum': (np.sum, np.add),
+    'prod': (np.prod, np.multiply),
+    'min': (np.min, np.minimum),
+    'max': (np.max, np.maximum),
+    'mean': (_sum_float, np.add),  # divided by the number of elements later
+    'count': (_count, np.add),
+}
+"""The reductions supported in the outermost call of expressions."""
+
+_reduction_re = re.compile(
+    r'^\s*(%s)\s*\((.*)\)\s*$' % '|'.join(_reductions), re.DOTALL)
+_axis_re = re.compile(r'^\s*(?:axis\s*=\s*)?(-?\d+)\s*$')
+
+
+def _split_reduction(expr):
+    """Split a reduction in the outermost call of the `expr` string.
+
+    A ``(reduction, axis, expr)`` tuple is returned, with the name and
+    axis of the reduction (``None`` when missing) and the expression to
+    be reduced.
+
+    """
+
+    match = _reduction_re.match(expr)
+    if not match:
+        return (None, None, expr)
+    (reduction, args) = match.groups()
+
+    # Look for the arguments of the call, checking that the last
+    # parenthesis closes it (not like in "sum(a) + sum(b)")
+    depth = 0
+    commas = []
+    for i, char in enumerate(args):
+        if char in '([{':
+            depth += 1
+        elif char in ')]}':
+            depth -= 1
+            if depth < 0:
+                return (None, None, expr)
+        elif char == ',' and depth == 0:
+            commas.append(i)
+    if not commas:
+        return (reduction, None, args.strip())
+    match = _axis_re.match(args[commas[0] + 1:])
+    if len(commas) > 1 or not match:
+        raise ValueError("the axis of ``%s()`` must be an integer: %r"
+                         % (reduction, expr))
+    return (reduction, int(match.group(1)), args[:commas[0]].strip())
+
+
 class Expr(object):
     """A class for evaluating expressions with arbitrary array-like objects.
 
@@ -122,6 +187,30 @@ class Expr(object):
 
         The step range selection for the user-provided output.
 
+    .. attribute:: axis
+
+        The axis of the reduction (if any) of the outcome.  None means
+        all the axes.
+
+    .. attribute:: pipeline
+
+        The number of blocks read and written in background threads
+        while others are computed (0 means no pipelining).  It has no
+        effect unless HDF5 is thread-safe.  See :meth:`Expr.set_pipeline`.
+
+    .. attribute:: reduction
+
+        The name of the reduction (if any) applied to the outcome of the
+        expression.  An expression whose outermost call is one of
+        ``sum``, ``prod``, ``min``, ``max``, ``mean`` or ``count``
+        (the number of true, i.e. non-zero, elements), like
+        "sum(a * b)" or "max(sqrt(x**2 + y**2), axis=1)", reduces the
+        outcome along its axis (or along all of them when it is not
+        given).  Reductions along the main dimension are accumulated
+        block by block, so the full outcome is never kept in memory.
+
+        .. versionadded:: 3.1.2
+
     .. attribute:: shape
 
         Common shape for the arrays in expression.
@@ -143,6 +232,8 @@ class Expr(object):
 
         self.append_mode = False
         """The append mode for user-provided output containers."""
+        self.axis = None
+        """The axis of the reduction (if any) of the outcome."""
         self.maindim = 0
         """Common main dimension for inputs in expression."""
         self.names = []
@@ -155,6 +246,10 @@ class Expr(object):
         """The stop range selection for the user-provided output."""
         self.o_step = None
         """The step range selection for the user-provided output."""
+        self.pipeline = 0
+        """The number of blocks read and written in background threads."""
+        self.reduction = None
+        """The name of the reduction (if any) applied to the outcome."""
         self.shape = None
         """Common shape for the arrays in expression."""
         self.start, self.stop, self.step = (None,) * 3
@@ -172,6 +267,15 @@ class Expr(object):
         self._single_row_out = None
         """A sample of the output with just a single row."""
 
+        # Numexpr is only loaded (with pending settings applied) when the
+        # first expression is built, to keep ``import tables`` fast.
+        load_numexpr()
+        from numexpr.necompiler import getContext, getExprNames
+        from numexpr.necompiler import getType, NumExpr
+
+        # Reductions are done by PyTables, not by Numexpr
+        self.reduction, self.axis, expr = _split_reduction(expr)
+
         # First, get the signature for the arrays in expression
         vars_ = self._required_expr_vars(expr, uservars)
         context = getContext(kwargs)
@@ -229,6 +333,13 @@ class Expr(object):
         # Guess the shape for the outcome and the maindim of inputs
         self.shape, self.maindim = self._guess_shape()
 
+        if self.axis is not None:
+            ndim = len(self.shape)
+            if not -ndim <= self.axis < ndim:
+                raise ValueError("axis %d is out of bounds for the outcome "
+                                 "of the expression" % self.axis)
+            self.axis %= ndim
+
     # The next method is similar to their counterpart in `Table`, but
     # adapted to the `Expr` own requirements.
     def _required_expr_vars(self, expression, uservars, depth=2):
@@ -261,6 +372,7 @@ class Expr(object):
                 # Remove 10 (arbitrary) elements from the cache
                 for k in exprvars_cache.keys()[:10]:
                     del exprvars_cache[k]
+            from numexpr.expressions import functions as numexpr_functions
             cexpr = compile(expression, '<string>', 'eval')
             exprvars = [var for var in cexpr.co_names
                         if var not in ['None', 'False', 'True']
@@ -381,6 +493,33 @@ class Expr(object):
 
     setOutputRange = previous_api(set_output_range)
 
+    def set_pipeline(self, depth):
+        """Overlap the I/O of blocks with their computation.
+
+        When depth is greater than 0, the blocks of on-disk inputs are read
+        in a background thread up to depth blocks ahead of the one being
+        computed, and the blocks of the outcome are written to an on-disk
+        output in another background thread, with up to depth blocks
+        waiting to be written.  This is useful for expressions on large
+        on-disk inputs whose evaluation is dominated by I/O, at the cost of
+        keeping up to 2 * depth more blocks in memory.  A depth of 0 (the
+        default) evaluates blocks one after the other.
+
+        The background threads are only used when the HDF5 library was
+        built thread-safe, which is not the default.  Otherwise the depth
+        is recorded but blocks are still read, computed and written one
+        after the other, so there is no overlap.  In any case, the inputs
+        and the output should not be accessed from other threads while
+        the expression is being evaluated.
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        if depth < 0:
+            raise ValueError("the pipeline depth can not be negative")
+        self.pipeline = depth
+
     # Although the next code is similar to the method in `Leaf`, it
     # allows the use of pure NumPy objects.
     def _calc_nrowsinbuf(self, object_):
@@ -481,12 +620,20 @@ value of dimensions that are orthogonal (and preferably close) to the
             i_nrows = 0
 
         if not itermode:
+            # The shape of the outcome (and of its main dimension), which
+            # lacks the reduced axis in reductions
+            rshape, rmaindim = list(shape), maindim
+            if self.reduction is not None:
+                del rshape[self.axis]
+                if self.axis < maindim:
+                    rmaindim -= 1
             # Create a container for output if not defined yet
             o_maindim = 0    # Default maindim
             if self.out is None:
-                out = np.empty(shape, dtype=self._single_row_out.dtype)
+                out = np.empty(rshape, dtype=self._outcome_dtype())
                 # Get the trivial values for start, stop and step
                 if maindim is not None:
+                    o_maindim = rmaindim
                     (o_start, o_stop, o_step) = (0, shape[maindim], 1)
                 else:
                     (o_start, o_stop, o_step) = (0, 0, 1)
@@ -508,7 +655,7 @@ value of dimensions that are orthogonal (and preferably close) to the
                 # Check that the shape of output is consistent with inputs
                 tr_oshape = list(o_shape)   # this implies a copy
                 olen_ = tr_oshape.pop(o_maindim)
-                tr_shape = list(shape)      # do a copy
+                tr_shape = list(rshape)     # do a copy
                 if maindim is not None:
                     len_ = tr_shape.pop(o_maindim)
                 else:
@@ -518,8 +665,8 @@ value of dimensions that are orthogonal (and preferably close) to the
                         "Shape for out container does not match expression")
                 # Force the input length to fit in `out`
                 if not self.append_mode and olen_ < len_:
-                    shape[o_maindim] = olen_
-                    stop = start + olen_
+                    shape[maindim] = i_nrows = olen_
+                    stop = start + olen_ * step
 
         # Get the positions of inputs that should be sliced (the others
         # will be broadcasted)
@@ -543,6 +690,85 @@ value of dimensions that are orthogonal (and preferably close) to the
             # For itermode, we don't need the out info
             return (i_nrows, slice_pos, start, stop, step, nrowsinbuf)
 
+    def _outcome_dtype(self):
+        """Get the type of the outcome of the expression."""
+
+        dtype = self._single_row_out.dtype
+        if self.reduction is not None:
+            sample = np.zeros((1,) * len(self.shape), dtype=dtype)
+            dtype = np.asarray(self._reduce(sample)).dtype
+        return dtype
+
+    def _reduce(self, array):
+        """Apply the reduction of the expression to an outcome `array`."""
+
+        reduce_ = _reductions[self.reduction][0]
+        result = reduce_(array, axis=self.axis)
+        if self.reduction == 'mean':
+            if self.axis is None:
+                result = result / array.size
+            else:
+                result = result / array.shape[self.axis]
+        return result
+
+    def _eval_plan(self):
+        """Get the plan for evaluating the expression in blocks.
+
+        A ``(i_nrows, slice_pos, start, stop, step, nrowsinbuf, out,
+        write)`` tuple is returned.  `write` is a function that puts the
+        outcome of a block, given as ``write(start2, rout)``, into `out`.
+        It is `None` for reductions along the main dimension (or all of
+        them), whose blocks are accumulated instead.
+
+        """
+
+        shape, maindim = list(self.shape), self.maindim
+
+        if self.reduction is not None and self.axis in (None, maindim):
+            if self.out is not None:
+                raise ValueError(
+                    "The outcome of a reduction along the main dimension "
+                    "can not be sent to an output container")
+            (i_nrows, slice_pos, start, stop, step, nrowsinbuf) = \
+                self._get_info(shape, maindim, itermode=True)
+            return (i_nrows, slice_pos, start, stop, step, nrowsinbuf,
+                    None, None)
+
+        (i_nrows, slice_pos, start, stop, step, nrowsinbuf,
+         out, o_maindim, o_start, o_stop, o_step) = \
+            self._get_info(shape, maindim)
+        append_mode = self.append_mode
+
+        def write(start2, rout):
+            # Set the values into the out buffer
+            if append_mode:
+                out.append(rout)
+            else:
+                # Compute the slice to be filled in output
+                start3 = o_start + (start2 - start) // step * o_step
+                stop3 = start3 + rout.shape[o_maindim] * o_step
+                if stop3 > o_stop:
+                    stop3 = o_stop
+                o_slices = ((slice(None),) * o_maindim +
+                            (slice(start3, stop3, o_step),))
+                # Set the slice
+                out[o_slices] = rout
+
+        return (i_nrows, slice_pos, start, stop, step, nrowsinbuf,
+                out, write)
+
+    def _empty_outcome(self):
+        """Get the outcome of the expression when no rows are computed."""
+
+        if self.reduction is None:
+            return self._single_row_out
+        if self.maindim is None:
+            # The expression only involves scalars
+            return self._reduce(np.asarray(self._single_row_out))
+        shape = list(self.shape)
+        shape[self.maindim] = 0
+        return self._reduce(np.empty(shape, dtype=self._single_row_out.dtype))
+
     def eval(self):
         """Evaluate the expression and return the outcome.
 
@@ -568,6 +794,10 @@ value of dimensions that are orthogonal (and preferably close) to the
         already been called, the output is sent to this user-provided
         container.  If not, a fresh NumPy container is returned instead.
 
+        The outcome of reductions along the main dimension (or along all
+        of them) is accumulated block by block, and it is always returned
+        as a NumPy object.  See :attr:`Expr.reduction`.
+
         .. warning::
 
             When dealing with large on-disk inputs, failing to specify an
@@ -575,21 +805,69 @@ value of dimensions that are orthogonal (and preferably close) to the
 
         """
 
-        values, shape, maindim = self.values, self.shape, self.maindim
+        return self._eval_exprs([self])[0]
 
-        # Get different info we need for the main computation loop
-        (i_nrows, slice_pos, start, stop, step, nrowsinbuf,
-         out, o_maindim, o_start, o_stop, o_step) = \
-            self._get_info(shape, maindim)
+    @staticmethod
+    def eval_many(exprs):
+        """Evaluate several expressions in a single pass over their inputs.
+
+        The exprs are `Expr` instances, set up as for :meth:`Expr.eval`,
+        which are evaluated together block by block, so that inputs used
+        by several of them are read just once.  Their inputs must have
+        the same main dimension and the same range must be selected in
+        it.  A list with the outcome of each expression is returned.
+
+        For example, the next computes a sum and a maximum, and writes an
+        on-disk output, while reading a and b once::
+
+            >>> exprs = [tb.Expr("sum(a * b)"), tb.Expr("max(a - b)"),
+            ...          tb.Expr("a + b")]
+            >>> exprs[2].set_output(out)
+            >>> sab, mab, out = tb.Expr.eval_many(exprs)
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        return Expr._eval_exprs(list(exprs))
+
+    @staticmethod
+    def _eval_exprs(exprs):
+        """Evaluate the `exprs` along their inputs at the same time."""
+
+        plans = [expr._eval_plan() for expr in exprs]
+        if not plans:
+            return []
+        maindim = exprs[0].maindim
+        (i_nrows, _, start, stop, step) = plans[0][:5]
+        for expr, plan in zip(exprs, plans):
+            if (expr.maindim != maindim or plan[0] != i_nrows or
+                    plan[2:5] != (start, stop, step)):
+                raise ValueError(
+                    "Expressions evaluated together must be computed over "
+                    "the same range of the same main dimension")
 
         if i_nrows == 0:
             # No elements to compute
-            return self._single_row_out
-
-        # Create a key that selects every element in inputs and output
-        # (including the main dimension)
-        i_slices = [slice(None)] * (maindim + 1)
-        o_slices = [slice(None)] * (o_maindim + 1)
+            return [expr._empty_outcome() for expr in exprs]
+
+        # Gather the inputs of all the expressions, so that the ones
+        # shared by several of them are read just once
+        values, slice_pos, positions = [], [], []
+        keys = {}
+        for expr, plan in zip(exprs, plans):
+            epositions = []
+            for i, val in enumerate(expr.values):
+                key = (id(val), i in plan[1])
+                if key not in keys:
+                    keys[key] = len(values)
+                    if key[1]:
+                        slice_pos.append(len(values))
+                    values.append(val)
+                epositions.append(keys[key])
+            positions.append(epositions)
+        nrowsinbuf = max(plan[5] for plan in plans)
+        pipeline = max(expr.pipeline for expr in exprs)
 
         # This is a hack to prevent doing unnecessary flavor conversions
         # while reading buffers
@@ -597,53 +875,137 @@ value of dimensions that are orthogonal (and preferably close) to the
             if hasattr(val, 'maindim'):
                 val._v_convert = False
 
+        # The partial outcomes of reductions along the main dimension
+        results = [None] * len(exprs)
+
         # Start the computation itself
-        for start2 in xrange(start, stop, step * nrowsinbuf):
+        blocks = Expr._iter_blocks(values, slice_pos, maindim, start, stop,
+                                   step, nrowsinbuf, pipeline)
+        writebehind = None
+        try:
+            if pipeline > 0 and any(plan[7] is not None and
+                                    not isinstance(plan[6], np.ndarray)
+                                    for plan in plans):
+                # Write the outcome in the background too
+                writebehind = WriteBehind(pipeline)
+
+            for start2, bvals in blocks:
+                for nexpr, expr in enumerate(exprs):
+                    write = plans[nexpr][7]
+                    vals = [bvals[pos] for pos in positions[nexpr]]
+                    # Do the actual computation for this slice
+                    rout = expr._compiled_expr(*vals)
+                    if write is None:
+                        # Accumulate the reduction of this block
+                        reduce_, combine = _reductions[expr.reduction]
+                        rout = reduce_(rout, axis=expr.axis)
+                        if results[nexpr] is not None:
+                            rout = combine(results[nexpr], rout)
+                        results[nexpr] = rout
+                        continue
+                    if expr.reduction is not None:
+                        rout = expr._reduce(rout)
+                    if (writebehind is not None and
+                            not isinstance(plans[nexpr][6], np.ndarray)):
+                        writebehind.put(write, (start2, rout))
+                    else:
+                        write(start2, rout)
+            if writebehind is not None:
+                writebehind.close()
+                writebehind = None
+        finally:
+            blocks.close()
+            if writebehind is not None:
+                try:
+                    writebehind.close()
+                except Exception:
+                    pass  # already raising another exception
+            # Activate the conversion again (default)
+            for val in values:
+                if hasattr(val, 'maindim'):
+                    val._v_convert = True
+
+        outcomes = []
+        for expr, plan, result in zip(exprs, plans, results):
+            if plan[7] is not None:
+                outcomes.append(plan[6])
+                continue
+            if expr.reduction == 'mean':
+                # Get the number of reduced elements in inputs
+                shape = list(expr.shape)
+                shape[maindim] = i_nrows
+                if expr.axis is None:
+                    result = result / np.prod(shape)
+                else:
+                    result = result / i_nrows
+            outcomes.append(result)
+        return outcomes
+
+    @staticmethod
+    def _iter_blocks(values, slice_pos, maindim, start, stop, step,
+                     nrowsinbuf, pipeline):
+        """Iterate over the blocks of `values` in the main dimension.
+
+        ``(start2, vals)`` pairs are yielded, where `start2` is the first
+        row of the block in inputs and `vals` the values of variables for
+        computing it.  When `pipeline` is greater than 0, the blocks are
+        read in a background thread.
+
+        """
+
+        def read(start2):
             stop2 = start2 + step * nrowsinbuf
             if stop2 > stop:
                 stop2 = stop
-            # Set the proper slice for inputs
-            i_slices[maindim] = slice(start2, stop2, step)
-            # Get the input values
+            # Set the proper slice in the main dimension
+            i_slices = ((slice(None),) * maindim +
+                        (slice(start2, stop2, step),))
+            # Get the values for computing the buffer
             vals = []
             for i, val in enumerate(values):
                 if i in slice_pos:
-                    vals.append(val.__getitem__(tuple(i_slices)))
+                    vals.append(val.__getitem__(i_slices))
                 else:
                     # A read of values is not apparently needed, as PyTables
                     # leaves seems to work just fine inside Numexpr
                     vals.append(val)
-            # Do the actual computation for this slice
-            rout = self._compiled_expr(*vals)
-            # Set the values into the out buffer
-            if self.append_mode:
-                out.append(rout)
-            else:
-                # Compute the slice to be filled in output
-                start3 = o_start + (start2 - start) // step
-                stop3 = start3 + nrowsinbuf * o_step
-                if stop3 > o_stop:
-                    stop3 = o_stop
-                o_slices[o_maindim] = slice(start3, stop3, o_step)
-                # Set the slice
-                out[tuple(o_slices)] = rout
+            return vals
 
-        # Activate the conversion again (default)
-        for val in values:
-            if hasattr(val, 'maindim'):
-                val._v_convert = True
+        positions = xrange(start, stop, step * nrowsinbuf)
+        if pipeline <= 0:
+            for start2 in positions:
+                yield (start2, read(start2))
+            return
 
-        return out
+        # Broadcasted on-disk inputs are read just once, so that the
+        # computation does not need to access the file
+        values = [val.read() if i not in slice_pos and
+                  isinstance(val, (tb.Leaf, tb.Column)) else val
+                  for i, val in enumerate(values)]
+        readahead = ReadAhead(read, positions, pipeline)
+        try:
+            while True:
+                (start2, vals) = readahead.get()
+                if start2 is None:
+                    break
+                yield (start2, vals)
+        finally:
+            readahead.close()
 
     def __iter__(self):
         """Iterate over the rows of the outcome of the expression.
 
         This iterator always returns rows as NumPy objects, so a possible out
         container specified in :meth:`Expr.set_output` method is ignored here.
+        Reductions along the main dimension (or along all of them) can not
+        be iterated over.
 
         """
 
-        values, shape, maindim = self.values, self.shape, self.maindim
+        values, shape, maindim = self.values, list(self.shape), self.maindim
+        if self.reduction is not None and self.axis in (None, maindim):
+            raise TypeError("Reductions along the main dimension can not "
+                            "be iterated over; use `Expr.eval()` instead")
 
         # Get different info we need for the main computation loop
         (i_nrows, slice_pos, start, stop, step, nrowsinbuf) = \
@@ -653,10 +1015,6 @@ value of dimensions that are orthogonal (and preferably close) to the
             # No elements to compute
             return
 
-        # Create a key that selects every element in inputs
-        # (including the main dimension)
-        i_slices = [slice(None)] * (maindim + 1)
-
         # This is a hack to prevent doing unnecessary flavor conversions
         # while reading buffers
         for val in values:
@@ -664,31 +1022,23 @@ value of dimensions that are orthogonal (and preferably close) to the
                 val._v_convert = False
 
         # Start the computation itself
-        for start2 in xrange(start, stop, step * nrowsinbuf):
-            stop2 = start2 + step * nrowsinbuf
-            if stop2 > stop:
-                stop2 = stop
-            # Set the proper slice in the main dimension
-            i_slices[maindim] = slice(start2, stop2, step)
-            # Get the values for computing the buffer
-            vals = []
-            for i, val in enumerate(values):
-                if i in slice_pos:
-                    vals.append(val.__getitem__(tuple(i_slices)))
-                else:
-                    # A read of values is not apparently needed, as PyTables
-                    # leaves seems to work just fine inside Numexpr
-                    vals.append(val)
-            # Do the actual computation
-            rout = self._compiled_expr(*vals)
-            # Return one row per call
-            for row in rout:
-                yield row
-
-        # Activate the conversion again (default)
-        for val in values:
-            if hasattr(val, 'maindim'):
-                val._v_convert = True
+        blocks = self._iter_blocks(values, slice_pos, maindim, start, stop,
+                                   step, nrowsinbuf, self.pipeline)
+        try:
+            for start2, vals in blocks:
+                # Do the actual computation
+                rout = self._compiled_expr(*vals)
+                if self.reduction is not None:
+                    rout = self._reduce(rout)
+                # Return one row per call
+                for row in rout:
+                    yield row
+        finally:
+            blocks.close()
+            # Activate the conversion again (default)
+            for val in values:
+                if hasattr(val, 'maindim'):
+                    val._v_convert = True
 
 
 if __name__ == "__main__":
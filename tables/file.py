@@ -25,10 +25,11 @@ import os
 import sys
 import time
 import weakref
+import threading
+import contextlib
 import warnings
 import collections
 
-import numexpr
 import numpy
 
 import tables.misc.proxydict
@@ -38,8 +39,8 @@ from tables import parameters
 from tables.exceptions import (ClosedFileError, FileModeError, NodeError,
                                NoSuchNodeError, UndoRedoError, ClosedNodeError,
                                PerformanceWarning)
-from tables.registry import get_class_by_name
-from tables.path import join_path, split_path
+from tables.registry import get_class_by_name, class_id_dict
+from tables.path import join_path, split_path, isvisiblepath
 from tables import undoredo
 from tables.description import (IsDescription, UInt8Col, StringCol,
                                 descr_from_dtype, dtype_from_descr)
@@ -52,9 +53,10 @@ from tables.array import Array
 from tables.carray import CArray
 from tables.earray import EArray
 from tables.vlarray import VLArray
+from tables.raggedarray import RaggedArray
 from tables.table import Table
 from tables import linkextension
-from tables.utils import detect_number_of_cores
+from tables.utils import detect_number_of_cores, set_numexpr_vml_threads
 from tables import lrucacheextension
 from tables.flavor import flavor_of, array_as_internal
 from tables.atom import Atom
@@ -89,6 +91,7 @@ class _FileRegistry(object):
     def __init__(self):
         self._name_mapping = collections.defaultdict(set)
         self._handlers = set()
+        self._identities = {}
 
     @property
     def filenames(self):
@@ -121,6 +124,29 @@ class _FileRegistry(object):
         #return set(self._name_mapping[filename])  # return a copy
         return self._name_mapping[filename]
 
+    def get_file_identity(self, filename):
+        """Return an identity for the current contents of `filename`.
+
+        The identity is made of the location (device and inode) of the
+        file, followed by its size and modification time, so it changes
+        whenever the file is modified.  Chunks cached under a previous
+        identity of the same file are discarded from the shared chunk
+        cache.  If the file can not be found, `None` is returned.
+
+        """
+
+        try:
+            stat = os.stat(filename)
+        except (OSError, TypeError):
+            return None
+        location = (stat.st_dev, stat.st_ino)
+        identity = (location, stat.st_size, stat.st_mtime)
+        previous = self._identities.get(location)
+        if previous is not None and previous != identity:
+            lrucacheextension.shared_chunk_cache.invalidate(previous)
+        self._identities[location] = identity
+        return identity
+
     def close_all(self):
         are_open_files = len(self._handlers) > 0
         if are_open_files:
@@ -320,6 +346,251 @@ def open_file(filename, mode="r", title="", root_uep="/", filters=None,
 openFile = previous_api(open_file)
 
 
+class FilePool(object):
+    """A pool of reusable read-only :class:`File` handles.
+
+    Opening an HDF5 file and walking to the nodes of interest is
+    comparatively expensive, so applications which repeatedly open the
+    same files for reading (e.g. one request at a time in a server) can
+    get them from a pool instead.  Handles acquired from the pool are
+    kept open after being released, together with their node caches,
+    and handed out again by later acquisitions of the same file.
+
+    Parameters
+    ----------
+    idle_timeout : float
+        The number of seconds a released handle may stay unused before
+        the pool closes it.  Idle handles are closed when the pool is
+        next used (there is no background thread), or explicitly by
+        calling :meth:`FilePool.close_idle`.
+
+    Notes
+    -----
+    Only read-only handles may be pooled.  The pool only amortizes the
+    cost of opening and closing files: its bookkeeping is thread-safe
+    and a handle is never handed to two threads at the same time (a
+    thread acquiring a file already held by itself gets the same handle
+    back and must release it as many times as it acquired it, while
+    other threads get a different handle to the same file), but this
+    does not make I/O on different handles concurrent.  Unless the
+    HDF5 library was built thread-safe, threads using pooled handles
+    must still serialize their I/O, e.g. by holding a lock shared by all
+    of them around it.
+
+    Examples
+    --------
+
+    ::
+
+        pool = tables.FilePool(idle_timeout=30)
+        with pool.open('data.h5') as h5file:
+            table = h5file.root.detector.readout
+
+    .. versionadded:: 3.1.2
+
+    """
+
+    def __init__(self, idle_timeout=60.0):
+        if idle_timeout < 0:
+            raise ValueError("``idle_timeout`` can not be negative")
+        self.idle_timeout = idle_timeout
+        """Seconds after which an unused handle is closed."""
+
+        self._lock = threading.Lock()
+        # HDF5 is not thread-safe, so serialize opening and closing files
+        self._io_lock = threading.Lock()
+        # key -> list of pool entries, each a list
+        # [h5file, owner thread ident, reference count, idle since]
+        self._entries = {}
+        # id(h5file) -> (key, entry)
+        self._handles = {}
+        self._closed = False
+
+    def __len__(self):
+        """The number of open handles in the pool."""
+
+        with self._lock:
+            return len(self._handles)
+
+    def _key(self, filename, root_uep, kwargs):
+        try:
+            filename = os.path.abspath(filename)
+        except (TypeError, AttributeError):
+            pass
+        # Extra arguments (like ``Filters`` instances or lists) need not
+        # be hashable, so they are compared by their representation.
+        extra = tuple(sorted((name, repr(value))
+                             for (name, value) in kwargs.items()))
+        return (filename, root_uep, extra)
+
+    def _drop(self, key, entry):
+        entries = self._entries[key]
+        entries.remove(entry)
+        if not entries:
+            del self._entries[key]
+        del self._handles[id(entry[0])]
+
+    def _g_pop_idle(self, now):
+        """Remove and return the handles which have been idle too long."""
+
+        expired = []
+        for key, entries in list(self._entries.items()):
+            for entry in entries[:]:
+                h5file, owner, refcount, since = entry
+                if not h5file.isopen:
+                    self._drop(key, entry)
+                elif refcount == 0 and now - since >= self.idle_timeout:
+                    self._drop(key, entry)
+                    expired.append(h5file)
+        return expired
+
+    def _g_close_files(self, h5files):
+        with self._io_lock:
+            for h5file in h5files:
+                if h5file.isopen:
+                    h5file.close()
+
+    def acquire(self, filename, mode='r', root_uep='/', **kwargs):
+        """Get a read-only handle to the named file from the pool.
+
+        The arguments are those of :func:`open_file`, but `mode` must be
+        'r'.  Handles opened with different `root_uep` or extra
+        arguments (compared by their ``repr()``) are not shared.  Every
+        acquired handle must be given back with :meth:`FilePool.release`
+        instead of being closed.
+
+        """
+
+        if mode != 'r':
+            raise ValueError("only read-only ('r') handles can be pooled, "
+                             "not mode '%s'" % mode)
+        key = self._key(filename, root_uep, kwargs)
+        me = threading.current_thread().ident
+
+        with self._lock:
+            if self._closed:
+                raise ValueError("the file pool is closed")
+            expired = self._g_pop_idle(time.time())
+            chosen = None
+            for entry in self._entries.get(key, ()):
+                h5file, owner = entry[:2]
+                if not h5file.isopen:
+                    continue
+                if owner == me:
+                    # Re-entrant acquisition from the holding thread.
+                    chosen = entry
+                    break
+                if entry[2] == 0 and chosen is None:
+                    chosen = entry
+            if chosen is not None:
+                chosen[1] = me
+                chosen[2] += 1
+        self._g_close_files(expired)
+        if chosen is not None:
+            return chosen[0]
+
+        # Open a new handle outside the lock, since it may take a while.
+        with self._io_lock:
+            h5file = open_file(filename, mode, root_uep=root_uep, **kwargs)
+        with self._lock:
+            if self._closed:
+                self._g_close_files([h5file])
+                raise ValueError("the file pool is closed")
+            entry = [h5file, me, 1, None]
+            self._entries.setdefault(key, []).append(entry)
+            self._handles[id(h5file)] = (key, entry)
+        return h5file
+
+    def release(self, h5file):
+        """Give back a handle obtained with :meth:`FilePool.acquire`.
+
+        The handle is kept open for later reuse.  Once it has been
+        released as many times as it was acquired it may be handed out
+        to other threads, or closed after being idle for
+        :attr:`FilePool.idle_timeout` seconds.
+
+        """
+
+        with self._lock:
+            try:
+                key, entry = self._handles[id(h5file)]
+            except KeyError:
+                raise ValueError("the file handle does not belong to "
+                                 "this pool: %r" % (h5file,))
+            if entry[2] <= 0:
+                raise ValueError("the file handle has already been "
+                                 "released: %r" % (h5file,))
+            now = time.time()
+            entry[2] -= 1
+            if entry[2] == 0:
+                entry[1] = None
+                entry[3] = now
+                if not h5file.isopen:
+                    self._drop(key, entry)
+            expired = self._g_pop_idle(now)
+        self._g_close_files(expired)
+
+    @contextlib.contextmanager
+    def open(self, filename, mode='r', root_uep='/', **kwargs):
+        """Acquire a handle for the duration of a ``with`` block.
+
+        The handle is released when the block ends.  See
+        :meth:`FilePool.acquire` for the arguments.
+
+        """
+
+        h5file = self.acquire(filename, mode, root_uep, **kwargs)
+        try:
+            yield h5file
+        finally:
+            self.release(h5file)
+
+    def close_idle(self):
+        """Close the handles which have been idle for too long.
+
+        Returns the number of closed handles.
+
+        """
+
+        with self._lock:
+            expired = self._g_pop_idle(time.time())
+        self._g_close_files(expired)
+        return len(expired)
+
+    def close(self):
+        """Close every handle in the pool, including those in use.
+
+        The pool can not be used afterwards.
+
+        """
+
+        with self._lock:
+            self._closed = True
+            handles = [entry[0] for (key, entry) in self._handles.values()]
+            self._entries.clear()
+            self._handles.clear()
+        self._g_close_files(handles)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+
+def _catalog_bytes(value):
+    """Get the UTF-8 encoded string representation of an attribute value."""
+
+    if value is None:
+        return b''
+    if isinstance(value, bytes):
+        return value
+    if not isinstance(value, unicode):
+        value = str(value)
+    return value.encode('utf-8')
+
+
 # A dumb class that doesn't keep nothing at all
 class _NoCache(object):
     def __len__(self):
@@ -334,6 +605,9 @@ class _NoCache(object):
     def __setitem__(self, key, value):
         pass
 
+    def get(self, key, default=None):
+        return default
+
     __marker = object()
 
     def pop(self, key, d=__marker):
@@ -406,14 +680,15 @@ class NodeManager(object):
         self.cache[key] = node
 
     def get_node(self, key):
-        node = self.cache.pop(key, None)
+        # The node becomes the most recently used one in the cache
+        node = self.cache.get(key)
         if node is not None:
             if node._v_isopen:
-                self.cache_node(node, key)
                 return node
             else:
                 # this should not happen
                 warnings.warn("a closed node found in the cache: ``%s``" % key)
+                self.cache.pop(key, None)
 
         if key in self.registry:
             node = self.registry[key]
@@ -778,8 +1053,17 @@ class File(hdf5extension.File, object):
         if params['MAX_BLOSC_THREADS'] is None:
             params['MAX_BLOSC_THREADS'] = detect_number_of_cores()
 
+        if params['MAX_QUERY_THREADS'] is None:
+            params['MAX_QUERY_THREADS'] = detect_number_of_cores()
+
+        if params['MAX_INDEX_THREADS'] is None:
+            params['MAX_INDEX_THREADS'] = detect_number_of_cores()
+
         self.params = params
 
+        # Datasets may use the optional filters, which are loaded lazily
+        utilsextension.register_extra_filters()
+
         # Now, it is time to initialize the File extension
         self._g_new(filename, mode, **params)
 
@@ -796,6 +1080,15 @@ class File(hdf5extension.File, object):
         node_cache_slots = params['NODE_CACHE_SLOTS']
         self._node_manager = NodeManager(nslots=node_cache_slots)
 
+        # The memory used by the chunk caches of all tables in the file.
+        self._chunk_cache_budget = lrucacheextension.CacheBudget(
+            params['TABLE_CACHE_FILE_SIZE'])
+
+        # The identity of the file in the shared chunk cache (if used).
+        self._shared_cache_id = None
+        if mode == 'r' and params['SHARED_CHUNK_CACHE']:
+            self._shared_cache_id = _open_files.get_file_identity(filename)
+
         # For the moment Undo/Redo is not enabled.
         self._undoEnabled = False
 
@@ -832,7 +1125,7 @@ class File(hdf5extension.File, object):
             self.enable_undo()
 
         # Set the maximum number of threads for Numexpr
-        numexpr.set_vml_num_threads(params['MAX_NUMEXPR_THREADS'])
+        set_numexpr_vml_threads(params['MAX_NUMEXPR_THREADS'])
 
     def __get_root_group(self, root_uep, title, filters):
         """Returns a Group instance which will act as the root group in the
@@ -1464,6 +1757,89 @@ class File(hdf5extension.File, object):
 
     createVLArray = previous_api(create_vlarray)
 
+    def create_ragged_array(self, where, name, atom=None, title="",
+                            filters=None, expectedrows=None,
+                            chunkshape=None, byteorder=None,
+                            createparents=False, obj=None):
+        """Create a new ragged array stored in chunked datasets.
+
+        The new :class:`RaggedArray` offers the same interface as a
+        variable-length array (see :meth:`File.create_vlarray`), but its
+        data is kept in two chunked datasets (the concatenated values and
+        the offsets of the rows) instead of in HDF5 variable length types,
+        so that filters apply to the values themselves and reading a range
+        of rows is done with a couple of contiguous reads.
+
+        Parameters
+        ----------
+        where : str or Group
+            The parent group from which the new array will hang. It can
+            be a path string (for example '/level1/leaf5'), or a Group
+            instance (see :ref:`GroupClassDescr`).
+        name : str
+            The name of the new array
+        atom : Atom
+            An Atom (see :ref:`AtomClassDescr`) instance representing
+            the *type* and *shape* of the atomic objects to be saved.
+            It can be None if *obj* is provided.
+        title : str, optional
+            A description for this node (it sets the TITLE HDF5 attribute
+            on disk).
+        filters : Filters
+            An instance of the Filters class (see :ref:`FiltersClassDescr`)
+            that provides information about the desired I/O filters to
+            be applied to the datasets of the array.
+        expectedrows : int, optional
+            A user estimate about the number of rows that will be added to
+            the array.  If not provided, the default value is
+            ``EXPECTED_ROWS_VLARRAY`` (see ``tables/parameters.py``).
+        chunkshape : int or tuple of int, optional
+            The shape of the data chunk of the values dataset, whose first
+            dimension counts atoms (not rows).  If None, a sensible value
+            is calculated (which is recommended).
+        byteorder : str, optional
+            The byteorder of the data *on disk*, specified as 'little' or
+            'big'. If this is not specified, the byteorder is that of the
+            platform.
+        createparents : bool, optional
+            Whether to create the needed groups for the parent path to
+            exist (not done by default).
+        obj : python object
+            The array or scalar to be saved as the first row of the array,
+            as in :meth:`File.create_vlarray`.
+
+        See Also
+        --------
+        RaggedArray : for more information on ragged arrays
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        if obj is not None:
+            flavor = flavor_of(obj)
+            obj = array_as_internal(obj, flavor)
+
+            if atom is not None and atom.dtype != obj.dtype:
+                raise TypeError('the atom parameter is not consistent with '
+                                'the data type of the obj parameter')
+            if atom is None:
+                atom = Atom.from_dtype(obj.dtype)
+        elif atom is None:
+            raise ValueError('atom parameter cannot be None')
+
+        parentnode = self._get_or_create_path(where, createparents)
+        _checkfilters(filters)
+        ptobj = RaggedArray(parentnode, name,
+                            atom=atom, title=title, filters=filters,
+                            expectedrows=expectedrows,
+                            chunkshape=chunkshape, byteorder=byteorder)
+
+        if obj is not None:
+            ptobj.append(obj)
+
+        return ptobj
+
     def create_hard_link(self, where, name, target, createparents=False):
         """Create a hard link.
 
@@ -1480,8 +1856,9 @@ class File(hdf5extension.File, object):
         targetnode = self.get_node(target)
         parentnode = self._get_or_create_path(where, createparents)
         linkextension._g_create_hard_link(parentnode, name, targetnode)
-        # Refresh children names in link's parent node
-        parentnode._g_add_children_names()
+        # Refresh children names in link's parent node (if already listed)
+        if '_v_children' in parentnode.__dict__:
+            parentnode._g_add_children_names()
         # Return the target node
         return self.get_node(parentnode, name)
 
@@ -1511,8 +1888,9 @@ class File(hdf5extension.File, object):
                     "`target` has to be a string or a node object")
         parentnode = self._get_or_create_path(where, createparents)
         slink = SoftLink(parentnode, name, target)
-        # Refresh children names in link's parent node
-        parentnode._g_add_children_names()
+        # Refresh children names in link's parent node (if already listed)
+        if '_v_children' in parentnode.__dict__:
+            parentnode._g_add_children_names()
         return slink
 
     createSoftLink = previous_api(create_soft_link)
@@ -1541,8 +1919,9 @@ class File(hdf5extension.File, object):
                 "`target` must expressed as 'file:/path/to/node'")
         parentnode = self._get_or_create_path(where, createparents)
         elink = ExternalLink(parentnode, name, target)
-        # Refresh children names in link's parent node
-        parentnode._g_add_children_names()
+        # Refresh children names in link's parent node (if already listed)
+        if '_v_children' in parentnode.__dict__:
+            parentnode._g_add_children_names()
         return elink
 
     createExternalLink = previous_api(create_external_link)
@@ -1802,6 +2181,40 @@ class File(hdf5extension.File, object):
 
     getNodeAttr = previous_api(get_node_attr)
 
+    def walk_node_attr(self, attrname, where="/", classname=None):
+        """Recursively iterate over the values of an attribute of nodes.
+
+        Nodes hanging from `where` (which is included) are walked as in
+        :meth:`File.walk_nodes` and a ``(pathname, value)`` pair is yielded
+        for each one having a PyTables attribute named `attrname`.  Nodes
+        without that attribute are skipped.  Other attributes are not
+        read from disk.
+
+        Parameters
+        ----------
+        attrname
+            The name of the attribute to retrieve.
+        where, classname
+            These arguments work as in :meth:`File.walk_nodes`.
+
+        Examples
+        --------
+
+        ::
+
+            # Collect the units of every array in the file
+            units = dict(h5file.walk_node_attr('units', classname='Array'))
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        names = (attrname,)
+        for node in self.walk_nodes(where, classname):
+            values = node._v_attrs._f_get_many(names)
+            if attrname in values:
+                yield (node._v_pathname, values[attrname])
+
     def set_node_attr(self, where, attrname, attrvalue, name=None):
         """Set a PyTables attribute for the given node.
 
@@ -2126,6 +2539,158 @@ class File(hdf5extension.File, object):
 
     walkGroups = previous_api(walk_groups)
 
+    def catalog(self, where="/", fields=None, persist=False,
+                use_persisted=False):
+        """Get a compact record with the metadata of nodes below where.
+
+        The nodes hanging from the `where` group (which is included) are
+        listed in a single pass over the HDF5 hierarchy, without creating
+        node objects, so this is much faster than :meth:`File.walk_nodes`
+        when only an inventory of a big file is needed.  Hidden nodes are
+        skipped, and links are listed but not followed.
+
+        The result is a NumPy structured array with a row per node and a
+        column for each field.  These fields are supported:
+
+        * 'path': the pathname of the node.
+        * 'class': the name of the class of the node, as in
+          :meth:`File.walk_nodes` (e.g. 'Group', 'Table' or 'SoftLink').
+        * 'ndim': the number of dimensions of leaves (-1 for other nodes).
+        * 'shape': the shape of leaves, padded with -1 up to the largest
+          number of dimensions in the catalog (all -1 for other nodes).
+        * 'dtype': the NumPy dtype of leaves, as a string (empty for other
+          nodes or unsupported types).
+
+        Any other field is taken as the name of an attribute, whose
+        scalar string or numeric values are given as strings (empty for
+        nodes lacking it).  All strings are UTF-8 encoded bytes.
+
+        Parameters
+        ----------
+        where : str or Group, optional
+            The group to be listed.
+        fields : sequence of str, optional
+            The fields to be returned.  They default to ('path', 'class',
+            'ndim', 'shape', 'dtype').  'path' is always included.
+        persist : bool
+            Store the catalog in a hidden table of the `where` group, so
+            that it can be retrieved at once with `use_persisted` later
+            on (e.g. after reopening the file).  The file must be
+            writable.
+        use_persisted : bool
+            Return the catalog stored with `persist` for the same `where`
+            and `fields`, if any, instead of walking the hierarchy.
+            Stored catalogs are snapshots, they are not updated when
+            nodes are changed afterwards.
+
+        Examples
+        --------
+
+        ::
+
+            cat = h5file.catalog('/', fields=('path', 'class', 'TITLE'))
+            tables = cat['path'][cat['class'] == b'Table']
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        group = self.get_node(where)
+        self._check_group(group)
+
+        if fields is None:
+            fields = ['path', 'class', 'ndim', 'shape', 'dtype']
+        else:
+            fields = list(fields)
+        if 'path' not in fields:
+            fields.insert(0, 'path')
+        if len(set(fields)) != len(fields):
+            raise ValueError("duplicated fields: %r" % (fields,))
+
+        catpath = join_path(group._v_pathname, '_p_catalog')
+        if use_persisted and catpath in self:
+            cattable = self.get_node(catpath)
+            if list(cattable.attrs.FIELDS) == fields:
+                return cattable.read()
+
+        metafields = ('path', 'class', 'ndim', 'shape', 'dtype')
+        attrnames = [field for field in fields if field not in metafields]
+        leafinfo = ('ndim' in fields or 'shape' in fields
+                    or 'dtype' in fields)
+        pathprefix = group._v_pathname.rstrip('/') + '/'
+        syscheck = self.params['PYTABLES_SYS_ATTRS']
+
+        columns = dict((field, []) for field in fields)
+        groupclass = class_id_dict.get(group._c_classid, Group)
+        values = group._v_attrs._f_get_many(attrnames)
+        values = dict((name, value) for (name, value) in values.items()
+                      if isinstance(value, (numpy.generic, bytes, unicode)))
+        visited = [(group._v_pathname, groupclass.__name__, None, None,
+                    values)]
+        for (relpath, kind, classid, shape, dtype, values) in \
+                group._g_visit_catalog(attrnames, leafinfo):
+            pathname = pathprefix + relpath
+            if not isvisiblepath(pathname):
+                continue
+            if classid is not None and not isinstance(classid, str):
+                classid = classid.decode('utf-8')
+            if kind == 'Group':
+                classname = class_id_dict.get(classid, Group).__name__
+            elif kind == 'Leaf':
+                if not syscheck or classid not in class_id_dict:
+                    classid = utilsextension.which_class(
+                        group._v_objectid, relpath)
+                if classid in class_id_dict:
+                    classname = class_id_dict[classid].__name__
+                else:
+                    classname = 'UnImplemented'
+            else:
+                classname = kind
+            values = dict((name, value) for (name, value)
+                          in zip(attrnames, values) if value is not None)
+            visited.append((pathname, classname, shape, dtype, values))
+
+        maxdim = 1
+        for (pathname, classname, shape, dtype, values) in visited:
+            columns['path'].append(pathname.encode('utf-8'))
+            if 'class' in columns:
+                columns['class'].append(classname.encode('utf-8'))
+            if 'ndim' in columns:
+                columns['ndim'].append(-1 if shape is None else len(shape))
+            if 'shape' in columns:
+                columns['shape'].append(shape or ())
+                maxdim = max(maxdim, len(shape or ()))
+            if 'dtype' in columns:
+                columns['dtype'].append(
+                    b'' if dtype is None else str(dtype).encode('utf-8'))
+            for name in attrnames:
+                columns[name].append(_catalog_bytes(values.get(name)))
+
+        if 'ndim' in columns:
+            columns['ndim'] = numpy.array(columns['ndim'], dtype=numpy.int32)
+        if 'shape' in columns:
+            shapes = numpy.empty((len(visited), maxdim), dtype=numpy.int64)
+            shapes[:] = -1
+            for (i, shape) in enumerate(columns['shape']):
+                shapes[i, :len(shape)] = shape
+            columns['shape'] = shapes
+        for field in fields:
+            columns[field] = numpy.asarray(columns[field])
+        dtype = numpy.dtype([(str(field), columns[field].dtype,
+                              columns[field].shape[1:]) for field in fields])
+        result = numpy.empty(len(visited), dtype=dtype)
+        for field in fields:
+            result[str(field)] = columns[field]
+
+        if persist:
+            if catpath in self:
+                self.remove_node(catpath)
+            cattable = self.create_table(group, '_p_catalog', result,
+                                         title="Catalog of nodes")
+            cattable.attrs.FIELDS = fields
+
+        return result
+
     def _check_open(self):
         """Check the state of the file.
 
@@ -259,7 +259,7 @@ class Group(hdf5extension.Group, Node):
                     set_attr('FILTERS', newfilters)
         else:
             # If the file has PyTables format, get the VERSION attr
-            if 'VERSION' in self._v_attrs._v_attrnamessys:
+            if 'VERSION' in self._v_attrs:
                 self._v_version = self._v_attrs.VERSION
             else:
                 self._v_version = "0.0 (unknown)"
@@ -533,11 +533,20 @@ be ready to see PyTables asking for *lots* of memory and possibly slow I/O."""
                 "to access the child node"
                 % (self._v_pathname, childname), NaturalNameWarning)
 
-        # Check group width limits.
-        if (len(self._v_children) + len(self._v_hidden) >=
-                self._v_max_group_width):
+        # Check group width limits.  The children are not listed here if
+        # they have not been loaded yet, since that may be very expensive
+        # for wide groups; the number of links is asked to HDF5 instead.
+        if '_v_children' in self.__dict__:
+            nchildren = len(self._v_children) + len(self._v_hidden)
+        else:
+            nchildren = self._g_get_nlinks()
+        if nchildren >= self._v_max_group_width:
             self._g_width_warning()
 
+        # Children will be listed from disk when first needed.
+        if '_v_children' not in self.__dict__:
+            return
+
         # Update members information.
         # Insert references to the new child.
         # (Assigned values are entirely irrelevant.)
@@ -740,6 +749,17 @@ be ready to see PyTables asking for *lots* of memory and possibly slow I/O."""
 
         self._g_check_open()
 
+        if classname == 'IndexArray':
+            raise TypeError(
+                "listing ``IndexArray`` nodes is not allowed")
+
+        if '_v_children' not in self.__dict__:
+            # Children have not been listed yet: read them from disk in
+            # pages instead of loading all of them at once.
+            for childnode in self._g_iter_nodes_paged(classname):
+                yield childnode
+            return
+
         if not classname:
             # Returns all the children alphanumerically sorted
             names = sorted(self._v_children.iterkeys())
@@ -760,9 +780,6 @@ be ready to see PyTables asking for *lots* of memory and possibly slow I/O."""
             names = sorted(self._v_links.iterkeys())
             for name in names:
                 yield self._v_links[name]
-        elif classname == 'IndexArray':
-            raise TypeError(
-                "listing ``IndexArray`` nodes is not allowed")
         else:
             class_ = get_class_by_name(classname)
 
@@ -776,6 +793,61 @@ be ready to see PyTables asking for *lots* of memory and possibly slow I/O."""
 
     _f_iterNodes = previous_api(_f_iter_nodes)
 
+    def _g_iter_nodes_paged(self, classname=None):
+        """Iterate over children nodes without listing all of them.
+
+        Children are read from disk in pages of ``GROUP_LIST_PAGE_SIZE``
+        links and yielded alphanumerically sorted by node name, as in
+        :meth:`Group._f_iter_nodes`.  If the group is modified during the
+        iteration, the remaining children are read in a single listing.
+
+        """
+
+        if classname in (None, 'Group', 'Leaf', 'Link'):
+            class_ = None
+        else:
+            class_ = get_class_by_name(classname)
+        pagesize = self._v_file.params['GROUP_LIST_PAGE_SIZE']
+
+        start = 0
+        lastname = None
+        nlinks = self._g_get_nlinks()
+        while start < nlinks:
+            if self._g_get_nlinks() != nlinks:
+                # Link indices have changed, so resume after the last
+                # yielded name using a full listing.
+                page = self._g_list_group(self._v_parent)
+                start = nlinks = None
+            else:
+                page = self._g_list_group_page(start, pagesize)
+                if page[4] == start:  # no links were visited
+                    break
+                start = page[4]
+
+            (group_names, leaf_names, link_names, unknown_names) = page[:4]
+            if classname == 'Group':
+                names = group_names
+            elif classname == 'Leaf':
+                names = leaf_names
+            elif classname == 'Link':
+                names = link_names
+            else:
+                names = group_names + leaf_names + link_names + unknown_names
+
+            # Links in a page are contiguous in name order.
+            for name in sorted(names):
+                if not isvisiblename(name):
+                    continue
+                if lastname is not None and name <= lastname:
+                    continue
+                childnode = self._f_get_child(name)
+                lastname = name
+                if class_ is None or isinstance(childnode, class_):
+                    yield childnode
+
+            if nlinks is None:
+                break
+
     def _f_walk_groups(self):
         """Recursively iterate over descendent groups (not leaves).
 
@@ -879,8 +951,22 @@ be ready to see PyTables asking for *lots* of memory and possibly slow I/O."""
         #   check above is disabled, that results in Python entering an
         #   endless loop on exit!
 
+        #
+        # ..note::
+        #
+        #   If children names have not been listed yet, the name is looked
+        #   up on disk instead, so that wide groups are not listed just
+        #   because of an attribute assignment.
+
         mydict = self.__dict__
-        if '__members__' in mydict and name in self.__members__:
+        if '__members__' in mydict:
+            clash = name in self.__members__
+        else:
+            clash = (mydict.get('_v_objectid') is not None and
+                     self._v_isopen and isvisiblename(name) and
+                     not name.startswith(('_c_', '_f_', '_g_', '_v_')) and
+                     self._g_get_objinfo(name) != "NoSuchNode")
+        if clash:
             warnings.warn(
                 "group ``%s`` already has a child node named ``%s``; "
                 "you will not be able to use natural naming "
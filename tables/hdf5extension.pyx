@@ -63,14 +63,15 @@ from tables._past import previous_api
 
 # Types, constants, functions, classes & other objects from everywhere
 from libc.stdlib cimport malloc, free
-from libc.string cimport strdup, strlen
+from libc.string cimport strdup, strlen, memcpy
 from numpy cimport import_array, ndarray, npy_intp
 from cpython.bytes cimport (PyBytes_AsString, PyBytes_FromStringAndSize,
     PyBytes_Check)
 from cpython.unicode cimport PyUnicode_DecodeUTF8
 
 
-from definitions cimport (const_char, uintptr_t, hid_t, herr_t, hsize_t, hvl_t,
+from definitions cimport (const_char, uintptr_t, hid_t, herr_t, htri_t,
+  hsize_t, hvl_t,
   H5S_seloper_t, H5D_FILL_VALUE_UNDEFINED,
   H5O_TYPE_UNKNOWN, H5O_TYPE_GROUP, H5O_TYPE_DATASET, H5O_TYPE_NAMED_DATATYPE,
   H5L_TYPE_ERROR, H5L_TYPE_HARD, H5L_TYPE_SOFT, H5L_TYPE_EXTERNAL,
@@ -81,23 +82,28 @@ from definitions cimport (const_char, uintptr_t, hid_t, herr_t, hsize_t, hvl_t,
   H5S_SELECT_SET, H5S_SELECT_AND, H5S_SELECT_NOTB,
   H5Fcreate, H5Fopen, H5Fclose, H5Fflush, H5Fget_vfd_handle, H5Fget_filesize,
   H5Fget_create_plist,
-  H5Gcreate, H5Gopen, H5Gclose, H5Ldelete, H5Lmove,
+  H5Gcreate, H5Gopen, H5Gclose, H5Gget_info, H5G_info_t,
+  H5Ldelete, H5Lmove,
   H5Dopen, H5Dclose, H5Dread, H5Dwrite, H5Dget_type,
   H5Dget_space, H5Dvlen_reclaim, H5Dget_storage_size, H5Dvlen_get_buf_size,
-  H5Tclose, H5Tis_variable_str, H5Tget_sign,
-  H5Adelete, H5T_BITFIELD, H5T_INTEGER, H5T_FLOAT, H5T_STRING, H5Tget_order,
+  H5Tclose, H5Tis_variable_str, H5Tget_sign, H5Tget_class, H5Tget_super,
+  H5Tcopy,
+  H5Adelete, H5Aexists,
+  H5T_BITFIELD, H5T_INTEGER, H5T_FLOAT, H5T_STRING, H5T_VLEN, H5Tget_order,
   H5Pcreate, H5Pset_cache, H5Pclose, H5Pget_userblock, H5Pset_userblock,
   H5Pset_fapl_sec2, H5Pset_fapl_log, H5Pset_fapl_stdio, H5Pset_fapl_core,
   H5Pset_fapl_split,
   H5Sselect_all, H5Sselect_elements, H5Sselect_hyperslab,
   H5Screate_simple, H5Sclose,
-  H5Oget_info, H5O_info_t,
+  H5Sget_simple_extent_ndims, H5Sget_simple_extent_dims,
+  H5Oget_info, H5O_info_t, H5Oopen, H5Oclose,
   H5ATTRset_attribute, H5ATTRset_attribute_string,
   H5ATTRget_attribute, H5ATTRget_attribute_string,
   H5ATTRget_attribute_vlen_string_array,
   H5ATTRfind_attribute, H5ATTRget_type_ndims, H5ATTRget_dims,
   H5ARRAYget_ndims, H5ARRAYget_info,
-  set_cache_size, get_objinfo, get_linkinfo, Giterate, Aiterate, H5UIget_info,
+  set_cache_size, get_objinfo, get_linkinfo, Giterate, Giterate_page, Aiterate, H5UIget_info,
+  Gvisit,
   get_len_of_range, conv_float64_timeval32, truncate_dset,
   H5_HAVE_DIRECT_DRIVER, pt_H5Pset_fapl_direct,
   H5_HAVE_WINDOWS_DRIVER, pt_H5Pset_fapl_windows,
@@ -159,6 +165,10 @@ cdef extern from "H5VLARRAY.h" nogil:
                                   int nobjects, hsize_t nrecords,
                                   void *data )
 
+  herr_t H5VLARRAYappend_rows( hid_t dataset_id, hid_t type_id,
+                               hsize_t nrows, hsize_t nrecords,
+                               hvl_t *wdata )
+
   herr_t H5VLARRAYmodify_records( hid_t dataset_id, hid_t type_id,
                                   hsize_t nrow, int nobjects,
                                   void *data )
@@ -284,6 +294,89 @@ cdef object get_dtype_scalar(hid_t type_id, H5T_class_t class_id,
   return ntype
 
 
+# Helper function for quickly fetch a scalar attribute
+cdef object get_scalar_attribute_or_none(hid_t node_id, char* attr_name):
+  """Returns a scalar string or numeric attribute if it exists in node_id.
+
+  It returns ``None`` in case it don't exists, it is not a scalar of a
+  supported type (or there have been problems reading it).
+
+  """
+
+  cdef hid_t type_id, native_type_id
+  cdef H5T_class_t class_id
+  cdef size_t type_size
+  cdef int rank
+  cdef ndarray ndvalue
+  cdef object dtype_, retvalue
+
+  if H5ATTRfind_attribute(node_id, attr_name) <= 0:
+    return None
+  if H5ATTRget_type_ndims(node_id, attr_name, &type_id, &class_id,
+                          &type_size, &rank) < 0:
+    return None
+
+  retvalue = None
+  if rank == 0 and class_id == H5T_STRING:
+    retvalue = get_attribute_string_or_none(node_id, attr_name)
+  elif rank == 0 and class_id in (H5T_BITFIELD, H5T_INTEGER, H5T_FLOAT):
+    dtype_ = get_dtype_scalar(type_id, class_id, type_size)
+    if dtype_ is not None:
+      native_type_id = get_native_type(type_id)
+      ndvalue = numpy.empty(dtype=dtype_, shape=())
+      if H5ATTRget_attribute(node_id, attr_name, native_type_id,
+                             ndvalue.data) >= 0:
+        retvalue = ndvalue[()]
+      H5Tclose(native_type_id)
+  H5Tclose(type_id)
+
+  return retvalue
+
+
+# Get the shape and the NumPy dtype of a dataset without opening a leaf
+cdef object get_dataset_shape_dtype(hid_t dataset_id):
+  """Returns a ``(shape, dtype)`` tuple for the dataset.
+
+  For variable length datasets the dtype of the base type is returned.
+  The dtype is ``None`` if it is not supported.
+
+  """
+
+  cdef hid_t space_id, type_id, base_type_id
+  cdef int rank
+  cdef hsize_t *dims
+  cdef object shape, dtype_
+
+  space_id = H5Dget_space(dataset_id)
+  if space_id < 0:
+    raise HDF5ExtError("Problems getting the dataspace of the dataset.")
+  rank = H5Sget_simple_extent_ndims(space_id)
+  dims = <hsize_t *>malloc(rank * sizeof(hsize_t))
+  H5Sget_simple_extent_dims(space_id, dims, NULL)
+  shape = getshape(rank, dims)
+  free(<void *>dims)
+  H5Sclose(space_id)
+
+  type_id = H5Dget_type(dataset_id)
+  if H5Tget_class(type_id) == H5T_VLEN:
+    base_type_id = H5Tget_super(type_id)
+  else:
+    base_type_id = H5Tcopy(type_id)
+  try:
+    dtype_ = atom_from_hdf5_type(base_type_id).dtype
+  except TypeError:
+    # Compound types do not map to atoms
+    try:
+      dtype_ = numpy.dtype(
+        hdf5_to_np_ext_type(base_type_id, pure_numpy_types=False)[0])
+    except TypeError:
+      dtype_ = None
+  H5Tclose(base_type_id)
+  H5Tclose(type_id)
+
+  return (shape, dtype_)
+
+
 _supported_drivers = (
     "H5FD_SEC2",
     "H5FD_DIRECT",
@@ -642,6 +735,28 @@ cdef class AttributeSet:
 
   _g_listAttr = previous_api(_g_list_attr)
 
+  def _g_has_attr(self, node, attrname):
+    "Check whether the node has an attribute called `attrname`"
+
+    cdef htri_t ret
+    cdef bytes encoded_attrname
+
+    encoded_attrname = attrname.encode('utf-8')
+    ret = H5Aexists(node._v_objectid, encoded_attrname)
+    if ret < 0:
+      raise HDF5ExtError("Can't check attribute %s in node %s." %
+                         (attrname, self.name))
+    return ret > 0
+
+  def _g_num_attrs(self, node):
+    "Return the number of attributes of the node"
+
+    cdef H5O_info_t oinfo
+
+    if H5Oget_info(node._v_objectid, &oinfo) < 0:
+      raise HDF5ExtError("Unable to get object info for '%s'" % self.name)
+    return oinfo.num_attrs
+
   def _g_setattr(self, node, name, object value):
     """Save Python or NumPy objects as HDF5 attributes.
 
@@ -1017,6 +1132,67 @@ cdef class Group(Node):
 
   _g_listGroup = previous_api(_g_list_group)
 
+  def _g_list_group_page(self, start, count):
+    """Return a page of the children hanging from self.
+
+    At most `count` children are listed in name order, starting at
+    link index `start`.  A tuple with the names of groups, leaves, links
+    and unknown nodes is returned, followed by the index where the next
+    page starts.
+
+    """
+
+    return Giterate_page(self.group_id, start, count)
+
+  def _g_visit_catalog(self, object attrnames, leafinfo=True):
+    """Return metadata about all the nodes below self, without loading them.
+
+    A list of ``(path, kind, classid, shape, dtype, attrs)`` tuples is
+    returned in depth-first name order, leaving hidden nodes and
+    everything below them out.  `path` is relative to self and
+    `kind` is one of 'Group', 'Leaf', 'SoftLink', 'ExternalLink' or
+    'Unknown'.  `classid` is the ``CLASS`` attribute of groups and
+    leaves (or None), `shape` and `dtype` are only filled for leaves
+    (when `leafinfo` is true), and `attrs` holds the values of the
+    scalar attributes named in `attrnames` (None for missing ones).
+
+    """
+
+    cdef hid_t obj_id
+    cdef bytes encoded_path
+    cdef object encoded_attrnames, result, classid, shape, dtype_, values
+
+    encoded_attrnames = [name.encode('utf-8') for name in attrnames]
+    result = []
+    for path, kind in Gvisit(self.group_id):
+      classid = shape = dtype_ = None
+      values = (None,) * len(encoded_attrnames)
+      if kind == "Group" or kind == "Leaf":
+        encoded_path = path.encode('utf-8')
+        obj_id = H5Oopen(self.group_id, encoded_path, H5P_DEFAULT)
+        if obj_id < 0:
+          raise HDF5ExtError("Can't open the node: '%s'." % path)
+        try:
+          classid = get_attribute_string_or_none(obj_id, b"CLASS")
+          if kind == "Leaf" and leafinfo:
+            shape, dtype_ = get_dataset_shape_dtype(obj_id)
+          values = tuple([get_scalar_attribute_or_none(obj_id, name)
+                          for name in encoded_attrnames])
+        finally:
+          H5Oclose(obj_id)
+      result.append((path, kind, classid, shape, dtype_, values))
+
+    return result
+
+  def _g_get_nlinks(self):
+    """Return the number of links (hidden or not) hanging from self."""
+
+    cdef H5G_info_t ginfo
+
+    if H5Gget_info(self.group_id, &ginfo) < 0:
+      raise HDF5ExtError("Problems getting info for group %s" % self.name)
+    return ginfo.nlinks
+
   def _g_get_gchild_attr(self, group_name, attr_name):
     """Return an attribute of a child `Group`.
 
@@ -1949,6 +2125,43 @@ cdef class VLArray(Leaf):
 
     self.nrecords = self.nrecords + 1
 
+  def _append_flat(self, ndarray values, ndarray offsets):
+    cdef int ret
+    cdef hsize_t i, nrows
+    cdef size_t atomsize
+    cdef long long *obuf
+    cdef char *vbuf
+    cdef hvl_t *wdata
+
+    nrows = len(offsets) - 1
+    if nrows == 0:
+      return
+    atomsize = values.nbytes // len(values) if len(values) else 0
+    # Convert some NumPy types to HDF5 before storing.
+    if self.atom.type == 'time64' and len(values):
+      self._convert_time64(values, 0)
+
+    obuf = <long long *>offsets.data
+    vbuf = values.data
+    with nogil:
+        # Point the row handlers to the data of each row
+        wdata = <hvl_t *>malloc(<size_t>nrows*sizeof(hvl_t))
+        for i from 0 <= i < nrows:
+          wdata[i].len = <size_t>(obuf[i+1] - obuf[i])
+          if wdata[i].len > 0:
+            wdata[i].p = vbuf + <size_t>obuf[i]*atomsize
+          else:
+            wdata[i].p = NULL
+        # Append all the records at once
+        ret = H5VLARRAYappend_rows(self.dataset_id, self.type_id,
+                                   nrows, self.nrecords, wdata)
+        free(wdata)
+
+    if ret < 0:
+      raise HDF5ExtError("Problems appending the records.")
+
+    self.nrecords = self.nrecords + nrows
+
   def _modify(self, hsize_t nrow, ndarray nparr, int nobjects):
     cdef int ret
     cdef void *rbuf
@@ -2076,6 +2289,93 @@ cdef class VLArray(Leaf):
 
   _readArray = previous_api(_read_array)
 
+  def _read_array_flat(self, hsize_t start, hsize_t stop, hsize_t step):
+    cdef hsize_t i
+    cdef size_t atomsize, rowsize
+    cdef herr_t ret
+    cdef hvl_t *rdata
+    cdef hsize_t nrows
+    cdef hid_t space_id
+    cdef hid_t mem_space_id
+    cdef long long *obuf
+    cdef char *vbuf
+    cdef ndarray values, offsets
+
+    # Compute the number of rows to read
+    nrows = get_len_of_range(start, stop, step)
+    if start + nrows > self.nrows:
+      raise HDF5ExtError(
+        "Asking for a range of rows exceeding the available ones!.",
+        h5bt=False)
+
+    offsets = numpy.zeros((nrows + 1,), dtype=numpy.int64)
+    if nrows == 0:
+      values = numpy.empty((0,) + self._atomicshape,
+                           dtype=self._atomicdtype.base)
+      return values, offsets
+
+    # Now, read the chunk of rows
+    with nogil:
+        # Allocate the necessary memory for keeping the row handlers
+        rdata = <hvl_t *>malloc(<size_t>nrows*sizeof(hvl_t))
+        # Get the dataspace handle
+        space_id = H5Dget_space(self.dataset_id)
+        # Create a memory dataspace handle
+        mem_space_id = H5Screate_simple(1, &nrows, NULL)
+        # Select the data to be read
+        H5Sselect_hyperslab(space_id, H5S_SELECT_SET, &start, &step, &nrows,
+                            NULL)
+        # Do the actual read
+        ret = H5Dread(self.dataset_id, self.type_id, mem_space_id, space_id,
+                      H5P_DEFAULT, rdata)
+
+    if ret < 0:
+      H5Sclose(mem_space_id)
+      H5Sclose(space_id)
+      free(rdata)
+      raise HDF5ExtError(
+        "VLArray._read_array_flat: Problems reading the array data.")
+
+    # Compute the offsets of the rows in the values array
+    obuf = <long long *>offsets.data
+    for i from 0 <= i < nrows:
+      obuf[i+1] = obuf[i] + rdata[i].len
+
+    # Copy the data of all the rows into a single buffer
+    values = numpy.empty((obuf[nrows],) + self._atomicshape,
+                         dtype=self._atomicdtype.base)
+    atomsize = self._atomicsize
+    vbuf = values.data
+    with nogil:
+        for i from 0 <= i < nrows:
+          rowsize = rdata[i].len * atomsize
+          if rowsize > 0:
+            memcpy(vbuf, rdata[i].p, rowsize)
+            vbuf += rowsize
+
+    if self.atom.kind == 'time' and obuf[nrows] > 0:
+      # Swap the byteorder by hand (this is not currently supported by HDF5)
+      if H5Tget_order(self.type_id) != platform_byteorder:
+        values.byteswap(True)
+      # Convert some HDF5 types to NumPy after reading.
+      if self.atom.type == 'time64':
+        self._convert_time64(values, 1)
+
+    # Release resources
+    # Reclaim all the (nested) VL data
+    ret = H5Dvlen_reclaim(self.type_id, mem_space_id, H5P_DEFAULT, rdata)
+    if ret < 0:
+      raise HDF5ExtError(
+        "VLArray._read_array_flat: error freeing the data buffer.")
+    # Terminate access to the memory dataspace
+    H5Sclose(mem_space_id)
+    # Terminate access to the dataspace
+    H5Sclose(space_id)
+    # Free the amount of row pointers to VL row data
+    free(rdata)
+
+    return values, offsets
+
   def get_row_size(self, row):
     """Return the total size in bytes of all the elements contained in a given row."""
 
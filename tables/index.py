@@ -20,6 +20,8 @@ import os.path
 import tempfile
 import math
 import warnings
+import threading
+from collections import deque
 
 import numpy
 
@@ -565,13 +567,36 @@ class Index(NotLoggedMixin, indexesextension.Index, Group):
         if profile:
             show_stats("Entering initial_append", tref)
         arr = xarr.pop()
-        indsize = self.indsize
-        slicesize = self.slicesize
         nelementsILR = self.nelementsILR
         if profile:
             show_stats("Before creating idx", tref)
+        idx = self.initial_indices(len(arr), nrow)
+        # Add the last row at the beginning of arr & idx (if needed)
+        if (self.indsize == 8 and nelementsILR > 0):
+            # It is possible that the values in LR are already sorted.
+            # Fetch them and override existing values in arr and idx.
+            assert len(arr) > nelementsILR
+            self.read_slice_lr(self.sortedLR, arr[:nelementsILR])
+            self.read_slice_lr(self.indicesLR, idx[:nelementsILR])
+        # In-place sorting
+        if profile:
+            show_stats("Before keysort", tref)
+        larr, arr = self.sort_slice(arr, idx, reduction)
+        # A completely sorted index is not longer possible after an
+        # append of an index with already one slice.
+        if nrow > 0:
+            self._v_attrs.is_csi = False
+        if profile:
+            show_stats("Exiting initial_append", tref)
+        return larr, arr, idx
+
+    def initial_indices(self, nelements, nrow):
+        """Get the initial indices for `nelements` values in slice `nrow`."""
+
+        indsize = self.indsize
+        slicesize = self.slicesize
         if indsize == 8:
-            idx = numpy.arange(0, len(arr), dtype="uint64") + nrow * slicesize
+            idx = numpy.arange(0, nelements, dtype="uint64") + nrow * slicesize
         elif indsize == 4:
             # For medium (32-bit) all the rows in tables should be
             # directly reachable.  But as len(arr) < 2**31, we can
@@ -591,9 +616,9 @@ class Index(NotLoggedMixin, indexesextension.Index, Group):
             # example, in table sorts).
             #
             # F. Alted 2008-09-15
-            idx = numpy.arange(0, len(arr), dtype="uint32")
+            idx = numpy.arange(0, nelements, dtype="uint32")
         else:
-            idx = numpy.empty(len(arr), "uint%d" % (indsize * 8))
+            idx = numpy.empty(nelements, "uint%d" % (indsize * 8))
             lbucket = self.lbucket
             # Fill the idx with the bucket indices
             offset = lbucket - ((nrow * (slicesize % lbucket)) % lbucket)
@@ -605,36 +630,24 @@ class Index(NotLoggedMixin, indexesextension.Index, Group):
                 # First normalize the number of rows
                 offset2 = (nrow % self.nslicesblock) * slicesize // lbucket
                 idx += offset2
-        # Add the last row at the beginning of arr & idx (if needed)
-        if (indsize == 8 and nelementsILR > 0):
-            # It is possible that the values in LR are already sorted.
-            # Fetch them and override existing values in arr and idx.
-            assert len(arr) > nelementsILR
-            self.read_slice_lr(self.sortedLR, arr[:nelementsILR])
-            self.read_slice_lr(self.indicesLR, idx[:nelementsILR])
-        # In-place sorting
-        if profile:
-            show_stats("Before keysort", tref)
+        return idx
+
+    def sort_slice(self, arr, idx, reduction):
+        """Sort `arr` in-place (with `idx`) and reduce it.
+
+        The last sorted value and the (maybe reduced) sorted array are
+        returned.  Neither the index nor its file are touched, so this
+        can be run in another thread.
+
+        """
+
         indexesextension.keysort(arr, idx)
         larr = arr[-1]
         if reduction > 1:
             # It's important to do a copy() here in order to ensure that
             # sorted._append() will receive a contiguous array.
-            if profile:
-                show_stats("Before reduction", tref)
-            reduc = arr[::reduction].copy()
-            if profile:
-                show_stats("After reduction", tref)
-            arr = reduc
-            if profile:
-                show_stats("After arr <-- reduc", tref)
-        # A completely sorted index is not longer possible after an
-        # append of an index with already one slice.
-        if nrow > 0:
-            self._v_attrs.is_csi = False
-        if profile:
-            show_stats("Exiting initial_append", tref)
-        return larr, arr, idx
+            arr = arr[::reduction].copy()
+        return larr, arr
 
     def final_idx32(self, idx, offset):
         """Perform final operations in 32-bit indices."""
@@ -656,6 +669,14 @@ class Index(NotLoggedMixin, indexesextension.Index, Group):
             show_stats("Exiting final_idx32", tref)
         return idx
 
+    def _get_append_target(self, update):
+        """Get the object to append slices to and their reduction."""
+
+        if not update and self.temp_required:
+            # The reduction will take place *after* the optimization process
+            return (self.tmp, 1)
+        return (self, self.reduction)
+
     def append(self, xarr, update=False):
         """Append the array to the index objects."""
 
@@ -663,13 +684,90 @@ class Index(NotLoggedMixin, indexesextension.Index, Group):
             tref = time()
         if profile:
             show_stats("Entering append", tref)
-        if not update and self.temp_required:
-            where = self.tmp
-            # The reduction will take place *after* the optimization process
-            reduction = 1
-        else:
-            where = self
-            reduction = self.reduction
+        where, reduction = self._get_append_target(update)
+        nrows = where.sorted.nrows  # before sorted.append()
+        larr, arr, idx = self.initial_append(xarr, nrows, reduction)
+        self._append_sorted(where, reduction, nrows, larr, arr, idx)
+        if profile:
+            show_stats("Exiting append", tref)
+
+    def append_slices(self, slices, nthreads, update=False):
+        """Append several arrays to the index objects, sorting in parallel.
+
+        The arrays in the `slices` iterable are taken in this thread, so
+        they may be read from the file while being consumed.  Up to
+        `nthreads` of them are sorted at a time by different threads
+        (``keysort`` releases the GIL), keeping no more of them in
+        memory than allowed by the ``INDEX_BUILD_MEMORY`` parameter, and
+        they are appended in order.  The result is the same as calling
+        `append()` for each array.
+
+        """
+
+        where, reduction = self._get_append_target(update)
+        slicebytes = self.slicesize * (self.dtype.itemsize + 8)
+        nbatch = max(1, self._v_file.params['INDEX_BUILD_MEMORY'] //
+                     slicebytes)
+        slices = iter(slices)
+        if self.nelementsILR > 0:
+            # The first slice takes the values in the last row
+            for arr in slices:
+                self.append([arr], update)
+                break
+        while True:
+            batch = []
+            for arr in slices:
+                batch.append(arr)
+                if len(batch) == nbatch:
+                    break
+            if not batch:
+                break
+            nrows = where.sorted.nrows
+            results = [None] * len(batch)
+            # The initial indices depend on index attributes (and on the
+            # table), so they are computed here and the workers only
+            # deal with NumPy arrays.
+            pending = deque(
+                (i, arr, self.initial_indices(len(arr), nrows + i))
+                for (i, arr) in enumerate(batch))
+            errors = []
+
+            def sort_slices():
+                while not errors:
+                    try:
+                        i, arr, idx = pending.popleft()
+                    except IndexError:
+                        break
+                    try:
+                        larr, arr = self.sort_slice(arr, idx, reduction)
+                        results[i] = (larr, arr, idx)
+                    except Exception as exc:
+                        errors.append(exc)
+
+            workers = [threading.Thread(target=sort_slices)
+                       for i in xrange(min(nthreads, len(batch)))]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            if errors:
+                raise errors[0]
+            del batch
+            # A completely sorted index is not longer possible after an
+            # append of an index with already one slice.
+            if nrows + len(results) > 1:
+                self._v_attrs.is_csi = False
+            for i in xrange(len(results)):
+                larr, arr, idx = results[i]
+                results[i] = None
+                self._append_sorted(where, reduction, nrows + i,
+                                    larr, arr, idx)
+
+    def _append_sorted(self, where, reduction, nrows, larr, arr, idx):
+        """Append a sorted slice to the `where` index objects."""
+
+        if profile:
+            tref = time()
         sorted = where.sorted
         indices = where.indices
         ranges = where.ranges
@@ -680,8 +778,6 @@ class Index(NotLoggedMixin, indexesextension.Index, Group):
         zbounds = where.zbounds
         sortedLR = where.sortedLR
         indicesLR = where.indicesLR
-        nrows = sorted.nrows  # before sorted.append()
-        larr, arr, idx = self.initial_append(xarr, nrows, reduction)
         # Save the sorted array
         sorted.append(arr.reshape(1, arr.size))
         cs = self.chunksize // reduction
@@ -718,8 +814,6 @@ class Index(NotLoggedMixin, indexesextension.Index, Group):
         sortedLR.attrs.nelements = self.nelementsSLR
         indicesLR.attrs.nelements = self.nelementsILR
         self.dirtycache = True   # the cache is dirty now
-        if profile:
-            show_stats("Exiting append", tref)
 
     def append_last_row(self, xarr, update=False):
         """Append the array to the last row index objects."""
@@ -132,45 +132,67 @@ def keysort(ndarray array1, ndarray array2):
   array1 can be of any type, except complex or string.  array2 may be made of
   elements on any size.
 
+  The GIL is released while sorting, so several arrays can be sorted by
+  different threads at the same time.
+
   """
 
   cdef npy_intp size
-  cdef int elsize1, elsize2
+  cdef int elsize1, elsize2, ret
+  cdef char *data1
+  cdef char *data2
 
   size = array1.size
   elsize1 = array1.itemsize
   elsize2 = array2.itemsize
+  data1 = array1.data
+  data2 = array2.data
   if array1.dtype == "float64":
-    return keysort_f64(<npy_float64 *>array1.data, array2.data, size, elsize2)
+    with nogil:
+      ret = keysort_f64(<npy_float64 *>data1, data2, size, elsize2)
   elif array1.dtype == "float32":
-    return keysort_f32(<npy_float32 *>array1.data, array2.data, size, elsize2)
+    with nogil:
+      ret = keysort_f32(<npy_float32 *>data1, data2, size, elsize2)
   # elif array1.dtype == "float16": # raises an error if float16 is not defined
   elif array1.dtype.name == "float16":
-    return keysort_f16(<npy_float16 *>array1.data, array2.data, size, elsize2)
+    with nogil:
+      ret = keysort_f16(<npy_float16 *>data1, data2, size, elsize2)
   elif array1.dtype.name == "float96":
-    return keysort_f96(<npy_float96 *>array1.data, array2.data, size, elsize2)
+    with nogil:
+      ret = keysort_f96(<npy_float96 *>data1, data2, size, elsize2)
   elif array1.dtype.name == "float128":
-    return keysort_f128(<npy_float128 *>array1.data, array2.data, size, elsize2)
+    with nogil:
+      ret = keysort_f128(<npy_float128 *>data1, data2, size, elsize2)
   elif array1.dtype == "int64":
-    return keysort_i64(<npy_int64 *>array1.data, array2.data, size, elsize2)
+    with nogil:
+      ret = keysort_i64(<npy_int64 *>data1, data2, size, elsize2)
   elif array1.dtype == "uint64":
-    return keysort_u64(<npy_uint64 *>array1.data, array2.data, size, elsize2)
+    with nogil:
+      ret = keysort_u64(<npy_uint64 *>data1, data2, size, elsize2)
   elif array1.dtype == "int32":
-    return keysort_i32(<npy_int32 *>array1.data, array2.data, size, elsize2)
+    with nogil:
+      ret = keysort_i32(<npy_int32 *>data1, data2, size, elsize2)
   elif array1.dtype == "uint32":
-    return keysort_u32(<npy_uint32 *>array1.data, array2.data, size, elsize2)
+    with nogil:
+      ret = keysort_u32(<npy_uint32 *>data1, data2, size, elsize2)
   elif array1.dtype == "int16":
-    return keysort_i16(<npy_int16 *>array1.data, array2.data, size, elsize2)
+    with nogil:
+      ret = keysort_i16(<npy_int16 *>data1, data2, size, elsize2)
   elif array1.dtype == "uint16":
-    return keysort_u16(<npy_uint16 *>array1.data, array2.data, size, elsize2)
+    with nogil:
+      ret = keysort_u16(<npy_uint16 *>data1, data2, size, elsize2)
   elif array1.dtype == "int8":
-    return keysort_i8(<npy_int8 *>array1.data, array2.data, size, elsize2)
+    with nogil:
+      ret = keysort_i8(<npy_int8 *>data1, data2, size, elsize2)
   elif array1.dtype == "uint8":
-    return keysort_u8(<npy_uint8 *>array1.data, array2.data, size, elsize2)
+    with nogil:
+      ret = keysort_u8(<npy_uint8 *>data1, data2, size, elsize2)
   elif array1.dtype == "bool":
-    return keysort_u8(<npy_uint8 *>array1.data, array2.data, size, elsize2)
+    with nogil:
+      ret = keysort_u8(<npy_uint8 *>data1, data2, size, elsize2)
   elif array1.dtype.char == "S":
-    return keysort_S(array1.data, elsize1, array2.data, size, elsize2)
+    with nogil:
+      ret = keysort_S(data1, elsize1, data2, size, elsize2)
     # As it turns out, an indirect sort is always faster, and much faster on
     # new processors.  See
     # http://www.mail-archive.com/numpy-discussion@scipy.org/msg06639.html
@@ -184,6 +206,7 @@ def keysort(ndarray array1, ndarray array2):
     #return 0
   else:
     raise ValueError("This shouldn't happen!")
+  return ret
 
 
 # Classes
@@ -14,6 +14,7 @@
 
 import warnings
 import math
+import weakref
 
 import numpy
 
@@ -21,7 +22,7 @@ from tables.flavor import (check_flavor, internal_flavor,
                            alias_map as flavor_alias_map)
 from tables.node import Node
 from tables.filters import Filters
-from tables.utils import byteorders, lazyattr, SizeType
+from tables.utils import byteorders, lazyattr, SizeType, WriteBehind
 from tables.exceptions import PerformanceWarning
 from tables import utilsextension
 from tables._past import previous_api
@@ -242,6 +243,10 @@ class Leaf(Node):
         """
         self._flavor = None
         """Private storage for the `flavor` property."""
+        self._v_readaheads = weakref.WeakKeyDictionary()
+        """The background readers (`ReadAhead`) of prefetching iterators."""
+        self._v_writebehind = None
+        """The background writer (`WriteBehind`) of appended data, if any."""
 
         if new:
             # Get filter properties from parent group if not given.
@@ -737,6 +742,7 @@ very small/large chunksize, you may want to increase/decrease it."""
 
         """
 
+        self._g_drain_write_behind()
         self._g_flush()
 
     def _f_close(self, flush=True):
@@ -751,6 +757,9 @@ very small/large chunksize, you may want to increase/decrease it."""
         if not self._v_isopen:
             return  # the node is already closed or not initialized
 
+        self._g_close_readaheads()
+        self._g_stop_write_behind()
+
         # Only do a flush in case the leaf has an IO buffer.  The
         # internal buffers of HDF5 will be flushed afterwards during the
         # self._g_close() call.  Avoiding an unnecessary flush()
@@ -764,6 +773,39 @@ very small/large chunksize, you may want to increase/decrease it."""
         # Close myself as a node.
         super(Leaf, self)._f_close()
 
+    def _g_get_write_behind(self):
+        if self._v_writebehind is None:
+            return 0
+        return self._v_writebehind.maxbatches
+
+    def _g_set_write_behind(self, maxbatches):
+        self._g_check_open()
+        self._g_stop_write_behind()
+        if maxbatches > 0:
+            self._v_file._check_writable()
+            self._v_writebehind = WriteBehind(maxbatches)
+
+    def _g_drain_write_behind(self):
+        """Wait for the background writer to write the queued data."""
+
+        if self._v_writebehind is not None:
+            self._v_writebehind.drain()
+
+    def _g_stop_write_behind(self):
+        """Write the queued data and stop the background writer."""
+
+        writebehind = self._v_writebehind
+        if writebehind is not None:
+            self._v_writebehind = None
+            writebehind.close()
+
+    def _g_close_readaheads(self):
+        """Stop the background readers of prefetching iterators."""
+
+        for readahead in list(self._v_readaheads.keys()):
+            readahead.close()
+        self._v_readaheads.clear()
+
     def close(self, flush=True):
         """Close this node in the tree.
 
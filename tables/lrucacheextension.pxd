@@ -16,10 +16,11 @@ from numpy cimport ndarray
 # The NodeCache class is useful for caching general objects (like Nodes).
 cdef class NodeCache:
   cdef readonly long nslots
-  cdef long nextslot
-  cdef object nodes, paths
+  cdef readonly long hits, misses, evictions
+  cdef object links, root
+  cdef unlink(self, object link)
+  cdef append(self, object link)
   cdef object setitem(self, object path, object node)
-  cdef long getslot(self, object path)
   cdef object cpop(self, object path)
 
 
@@ -76,6 +77,55 @@ cdef class NumCache(BaseCache):
   cdef void *getitem1_(self, long nslot)
 
 
+# Link in the queues of a ChunkCache or SharedChunkCache
+cdef class _ChunkLink:
+  cdef _ChunkLink prev, next
+  cdef object key
+  cdef ndarray data
+  cdef int queue
+
+
+# Accounting of the memory used by several caches
+cdef class CacheBudget:
+  cdef readonly object maxsize
+  cdef readonly long long size
+  cdef object caches
+  cdef long long getmaxsize(self)
+  cdef int reserve(self, long long nbytes)
+  cdef release(self, long long nbytes)
+  cdef add(self, object cache)
+  cdef int evict(self)
+
+
+# The ChunkCache class is useful for caching chunks of tables with a 2Q policy
+cdef class ChunkCache:
+  cdef readonly long slotsize, itemsize
+  cdef readonly long long maxsize, size
+  cdef readonly long hits, misses, evictions
+  cdef long long slotnbytes, ainsize, kin
+  cdef long kout
+  cdef object dtype, name, budgets, links, ghosts
+  cdef object __weakref__
+  cdef _ChunkLink ainroot, amroot, aoutroot
+  cdef object reserve(self, long long nbytes)
+  cdef int evict(self)
+  cdef int getitem_(self, long long key, void *data)
+  cdef setitem_(self, long long key, void *data)
+
+
+# The SharedChunkCache class is useful for sharing chunks among files
+cdef class SharedChunkCache:
+  cdef readonly object maxsize
+  cdef readonly long long size
+  cdef readonly long hits, misses, evictions
+  cdef object links
+  cdef _ChunkLink root
+  cdef long long getmaxsize(self)
+  cdef discard(self, _ChunkLink link)
+  cdef int getitem_(self, object key, void *data, long long nbytes)
+  cdef setitem_(self, object key, void *data, long long nbytes)
+
+
 ## Local Variables:
 ## mode: python
 ## py-indent-offset: 2
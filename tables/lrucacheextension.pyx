@@ -17,23 +17,27 @@ Classes (type extensions):
     NodeCache
     ObjectCache
     NumCache
+    ChunkCache
+    CacheBudget
+    SharedChunkCache
 
 Functions:
 
 Misc variables:
 
-"""
+    chunk_cache_budget
+    shared_chunk_cache
 
-cdef extern from "Python.h":
-    int PyUnicode_Compare(object, object)
+"""
 
 import sys
+import weakref
 
 import numpy
-from libc.string cimport memcpy, strcmp
-from cpython.unicode cimport PyUnicode_Check
+from libc.string cimport memcpy
 from numpy cimport import_array, ndarray
 
+from tables import parameters
 from tables.parameters import (DISABLE_EVERY_CYCLES, ENABLE_EVERY_CYCLES,
   LOWEST_HIT_RATIO)
 
@@ -49,23 +53,27 @@ import_array()
 
 # ------- Minimalist NodeCache for nodes in PyTables ---------
 
-# The next NodeCache code relies on the fact that a node that is
-# fetched from the cache will be removed from it. Said in other words:
-# "A node cannot be alive and dead at the same time."
+# Nodes are kept in a dictionary indexed by path, which points to the
+# links of a circular doubly linked list ordered from the least to the
+# most recently used node.  Lookups, promotions and evictions take
+# constant time, so the cache can hold a large number of nodes.
 
-# Thanks to the above behaviour, the next code has been stripped down
-# to a bare minimum (the info in cache is kept in just 2 lists).
+cdef class _NodeLink:
+  """Link in the list of nodes of a `NodeCache`."""
 
-#*********************** Important note! *****************************
-# The code behind has been carefully tuned to serve the needs of
-# PyTables cache for nodes. As a consequence, it is no longer
-# appropriate as a general LRU cache implementation. You have been
-# warned!.  F. Alted 2006-08-08
-#*********************************************************************
+  cdef _NodeLink prev, next
+  cdef object path, node
 
 
 cdef class NodeCache:
-  """Least-Recently-Used (LRU) cache for PyTables nodes."""
+  """Least-Recently-Used (LRU) cache for PyTables nodes.
+
+  The number of lookups with `get()` finding (or not) a node in the cache
+  is kept in the ``hits`` (and ``misses``) attribute, and the number of
+  least recently used nodes discarded to make room for others in the
+  ``evictions`` attribute.
+
+  """
 
   def __init__(self, nslots):
     """Maximum nslots of the cache.
@@ -75,75 +83,90 @@ cdef class NodeCache:
 
     """
 
+    cdef _NodeLink root
+
     if nslots < 0:
       raise ValueError("Negative number (%s) of slots!" % nslots)
     self.nslots = nslots
-    self.nextslot = 0
-    self.nodes = []
-    self.paths = []
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
+    self.links = {}
+    root = _NodeLink()
+    root.prev = root.next = root
+    self.root = root
 
   def __len__(self):
-    return len(self.nodes)
+    return len(self.links)
 
   def __setitem__(self, path, node):
     self.setitem(path, node)
 
+  cdef unlink(self, object link):
+    """Remove the `link` from the list of nodes."""
+
+    cdef _NodeLink clink = link
+
+    clink.prev.next = clink.next
+    clink.next.prev = clink.prev
+
+  cdef append(self, object link):
+    """Add the `link` at the end (most recently used) of the list."""
+
+    cdef _NodeLink clink = link
+    cdef _NodeLink root = self.root
+
+    clink.prev = root.prev
+    clink.next = root
+    root.prev.next = clink
+    root.prev = clink
+
   cdef setitem(self, object path, object node):
     """Puts a new node in the node list."""
 
+    cdef _NodeLink link
+
     if self.nslots == 0:   # Oops, the cache is set to empty
       return
+    link = self.links.get(path)
+    if link is not None:
+      link.node = node
+      self.unlink(link)
+      self.append(link)
+      return
     # Check if we are growing out of space
-    if self.nextslot == self.nslots:
-      # It is critical to reduce nextslot *before* the preemption of
-      # the LRU node.  If not, this can lead with problems in situations
-      # with very small caches (length 1 or so).
-      # F. Alted 2008-10-22
-      self.nextslot = self.nextslot - 1
-      # Remove the LRU node and path (the start of the lists)
-      del self.nodes[0]
-      del self.paths[0]
-    # The equality protection has been put for situations in which a
-    # node is being preempted and added simultaneously (with very small
-    # caches).
-    if len(self.nodes) == len(self.paths):
-      # Add the node and path to the end of its lists
-      self.nodes.append(node)
-      self.paths.append(path)
-      self.nextslot = self.nextslot + 1
+    if len(self.links) >= self.nslots:
+      # Remove the LRU node and path (the start of the list)
+      link = (<_NodeLink>self.root).next
+      self.unlink(link)
+      del self.links[link.path]
+      self.evictions = self.evictions + 1
+    link = _NodeLink()
+    link.path = path
+    link.node = node
+    self.append(link)
+    self.links[path] = link
 
   def __contains__(self, path):
-    if self.getslot(path) == -1:
-      return 0
-    else:
-      return 1
+    return path in self.links
 
-  cdef long getslot(self, object path):
-    """Checks whether path is in this cache or not."""
+  def get(self, path, default=None):
+    """Get the node for `path` and make it the most recently used.
 
-    cdef long i, nslot, compare
+    If the node is not in the cache, `default` is returned.
 
-    nslot = -1  # -1 means not found
-    if PyUnicode_Check(path):
-        # Start looking from the trailing values (most recently used)
-        for i from self.nextslot > i >= 0:
-          #if strcmp(<char *>encoded_path, <char *>self.paths[i]) == 0:
-          if PyUnicode_Compare(path, self.paths[i]) == 0:
-            nslot = i
-            break
-    else:
-        # Start looking from the trailing values (most recently used)
-        for i from self.nextslot > i >= 0:
-          #if strcmp(<char *>path, <char *>self.paths[i]) == 0:
-          if PyUnicode_Check(self.paths[i]):
-            compare = PyUnicode_Compare(path, self.paths[i])
-          else:
-            compare = strcmp(<char *>path, <char *>self.paths[i])
-          if compare == 0:
-            nslot = i
-            break
+    """
 
-    return nslot
+    cdef _NodeLink link
+
+    link = self.links.get(path)
+    if link is None:
+      self.misses = self.misses + 1
+      return default
+    self.hits = self.hits + 1
+    self.unlink(link)
+    self.append(link)
+    return link.node
 
   __marker = object()
 
@@ -159,26 +182,28 @@ cdef class NodeCache:
       return node
 
   cdef object cpop(self, object path):
-    cdef long nslot
+    cdef _NodeLink link
 
-    nslot = self.getslot(path)
-    if nslot == -1:
-        raise KeyError(path)
-    else:
-        node = self.nodes[nslot]
-        del self.nodes[nslot]
-        del self.paths[nslot]
-        self.nextslot = self.nextslot - 1
+    link = self.links.pop(path)
+    self.unlink(link)
+    node = link.node
+    link.node = None
     return node
 
   def __iter__(self):
-    # Do a copy of the paths list because it can be modified in the middle of
+    # Do a copy of the paths because they can be modified in the middle of
     # the iterator!
-    copy = self.paths[:]
-    return iter(copy)
+    cdef _NodeLink link
+
+    paths = []
+    link = (<_NodeLink>self.root).next
+    while link is not self.root:
+      paths.append(link.path)
+      link = link.next
+    return iter(paths)
 
   def __repr__(self):
-    return "<%s (%d elements)>" % (str(self.__class__), len(self.paths))
+    return "<%s (%d elements)>" % (str(self.__class__), len(self.links))
 
 
 ########################################################################
@@ -633,6 +658,429 @@ cdef class NumCache(BaseCache):
          cachesize, hitratio, self.iscachedisabled)
 
 
+
+########################################################################
+#  Byte-budgeted chunk cache with a 2Q replacement policy
+########################################################################
+
+# The 2Q policy (T. Johnson and D. Shasha, 1994) keeps chunks read for the
+# first time in a FIFO queue (A1in) using up to a quarter of the cache.
+# Chunks evicted from A1in leave their key in a queue of ghosts (A1out),
+# and only chunks read again while they are in A1in or A1out enter the
+# main LRU queue (Am).  Scans of chunks read once thus do not flush the
+# hot working set from the cache.
+
+cdef enum:
+  QUEUE_AIN = 0
+  QUEUE_AM = 1
+  QUEUE_AOUT = 2
+
+
+cdef class _ChunkLink:
+  """Link in the queues of a `ChunkCache`."""
+  pass
+
+
+cdef inline _unlink(_ChunkLink link):
+  link.prev.next = link.next
+  link.next.prev = link.prev
+
+
+cdef inline _append(_ChunkLink root, _ChunkLink link):
+  link.prev = root.prev
+  link.next = root
+  root.prev.next = link
+  root.prev = link
+
+
+cdef _ChunkLink _new_root():
+  cdef _ChunkLink root = _ChunkLink()
+  root.prev = root.next = root
+  return root
+
+
+cdef class CacheBudget:
+  """Accounting of the memory used by a group of caches.
+
+  Caches reserve the bytes of the data they keep from their budgets and
+  release them when the data is discarded.  When `maxsize` is `None`,
+  the ``TABLE_CACHE_GLOBAL_SIZE`` parameter is used.
+
+  The budget keeps weak references to its caches, so that room can be
+  made by discarding chunks of the largest of them when it is exhausted.
+
+  """
+
+  def __init__(self, maxsize=None):
+    self.maxsize = maxsize
+    self.size = 0
+    self.caches = weakref.WeakValueDictionary()
+
+  cdef long long getmaxsize(self):
+    if self.maxsize is None:
+      return parameters.TABLE_CACHE_GLOBAL_SIZE
+    return self.maxsize
+
+  cdef int reserve(self, long long nbytes):
+    if self.size + nbytes > self.getmaxsize():
+      return False
+    self.size = self.size + nbytes
+    return True
+
+  cdef release(self, long long nbytes):
+    self.size = self.size - nbytes
+
+  cdef add(self, object cache):
+    self.caches[id(cache)] = cache
+
+  cdef int evict(self):
+    """Discard a chunk from the largest cache using the budget.
+
+    Returns false if there was nothing to discard.
+
+    """
+
+    cdef ChunkCache cache, largest
+
+    largest = None
+    for cache in self.caches.values():
+      if largest is None or cache.size > largest.size:
+        largest = cache
+    if largest is None:
+      return False
+    return largest.evict()
+
+  def __repr__(self):
+    return "<%s (%d bytes used out of %d)>" % (
+      str(self.__class__), self.size, self.getmaxsize())
+
+
+chunk_cache_budget = CacheBudget()
+"""The budget shared by the chunk caches of all tables in the process."""
+
+
+cdef class ChunkCache:
+  """Cache for table chunks with a 2Q replacement policy.
+
+  The cache keeps up to `maxsize` bytes of chunks, each one made of
+  `slotsize` elements of type `dtype`.  The memory used is also reserved
+  from every `CacheBudget` in `budgets`.  When some budget is exhausted,
+  chunks are discarded from the largest cache using it (which may be
+  this one or another one) until there is room, and the chunk is not
+  cached if all those caches are empty.
+
+  The number of lookups finding (or not) a chunk in the cache is kept in
+  the ``hits`` (and ``misses``) attribute, and the number of chunks
+  discarded to make room for others in the ``evictions`` attribute.
+
+  """
+
+  def __init__(self, long slotsize, object dtype, long long maxsize,
+               object budgets=(), object name='chunk cache'):
+    if maxsize < 0:
+      raise ValueError("Negative size (%s) of the cache!" % maxsize)
+    self.dtype = numpy.dtype(dtype)
+    self.slotsize = slotsize
+    self.itemsize = self.dtype.itemsize
+    self.slotnbytes = slotsize * self.itemsize
+    self.maxsize = maxsize
+    self.budgets = tuple(budgets)
+    for budget in self.budgets:
+      (<CacheBudget?>budget).add(self)
+    self.name = name
+    self.size = 0
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
+    # A quarter of the cache for A1in and ghosts for half of its chunks
+    self.ainsize = 0
+    self.kin = maxsize // 4
+    if self.slotnbytes > 0:
+      self.kout = max(1, <long>(maxsize // self.slotnbytes // 2))
+    else:
+      self.kout = 1
+    self.links = {}
+    self.ghosts = {}
+    self.ainroot = _new_root()
+    self.amroot = _new_root()
+    self.aoutroot = _new_root()
+
+  def __len__(self):
+    return len(self.links)
+
+  def __contains__(self, long long key):
+    return key in self.links
+
+  cdef object reserve(self, long long nbytes):
+    """Reserve `nbytes` from the cache and all its budgets.
+
+    Returns `None` on success.  Otherwise nothing is reserved, and the
+    cache itself or the budget which has no room left is returned.
+
+    """
+
+    cdef CacheBudget budget
+    cdef long i, j
+
+    if self.size + nbytes > self.maxsize:
+      return self
+    for i in range(len(self.budgets)):
+      budget = self.budgets[i]
+      if not budget.reserve(nbytes):
+        for j in range(i):
+          (<CacheBudget>self.budgets[j]).release(nbytes)
+        return budget
+    self.size = self.size + nbytes
+    return None
+
+  cdef int evict(self):
+    """Discard a chunk following the 2Q policy.
+
+    Returns false if there was nothing to discard.
+
+    """
+
+    cdef _ChunkLink link, ghost
+    cdef CacheBudget budget
+
+    if self.ainsize > self.kin or self.amroot.next is self.amroot:
+      link = self.ainroot.next
+    else:
+      link = self.amroot.next
+    if link is self.ainroot:
+      return False
+    _unlink(link)
+    del self.links[link.key]
+    link.data = None
+    self.size = self.size - self.slotnbytes
+    for budget in self.budgets:
+      budget.release(self.slotnbytes)
+    self.evictions = self.evictions + 1
+    if link.queue == QUEUE_AIN:
+      # Remember the key of the chunk in the ghosts queue
+      self.ainsize = self.ainsize - self.slotnbytes
+      link.queue = QUEUE_AOUT
+      _append(self.aoutroot, link)
+      self.ghosts[link.key] = link
+      if len(self.ghosts) > self.kout:
+        ghost = self.aoutroot.next
+        _unlink(ghost)
+        del self.ghosts[ghost.key]
+    return True
+
+  def getitem(self, long long key, ndarray nparr):
+    """Copy the chunk for `key` into `nparr` and return true if cached."""
+
+    return bool(self.getitem_(key, nparr.data))
+
+  # Copy the chunk for key to data, if it is cached.  The user should be
+  # responsible to provide a large enough data buffer.
+  cdef int getitem_(self, long long key, void *data):
+    cdef _ChunkLink link
+
+    link = self.links.get(key)
+    if link is None:
+      self.misses = self.misses + 1
+      return False
+    self.hits = self.hits + 1
+    if link.queue == QUEUE_AM:
+      # Make it the most recently used chunk
+      _unlink(link)
+      _append(self.amroot, link)
+    memcpy(data, link.data.data, self.slotnbytes)
+    return True
+
+  def setitem(self, long long key, ndarray nparr):
+    """Put a copy of the chunk in `nparr` in the cache under `key`."""
+
+    self.setitem_(key, nparr.data)
+
+  # Copy a new chunk from data into the cache
+  cdef setitem_(self, long long key, void *data):
+    cdef _ChunkLink link
+    cdef object full
+    cdef int evicted
+
+    if key in self.links:
+      link = self.links[key]
+    else:
+      # Make room for the chunk, in this cache or in the largest one
+      # sharing an exhausted budget
+      while True:
+        full = self.reserve(self.slotnbytes)
+        if full is None:
+          break
+        if full is self:
+          evicted = self.evict()
+        else:
+          evicted = (<CacheBudget>full).evict()
+        if not evicted:
+          return
+      link = self.ghosts.pop(key, None)
+      if link is not None:
+        # The chunk was read again after being evicted from A1in
+        _unlink(link)
+        link.queue = QUEUE_AM
+        _append(self.amroot, link)
+      else:
+        link = _ChunkLink()
+        link.key = key
+        link.queue = QUEUE_AIN
+        _append(self.ainroot, link)
+        self.ainsize = self.ainsize + self.slotnbytes
+      link.data = numpy.empty(self.slotsize, dtype=self.dtype)
+      self.links[key] = link
+    memcpy(link.data.data, data, self.slotnbytes)
+
+  def clear(self):
+    """Discard all the chunks in the cache (statistics are kept)."""
+
+    cdef CacheBudget budget
+
+    for budget in self.budgets:
+      budget.release(self.size)
+    self.size = 0
+    self.ainsize = 0
+    self.links.clear()
+    self.ghosts.clear()
+    self.ainroot = _new_root()
+    self.amroot = _new_root()
+    self.aoutroot = _new_root()
+
+  def __repr__(self):
+    if self.hits + self.misses > 0:
+      hitratio = <double>self.hits / (self.hits + self.misses)
+    else:
+      hitratio = numpy.nan
+    return """<%s(%s)
+  (%d slots used, %.3f KB used out of %.3f KB,
+  hits: %d, misses: %d, evictions: %d, hit ratio: %.3f)>
+  """ % (self.name, str(self.__class__), len(self.links),
+         self.size / 1024., self.maxsize / 1024.,
+         self.hits, self.misses, self.evictions, hitratio)
+
+
+
+########################################################################
+#  Process-wide LRU cache of chunks shared among files
+########################################################################
+
+cdef class SharedChunkCache:
+  """Least-Recently-Used (LRU) cache of chunks shared by several files.
+
+  Chunks are keyed by arbitrary hashable objects; `File` and `Table` use
+  ``(file identity, table path, chunk number)`` tuples, where the identity
+  is a tuple whose first item is the location of the file.  The cache
+  keeps up to `maxsize` bytes of chunks, and the ``SHARED_CHUNK_CACHE_SIZE``
+  parameter is used when it is `None`.
+
+  The number of lookups finding (or not) a chunk in the cache is kept in
+  the ``hits`` (and ``misses``) attribute, and the number of chunks
+  discarded to make room for others in the ``evictions`` attribute.
+
+  """
+
+  def __init__(self, maxsize=None):
+    self.maxsize = maxsize
+    self.size = 0
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
+    self.links = {}
+    self.root = _new_root()
+
+  def __len__(self):
+    return len(self.links)
+
+  def __contains__(self, key):
+    return key in self.links
+
+  def __iter__(self):
+    return iter(list(self.links))
+
+  cdef long long getmaxsize(self):
+    if self.maxsize is None:
+      return parameters.SHARED_CHUNK_CACHE_SIZE
+    return self.maxsize
+
+  cdef discard(self, _ChunkLink link):
+    _unlink(link)
+    del self.links[link.key]
+    self.size = self.size - link.data.nbytes
+    link.data = None
+
+  def getitem(self, key, ndarray nparr):
+    """Copy the chunk for `key` into `nparr` and return true if cached."""
+
+    return bool(self.getitem_(key, nparr.data, nparr.nbytes))
+
+  # Copy the chunk for key to data, if it is cached with nbytes bytes.
+  cdef int getitem_(self, object key, void *data, long long nbytes):
+    cdef _ChunkLink link
+
+    link = self.links.get(key)
+    if link is None or link.data.nbytes != nbytes:
+      self.misses = self.misses + 1
+      return False
+    self.hits = self.hits + 1
+    # Make it the most recently used chunk
+    _unlink(link)
+    _append(self.root, link)
+    memcpy(data, link.data.data, nbytes)
+    return True
+
+  def setitem(self, key, ndarray nparr):
+    """Put a copy of the chunk in `nparr` in the cache under `key`."""
+
+    self.setitem_(key, nparr.data, nparr.nbytes)
+
+  # Copy a new chunk of nbytes bytes from data into the cache
+  cdef setitem_(self, object key, void *data, long long nbytes):
+    cdef _ChunkLink link
+    cdef long long maxsize
+
+    link = self.links.get(key)
+    if link is not None:
+      self.discard(link)
+    maxsize = self.getmaxsize()
+    if nbytes > maxsize:
+      return
+    # Remove the least recently used chunks (the start of the list)
+    while self.size + nbytes > maxsize:
+      self.discard(self.root.next)
+      self.evictions = self.evictions + 1
+    link = _ChunkLink()
+    link.key = key
+    link.data = numpy.empty(nbytes, dtype=numpy.uint8)
+    memcpy(link.data.data, data, nbytes)
+    _append(self.root, link)
+    self.links[key] = link
+    self.size = self.size + nbytes
+
+  def invalidate(self, fileid):
+    """Discard the chunks of the file with identity `fileid`."""
+
+    for key in [key for key in self.links if key[0] == fileid]:
+      self.discard(self.links[key])
+
+  def clear(self):
+    """Discard all the chunks in the cache (statistics are kept)."""
+
+    self.links.clear()
+    self.root = _new_root()
+    self.size = 0
+
+  def __repr__(self):
+    return ("<%s (%d chunks, %d bytes, hits: %d, misses: %d, "
+            "evictions: %d)>" % (str(self.__class__), len(self.links),
+                                 self.size, self.hits, self.misses,
+                                 self.evictions))
+
+
+shared_chunk_cache = SharedChunkCache()
+"""The cache of table chunks shared by files opened in read-only mode."""
+
+
 ## Local Variables:
 ## mode: python
 ## py-indent-offset: 2
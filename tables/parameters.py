@@ -52,7 +52,53 @@ LIMBOUNDS_MAX_SLOTS = 128
 """The maximum number of slots for LIMBOUNDS cache."""
 
 TABLE_MAX_SIZE = 1 * _MB
-"""The maximum size for table chunks cached during index queries."""
+"""The maximum size for table chunks cached during index queries.
+
+.. versionchanged:: 3.1.2
+   The cache is no longer limited to 65535 chunks and it is never disabled
+   because of a low hit ratio.  It uses a 2Q replacement policy, and its
+   ``hits``, ``misses`` and ``evictions`` attributes (in
+   ``Table._chunkcache``) can help sizing it.
+
+"""
+
+TABLE_CACHE_FILE_SIZE = 64 * _MB
+"""The maximum size for table chunks cached during index queries, summed
+over all the tables in a file.
+
+.. versionadded:: 3.1.2
+
+"""
+
+TABLE_CACHE_GLOBAL_SIZE = 256 * _MB
+"""The maximum size for table chunks cached during index queries, summed
+over all the tables in the process.  Unlike ``TABLE_CACHE_FILE_SIZE``,
+this is read from the `tables.parameters` module, not from file
+parameters.
+
+.. versionadded:: 3.1.2
+
+"""
+
+SHARED_CHUNK_CACHE = False
+"""Whether tables of a file opened in read-only mode use the cache of table
+chunks shared by all the files in the process (see
+``SHARED_CHUNK_CACHE_SIZE``) instead of their own chunk caches.  All the
+read-only handles of a file opened with this enabled share the chunks
+read during index queries, as long as the file is not modified.
+
+.. versionadded:: 3.1.2
+
+"""
+
+SHARED_CHUNK_CACHE_SIZE = 256 * _MB
+"""The maximum size for table chunks kept in the cache shared by all the
+files in the process (see ``SHARED_CHUNK_CACHE``).  This is read from the
+`tables.parameters` module, not from file parameters.
+
+.. versionadded:: 3.1.2
+
+"""
 
 SORTED_MAX_SIZE = 1 * _MB
 """The maximum size for sorted values cached during index lookups."""
@@ -125,6 +171,15 @@ MAX_UNDO_PATH_LENGTH = 10 * _KB
 COND_CACHE_SLOTS = 128
 """Maximum number of conditions for table queries to be kept in memory."""
 
+COND_SHARED_CACHE_SLOTS = 1024
+"""Maximum number of compiled conditions to be kept in the cache shared
+by all the tables in the process.  Unlike ``COND_CACHE_SLOTS``, this is
+read from the `tables.parameters` module, not from file parameters.
+
+.. versionadded:: 3.1.2
+
+"""
+
 CHUNK_CACHE_NELMTS = 521
 """Number of elements for HDF5 chunk cache."""
 
@@ -149,11 +204,13 @@ METADATA_CACHE_SIZE = 1 * _MB  # 1 MB is the default for HDF5
 # There are several forces driving the election of this number:
 # 1.- As more nodes, better chances to re-use nodes
 #     --> better performance
-# 2.- As more nodes, the re-ordering of the LRU cache takes more time
-#     --> less performance
-# 3.- As more nodes, the memory needs for PyTables grows, specially for table
+# 2.- As more nodes, the memory needs for PyTables grows, specially for table
 #     writings (that could take double of memory than table reads!).
 #
+# Looking up nodes in the LRU cache takes constant time, so its size is
+# only limited by memory.  The number of hits, misses and evictions in the
+# cache of a file (``File._node_manager.cache``) can help sizing it.
+#
 # The default value here is quite conservative. If you have a system
 # with tons of memory, and if you are touching regularly a very large
 # number of leaves, try increasing this value and see if it fits better
@@ -206,6 +263,17 @@ EXPECTED_ROWS_VLARRAY = 1000
 EXPECTED_ROWS_TABLE = 10000
 """Default expected number of rows for :class:`Table` objects."""
 
+COND_PROJECTION_RATIO = 0.5
+"""The maximum ratio between the size of the columns taking part in a
+table condition and the size of a complete row for in-kernel queries to
+read just those columns.  The complete rows are then read only for the
+coordinates fulfilling the condition.  A value of 0 disables projected
+reads in queries.
+
+.. versionadded:: 3.1.2
+
+"""
+
 PYTABLES_SYS_ATTRS = True
 """Set this to ``False`` if you don't want to create PyTables system
 attributes in datasets.  Also, if set to ``False`` the possible existing
@@ -227,6 +295,45 @@ your machine. In general, it is a good idea to set this to the number of
 cores in your machine or, when your machine has many of them (e.g. > 4),
 perhaps one less than this."""
 
+MAX_QUERY_THREADS = None
+"""The maximum number of threads that PyTables should use for scanning
+tables in in-kernel queries that collect coordinates (like in
+:meth:`Table.read_where` or :meth:`Table.get_where_list`).  If `None`, it
+is automatically set to the number of cores in your machine.  Set it to 1
+to scan tables sequentially.
+
+.. versionadded:: 3.1.2
+
+"""
+
+MAX_INDEX_THREADS = None
+"""The maximum number of threads that PyTables should use for sorting
+the slices of an index while it is being built.  If `None`, it is
+automatically set to the number of cores in your machine.  Set it to 1
+to sort slices sequentially.
+
+.. versionadded:: 3.1.2
+
+"""
+
+INDEX_BUILD_MEMORY = 256 * _MB
+"""The maximum amount of memory (in bytes) used for keeping index slices
+which are waiting to be sorted or written while building an index with
+several threads.  At least one slice is always kept.
+
+.. versionadded:: 3.1.2
+
+"""
+
+GROUP_LIST_PAGE_SIZE = 1 * _KB
+"""The number of children read from disk at a time when iterating over
+a group whose children have not been listed yet.  Iterating in pages
+keeps the memory needed for very wide groups bounded.
+
+.. versionadded:: 3.1.2
+
+"""
+
 USER_BLOCK_SIZE = 0
 """Sets the user block size of a file.
 
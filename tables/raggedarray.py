@@ -0,0 +1,509 @@
+# -*- coding: utf-8 -*-
+
+########################################################################
+#
+# License: BSD
+# Created: October 18, 2026
+# Author:  The PyTables Team
+#
+# $Id$
+#
+########################################################################
+
+"""Here is defined the RaggedArray class."""
+
+import numpy
+
+from tables.atom import Int64Atom, ObjectAtom, VLStringAtom, VLUnicodeAtom
+from tables.earray import EArray
+from tables.flavor import internal_to_flavor
+from tables.group import Group
+from tables.utils import convert_to_np_atom2, is_idx, SizeType
+
+
+# default version for RAGGEDARRAY objects
+obversion = "1.0"    # initial version
+
+
+class RaggedArray(Group):
+    """This class represents ragged arrays stored in chunked datasets.
+
+    Like :class:`VLArray`, instances of this class represent arrays
+    whose rows can have a *variable* number of homogeneous elements
+    (*atoms*), and they offer the same interface for appending and
+    reading rows.  However, instead of relying on HDF5 variable length
+    types (whose data lives in the global heap of the file), the atoms
+    of all the rows are stored one after the other in a chunked ``values``
+    EArray, and the end of each row is stored in an ``offsets`` EArray of
+    64-bit integers (which always starts with a 0).  Both datasets hang
+    from the group which represents the ragged array as hidden nodes
+    (named ``_p_values`` and ``_p_offsets``), so they are not listed as
+    children of the group.
+
+    This has several advantages over VLArray for big arrays of many rows:
+    the filters of the array are applied to the data itself, so it can
+    be efficiently compressed, and reading a range of rows only requires
+    two contiguous reads, one on each dataset.  On the other hand, rows
+    can not be modified once written.
+
+    Parameters
+    ----------
+    parentnode
+        The parent :class:`Group` object.
+    name : str
+        The name of this node in its parent group.
+    atom
+        An `Atom` instance representing the *type* and *shape* of the atomic
+        objects to be saved.  Pseudo-atoms are supported as well.
+    title
+        A description for this node (it sets the ``TITLE`` HDF5 attribute on
+        disk).
+    filters
+        An instance of the `Filters` class that provides information about the
+        desired I/O filters to be applied to the datasets of the array.
+    expectedrows
+        A user estimate about the number of rows that will be added to the
+        array.  If not provided, the default value is
+        ``EXPECTED_ROWS_VLARRAY`` (see ``tables/parameters.py``).
+    chunkshape
+        The shape of the data chunk of the ``values`` dataset (its first
+        dimension counts atoms, not rows).  An integer is taken as the first
+        dimension of the shape.  If ``None``, a sensible value is calculated
+        (which is recommended).
+    byteorder
+        The byteorder of the data *on disk*, specified as 'little' or 'big'.
+        If this is not specified, the byteorder is that of the platform.
+
+    .. versionadded:: 3.1.2
+
+    Examples
+    --------
+
+    ::
+
+        ragged = fileh.create_ragged_array(fileh.root, 'events',
+                                           tables.Float64Atom(),
+                                           filters=tables.Filters(5))
+        ragged.append([1.5, 2.5])
+        ragged.append_flat(numpy.arange(10.), [0, 3, 3, 10])
+        for row in ragged.iterrows(1):
+            print(row)
+
+    .. rubric:: RaggedArray attributes
+
+    .. attribute:: atom
+
+        An Atom (see :ref:`AtomClassDescr`) instance representing the
+        *type* and *shape* of the atomic objects in the array.
+
+    .. attribute:: nrow
+
+        On iterators, this is the index of the current row.
+
+    .. attribute:: nrowsinbuf
+
+        The number of rows read at once by iterators.
+
+    """
+
+    # Class identifier.
+    _c_classid = 'RAGGEDARRAY'
+
+    # Properties
+    # ~~~~~~~~~~
+    values = property(
+        lambda self: self._f_get_child('_p_values'), None, None,
+        "The EArray holding the values of all the rows.")
+
+    offsets = property(
+        lambda self: self._f_get_child('_p_offsets'), None, None,
+        "The EArray holding the offsets of the ends of the rows.")
+
+    nrows = property(
+        lambda self: SizeType(self.offsets.nrows - 1), None, None,
+        "The current number of rows in the array.")
+
+    shape = property(
+        lambda self: (self.nrows,), None, None,
+        "The shape of the stored array.")
+
+    filters = property(
+        lambda self: self.values.filters, None, None,
+        """Filter properties for the datasets of this array - see Filters in
+        :ref:`FiltersClassDescr`.""")
+
+    def _getflavor(self):
+        return self.values.flavor
+
+    def _setflavor(self, flavor):
+        self.values.flavor = flavor
+
+    flavor = property(
+        _getflavor, _setflavor, None,
+        """The type of data object read from this array.
+
+        As for VLArray, it only applies to the *components* of the
+        Python list returned when reading several rows.""")
+
+    # Other methods
+    # ~~~~~~~~~~~~~
+    def __init__(self, parentnode, name, atom=None, title="",
+                 filters=None, expectedrows=None,
+                 chunkshape=None, byteorder=None,
+                 new=True, _log=True):
+
+        self._v_version = None
+        """The object version of this array."""
+
+        if expectedrows is None:
+            expectedrows = parentnode._v_file.params['EXPECTED_ROWS_VLARRAY']
+        self._v_expectedrows = expectedrows
+        """The expected number of rows to be stored in the array."""
+
+        if isinstance(chunkshape, (int, numpy.integer, long)):
+            chunkshape = (chunkshape,) + atom.shape
+        self._v_new_chunkshape = chunkshape
+        """The chunkshape of the new ``values`` dataset."""
+
+        self._v_new_byteorder = byteorder
+        """The byteorder of the new ``values`` dataset."""
+
+        self.atom = atom
+        self.nrow = None
+        self.nrowsinbuf = None
+
+        if new and atom is None:
+            raise ValueError('atom parameter cannot be None')
+        if new and 0 in atom.shape:
+            raise ValueError("When creating RaggedArrays, none of the "
+                             "dimensions of the Atom instance can be zero.")
+        super(RaggedArray, self).__init__(parentnode, name, title, new,
+                                          filters, _log)
+
+    def _g_post_init_hook(self):
+        if self._v_new:
+            self._v_version = obversion
+        super(RaggedArray, self)._g_post_init_hook()
+
+        if self._v_new:
+            atom = self.atom
+            if not hasattr(atom, 'size'):  # it is a pseudo-atom
+                # Keep the kind of the pseudo-atom so that it can be
+                # retrieved after a re-opening operation.
+                self._v_attrs._g__setattr('PSEUDOATOM', atom.kind)
+                if atom.kind == 'object' and atom.codec != 'pickle':
+                    self._v_attrs._g__setattr('OBJECT_CODEC', atom.codec)
+                atom = atom.base
+            # The creation of the datasets does not need to be logged,
+            # since they go away (and come back) with the group.
+            EArray(self, '_p_values', atom.copy(shape=()),
+                   (0,) + atom.shape,
+                   "Values of the rows", self._v_new_filters,
+                   self._v_expectedrows, self._v_new_chunkshape,
+                   self._v_new_byteorder, _log=False)
+            offsets = EArray(self, '_p_offsets', Int64Atom(), (0,),
+                             "Offsets of the ends of the rows",
+                             self._v_new_filters, self._v_expectedrows + 1,
+                             _log=False)
+            offsets.append([0])
+        else:
+            kind = self._v_attrs.PSEUDOATOM \
+                if 'PSEUDOATOM' in self._v_attrs else None
+            if kind is None:
+                values = self.values
+                self.atom = values.atom.copy(shape=values.shape[1:])
+            elif kind == 'vlstring':
+                self.atom = VLStringAtom()
+            elif kind == 'vlunicode':
+                self.atom = VLUnicodeAtom()
+            elif kind == 'object':
+                codec = self._v_attrs.OBJECT_CODEC \
+                    if 'OBJECT_CODEC' in self._v_attrs else 'pickle'
+                self.atom = ObjectAtom._from_saved_codec(codec)
+            else:
+                raise ValueError(
+                    "pseudo-atom name ``%s`` not known." % kind)
+
+        # Iterators read the rows in a chunk of offsets at a time
+        self.nrowsinbuf = int(self.offsets.chunkshape[0])
+
+    def __len__(self):
+        """Get the number of rows in the array."""
+
+        return int(self.nrows)
+
+    def _statom(self):
+        """Get the atom of the values actually stored in the array."""
+
+        atom = self.atom
+        if not hasattr(atom, 'size'):  # it is a pseudo-atom
+            return atom.base
+        return atom
+
+    def _process_range_read(self, start, stop, step):
+        """Get the row range to be read for `start`, `stop` and `step`."""
+
+        nrows = self.nrows
+        if start is not None and stop is None and step is None:
+            # Protection against start greater than available records
+            if nrows > 0 and start >= nrows:
+                raise IndexError("start of range (%s) is greater than "
+                                 "number of rows (%s)" % (start, nrows))
+            step = 1
+            if start == -1:  # corner case
+                stop = nrows
+            else:
+                stop = start + 1
+        if step and step < 0:
+            raise ValueError("slice step cannot be negative")
+        return slice(start, stop, step).indices(long(nrows))
+
+    def append(self, sequence):
+        """Add a sequence of data to the end of the array.
+
+        This method appends the objects in the sequence to a *single row* in
+        this array, exactly as :meth:`VLArray.append` does.
+
+        """
+
+        self._g_check_open()
+        self._v_file._check_writable()
+
+        atom = self.atom
+        if not hasattr(atom, 'size'):  # it is a pseudo-atom
+            sequence = atom.toarray(sequence)
+        else:
+            try:  # fastest check in most cases
+                len(sequence)
+            except TypeError:
+                raise TypeError("argument is not a sequence")
+        statom = self._statom()
+
+        if len(sequence) > 0:
+            nparr = convert_to_np_atom2(sequence, statom)
+            if nparr.shape == statom.shape:
+                nparr = nparr.reshape((1,) + statom.shape)
+            elif nparr.ndim == 0 or nparr.shape[1:] != statom.shape:
+                raise ValueError("The object '%s' is composed of elements "
+                                 "with shape '%s', which is not compatible "
+                                 "with the atom shape ('%s')."
+                                 % (nparr, nparr.shape[1:], statom.shape))
+            self.values.append(nparr)
+        self.offsets.append([self.values.nrows])
+
+    def append_flat(self, values, offsets):
+        """Add several rows given as a flat array of values and offsets.
+
+        The arguments have the same meaning as in
+        :meth:`VLArray.append_flat`.  The values of all the new rows are
+        written to disk in a single operation, followed by their offsets.
+
+        """
+
+        self._g_check_open()
+        self._v_file._check_writable()
+
+        statom = self._statom()
+        offsets = numpy.array(offsets, dtype=numpy.int64)
+        if offsets.ndim != 1 or len(offsets) == 0:
+            raise ValueError("``offsets`` must be a non-empty "
+                             "unidimensional sequence")
+        if len(values) > 0:
+            nparr = convert_to_np_atom2(values, statom)
+        else:
+            nparr = numpy.empty((0,) + statom.shape, dtype=statom.dtype.base)
+        if nparr.ndim == 0 or nparr.shape[1:] != statom.shape:
+            raise ValueError("The values have shape '%s', which is not "
+                             "compatible with the atom shape ('%s')."
+                             % (nparr.shape, statom.shape))
+        if (offsets[0] < 0 or offsets[-1] > len(nparr) or
+                (numpy.diff(offsets) < 0).any()):
+            raise ValueError("``offsets`` must be non-decreasing and within "
+                             "the bounds of ``values``")
+
+        # Write the values first, so that the rows are never left
+        # pointing to missing values.
+        nvalues = self.values.nrows
+        if offsets[-1] > offsets[0]:
+            self.values.append(nparr[offsets[0]:offsets[-1]])
+        if len(offsets) > 1:
+            self.offsets.append(offsets[1:] - offsets[0] + nvalues)
+
+    def read(self, start=None, stop=None, step=1, as_flat=False):
+        """Get data in the array as a list of objects of the current flavor.
+
+        The arguments have the same meaning as in :meth:`VLArray.read`.
+        Each range of rows is read with a single read operation on each of
+        the ``offsets`` and ``values`` datasets.
+
+        """
+
+        self._g_check_open()
+        start, stop, step = self._process_range_read(start, stop, step)
+        statom = self._statom()
+        if start >= stop:
+            values = numpy.empty((0,) + statom.shape, dtype=statom.dtype.base)
+            offsets = numpy.zeros((1,), dtype=numpy.int64)
+        else:
+            # Read the offsets of all the rows in the range at once
+            last = start + (len(xrange(start, stop, step)) - 1) * step
+            bounds = self.offsets._read(start, last + 2, 1)
+            starts = bounds[:-1:step] - bounds[0]
+            lengths = bounds[1::step] - bounds[:-1:step]
+            # and then the values between the first and last rows
+            values = self.values._read(bounds[0], bounds[-1], 1)
+            offsets = numpy.zeros((len(lengths) + 1,), dtype=numpy.int64)
+            numpy.cumsum(lengths, out=offsets[1:])
+            if step > 1:
+                # Pick the values of the selected rows alone
+                idx = numpy.arange(offsets[-1], dtype=numpy.int64)
+                idx += numpy.repeat(starts - offsets[:-1], lengths)
+                values = values[idx]
+
+        if as_flat:
+            return values, offsets
+
+        atom = self.atom
+        if not hasattr(atom, 'size'):  # it is a pseudo-atom
+            return atom.fromflat(values, offsets)
+        rows = [values[s:e] for s, e in zip(offsets[:-1], offsets[1:])]
+        # Convert the list to the right flavor
+        flavor = self.flavor
+        return [internal_to_flavor(row, flavor) for row in rows]
+
+    def iterrows(self, start=None, stop=None, step=None, as_flat=False):
+        """Iterate over the rows of the array.
+
+        The arguments have the same meaning as in :meth:`VLArray.iterrows`.
+        Rows are read in buffers of :attr:`RaggedArray.nrowsinbuf` rows.
+
+        """
+
+        self._g_check_open()
+        if step and step < 0:
+            raise ValueError("slice step cannot be negative")
+        start, stop, step = slice(start, stop, step).indices(
+            long(self.nrows))
+        return self._iterrows(start, stop, step, as_flat)
+
+    def _iterrows(self, start, stop, step, as_flat):
+        bufsize = step * self.nrowsinbuf
+        self.nrow = SizeType(start - step)
+        for start2 in xrange(start, stop, bufsize):
+            stop2 = min(start2 + bufsize, stop)
+            buf = self.read(start2, stop2, step, as_flat)
+            if as_flat:
+                yield buf
+                continue
+            for row in buf:
+                self.nrow += step
+                yield row
+
+    def __iter__(self):
+        """Iterate over all the rows of the array.
+
+        This is equivalent to calling :meth:`RaggedArray.iterrows` with
+        default arguments.
+
+        """
+
+        return self.iterrows()
+
+    def __getitem__(self, key):
+        """Get a row or a range of rows from the array.
+
+        The `key` argument has the same meaning as in
+        :meth:`VLArray.__getitem__`.
+
+        """
+
+        self._g_check_open()
+        nrows = self.nrows
+        if is_idx(key):
+            # Index out of range protection
+            if key >= nrows:
+                raise IndexError("Index out of range")
+            if key < 0:
+                # To support negative values
+                key += nrows
+            return self.read(key, key + 1, 1)[0]
+        elif isinstance(key, slice):
+            if key.step and key.step < 0:
+                raise ValueError("slice step cannot be negative")
+            start, stop, step = key.indices(long(nrows))
+            return self.read(start, stop, step)
+        # Try with a boolean or point selection
+        elif type(key) in (list, tuple) or isinstance(key, numpy.ndarray):
+            key = numpy.asarray(key)
+            if key.dtype.kind == 'b':
+                if key.shape != (nrows,):
+                    raise IndexError(
+                        "the shape of the boolean key (%s) does not match "
+                        "the number of rows (%s)" % (key.shape, nrows))
+                coords = numpy.nonzero(key)[0]
+            elif key.ndim == 1 and (key.dtype.kind in 'iu' or len(key) == 0):
+                coords = key.astype(numpy.int64)
+                coords[coords < 0] += nrows
+                if ((coords < 0) | (coords >= nrows)).any():
+                    raise IndexError("Index out of range")
+            else:
+                raise IndexError("Invalid index or slice: %r" % (key,))
+            return [self.read(coord, coord + 1, 1)[0] for coord in coords]
+        else:
+            raise IndexError("Invalid index or slice: %r" % (key,))
+
+    def _g_copy(self, newparent, newname, recursive, _log=True, **kwargs):
+        # The datasets of a ragged array are always copied along with it.
+        start = kwargs.get('start', None)
+        stop = kwargs.get('stop', None)
+        step = kwargs.get('step', None)
+        title = kwargs.get('title', self._v_title)
+        filters = kwargs.get('filters', None)
+        chunkshape = kwargs.get('chunkshape', None)
+        stats = kwargs.get('stats', None)
+
+        # Fix arguments with explicit None values for backwards compatibility.
+        if title is None:
+            title = self._v_title
+        if filters is None:
+            filters = self.filters
+        if chunkshape == 'keep':
+            chunkshape = self.values.chunkshape
+
+        # Create a copy of the object.
+        new_node = RaggedArray(newparent, newname, self.atom, title,
+                               filters, max(self.nrows, 1), chunkshape,
+                               self.values.byteorder, _log=_log)
+        new_node.flavor = self.flavor
+
+        # Copy user attributes if needed.
+        if kwargs.get('copyuserattrs', True):
+            self._v_attrs._g_copy(new_node._v_attrs, copyclass=True)
+
+        # Copy the rows, a buffer at a time.
+        nbytes = 0
+        for values, offsets in self.iterrows(start, stop, step,
+                                             as_flat=True):
+            new_node.append_flat(values, offsets)
+            nbytes += values.nbytes + offsets.nbytes
+
+        # Update statistics if needed.
+        if stats is not None:
+            stats['groups'] += 1
+            stats['bytes'] += nbytes
+
+        return new_node
+
+    def _g_remove(self, recursive=False, force=False):
+        # The datasets of a ragged array always go away with it.
+        super(RaggedArray, self)._g_remove(True, force)
+
+    def __repr__(self):
+        """This provides more metainfo in addition to standard __str__"""
+
+        return """%s
+  atom = %r
+  nrows = %s
+  flavor = %r
+  filters = %r""" % (self, self.atom, self.nrows, self.flavor,
+                     self.filters)
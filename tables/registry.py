@@ -36,7 +36,56 @@ from tables._past import previous_api
 __docformat__ = 'reStructuredText'
 """The format of documentation strings in this module."""
 
-class_name_dict = {}
+class _LazyClassDict(dict):
+    """A class mapping which imports the defining modules on demand.
+
+    Some node classes (e.g. the ones used by indexes) live in modules
+    which are not imported along with the `tables` package.  Looking up
+    one of their keys (which are given in the `lazymodules` mapping to
+    the name of the defining module) imports that module first, so that
+    the classes get registered.
+
+    """
+
+    def __init__(self, lazymodules):
+        super(_LazyClassDict, self).__init__()
+        self._lazymodules = lazymodules
+
+    def _load(self, key):
+        modname = self._lazymodules.get(key)
+        if modname is None:
+            return False
+        __import__(modname)
+        return dict.__contains__(self, key)
+
+    def __contains__(self, key):
+        return dict.__contains__(self, key) or self._load(key)
+
+    def __missing__(self, key):
+        if self._load(key):
+            return dict.__getitem__(self, key)
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+
+
+_lazy_class_modules = dict.fromkeys([
+    # Class identifiers
+    'INDEX', 'DINDEX', 'TINDEX', 'CINDEX',
+    'CACHEARRAY', 'LASTROWARRAY', 'INDEXARRAY',
+    # Class names
+    'Index', 'IndexesDescG', 'IndexesTableG', 'OldIndex',
+    'CacheArray', 'LastRowArray', 'IndexArray',
+], 'tables.index')
+"""Keys of lazily registered node classes and their defining modules."""
+
+_lazy_class_modules.update(dict.fromkeys(['ZONEMAP', 'ZoneMap'],
+                                         'tables.zonemap'))
+
+class_name_dict = _LazyClassDict(_lazy_class_modules)
 """Node class name to class object mapping.
 
 This dictionary maps class names (e.g. ``'Group'``) to actual class
@@ -49,7 +98,7 @@ can be replaced when the module that defines them is reloaded.
 
 """
 
-class_id_dict = {}
+class_id_dict = _LazyClassDict(_lazy_class_modules)
 """Class identifier to class object mapping.
 
 This dictionary maps class identifiers (e.g. ``'GROUP'``) to actual
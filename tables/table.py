@@ -20,15 +20,11 @@ from time import time
 from functools import reduce as _reduce
 
 import numpy
-import numexpr
 
 from tables import tableextension
-from tables.lrucacheextension import ObjectCache, NumCache
+from tables.lrucacheextension import (
+    ObjectCache, ChunkCache, chunk_cache_budget)
 from tables.atom import Atom
-from tables.conditions import compile_condition
-from numexpr.necompiler import (
-    getType as numexpr_getType, double, is_cpu_amd_intel)
-from numexpr.expressions import functions as numexpr_functions
 from tables.flavor import flavor_of, array_as_internal, internal_to_flavor
 from tables.utils import is_idx, lazyattr, SizeType, NailedDict as CacheDict
 from tables.leaf import Leaf
@@ -39,9 +35,6 @@ from tables.exceptions import (NodeError, HDF5ExtError, PerformanceWarning,
 from tables.utilsextension import get_nested_field
 
 from tables.path import join_path, split_path
-from tables.index import (
-    OldIndex, default_index_filters, default_auto_index, Index, IndexesDescG,
-    IndexesTableG)
 
 profile = False
 # profile = True  # Uncomment for profiling
@@ -60,44 +53,8 @@ from tables._past import previous_api, previous_api_property
 obversion = "2.7"  # The Table VERSION number
 
 
-try:
-    # int_, long_ are only available in numexpr >= 2.1
-    from numexpr.necompiler import int_, long_
-except ImportError:
-    int_ = int
-    long_ = long
-
-# Maps NumPy types to the types used by Numexpr.
-_nxtype_from_nptype = {
-    numpy.bool_: bool,
-    numpy.int8: int_,
-    numpy.int16: int_,
-    numpy.int32: int_,
-    numpy.int64: long_,
-    numpy.uint8: int_,
-    numpy.uint16: int_,
-    numpy.uint32: long_,
-    numpy.uint64: long_,
-    numpy.float32: float,
-    numpy.float64: double,
-    numpy.complex64: complex,
-    numpy.complex128: complex,
-    numpy.bytes_: bytes,
-}
-
-if sys.version_info[0] > 2:
-    _nxtype_from_nptype[numpy.str_] = str
-
-if hasattr(numpy, 'float16'):
-    _nxtype_from_nptype[numpy.float16] = float    # XXX: check
-if hasattr(numpy, 'float96'):
-    _nxtype_from_nptype[numpy.float96] = double   # XXX: check
-if hasattr(numpy, 'float128'):
-    _nxtype_from_nptype[numpy.float128] = double  # XXX: check
-if hasattr(numpy, 'complec192'):
-    _nxtype_from_nptype[numpy.complex192] = complex  # XXX: check
-if hasattr(numpy, 'complex256'):
-    _nxtype_from_nptype[numpy.complex256] = complex  # XXX: check
+# Numexpr types of the data types seen in condition variables.
+_nxtype_from_dtype = {}
 
 
 # The NumPy scalar type corresponding to `SizeType`.
@@ -146,6 +103,15 @@ def _index_pathname_of_column_(tablePath, colpathname):
 _indexPathnameOfColumn_ = previous_api(_index_pathname_of_column_)
 
 
+def _zonemap_name_of(node):
+    return '_p_zonemap_%s' % node._v_name
+
+
+def _zonemap_pathname_of(node):
+    nodeParentPath = split_path(node._v_pathname)[0]
+    return join_path(nodeParentPath, _zonemap_name_of(node))
+
+
 def _table__setautoindex(self, auto):
     auto = bool(auto)
     try:
@@ -174,6 +140,7 @@ def _table__getautoindex(self):
         try:
             indexgroup = self._v_file._get_node(_index_pathname_of(self))
         except NoSuchNodeError:
+            from tables.index import default_auto_index
             self._autoindex = default_auto_index  # update cache
             return self._autoindex
         else:
@@ -209,9 +176,24 @@ def restorecache(self):
     # Define a cache for sparse table reads
     params = self._v_file.params
     chunksize = self._v_chunkshape[0]
-    nslots = params['TABLE_MAX_SIZE'] / (chunksize * self._v_dtype.itemsize)
-    self._chunkcache = NumCache((nslots, chunksize), self._v_dtype,
-                                'table chunk cache')
+    # Chunks of read-only files may be shared with other handles
+    fileid = self._v_file._shared_cache_id
+    if fileid is not None:
+        # Node paths are relative to the root of the handle
+        rootpath = '/' + self._v_file.root_uep.strip('/')
+        self._shared_chunk_key = (fileid, join_path(rootpath,
+                                                    self._v_pathname))
+    else:
+        self._shared_chunk_key = None
+    chunkcache = self.__dict__.get('_chunkcache')
+    if chunkcache is not None and chunkcache.slotsize == chunksize:
+        # Keep the statistics of the cache
+        chunkcache.clear()
+    else:
+        self._chunkcache = ChunkCache(
+            chunksize, self._v_dtype, params['TABLE_MAX_SIZE'],
+            (self._v_file._chunk_cache_budget, chunk_cache_budget),
+            'table chunk cache')
     self._seqcache = ObjectCache(params['ITERSEQ_MAX_SLOTS'],
                                  params['ITERSEQ_MAX_SIZE'],
                                  'Iter sequence cache')
@@ -220,6 +202,15 @@ def restorecache(self):
 
 def _table__where_indexed(self, compiled, condition, condvars,
                           start, stop, step):
+    """Get the chunkmap for an indexed query.
+
+    A boolean array is returned with the chunks that must be scanned
+    in-kernel.  When the result of the query is already known (it is
+    empty or it is in the sequence cache), an ``int64`` array with the
+    final row coordinates is returned instead.
+
+    """
+
     if profile:
         tref = time()
     if profile:
@@ -242,14 +233,14 @@ def _table__where_indexed(self, compiled, condition, condvars,
         # Get the row sequence from the cache
         seq = self._seqcache.getitem(nslot)
         if len(seq) == 0:
-            return iter([])
-        # seq is a list.
+            return numpy.empty(0, dtype='int64')
+        # seq is a list or an array.
         seq = numpy.array(seq, dtype='int64')
         # Correct the ranges in cached sequence
         if (start, stop, step) != (0, self.nrows, 1):
             seq = seq[(seq >= start) & (
                 seq < stop) & ((seq - start) % step == 0)]
-        return self.itersequence(seq)
+        return seq
     else:
         # No luck.  self._seqcache will be populated
         # in the iterator if possible. (Row._finish_riterator)
@@ -285,14 +276,15 @@ def _table__where_indexed(self, compiled, condition, condvars,
     if index.reduction == 1 and tcoords == 0:
         # No candidates found in any indexed expression component, so leave now
         self._seqcache.setitem(seqkey, [], 1)
-        return iter([])
+        return numpy.empty(0, dtype='int64')
 
     # Compute the final chunkmap
+    import numexpr
     chunkmap = numexpr.evaluate(strexpr, cmvars)
     if not chunkmap.any():
         # The chunkmap is all False, so the result is empty
         self._seqcache.setitem(seqkey, [], 1)
-        return iter([])
+        return numpy.empty(0, dtype='int64')
 
     if profile:
         show_stats("Exiting table_whereIndexed", tref)
@@ -301,7 +293,106 @@ def _table__where_indexed(self, compiled, condition, condvars,
 _table__whereIndexed = previous_api(_table__where_indexed)
 
 
+def _table__where_zonemap(self, condition, condvars):
+    """Get the chunkmap for an in-kernel query from the zone map.
+
+    A boolean array is returned with the chunks that must be scanned.
+    ``None`` is returned when the zone map can not be used for the
+    condition or when no chunk can be skipped with it.
+
+    """
+
+    if not self._enabled_indexing_in_queries:
+        return None
+    zonemap = self.zonemap
+    if zonemap is None:
+        return None
+    # The rows being written in the background are summarized already
+    self._g_drain_write_behind()
+    if not zonemap.is_usable_for(self):
+        return None
+
+    # Get the comparisons with summarized columns in the condition
+    zonecols = zonemap.columns + zonemap.bloomcolumns
+    zonevars = [var for (var, val) in condvars.iteritems()
+                if hasattr(val, 'pathname') and val.pathname in zonecols]
+    if not zonevars:
+        return None
+    compiled = self._compile_condition(condition, condvars, zonevars)
+    if not compiled.index_expressions:
+        return None
+
+    # Compute the chunkmap for every comparison and combine them
+    cmvars = {}
+    for i, (var, ops, lims) in enumerate(compiled.index_expressions):
+        colpathname = condvars[var].pathname
+        cmvars["e%d" % i] = zonemap.get_chunkmap(colpathname, ops, lims)
+    import numexpr
+    chunkmap = numexpr.evaluate(compiled.string_expression, cmvars)
+    if chunkmap.all():
+        return None  # a plain in-kernel query is faster
+    return chunkmap
+
+
+# Ufuncs combining the partial states of each aggregate function.
+_agg_state_ufuncs = {
+    'count': [numpy.add],
+    'sum': [numpy.add],
+    'mean': [numpy.add, numpy.add],  # sum and count
+    'min': [numpy.minimum],
+    'max': [numpy.maximum],
+}
+
+
+def _agg_sum_dtype(dtype, mean=False):
+    """Get the dtype for accumulating sums (or means) of `dtype` values."""
+
+    if dtype.kind == 'c':
+        return numpy.dtype('complex128')
+    if dtype.kind in 'biu' and not mean:
+        return numpy.dtype(['int64', 'uint64'][dtype.kind == 'u'])
+    return numpy.dtype('float64')
+
+
+def _agg_reduce(keys, states, ufuncs):
+    """Combine the partial aggregate `states` having equal `keys`.
+
+    `states` is a list of arrays parallel to `keys`, whose elements with
+    equal keys are combined by the respective ufunc in `ufuncs`.  The
+    distinct keys are returned in increasing order with the combined
+    states.
+
+    """
+
+    order = keys.argsort(kind='mergesort')
+    keys = keys[order]
+    states = [state[order] for state in states]
+    if len(keys) == 0:
+        return keys, states
+    starts = numpy.concatenate(
+        ([0], numpy.flatnonzero(keys[1:] != keys[:-1]) + 1))
+    return (keys[starts], [ufunc.reduceat(state, starts)
+                           for (ufunc, state) in zip(ufuncs, states)])
+
+
+def _agg_merge(parts, ufuncs):
+    """Merge the partial aggregates in the `parts` list.
+
+    Each part is a ``(keys, states)`` tuple as returned by
+    `_agg_reduce()`.
+
+    """
+
+    if len(parts) == 1:
+        return parts[0]
+    keys = numpy.concatenate([keys for (keys, states) in parts])
+    states = [numpy.concatenate(pstates)
+              for pstates in zip(*[states for (keys, states) in parts])]
+    return _agg_reduce(keys, states, ufuncs)
+
+
 def create_indexes_table(table):
+    from tables.index import IndexesTableG
     itgroup = IndexesTableG(
         table._v_parent, _index_name_of(table),
         "Indexes container for table " + table._v_pathname, new=True)
@@ -311,6 +402,7 @@ createIndexesTable = previous_api(create_indexes_table)
 
 
 def create_indexes_descr(igroup, dname, iname, filters):
+    from tables.index import IndexesDescG
     idgroup = IndexesDescG(
         igroup, iname,
         "Indexes container for sub-description " + dname,
@@ -378,6 +470,7 @@ def _column__create_index(self, optlevel, kind, filters, tmp_dir,
         expectedrows = table.nrows
 
     # Create the index itself
+    from tables.index import Index
     index = Index(
         idgroup, name, atom=atom,
         title="Index for %s column" % name,
@@ -603,6 +696,28 @@ class Table(tableextension.Table, Leaf):
 
         return self.description._v_dtype
 
+    write_behind = property(
+        Leaf._g_get_write_behind, Leaf._g_set_write_behind, None,
+        """The maximum number of appended batches waiting to be written.
+
+        When this is greater than 0, the rows passed to
+        :meth:`Table.append` (or flushed from :meth:`Row.append`) are
+        queued (up to this number of batches) and a background thread
+        converts, compresses and writes them, so that the caller does not
+        wait for the filters.  :meth:`Table.flush` waits for the queue to
+        be drained and raises any error found while writing; queued rows
+        are not visible (e.g. in :attr:`Table.nrows`) nor indexed until
+        then.  Set it to 0 (the default) to write synchronously again.
+
+        Background writes are only done when the HDF5 library was built
+        thread-safe, which is not the default.  Otherwise no background
+        thread is used and the rows are written at once, so the caller
+        still waits for them.
+
+        .. versionadded:: 3.1.2
+
+        """)
+
     # Read-only shorthands
     # ````````````````````
 
@@ -693,6 +808,25 @@ class Table(tableextension.Table, Leaf):
         None, None,
         """A dictionary with the indexes of the indexed columns.""")
 
+    def _get_zonemap(self):
+        if self._zonemapped:
+            try:
+                return self._v_file._get_node(_zonemap_pathname_of(self))
+            except NoSuchNodeError:
+                self._zonemapped = False
+        return None
+
+    zonemap = property(
+        _get_zonemap, None, None,
+        """The zone map of the table, or None if it has none.
+
+        See :meth:`Table.create_zonemap` and
+        :class:`tables.zonemap.ZoneMap`.
+
+        .. versionadded:: 3.1.2
+
+        """)
+
     _dirtyindexes = property(
         lambda self: self._condition_cache._nailcount > 0,
         None, None,
@@ -745,6 +879,12 @@ class Table(tableextension.Table, Leaf):
         """The list of columns with old indexes."""
         self._autoindex = None
         """Private variable that caches the value for autoindex."""
+        self._zonemapped = False
+        """Does this table have a zone map?"""
+        self._v_writebehindstart = None
+        """The number of rows before the ones queued for writing, if any."""
+        self._v_writebehindnrows = None
+        """The number of rows including the ones queued for writing."""
 
         self.colnames = []
         """A list containing the names of *top-level* columns in the table."""
@@ -777,6 +917,9 @@ class Table(tableextension.Table, Leaf):
         """Whether an index can be used or not in a search.  Boolean."""
         self._where_condition = None
         """Condition function and argument list for selection of values."""
+        self._where_projection = None
+        """Dtype and path names of the columns to be read for evaluating
+        the condition, or None to read complete rows."""
         self._seqcache_key = None
         """The key under which to save a query's results (list of row indexes)
         or None to not save."""
@@ -895,6 +1038,9 @@ class Table(tableextension.Table, Leaf):
 
         # The following code is only for opened tables.
 
+        # Does the zone map exist?
+        self._zonemapped = _zonemap_pathname_of(self) in self._v_file
+
         # Do the indexes group exist?
         indexesgrouppath = _index_pathname_of(self)
         igroup = indexesgrouppath in self._v_file
@@ -909,6 +1055,7 @@ class Table(tableextension.Table, Leaf):
                 if indexed:
                     column = self.cols._g_col(colname)
                     indexobj = column.index
+                    from tables.index import OldIndex
                     if isinstance(indexobj, OldIndex):
                         indexed = False  # Not a vaild index
                         oldindexes = True
@@ -1064,7 +1211,7 @@ class Table(tableextension.Table, Leaf):
         # 4. If there are field fill attributes, get them from disk and
         #    set them in the table description.
         if self._v_file.params['PYTABLES_SYS_ATTRS']:
-            if "FIELD_0_FILL" in self._v_attrs._f_list("sys"):
+            if "FIELD_0_FILL" in self._v_attrs:
                 i = 0
                 get_attr = self._v_attrs.__getattr__
                 for objcol in self.description._f_walk(type="Col"):
@@ -1220,6 +1367,7 @@ class Table(tableextension.Table, Leaf):
                 # Remove 10 (arbitrary) elements from the cache
                 for k in exprvarscache.keys()[:10]:
                     del exprvarscache[k]
+            from numexpr.expressions import functions as numexpr_functions
             cexpr = compile(expression, '<string>', 'eval')
             exprvars = [var for var in cexpr.co_names
                         if var not in ['None', 'False', 'True']
@@ -1313,14 +1461,20 @@ class Table(tableextension.Table, Leaf):
                 colnames.append(var)
                 colpaths.append(val.pathname)
             else:  # array
-                try:
-                    varnames.append(var)
-                    vartypes.append(numexpr_getType(val))  # expensive
-                except ValueError:
-                    # This is more clear than the error given by Numexpr.
-                    raise TypeError("variable ``%s`` has data type ``%s``, "
-                                    "not allowed in conditions"
-                                    % (var, val.dtype.name))
+                varnames.append(var)
+                vartype = _nxtype_from_dtype.get(val.dtype)
+                if vartype is None:
+                    from numexpr.necompiler import getType as numexpr_getType
+                    try:
+                        vartype = numexpr_getType(val)  # expensive
+                    except ValueError:
+                        # This is more clear than the error given by Numexpr.
+                        raise TypeError(
+                            "variable ``%s`` has data type ``%s``, "
+                            "not allowed in conditions"
+                            % (var, val.dtype.name))
+                    _nxtype_from_dtype[val.dtype] = vartype
+                vartypes.append(vartype)
         colnames, varnames = tuple(colnames), tuple(varnames)
         colpaths, vartypes = tuple(colpaths), tuple(vartypes)
         condkey = (condition, colnames, varnames, colpaths, vartypes)
@@ -1328,13 +1482,17 @@ class Table(tableextension.Table, Leaf):
 
     _getConditionKey = previous_api(_get_condition_key)
 
-    def _compile_condition(self, condition, condvars):
+    def _compile_condition(self, condition, condvars, zonevars=None):
         """Compile the `condition` and extract usable index conditions.
 
         This method returns an instance of ``CompiledCondition``.  See
         the ``compile_condition()`` function in the ``conditions``
         module for more information about the compilation process.
 
+        If a sequence of column variable names is given in `zonevars`,
+        the conditions on those columns are extracted instead of the
+        ones on indexed columns (this is used with zone maps).
+
         This method makes use of the condition cache when possible.
 
         """
@@ -1342,12 +1500,18 @@ class Table(tableextension.Table, Leaf):
         # Look up the condition in the condition cache.
         condcache = self._condition_cache
         condkey = self._get_condition_key(condition, condvars)
-        compiled = condcache.get(condkey)
+        if zonevars is not None:
+            zonevars = frozenset(zonevars)
+            cachekey = (condkey, zonevars)
+        else:
+            cachekey = condkey
+        compiled = condcache.get(cachekey)
         if compiled:
             return compiled.with_replaced_vars(condvars)  # bingo!
 
         # Bad luck, the condition must be parsed and compiled.
         # Fortunately, the key provides some valuable information. ;)
+        from tables.conditions import compile_condition, _nxtype_from_nptype
         (condition, colnames, varnames, colpaths, vartypes) = condkey
 
         # Extract more information from referenced columns.
@@ -1361,10 +1525,13 @@ class Table(tableextension.Table, Leaf):
             typemap[colname] = _nxtype_from_nptype[coltype]
 
             # Get the set of columns with usable indexes.
-            if (self._enabled_indexing_in_queries  # no in-kernel searches
+            if (zonevars is None
+                    and self._enabled_indexing_in_queries  # no in-kernel
                     and self.colindexed[col.pathname] and not col.index.dirty):
                 indexedcols.append(colname)
 
+        if zonevars is not None:
+            indexedcols = zonevars  # columns in the zone map
         indexedcols = frozenset(indexedcols)
         # Now let ``compile_condition()`` do the Numexpr-related job.
         compiled = compile_condition(condition, typemap, indexedcols)
@@ -1375,11 +1542,64 @@ class Table(tableextension.Table, Leaf):
                              "in condition ``%s``" % (condition,))
 
         # Store the compiled condition in the cache and return it.
-        condcache[condkey] = compiled
+        condcache[cachekey] = compiled
         return compiled.with_replaced_vars(condvars)
 
     _compileCondition = previous_api(_compile_condition)
 
+    def _get_where_projection(self, compiled, condvars):
+        """Get the projection to be used for evaluating `compiled`.
+
+        A ``(dtype, colpathnames)`` tuple is returned describing the
+        columns taking part in the condition, or `None` if reading them
+        alone would not save enough I/O (see ``COND_PROJECTION_RATIO``).
+
+        """
+
+        colpathnames = frozenset(
+            condvars[param].pathname for param in compiled.parameters
+            if hasattr(condvars[param], 'pathname'))
+        return self._get_projection(colpathnames)
+
+    def _get_projection(self, colpathnames):
+        """Get the projection of the table to the `colpathnames` columns.
+
+        This works like `_get_where_projection()`, for a given set of
+        column pathnames.
+
+        """
+
+        ratio = self._v_file.params['COND_PROJECTION_RATIO']
+        if not ratio:
+            return None
+        dtype = self._get_projected_dtype(colpathnames)
+        if dtype.itemsize > ratio * self.rowsize:
+            return None
+        return (dtype, colpathnames)
+
+    def _get_projected_dtype(self, colpathnames):
+        """Get the (nested) dtype of the table with just `colpathnames`.
+
+        The fields keep the order and nesting of the table description,
+        and `colpathnames` must only contain non-nested columns.
+
+        """
+
+        def project(descr, prefix):
+            fields = []
+            for name in descr._v_names:
+                colpathname = prefix + name
+                colobj = descr._v_colobjects[name]
+                if isinstance(colobj, Description):
+                    nfields = project(colobj, colpathname + '/')
+                    if nfields:
+                        fields.append((name, nfields))
+                elif colpathname in colpathnames:
+                    fields.append((name, descr._v_dtype[name]))
+            return fields
+
+        return numpy.dtype(project(self.description, ''))
+
     def will_query_use_indexing(self, condition, condvars=None):
         """Will a query for the condition use indexing?
 
@@ -1522,23 +1742,78 @@ class Table(tableextension.Table, Leaf):
         if compiled.index_expressions:
             chunkmap = _table__where_indexed(
                 self, compiled, condition, condvars, start, stop, step)
-            if not isinstance(chunkmap, numpy.ndarray):
-                # If it is not a NumPy array it should be an iterator
+            if chunkmap.dtype.kind != 'b':
+                # If it is not a chunkmap it should be the final coordinates
                 # Reset conditions
                 self._use_index = False
                 self._where_condition = None
-                # ...and return the iterator
-                return chunkmap
+                # ...and return an iterator over them
+                return self.itersequence(chunkmap)
         else:
-            chunkmap = None  # default to an in-kernel query
+            # Can we skip chunks with the zone map?
+            chunkmap = _table__where_zonemap(self, condition, condvars)
+            if chunkmap is not None:
+                if self._dirtycache:
+                    restorecache(self)
+                self._use_index = True
 
         args = [condvars[param] for param in compiled.parameters]
         self._where_condition = (compiled.function, args)
+        if chunkmap is None:
+            self._where_projection = self._get_where_projection(
+                compiled, condvars)
         row = tableextension.Row(self)
         if profile:
             show_stats("Exiting table._where", tref)
         return row._iter(start, stop, step, chunkmap=chunkmap)
 
+    def _where_coords(self, condition, condvars,
+                      start=None, stop=None, step=None):
+        """Get the coordinates of the rows fulfilling `condition`.
+
+        This is equivalent to ``[r.nrow for r in self._where(...)]``, but
+        the coordinates are collected by ``Row`` into an ``int64`` array
+        one I/O buffer at a time, without creating a Python object for
+        every selected row.
+
+        """
+
+        # Adjust the slice to be used.
+        (start, stop, step) = self._process_range_read(start, stop, step)
+        if start >= stop:  # empty range, reset conditions
+            self._use_index = False
+            self._where_condition = None
+            return numpy.empty(0, dtype=SizeType)
+
+        # Compile the condition and extract usable index conditions.
+        condvars = self._required_expr_vars(condition, condvars, depth=3)
+        compiled = self._compile_condition(condition, condvars)
+
+        # Can we use indexes?
+        if compiled.index_expressions:
+            chunkmap = _table__where_indexed(
+                self, compiled, condition, condvars, start, stop, step)
+            if chunkmap.dtype.kind != 'b':
+                # The final coordinates are already known
+                self._use_index = False
+                self._where_condition = None
+                return chunkmap.astype(SizeType)
+        else:
+            # Can we skip chunks with the zone map?
+            chunkmap = _table__where_zonemap(self, condition, condvars)
+            if chunkmap is not None:
+                if self._dirtycache:
+                    restorecache(self)
+                self._use_index = True
+
+        args = [condvars[param] for param in compiled.parameters]
+        self._where_condition = (compiled.function, args)
+        if chunkmap is None:
+            self._where_projection = self._get_where_projection(
+                compiled, condvars)
+        row = tableextension.Row(self)
+        return row._where_coords(start, stop, step, chunkmap)
+
     def read_where(self, condition, condvars=None, field=None,
                    start=None, stop=None, step=None):
         """Read table data fulfilling the given *condition*.
@@ -1553,15 +1828,13 @@ class Table(tableextension.Table, Leaf):
         """
 
         self._g_check_open()
-        coords = [p.nrow for p in
-                  self._where(condition, condvars, start, stop, step)]
+        coords = self._where_coords(condition, condvars, start, stop, step)
         self._where_condition = None  # reset the conditions
         if len(coords) > 1:
             cstart, cstop = coords[0], coords[-1] + 1
             if cstop - cstart == len(coords):
                 # Chances for monotonically increasing row values. Refine.
-                inc_seq = numpy.alltrue(
-                    numpy.arange(cstart, cstop) == numpy.array(coords))
+                inc_seq = numpy.alltrue(numpy.diff(coords) == 1)
                 if inc_seq:
                     return self.read(cstart, cstop, field=field)
         return self.read_coordinates(coords, field)
@@ -1620,9 +1893,7 @@ class Table(tableextension.Table, Leaf):
 
         self._g_check_open()
 
-        coords = [p.nrow for p in
-                  self._where(condition, condvars, start, stop, step)]
-        coords = numpy.array(coords, dtype=SizeType)
+        coords = self._where_coords(condition, condvars, start, stop, step)
         # Reset the conditions
         self._where_condition = None
         if sort:
@@ -1631,6 +1902,273 @@ class Table(tableextension.Table, Leaf):
 
     getWhereList = previous_api(get_where_list)
 
+    def where_many(self, conditions, condvars=None,
+                   start=None, stop=None, step=None):
+        """Get the row coordinates fulfilling each of the given conditions.
+
+        This is equivalent to calling :meth:`Table.get_where_list` once for
+        each condition in the *conditions* sequence, and a list with the
+        coordinates for each condition (as arrays of the current flavor) is
+        returned.  However, the conditions which can not use indexes are
+        evaluated together in a single pass over the table, so each I/O
+        buffer is only read once for all of them.  Conditions with usable
+        indexes are still resolved through them one at a time.
+
+        The meaning of the other arguments is the same as in the
+        :meth:`Table.where` method, and *condvars* applies to every
+        condition.
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        self._g_check_open()
+
+        (start, stop, step) = self._process_range_read(start, stop, step)
+        coords = [numpy.empty(0, dtype=SizeType)] * len(conditions)
+        if start < stop:
+            # Compile the conditions, resolving the indexed ones.
+            scanned, scannedfuncs, colpathnames = [], [], set()
+            for i, condition in enumerate(conditions):
+                cvars = self._required_expr_vars(condition, condvars, depth=2)
+                compiled = self._compile_condition(condition, cvars)
+                if compiled.index_expressions:
+                    coords[i] = self._where_coords(
+                        condition, cvars, start, stop, step)
+                    self._where_condition = None
+                    continue
+                args = [cvars[param] for param in compiled.parameters]
+                scanned.append(i)
+                scannedfuncs.append((compiled.function, args))
+                colpathnames.update(
+                    cvars[param].pathname for param in compiled.parameters
+                    if hasattr(cvars[param], 'pathname'))
+
+            # Evaluate the rest of conditions in one pass.
+            if scanned:
+                self._use_index = False
+                self._where_projection = self._get_projection(
+                    frozenset(colpathnames))
+                row = tableextension.Row(self)
+                scannedcoords = row._where_coords_many(
+                    start, stop, step, scannedfuncs)
+                for i, icoords in zip(scanned, scannedcoords):
+                    coords[i] = icoords
+
+        return [internal_to_flavor(icoords, self.flavor)
+                for icoords in coords]
+
+    def aggregate(self, by, aggs, condition=None, condvars=None,
+                  start=None, stop=None, step=None):
+        """Compute aggregates of some columns for each value of another.
+
+        The rows are grouped by the values of the *by* column, and *aggs*
+        maps the name of each aggregate to compute to a ``(function,
+        column)`` tuple, where function is one of ``'count'``, ``'sum'``,
+        ``'mean'``, ``'min'`` or ``'max'``, and column is the name of the
+        aggregated column (it is ignored by ``'count'``, which counts
+        rows).  Columns are given by their pathnames, and they must be
+        non-nested columns with scalar values.
+
+        If a *condition* is given, only the rows fulfilling it are
+        aggregated.  The meaning of *condvars* is the same as in the
+        :meth:`Table.where` method, and *start*, *stop* and *step* select
+        a range of rows as in :meth:`Table.read`.
+
+        The table is read one buffer at a time, with just the columns
+        taking part in the computation.  The partial aggregates of each
+        buffer are merged, so memory usage depends on the number of groups
+        and not on the number of rows.  If the *by* column has a clean CSI
+        index (see :meth:`Column.create_csindex`), rows are read in the
+        order of the index instead, so that each group is completed before
+        the next ones and no merging is needed.  Negative steps are not
+        supported.
+
+        A structured array of the current flavor is returned, with a field
+        named *by* holding the distinct values of that column in increasing
+        order and a field for each aggregate.  Sums and means are computed
+        with 64-bit numbers (means are floating point), and counts are
+        ``int64`` values.
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        self._g_check_open()
+
+        if isinstance(by, Column):
+            by = by.pathname
+        aggs = list(aggs.items())
+        colpathnames = set([by])
+        for (name, (func, column)) in aggs:
+            if func not in _agg_state_ufuncs:
+                raise ValueError("unknown aggregate function ``%s`` for "
+                                 "``%s``; use one of %s"
+                                 % (func, name, sorted(_agg_state_ufuncs)))
+            if func != 'count':
+                colpathnames.add(column)
+        for colpathname in colpathnames:
+            self._check_column(colpathname)
+            if (colpathname not in self.coldtypes or
+                    self.coldtypes[colpathname].shape != ()):
+                raise ValueError("column ``%s`` is not a non-nested column "
+                                 "with scalar values" % colpathname)
+        ufuncs = []
+        for (name, (func, column)) in aggs:
+            ufuncs.extend(_agg_state_ufuncs[func])
+
+        def get_states(cols):
+            # The initial states of the aggregates for some rows.
+            states = []
+            nrows = len(cols[by])
+            for (name, (func, column)) in aggs:
+                if func in ('count', 'mean'):
+                    counts = numpy.ones(nrows, dtype='int64')
+                if func == 'count':
+                    states.append(counts)
+                elif func in ('sum', 'mean'):
+                    values = cols[column]
+                    states.append(values.astype(
+                        _agg_sum_dtype(values.dtype, func == 'mean')))
+                    if func == 'mean':
+                        states.append(counts)
+                else:
+                    states.append(cols[column])
+            return states
+
+        # Compile the condition and add its columns to the ones to read.
+        if condition is not None:
+            condvars = self._required_expr_vars(condition, condvars, depth=2)
+            compiled = self._compile_condition(condition, condvars)
+            condargs = [condvars[param] for param in compiled.parameters]
+            colpathnames.update(arg.pathname for arg in condargs
+                                if hasattr(arg, 'pathname'))
+
+        def select(cols):
+            # Keep the rows in `cols` fulfilling the condition.
+            if condition is None:
+                return cols
+            args = [cols[arg.pathname] if hasattr(arg, 'pathname') else arg
+                    for arg in condargs]
+            valid = compiled.function(*args)
+            return dict((colpathname, cols[colpathname][valid])
+                        for colpathname in cols)
+
+        (start, stop, step) = self._process_range_read(start, stop, step)
+        index = None
+        if self.colindexed[by]:
+            index = self.cols._f_col(by).index
+            if (not index.is_csi or index.dirty or
+                    index.nelements != self.nrows):
+                index = None
+
+        if index is None:
+            parts = self._agg_scan(start, stop, step, colpathnames,
+                                   select, by, get_states, ufuncs)
+        else:
+            parts = self._agg_sorted(index, start, stop, step, colpathnames,
+                                     select, by, get_states, ufuncs)
+        if not parts:
+            cols = dict((colpathname, numpy.empty(0, dtype=dtype))
+                        for (colpathname, dtype) in self.coldtypes.iteritems()
+                        if colpathname in colpathnames)
+            parts.append(_agg_reduce(cols[by], get_states(cols), ufuncs))
+        keys, states = _agg_merge(parts, ufuncs)
+
+        # Build the result from the final states.
+        fields = [(by, keys)]
+        states = iter(states)
+        for (name, (func, column)) in aggs:
+            state = next(states)
+            if func == 'mean':
+                state = state / next(states)  # sums by counts
+            fields.append((name, state))
+        result = numpy.empty(len(keys), dtype=[(str(name), values.dtype)
+                                               for (name, values) in fields])
+        for (name, values) in fields:
+            result[str(name)] = values
+        return internal_to_flavor(result, self.flavor)
+
+    def _agg_scan(self, start, stop, step, colpathnames,
+                  select, by, get_states, ufuncs):
+        """Aggregate the selected rows in table order.
+
+        Buffers of rows are read straight into column arrays, and their
+        partial aggregates are merged from time to time to bound memory
+        usage.  A list of partial aggregates is returned.
+
+        """
+
+        nrowsinbuf = self.nrowsinbuf
+        bufs = dict(
+            (colpathname,
+             numpy.empty(nrowsinbuf, dtype=self.coldtypes[colpathname]))
+            for colpathname in colpathnames)
+        parts = []
+        nmerged = npending = 0
+        for bstart in xrange(start, stop, nrowsinbuf * step):
+            bstop = min(bstart + nrowsinbuf * step, stop)
+            nbrows = len(xrange(bstart, bstop, step))
+            cols = self._read_columns(
+                bstart, bstop, step,
+                dict((colpathname, buf[:nbrows])
+                     for (colpathname, buf) in bufs.iteritems()))
+            cols = select(cols)
+            part = _agg_reduce(cols[by], get_states(cols), ufuncs)
+            parts.append(part)
+            npending += len(part[0])
+            if npending > max(nmerged, nrowsinbuf):
+                # Merge the partial aggregates to bound memory usage
+                parts = [_agg_merge(parts, ufuncs)]
+                nmerged, npending = len(parts[0][0]), 0
+        return parts
+
+    def _agg_sorted(self, index, start, stop, step, colpathnames,
+                    select, by, get_states, ufuncs):
+        """Aggregate the selected rows in the order of the CSI `index`.
+
+        Each buffer of sorted coordinates holds a run of consecutive keys,
+        so all its groups but the last one are complete and only that one
+        needs to be merged with the next buffer.  A list of partial
+        aggregates is returned.
+
+        """
+
+        nrowsinbuf = self.nrowsinbuf
+        wholerange = (start == 0 and stop == self.nrows and step == 1)
+        parts = []
+        last = None
+        for istart in xrange(0, index.nelements, nrowsinbuf):
+            coords = index.read_indices(
+                istart, min(istart + nrowsinbuf, index.nelements), 1)
+            if not wholerange:
+                coords = coords[(coords >= start) & (coords < stop) &
+                                ((coords - start) % step == 0)]
+            if len(coords) == 0:
+                continue
+            # Reading in table order is faster, and the groups are the
+            # same in any order.
+            coords.sort()
+            rows = self._read_coordinates(coords)
+            cols = select(dict(
+                (colpathname, get_nested_field(rows, colpathname))
+                for colpathname in colpathnames))
+            part = _agg_reduce(cols[by], get_states(cols), ufuncs)
+            if last is not None:
+                part = _agg_merge([last, part], ufuncs)
+            keys, states = part
+            if len(keys) > 1:
+                parts.append((keys[:-1], [state[:-1] for state in states]))
+            last = (keys[-1:], [state[-1:] for state in states])
+        if last is not None:
+            parts.append(last)
+        if len(parts) > 1:
+            # The parts are sorted and disjoint: just join them.
+            parts = [(numpy.concatenate([keys for (keys, states) in parts]),
+                      [numpy.concatenate(pstates) for pstates in
+                       zip(*[states for (keys, states) in parts])])]
+        return parts
+
     def itersequence(self, sequence):
         """Iterate over a sequence of row coordinates.
 
@@ -1744,7 +2282,7 @@ class Table(tableextension.Table, Leaf):
 
     readSorted = previous_api(read_sorted)
 
-    def iterrows(self, start=None, stop=None, step=None):
+    def iterrows(self, start=None, stop=None, step=None, prefetch=0):
         """Iterate over the table using a Row instance.
 
         If a range is not supplied, *all the rows* in the table are iterated
@@ -1752,6 +2290,14 @@ class Table(tableextension.Table, Leaf):
         that purpose. If you want to iterate over a given *range of rows* in
         the table, you may use the start, stop and step parameters.
 
+        If *prefetch* is greater than 0 (and *step* is positive), up to that
+        number of I/O buffers (see :attr:`Leaf.nrowsinbuf`) are read by a
+        background thread while the current one is being processed, so that
+        reading the table overlaps with the work done in the loop.  This is
+        only done when the HDF5 library was built thread-safe, which is not
+        the default: otherwise each buffer is read when it is needed, as if
+        *prefetch* was 0.
+
         .. warning::
 
             When in the middle of a table row iterator, you should not
@@ -1759,6 +2305,10 @@ class Table(tableextension.Table, Leaf):
             (like :meth:`Table.append` or :meth:`Table.remove_rows`) or
             unexpected errors will happen.
 
+            When prefetching, rows ahead of the current one may have been
+            read already, so changes made to them in the loop by other
+            means than :meth:`Row.update` may not be seen.
+
         See Also
         --------
         tableextension.Row : the table row iterator and field accessor
@@ -1771,6 +2321,9 @@ class Table(tableextension.Table, Leaf):
             result = [ row['var2'] for row in table.iterrows(step=5)
                                                     if row['var1'] <= 20 ]
 
+            for row in table.iterrows(prefetch=2):
+                process(row['var1'])
+
         Notes
         -----
         This iterator can be nested (see :meth:`Table.where` for an example).
@@ -1780,6 +2333,9 @@ class Table(tableextension.Table, Leaf):
            table is iterated from *start* to the last line.
            In PyTables < 3.0 only one element was returned.
 
+        .. versionchanged:: 3.1.2
+           Added the *prefetch* argument.
+
         """
         (start, stop, step) = self._process_range(start, stop, step,
                                                   warn_negstep=False)
@@ -1787,7 +2343,7 @@ class Table(tableextension.Table, Leaf):
             # Fall-back action is to return an empty iterator
             return iter([])
         row = tableextension.Row(self)
-        return row._iter(start, stop, step)
+        return row._iter(start, stop, step, prefetch=prefetch)
 
     def __iter__(self):
         """Iterate over the table using a Row instance.
@@ -1822,6 +2378,9 @@ class Table(tableextension.Table, Leaf):
     def _read(self, start, stop, step, field=None, out=None):
         """Read a range of rows and return an in-memory object."""
 
+        if isinstance(out, dict):
+            return self._read_columns(start, stop, step, out)
+
         select_field = None
         if field:
             if field not in self.coldtypes:
@@ -1872,7 +2431,10 @@ class Table(tableextension.Table, Leaf):
             result = out
 
         # Call the routine to fill-up the resulting array
-        if step == 1 and not field:
+        if field:
+            # Read just this column, straight into the result
+            self._read_columns(start, stop, step, {field: result})
+        elif step == 1 and not field:
             # This optimization works three times faster than
             # the row._fill_col method (up to 170 MB/s on a pentium IV @ 2GHz)
             self._read_records(start, stop - start, result)
@@ -1891,6 +2453,47 @@ class Table(tableextension.Table, Leaf):
         else:
             return result
 
+    def _read_columns(self, start, stop, step, outs):
+        """Read a range of rows of some columns into the arrays in `outs`.
+
+        `outs` maps column pathnames to arrays with exactly one element
+        for each selected row.  The columns are read together, without
+        building any intermediate array of complete rows, and converted
+        to the types of the arrays if needed.
+
+        """
+
+        nrows = len(xrange(start, stop, step))
+        for (colpathname, out) in outs.iteritems():
+            if colpathname not in self.coldtypes:
+                raise KeyError("Field %s not found in table %s, or it is a "
+                               "nested column" % (colpathname, self))
+            if not out.dtype.isnative:
+                raise ValueError("output array for column ``%s`` must be in "
+                                 "system's byteorder" % colpathname)
+            bytes_required = self.coldtypes[colpathname].itemsize * nrows
+            if bytes_required != out.nbytes:
+                raise ValueError(("output array size for column ``{0}`` "
+                                  "invalid, got {1} bytes, need {2} bytes"
+                                  ).format(colpathname, out.nbytes,
+                                           bytes_required))
+            if not out.flags['C_CONTIGUOUS']:
+                raise ValueError("output array for column ``%s`` not C "
+                                 "contiguous" % colpathname)
+
+        if nrows > 0 and outs:
+            views = outs
+            if step < 0:
+                # Read the same rows forwards into reversed outputs
+                (start, stop, step) = (start + (nrows - 1) * step,
+                                       start + 1, -step)
+                views = dict((colpathname, out.reshape(
+                    (nrows,) + self.coldtypes[colpathname].shape)[::-1])
+                    for (colpathname, out) in outs.iteritems())
+            self._read_fields(start, stop, step, views,
+                              self._get_projected_dtype(outs))
+        return outs
+
     def read(self, start=None, stop=None, step=None, field=None, out=None):
         """Get data in the table as a (record) array.
 
@@ -1927,10 +2530,22 @@ class Table(tableextension.Table, Leaf):
         stored on disk. If the out parameter is specified, the output
         array also must be in the current system's byteorder.
 
+        The out parameter may also be a dictionary mapping the pathnames
+        of some (non-nested) columns to arrays with one element for each
+        selected row, like NumPy memory maps or arrays in shared memory.
+        In this case the field parameter must not be given, and the
+        columns are read together straight into their arrays (without
+        building an intermediate record array), which is then returned.
+        Single columns selected with the field parameter are read
+        straight into their result (or out) array too.
+
         .. versionchanged:: 3.0
            Added the *out* parameter.  Also the start, stop and step
            parameters now behave like in slice.
 
+        .. versionchanged:: 3.1.2
+           The *out* parameter may be a dictionary of column arrays.
+
         Examples
         --------
 
@@ -1952,6 +2567,9 @@ class Table(tableextension.Table, Leaf):
 
         if field:
             self._check_column(field)
+            if isinstance(out, dict):
+                raise TypeError("the field parameter can not be used with "
+                                "a dictionary of output arrays")
 
         if out is not None and self.flavor != 'numpy':
             msg = ("Optional 'out' argument may only be supplied if array "
@@ -1963,6 +2581,8 @@ class Table(tableextension.Table, Leaf):
                                                   warn_negstep=False)
 
         arr = self._read(start, stop, step, field, out)
+        if isinstance(arr, dict):
+            return arr
         return internal_to_flavor(arr, self.flavor)
 
     def _read_coordinates(self, coords, field=None):
@@ -2191,11 +2811,45 @@ class Table(tableextension.Table, Leaf):
             raise IndexError("Invalid index or slice: %r" % (key,))
 
     def _save_buffered_rows(self, wbufRA, lenrows):
-        """Update the indexes after a flushing of rows."""
+        """Write rows (maybe in the background) and update the indexes."""
+
+        zonemap = self.zonemap
+        if self._v_writebehind is not None:
+            # The caller may reuse `wbufRA` while the rows are queued.
+            rows = wbufRA[:lenrows].copy()
+            if self._v_writebehindstart is None:
+                self._v_writebehindstart = self.nrows
+                self._v_writebehindnrows = self.nrows
+            # The background writer only writes the rows: other nodes are
+            # only used from this thread, so the zone map is updated here
+            # and the indexes once the writer is drained.
+            if zonemap is not None:
+                zonemap._g_add_rows(rows, self._v_writebehindnrows)
+            self._v_writebehindnrows += lenrows
+            self._v_writebehind.put(self._append_buffered_rows,
+                                    (rows, lenrows))
+        else:
+            if zonemap is not None:
+                # Summarize the rows before they are converted for writing
+                start = self.nrows
+                rows = wbufRA[:lenrows].copy()
+            self._append_buffered_rows(wbufRA, lenrows)
+            if zonemap is not None:
+                zonemap._g_add_rows(rows, start)
+            self._index_buffered_rows(lenrows)
+
+    _saveBufferedRows = previous_api(_save_buffered_rows)
+
+    def _append_buffered_rows(self, wbufRA, lenrows):
+        """Write the first `lenrows` rows in `wbufRA`."""
 
         self._open_append(wbufRA)
         self._append_records(lenrows)
         self._close_append()
+
+    def _index_buffered_rows(self, lenrows):
+        """Update the indexes after a flushing of rows."""
+
         if self.indexed:
             self._unsaved_indexedrows += lenrows
             # The table caches for indexed queries are dirty now
@@ -2207,7 +2861,32 @@ class Table(tableextension.Table, Leaf):
                 # All the columns are dirty now
                 self._mark_columns_as_dirty(self.colpathnames)
 
-    _saveBufferedRows = previous_api(_save_buffered_rows)
+    def _g_drain_write_behind(self):
+        try:
+            super(Table, self)._g_drain_write_behind()
+        finally:
+            self._index_written_behind_rows()
+
+    def _g_stop_write_behind(self):
+        try:
+            super(Table, self)._g_stop_write_behind()
+        finally:
+            self._index_written_behind_rows()
+
+    def _index_written_behind_rows(self):
+        """Update the indexes with the rows written in the background."""
+
+        start = self._v_writebehindstart
+        if start is not None:
+            self._v_writebehindstart = None
+            # Rows may be missing if the background writer failed
+            if self.nrows < self._v_writebehindnrows:
+                zonemap = self.zonemap
+                if zonemap is not None:
+                    # The zone map summarizes the missing rows
+                    zonemap.dirty = True
+            if self.nrows > start:
+                self._index_buffered_rows(self.nrows - start)
 
     def append(self, rows):
         """Append a sequence of rows to the end of the table.
@@ -2589,6 +3268,17 @@ class Table(tableextension.Table, Leaf):
         startLR = index.sorted.nrows * slicesize
         indexedrows = startLR - start
         stop = start + nrows - slicesize + 1
+        nthreads = self._v_file.params['MAX_INDEX_THREADS']
+        nslices = (stop - startLR + slicesize - 1) // slicesize
+        if nthreads > 1 and nslices > 1:
+            # Sort the slices in several threads while reading them
+            index.append_slices(
+                (self._read(startLR + i * slicesize,
+                            startLR + (i + 1) * slicesize, 1, colname)
+                 for i in xrange(nslices)),
+                nthreads, update=update)
+            indexedrows += nslices * slicesize
+            startLR += nslices * slicesize
         while startLR < stop:
             index.append(
                 [self._read(startLR, startLR + slicesize, 1, colname)],
@@ -2705,6 +3395,7 @@ class Table(tableextension.Table, Leaf):
         """
 
         itgpathname = _index_pathname_of(self)
+        zmpathname = _zonemap_pathname_of(self)
 
         # First, move the table to the new location.
         super(Table, self)._g_move(newparent, newname)
@@ -2719,6 +3410,14 @@ class Table(tableextension.Table, Leaf):
             newiname = _index_name_of(self)
             itgroup._g_move(newigroup, newiname)
 
+        # And the zone map (if any).
+        try:
+            zonemap = self._v_file._get_node(zmpathname)
+        except NoSuchNodeError:
+            pass
+        else:
+            zonemap._g_move(self._v_parent, _zonemap_name_of(self))
+
     def _g_remove(self, recursive=False, force=False):
         # Remove the associated index group (if any).
         itgpathname = _index_pathname_of(self)
@@ -2730,6 +3429,9 @@ class Table(tableextension.Table, Leaf):
             itgroup._f_remove(recursive=True)
             self.indexed = False   # there are indexes no more
 
+        # Remove the zone map (if any).
+        self.remove_zonemap()
+
         # Remove the leaf itself from the hierarchy.
         super(Table, self)._g_remove(recursive, force)
 
@@ -2762,9 +3464,18 @@ class Table(tableextension.Table, Leaf):
 
     _markColumnsAsDirty = previous_api(_mark_columns_as_dirty)
 
+    def _mark_zonemap_as_dirty(self):
+        """Mark the zone map (if any) as dirty."""
+
+        zonemap = self.zonemap
+        if zonemap is not None and not zonemap.dirty:
+            zonemap.dirty = True
+
     def _reindex(self, colnames):
         """Re-index columns in `colnames` if automatic indexing is true."""
 
+        # The zone map does not reflect the modified rows anymore
+        self._mark_zonemap_as_dirty()
         if self.indexed:
             colindexed, cols = self.colindexed, self.cols
             colstoindex = []
@@ -2826,6 +3537,100 @@ class Table(tableextension.Table, Leaf):
 
     reIndexDirty = previous_api(reindex_dirty)
 
+    def create_zonemap(self, columns=None, bloom=(), bloombits=8):
+        """Create a zone map for the columns of the table.
+
+        A zone map keeps, for every chunk of rows in the table, the
+        minimum and maximum values of some columns (and the number of
+        NaN values in them).  In-kernel queries (see
+        :meth:`Table.where`) with range conditions on these columns use
+        it to skip the chunks which can not hold any matching row.  This
+        is a lightweight alternative to indexing (see
+        :meth:`Column.create_index`) which works best with columns whose
+        values are nearly sorted, like time stamps.
+
+        The columns argument is a sequence with the path names of the
+        columns to be summarized.  By default, every scalar column of
+        an integer, floating point or time type is summarized.  Any
+        existing zone map of the table is replaced by the new one, which
+        is returned (see :class:`tables.zonemap.ZoneMap`).
+
+        The bloom argument is a sequence with the path names of scalar
+        columns (of any type) which get a Bloom filter per chunk as
+        well.  Bloom filters make equality conditions (like
+        ``(id == 3) | (id == 42)``) skip most of the chunks which do not
+        hold the looked up values, even when the values in the column
+        are not sorted at all.  This is useful for columns with many
+        distinct values, like identifiers.  Each filter takes bloombits
+        bits per row, and about 2% of the chunks not holding a value are
+        read anyway with the default of 8 bits.
+
+        The zone map is kept up to date when rows are appended to the
+        table.  Modifying or removing rows makes it dirty, so queries do
+        not use it until it is created again with this method.  It is
+        kept in a hidden node beside the table, which is moved or
+        removed along with the table, but it is not copied with it.
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        self._g_check_open()
+        self._v_file._check_writable()
+        from tables.zonemap import ZoneMap, _is_zonable, _is_bloomable
+
+        def check_columns(colpathnames, check, kinds):
+            colpathnames = list(colpathnames)
+            for colpathname in colpathnames:
+                coldescr = self.coldescrs.get(colpathname)
+                if coldescr is None:
+                    raise KeyError("table ``%s`` has no column named ``%s``"
+                                   % (self._v_pathname, colpathname))
+                if not check(coldescr):
+                    raise ValueError(
+                        "column ``%s`` can not be summarized in a zone map; "
+                        "only scalar%s columns are supported"
+                        % (colpathname, kinds))
+            return colpathnames
+
+        if columns is None:
+            columns = [colpathname for colpathname in self.colpathnames
+                       if _is_zonable(self.coldescrs[colpathname])]
+        else:
+            columns = check_columns(columns, _is_zonable,
+                                    " integer, floating point and time")
+        bloom = check_columns(bloom, _is_bloomable, "")
+        if bloombits < 1:
+            raise ValueError("``bloombits`` must be a positive integer: %r"
+                             % (bloombits,))
+
+        # Summarize the rows in the table, a whole number of chunks at
+        # a time.
+        self._g_drain_write_behind()
+        self.remove_zonemap()
+        zonemap = ZoneMap(self._v_parent, _zonemap_name_of(self),
+                          self, columns, bloom, bloombits)
+        self._zonemapped = True
+        chunksize = self.chunkshape[0]
+        step = max(self.nrowsinbuf // chunksize, 1) * chunksize
+        nrows = self.nrows
+        for start in xrange(0, nrows, step):
+            rows = self._read(start, min(start + step, nrows), 1)
+            zonemap._g_add_rows(rows, start)
+        return zonemap
+
+    def remove_zonemap(self):
+        """Remove the zone map of the table (if any).
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        zonemap = self.zonemap
+        if zonemap is not None:
+            zonemap._f_remove()
+        self._zonemapped = False
+
     def _g_copy_rows(self, object, start, stop, step, sortby, checkCSI):
         "Copy rows from self to object"
         if sortby is None:
@@ -2959,6 +3764,8 @@ class Table(tableextension.Table, Leaf):
         # Flush rows that remains to be appended
         if 'row' in self.__dict__:
             self.row._flush_buffered_rows()
+        # Wait for the rows being written in the background
+        self._g_drain_write_behind()
         if self.indexed and self.autoindex:
             # Flush any unindexed row
             rowsadded = self.flush_rows_to_index(_lastrow=True)
@@ -3024,6 +3831,8 @@ class Table(tableextension.Table, Leaf):
         #   to first close ``Table`` objects and then ``Index`` hierarchies.
         #
 
+        self._g_close_readaheads()
+
         # Flush right now so the row object does not get in the middle.
         if flush:
             self.flush()
@@ -3037,6 +3846,11 @@ class Table(tableextension.Table, Leaf):
         if cols is not None:
             cols._g_close()
 
+        # Give the memory of the chunk cache back to its budgets.
+        chunkcache = self.__dict__.get('_chunkcache')
+        if chunkcache is not None:
+            chunkcache.clear()
+
         # Close myself as a leaf.
         super(Table, self)._f_close(False)
 
@@ -3658,6 +4472,7 @@ class Column(object):
             raise ValueError("Optimization level must be an integer in the "
                              "range 0-9")
         if filters is None:
+            from tables.index import default_index_filters
             filters = default_index_filters
         if tmp_dir is None:
             tmp_dir = os.path.dirname(self._table_file.filename)
@@ -25,16 +25,19 @@ Misc variables:
 
 import sys
 import numpy
+import functools
+import threading
 from time import time
+from collections import deque
 
 from tables.description import Col
 from tables.exceptions import HDF5ExtError
-from tables.conditions import call_on_recarr
 from tables.utilsextension import (get_nested_field, atom_from_hdf5_type,
   create_nested_type, hdf5_to_np_ext_type, create_nested_type, platform_byteorder,
   pttype_to_hdf5, pt_special_kinds, npext_prefixes_to_ptkinds, hdf5_class_to_string,
   H5T_STD_I64)
-from tables.utils import SizeType
+from tables.utils import SizeType, ReadAhead
+from tables import lrucacheextension
 
 from utilsextension cimport get_native_type, cstr_to_pystr
 
@@ -55,6 +58,7 @@ from definitions cimport (hid_t, herr_t, hsize_t, htri_t,
   H5Sget_simple_extent_ndims, H5Sget_simple_extent_dims, H5Sclose,
   H5T_class_t, H5Tget_size, H5Tset_size, H5Tcreate, H5Tcopy, H5Tclose,
   H5Tget_nmembers, H5Tget_member_name, H5Tget_member_type, H5Tget_native_type,
+  H5Tget_member_index,
   H5Tget_member_value, H5Tinsert, H5Tget_class, H5Tget_super, H5Tget_offset,
   H5T_cset_t, H5T_CSET_ASCII, H5T_CSET_UTF8,
   H5ATTRset_attribute_string, H5ATTRset_attribute,
@@ -62,7 +66,7 @@ from definitions cimport (hid_t, herr_t, hsize_t, htri_t,
   conv_float64_timeval32, truncate_dset,
   pt_H5free_memory)
 
-from lrucacheextension cimport ObjectCache, NumCache
+from lrucacheextension cimport ObjectCache, ChunkCache, SharedChunkCache
 
 from tables._past import previous_api, previous_api_property
 
@@ -110,8 +114,26 @@ cdef extern from "H5TB-opt.h" nogil:
 # using any numpy facilities in an extension module.
 import_array()
 
+
+# The helpers for evaluating conditions are imported (along with Numexpr)
+# when the first condition is evaluated.
+cdef object call_on_recarr = None
+cdef object copy_function = None
+
+cdef load_condition_helpers():
+  global call_on_recarr, copy_function
+
+  if call_on_recarr is None:
+    from tables import conditions
+    call_on_recarr = conditions.call_on_recarr
+    copy_function = conditions.copy_function
+
+
 #-------------------------------------------------------------
 
+# The cache of table chunks shared by read-only files
+cdef SharedChunkCache shared_chunk_cache = lrucacheextension.shared_chunk_cache
+
 
 # Private functions
 cdef get_nested_field_cache(recarray, fieldname, fieldcache):
@@ -143,6 +165,93 @@ cdef join_path(object parent, object name):
     return parent + '/' + name
 
 
+def _read_buffer(table, nrowsinbuf, start):
+  """Read `nrowsinbuf` rows of `table` from `start` into a new buffer.
+
+  A ``(nrecords, buffer)`` tuple is returned.
+
+  """
+
+  buf = table._get_container(nrowsinbuf)
+  return (table._read_records(start, nrowsinbuf, buf), buf)
+
+
+def _buffer_positions(start, stop, step, nrowsinbuf):
+  """Yield the start of the I/O buffers read by a sequential loop.
+
+  These are the buffers read by ``Row.__next__general()`` with a
+  positive `step`, i.e. those with some row in ``range(start, stop,
+  step)``.
+
+  """
+
+  pos = nextelement = start
+  while nextelement < stop:
+    while nextelement >= pos + nrowsinbuf:
+      pos = pos + nrowsinbuf
+    yield pos
+    pos = pos + nrowsinbuf
+    # The first selected row after this buffer
+    nextelement = start + ((pos - start - 1) // step + 1) * step
+
+
+cdef hid_t create_projected_type(hid_t type_id, object dtype) except -1:
+  """Create a compound type with just the members of `type_id` in `dtype`.
+
+  The members are placed at the offsets of the fields in `dtype`, which
+  is walked recursively for nested fields.  This type can be used for
+  reading only some of the columns of a table.
+
+  """
+
+  cdef hid_t tid, member_type_id, nested_type_id
+  cdef int i
+  cdef bytes encoded_name
+
+  tid = H5Tcreate(H5T_COMPOUND, dtype.itemsize)
+  if tid < 0:
+    raise HDF5ExtError("Problems creating a projected compound type.")
+  for name in dtype.names:
+    fdtype, offset = dtype.fields[name][:2]
+    encoded_name = name.encode('utf-8')
+    i = H5Tget_member_index(type_id, encoded_name)
+    if i < 0:
+      H5Tclose(tid)
+      raise HDF5ExtError("Member ``%s`` not found in compound type." % name)
+    member_type_id = H5Tget_member_type(type_id, i)
+    if fdtype.names is not None:
+      # A nested column: keep only its projected members
+      nested_type_id = create_projected_type(member_type_id, fdtype)
+      H5Tclose(member_type_id)
+      member_type_id = nested_type_id
+    H5Tinsert(tid, encoded_name, offset, member_type_id)
+    H5Tclose(member_type_id)
+  return tid
+
+
+cdef ndarray append_coords(ndarray coords, npy_intp ncoords, ndarray newcoords):
+  """Append `newcoords` after the first `ncoords` elements of `coords`.
+
+  The `coords` buffer is enlarged (at least doubling its size) when
+  there is not enough room for the new coordinates.  The (maybe
+  reallocated) buffer is returned.
+
+  """
+
+  cdef npy_intp nnew, size
+  cdef ndarray newbuf
+
+  nnew = newcoords.shape[0]
+  size = coords.shape[0]
+  if ncoords + nnew > size:
+    size = max(2 * size, ncoords + nnew)
+    newbuf = numpy.empty(size, dtype='int64')
+    newbuf[:ncoords] = coords[:ncoords]
+    coords = newbuf
+  coords[ncoords:ncoords+nnew] = newcoords
+  return coords
+
+
 # Public classes
 
 cdef class Table(Leaf):
@@ -437,19 +546,29 @@ cdef class Table(Leaf):
     conv_float64_timeval32(
       t64buf, byteoffset, bytestride, nrecords, nelements, sense)
 
-  cpdef _convert_types(self, ndarray recarr, hsize_t nrecords, int sense):
+  cpdef _convert_types(self, ndarray recarr, hsize_t nrecords, int sense,
+                       object colpathnames=None):
     """Converts columns in 'recarr' between NumPy and HDF5 formats.
 
     NumPy to HDF5 conversion is performed when 'sense' is 0.  Otherwise, HDF5
     to NumPy conversion is performed.  The conversion is done in place,
     i.e. 'recarr' is modified.
 
+    If 'colpathnames' is given, 'recarr' only has these columns.
+
     """
 
+    if colpathnames is None:
+      colpathnames = self.colpathnames
+      time64colnames = self._time64colnames
+    else:
+      time64colnames = [name for name in self._time64colnames
+                        if name in colpathnames]
+
     # For reading, first swap the byteorder by hand
     # (this is not currently supported by HDF5)
     if sense == 1:
-      for colpathname in self.colpathnames:
+      for colpathname in colpathnames:
         if self.coltypes[colpathname] in ["time32", "time64"]:
           colobj = self.coldescrs[colpathname]
           if hasattr(colobj, "_byteorder"):
@@ -459,7 +578,7 @@ cdef class Table(Leaf):
               column.byteswap(True)
 
     # This should be generalised to support other type conversions.
-    for t64cname in self._time64colnames:
+    for t64cname in time64colnames:
       column = get_nested_field(recarr, t64cname)
       self._convert_time64_(column, nrecords, sense)
 
@@ -581,12 +700,97 @@ cdef class Table(Leaf):
 
     return nrecords
 
+  def _read_projected_records(self, hsize_t start, hsize_t nrecords,
+                              ndarray recarr, hid_t type_id,
+                              object colpathnames):
+    """Read only the columns in `colpathnames` for a range of records.
+
+    `type_id` must be a compound type made with `create_projected_type()`
+    for the dtype of `recarr`.
+
+    """
+
+    cdef void *rbuf
+    cdef int ret
+
+    # Correct the number of records to read, if needed
+    if (start + nrecords) > self.nrows:
+      nrecords = self.nrows - start
+
+    # Get the pointer to the buffer data area
+    rbuf = recarr.data
+
+    # Read the records from disk (HDF5 skips the fields not in type_id)
+    with nogil:
+        ret = H5TBOread_records(self.dataset_id, type_id, start,
+                                nrecords, rbuf)
+
+    if ret < 0:
+      raise HDF5ExtError("Problems reading records.")
+
+    # Convert some HDF5 types to NumPy after reading.
+    self._convert_types(recarr, nrecords, 1, colpathnames)
+
+    return nrecords
+
+  def _read_fields(self, hsize_t start, hsize_t stop, hsize_t step,
+                   object outs, object dtype):
+    """Read some columns of a range of rows into the arrays in `outs`.
+
+    `outs` maps column pathnames to arrays with one element for each row
+    in ``range(start, stop, step)``, and `dtype` is the (nested) dtype of
+    the table with just these columns.  A single column read with a unit
+    step into an array of the column type goes straight into the array.
+    Otherwise, the rows are read in blocks of up to `nrowsinbuf` rows of
+    `dtype`, which are scattered (and converted) to the arrays.
+
+    """
+
+    cdef hid_t type_id
+    cdef hsize_t nrow, nrecords, nspan, nout
+
+    colpathnames = frozenset(outs)
+    type_id = create_projected_type(self.type_id, dtype)
+    try:
+      if step == 1 and len(outs) == 1:
+        (colpathname, out), = outs.items()
+        if out.dtype.base == self.coldtypes[colpathname].base:
+          if out.size > 0:
+            recarr = out.reshape(-1).view(dtype)
+            self._read_projected_records(start, stop - start, recarr,
+                                         type_id, colpathnames)
+          return
+
+      # Each block spans as many selected rows as fit in the I/O buffer
+      nspan = (max(self.nrowsinbuf // step, 1) - 1) * step + 1
+      buf = numpy.empty(nspan, dtype=dtype)
+      outs = [(colpathname, out.reshape(
+                (-1,) + get_nested_field(buf, colpathname).shape[1:]))
+              for colpathname, out in outs.items()]
+      nrow = start
+      nout = 0
+      while nrow < stop:
+        nrecords = stop - nrow
+        if nrecords > nspan:
+          nrecords = nspan
+        nrecords = self._read_projected_records(nrow, nrecords, buf, type_id,
+                                                colpathnames)
+        if nrecords == 0:
+          break
+        rows = buf[:nrecords:step]
+        for colpathname, out in outs:
+          out[nout:nout+len(rows)] = get_nested_field(rows, colpathname)
+        nout = nout + len(rows)
+        nrow = nrow + len(rows) * step
+    finally:
+      H5Tclose(type_id)
+
   cdef hsize_t _read_chunk(self, hsize_t nchunk, ndarray iobuf, long cstart):
-    cdef long nslot
     cdef hsize_t start, nrecords, chunkshape
     cdef int ret
     cdef void *rbuf
-    cdef NumCache chunkcache
+    cdef ChunkCache chunkcache
+    cdef object sharedkey
 
     chunkcache = self._chunkcache
     chunkshape = chunkcache.slotsize
@@ -596,19 +800,27 @@ cdef class Table(Leaf):
     if (start + nrecords) > self.nrows:
       nrecords = self.nrows - start
     rbuf = <char *>iobuf.data + cstart * chunkcache.itemsize
-    # Try to see if the chunk is in cache
-    nslot = chunkcache.getslot_(nchunk)
-    if nslot >= 0:
-      chunkcache.getitem_(nslot, rbuf, 0)
-    else:
-      # Chunk is not in cache. Read it and put it in the LRU cache.
-      with nogil:
-          ret = H5TBOread_records(self.dataset_id, self.type_id,
-                                  start, nrecords, rbuf)
+    # Try to see if the chunk is in cache (shared or not)
+    sharedkey = self._shared_chunk_key
+    if sharedkey is not None:
+      sharedkey = sharedkey + (nchunk,)
+      if shared_chunk_cache.getitem_(sharedkey, rbuf,
+                                     chunkshape * chunkcache.itemsize):
+        return nrecords
+    elif chunkcache.getitem_(nchunk, rbuf):
+      return nrecords
+    # Chunk is not in cache. Read it and put it in the cache.
+    with nogil:
+        ret = H5TBOread_records(self.dataset_id, self.type_id,
+                                start, nrecords, rbuf)
 
-      if ret < 0:
-        raise HDF5ExtError("Problems reading chunk records.")
-      nslot = chunkcache.setitem_(nchunk, rbuf, 0)
+    if ret < 0:
+      raise HDF5ExtError("Problems reading chunk records.")
+    if sharedkey is not None:
+      shared_chunk_cache.setitem_(sharedkey, rbuf,
+                                  chunkshape * chunkcache.itemsize)
+    else:
+      chunkcache.setitem_(nchunk, rbuf)
     return nrecords
 
   def _read_elements(self, ndarray coords, ndarray recarr):
@@ -713,6 +925,8 @@ cdef class Row:
   cdef int     ro_filemode, chunked
   cdef int     _bufferinfo_done, sss_on
   cdef int     iterseq_max_elements
+  cdef int     projected
+  cdef hid_t   ptype_id
   cdef ndarray bufcoords, indexvalid, indexvalues, chunkmap
   cdef hsize_t *bufcoords_data
   cdef hsize_t *index_values_data
@@ -720,6 +934,7 @@ cdef class Row:
   cdef char    *index_valid_data
   cdef object  dtype
   cdef object  iobuf, iobufcpy
+  cdef object  pbuf, pcolpathnames
   cdef object  wrec, wreccpy
   cdef object  wfields, rfields
   cdef object  coords
@@ -730,6 +945,7 @@ cdef class Row:
   cdef object  _table_file, _table_path
   cdef object  modified_fields
   cdef object  seqcache_key
+  cdef object  readahead
 
   # Deprecated API
   indexChunk = previous_api_property('indexchunk')
@@ -789,12 +1005,134 @@ cdef class Row:
     self.rfieldscache = {}
     self.wfieldscache = {}
     self.modified_fields = set()
+    self.ptype_id = -1
+    self.readahead = None
+
+  def __dealloc__(self):
+    if self.ptype_id >= 0:
+      H5Tclose(self.ptype_id)
+    if self.readahead is not None:
+      self.readahead.close()
+
+  def _iter(self, start=0, stop=0, step=1, coords=None, chunkmap=None,
+            prefetch=0):
+    """Return an iterator for traversiong the data in table.
+
+    If `prefetch` is greater than 0, up to that number of I/O buffers are
+    read ahead by a background thread in sequential loops.
 
-  def _iter(self, start=0, stop=0, step=1, coords=None, chunkmap=None):
-    """Return an iterator for traversiong the data in table."""
+    """
+    if self.readahead is not None:
+      self.readahead.close()
+      self.readahead = None
     self._init_loop(start, stop, step, coords, chunkmap)
+    if (prefetch > 0 and step > 0 and coords is None and not self.wherecond
+        and start < stop):
+      self._start_readahead(prefetch)
     return iter(self)
 
+  cdef _start_readahead(self, int nbuffers):
+    """Start reading the I/O buffers of a sequential loop in advance."""
+    table = self.table
+    read = functools.partial(_read_buffer, table, self.nrowsinbuf)
+    positions = _buffer_positions(self.start, self.stop, self.step,
+                                  self.nrowsinbuf)
+    self.readahead = ReadAhead(read, positions, nbuffers)
+    table._v_readaheads[self.readahead] = None
+
+  cdef hsize_t _read_ahead(self) except? 0:
+    """Get the next I/O buffer from the background reader."""
+    pos, (recout, buf) = self.readahead.get()
+    assert pos == self.nrowsread, "unexpected buffer from the reader"
+    self.iobuf[:recout] = buf[:recout]
+    return recout
+
+  def _where_coords(self, start=0, stop=0, step=1, chunkmap=None):
+    """Return the coordinates of the rows fulfilling the table condition.
+
+    This is a vectorized alternative to iterating over the rows selected
+    by a where condition.  Each I/O buffer is evaluated as a whole and
+    the coordinates of the selected rows are appended to a growable
+    ``int64`` array, so no Python objects are created for each row.
+
+    """
+
+    cdef ndarray coords
+    cdef ObjectCache seqcache
+
+    self._init_loop(start, stop, step, None, chunkmap)
+    assert self.wherecond, "a where condition must be set in the table"
+    if self.indexed:
+      coords = self._where_coords_indexed()
+    else:
+      coords = self._where_coords_inkernel()
+    if self._write_to_seqcache:
+      if coords.shape[0] < self.iterseq_max_elements:
+        seqcache = self.table._seqcache
+        seqcache.setitem_(self.seqcache_key, coords.copy(), coords.nbytes)
+      self._write_to_seqcache = 0
+    self.iterseq = None
+    self.seqcache_key = None
+    self.condfunc = self.condargs = None
+    self._riterator = 0
+    return coords
+
+  def _where_coords_many(self, start, stop, step, conditions):
+    """Return the coordinates of the rows fulfilling each of `conditions`.
+
+    `conditions` is a sequence of ``(function, args)`` tuples like the
+    table condition.  Every I/O buffer in the range is read just once
+    (only the columns in the table projection, if set) and all the
+    conditions are evaluated over it.  A list with an ``int64`` array of
+    coordinates for each condition is returned.
+
+    """
+
+    cdef hsize_t nrow, nrecords, recout
+    cdef npy_intp i, nconds
+    cdef ndarray valid, found
+
+    table = self.table
+    # The first condition lets the loop set up the projection
+    table._where_condition = conditions[0]
+    self._init_loop(start, stop, step, None, None)
+    nconds = len(conditions)
+    coords = [numpy.empty(self.nrowsinbuf, dtype='int64')
+              for i in range(nconds)]
+    ncoords = [0] * nconds
+    try:
+      nrow = self.start
+      while nrow < self.stop:
+        nrecords = self.stop - nrow
+        if nrecords > self.nrowsinbuf:
+          nrecords = self.nrowsinbuf
+        if self.projected:
+          buf = self.pbuf
+          recout = table._read_projected_records(nrow, nrecords, buf,
+                                                 self.ptype_id,
+                                                 self.pcolpathnames)
+        else:
+          buf = self.iobuf
+          recout = table._read_records(nrow, nrecords, buf)
+        if recout == 0:
+          break
+        for i in range(nconds):
+          condfunc, condargs = conditions[i]
+          valid = call_on_recarr(condfunc, condargs, buf[:recout])
+          if self.step > 1:
+            found = numpy.flatnonzero(valid[::self.step]) * self.step
+          else:
+            found = numpy.flatnonzero(valid)
+          if found.shape[0] > 0:
+            coords[i] = append_coords(coords[i], ncoords[i], found + nrow)
+            ncoords[i] = ncoords[i] + found.shape[0]
+        # The next buffer starts at the next row in the step sequence
+        nrow = nrow + ((recout - 1) / self.step + 1) * self.step
+    finally:
+      self.condfunc = self.condargs = None
+      self._riterator = 0
+    return [coords[i][:ncoords[i]] for i in range(nconds)]
+
   def __iter__(self):
     """Iterator that traverses all the data in the Table"""
     return self
@@ -868,10 +1206,25 @@ cdef class Row:
       return
 
     if table._where_condition:
+      load_condition_helpers()
       self.wherecond = 1
       self.condfunc, self.condargs = table._where_condition
       table._where_condition = None
 
+    self.projected = 0
+    if table._where_projection is not None:
+      if self.wherecond and not table._use_index:
+        # Only the columns in the condition are read for evaluating it
+        self.projected = 1
+        pdtype, self.pcolpathnames = table._where_projection
+        self.pbuf = numpy.empty(self.nrowsinbuf, dtype=pdtype)
+        if self.ptype_id >= 0:
+          H5Tclose(self.ptype_id)
+        self.ptype_id = create_projected_type((<Table>table).type_id,
+                                              pdtype)
+        self.lenbuf = 0
+      table._where_projection = None
+
     if table._use_index:
       self.indexed = 1
       # Compute totalchunks here because self.nrows can change during the
@@ -908,6 +1261,8 @@ cdef class Row:
       return self.__next__indexed()
     elif self.coords is not None:
       return self.__next__coords()
+    elif self.projected:
+      return self.__next__projected()
     elif self.wherecond:
       return self.__next__inkernel()
     else:
@@ -1126,6 +1481,232 @@ cdef class Row:
     else:
       self._finish_riterator()
 
+  cdef __next__projected(self):
+    """The version of next() for in-kernel conditions on some columns.
+
+    The condition is evaluated over a buffer with just the columns taking
+    part in it, and then only the rows fulfilling the condition are read
+    in full.
+
+    """
+
+    cdef hsize_t recout
+    cdef ndarray valid, found
+
+    while 1:
+      self._row = self._row + 1
+      if self._row < self.lenbuf:
+        self._nrow = self.index_values_data[self._row]
+        return self
+      # Make _row to point to the last valid entry in buffer
+      # (this is useful for accessing the last row after an iterator loop)
+      self._row = self._row - 1
+      if self.nrowsread >= self.stop:
+        break
+      # Read the columns in the condition and evaluate it
+      recout = self.stop - self.nrowsread
+      if recout > self.nrowsinbuf:
+        recout = self.nrowsinbuf
+      table = self.table
+      recout = table._read_projected_records(self.nrowsread, recout,
+                                             self.pbuf, self.ptype_id,
+                                             self.pcolpathnames)
+      if recout == 0:
+        break
+      valid = call_on_recarr(self.condfunc, self.condargs,
+                             self.pbuf[:recout])
+      if self.step > 1:
+        found = numpy.flatnonzero(valid[::self.step]) * self.step
+      else:
+        found = numpy.flatnonzero(valid)
+      found = (found + self.nrowsread).astype(numpy.uint64)
+      # The next buffer starts at the next row in the step sequence
+      self.nrowsread = (self.nrowsread +
+                        ((recout - 1) / self.step + 1) * self.step)
+      if found.shape[0] == 0:
+        continue
+      # Read the complete rows fulfilling the condition
+      table._read_elements(found, self.iobuf)
+      self.indexvalues = found
+      self.index_values_data = <hsize_t *>self.indexvalues.data
+      self.lenbuf = found.shape[0]
+      self._row = -1
+    self._finish_riterator()
+
+  cdef ndarray _where_coords_inkernel(self):
+    """Collect the coordinates selected by an in-kernel condition."""
+
+    cdef hsize_t nrow, nrecords, recout
+    cdef npy_intp ncoords
+    cdef ndarray coords, valid, found
+
+    table = self.table
+    nthreads = table._v_file.params['MAX_QUERY_THREADS']
+    if nthreads > 1 and self.stop - self.start > self.nrowsinbuf:
+      return self._where_coords_threaded(nthreads)
+
+    coords = numpy.empty(self.nrowsinbuf, dtype='int64')
+    ncoords = 0
+    nrow = self.start
+    while nrow < self.stop:
+      nrecords = self.stop - nrow
+      if nrecords > self.nrowsinbuf:
+        nrecords = self.nrowsinbuf
+      # Read a buffer and evaluate the condition on it as a whole
+      if self.projected:
+        buf = self.pbuf
+        recout = table._read_projected_records(nrow, nrecords, buf,
+                                               self.ptype_id,
+                                               self.pcolpathnames)
+      else:
+        buf = self.iobuf
+        recout = table._read_records(nrow, nrecords, buf)
+      if recout == 0:
+        break
+      valid = call_on_recarr(self.condfunc, self.condargs, buf[:recout])
+      if self.step > 1:
+        found = numpy.flatnonzero(valid[::self.step]) * self.step
+      else:
+        found = numpy.flatnonzero(valid)
+      if found.shape[0] > 0:
+        coords = append_coords(coords, ncoords, found + nrow)
+        ncoords = ncoords + found.shape[0]
+      # The next buffer starts at the next row in the step sequence
+      nrow = nrow + ((recout - 1) / self.step + 1) * self.step
+    return coords[:ncoords]
+
+  cdef ndarray _where_coords_threaded(self, int nthreads):
+    """Collect the coordinates selected by an in-kernel condition using
+    several threads.
+
+    The range is split into blocks aligned with chunk boundaries, which
+    are handed out in order to `nthreads` workers.  Reads are serialized
+    (HDF5 is not thread-safe) but they release the GIL, so the condition
+    can be evaluated over some blocks while another one is being read and
+    decompressed.  The coordinates are concatenated in block order, so
+    they come back in row order.
+
+    """
+
+    cdef hsize_t blocksize, bstart, bstop
+    cdef int i
+
+    # Blocks are aligned with chunks and are not larger than the I/O buffer
+    blocksize = self.nrowsinbuf - self.nrowsinbuf % self.chunksize
+    if blocksize == 0:
+      blocksize = self.nrowsinbuf
+    blocks = []
+    bstart = self.start
+    while bstart < <hsize_t>self.stop:
+      bstop = (bstart / blocksize + 1) * blocksize
+      if bstop > <hsize_t>self.stop:
+        bstop = self.stop
+      blocks.append((bstart, bstop))
+      bstart = bstop
+    if nthreads > len(blocks):
+      nthreads = len(blocks)
+
+    pending = deque(enumerate(blocks))
+    results = [None] * len(blocks)
+    errors = []
+    iolock = threading.Lock()
+    workers = [threading.Thread(target=self._scan_blocks,
+                                args=(pending, results, iolock, errors))
+               for i in range(nthreads)]
+    for worker in workers:
+      worker.start()
+    for worker in workers:
+      worker.join()
+    if errors:
+      raise errors[0]
+    return numpy.concatenate(results)
+
+  def _scan_blocks(self, pending, results, iolock, errors):
+    """Evaluate the table condition over the `pending` blocks.
+
+    This is the body of the worker threads in `_where_coords_threaded()`.
+    Each `(i, (start, stop))` block is popped from the `pending` deque and
+    the coordinates it selects are stored in ``results[i]``.  The first
+    exception raised is appended to `errors`, which stops all workers.
+
+    """
+
+    table = self.table
+    if self.projected:
+      buf = numpy.empty(self.nrowsinbuf, dtype=self.pbuf.dtype)
+    else:
+      buf = table._get_container(self.nrowsinbuf)
+    # Numexpr functions can not be run by several threads at a time
+    condfunc = copy_function(self.condfunc)
+    start, step = self.start, self.step
+    while not errors:
+      try:
+        i, (bstart, bstop) = pending.popleft()
+      except IndexError:
+        break
+      try:
+        with iolock:
+          if self.projected:
+            recout = table._read_projected_records(
+              bstart, bstop - bstart, buf, self.ptype_id, self.pcolpathnames)
+          else:
+            recout = table._read_records(bstart, bstop - bstart, buf)
+        valid = call_on_recarr(condfunc, self.condargs, buf[:recout])
+        # The offset of the first row in the block that is in the step sequence
+        offset = -(bstart - start) % step
+        found = numpy.flatnonzero(valid[offset::step]) * step
+        results[i] = found + (bstart + offset)
+      except Exception as exc:
+        errors.append(exc)
+
+  cdef ndarray _where_coords_indexed(self):
+    """Collect the coordinates selected by a condition and a chunkmap."""
+
+    cdef hsize_t nchunk, lastchunk, recout
+    cdef long j, cs
+    cdef npy_intp ncoords
+    cdef Table table
+    cdef ndarray iobuf, bufcoords, coords, valid, found
+    cdef object tmp_range
+
+    assert self.nrowsinbuf >= self.chunksize
+    table = self.table
+    cs = self.chunksize
+    tmp_range = numpy.arange(0, cs, dtype='int64')
+    bufcoords = numpy.empty(self.nrowsinbuf, dtype='int64')
+    coords = numpy.empty(self.nrowsinbuf, dtype='int64')
+    ncoords = 0
+    nchunk = self.start / cs
+    lastchunk = (self.stop - 1) / cs + 1
+    if lastchunk > self.totalchunks:
+      lastchunk = self.totalchunks
+    while nchunk < lastchunk:
+      # Fetch valid chunks until the I/O buffer is full
+      j = 0;  recout = 0
+      while nchunk < lastchunk and j < self.nchunksinbuf:
+        if self.chunkmap_data[nchunk]:
+          bufcoords[j*cs:(j+1)*cs] = tmp_range + nchunk * cs
+          recout = recout + table._read_chunk(nchunk, self.iobuf, j*cs)
+          j = j + 1
+        nchunk = nchunk + 1
+      if recout == 0:
+        continue
+
+      # Evaluate the condition on this table fragment.
+      iobuf = self.iobuf[:recout]
+      table._convert_types(iobuf, recout, 1)
+      valid = call_on_recarr(self.condfunc, self.condargs, iobuf)
+      found = bufcoords[:recout][valid]
+      # Check additional conditions on start, stop, step params
+      if self.sss_on:
+        found = found[(found >= <long long>self.start) &
+                      (found < self.stop) &
+                      ((found - <long long>self.start) % self.step == 0)]
+      if found.shape[0] > 0:
+        coords = append_coords(coords, ncoords, found)
+        ncoords = ncoords + found.shape[0]
+    return coords[:ncoords]
+
   cdef __next__general(self):
     """The version of next() for the general cases"""
     cdef int recout
@@ -1142,8 +1723,11 @@ cdef class Row:
             self.stopb = self.nrowsinbuf
           self._row = self.startb - self.step
           # Read a chunk
-          recout = self.table._read_records(self.nrowsread, self.nrowsinbuf,
-                                            self.iobuf)
+          if self.readahead is not None:
+            recout = self._read_ahead()
+          else:
+            recout = self.table._read_records(self.nrowsread,
+                                              self.nrowsinbuf, self.iobuf)
           self.nrowsread = self.nrowsread + recout
 
         self._row = self._row + self.step
@@ -1191,6 +1775,9 @@ cdef class Row:
       # Guessing iterseq size: Each element in self.iterseq should take at least 8 bytes
       seqcache.setitem_(self.seqcache_key, self.iterseq, len(self.iterseq) * 8)
     self._riterator = 0        # out of iterator
+    if self.readahead is not None:
+      self.readahead.close()     # stop reading ahead
+      self.readahead = None
     self.iterseq = None        # empty seqcache-related things
     self.seqcache_key = None
     if self._mod_nrows > 0:    # Check if there is some modified row
@@ -1432,11 +2019,14 @@ cdef class Row:
 
     table = self.table
     # Save the records on disk
-    table._update_elements(self._mod_nrows, self.mod_elements, self.iobufcpy)
+    table._update_elements(self._mod_nrows, self.mod_elements,
+                           self.iobufcpy)
     # Reset the counter of modified rows to 0
     self._mod_nrows = 0
     # Mark the modified fields' indexes as dirty.
     table._mark_columns_as_dirty(self.modified_fields)
+    # The zone map does not reflect the modified rows anymore.
+    table._mark_zonemap_as_dirty()
 
   _flushModRows = previous_api(_flush_mod_rows)
 
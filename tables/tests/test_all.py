@@ -35,6 +35,7 @@ def suite():
         'tables.tests.test_earray',
         'tables.tests.test_carray',
         'tables.tests.test_vlarray',
+        'tables.tests.test_raggedarray',
         'tables.tests.test_tree',
         'tables.tests.test_timetype',
         'tables.tests.test_do_undo',
@@ -47,6 +48,7 @@ def suite():
         'tables.tests.test_links',
         'tables.tests.test_indexes',
         'tables.tests.test_indexvalues',
+        'tables.tests.test_zonemap',
         'tables.tests.test_index_backcompat',
         # Sub-packages
         'tables.nodes.tests.test_filenode',
@@ -2664,6 +2664,37 @@ class TestCreateArrayArgs(common.TempFileMixin, TestCase):
                           shape=shape)
 
 
+class PrefetchIterTestCase(common.TempFileMixin, TestCase):
+    """Test iterating over arrays with buffers read ahead."""
+
+    def test00_ranges(self):
+        """Iterating with prefetching over ranges of rows."""
+
+        nparr = numpy.arange(200).reshape(100, 2)
+        for factory in [self.h5file.create_array, self.h5file.create_carray]:
+            array = factory('/', factory.__name__, obj=nparr)
+            array.nrowsinbuf = 7
+            for (start, stop, step) in [(None, None, None), (3, 97, 1),
+                                        (2, 90, 6), (1, None, 30)]:
+                rows = [row.tolist() for row in
+                        array.iterrows(start, stop, step, prefetch=2)]
+                self.assertEqual(rows, nparr[start:stop:step].tolist())
+
+    def test01_break(self):
+        """Leaving a prefetching loop before its end."""
+
+        array = self.h5file.create_array('/', 'array', numpy.arange(100))
+        array.nrowsinbuf = 7
+        for row in array.iterrows(prefetch=2):
+            if row == 10:
+                break
+        # A new loop stops the previous reader
+        self.assertEqual(list(array.iterrows(95, prefetch=2)),
+                         list(range(95, 100)))
+        self._reopen()
+        self.assertEqual(self.h5file.root.array.nrows, 100)
+
+
 def suite():
     theSuite = unittest.TestSuite()
     niter = 1
@@ -2730,6 +2761,7 @@ def suite():
         theSuite.addTest(unittest.makeSuite(AccessClosedTestCase))
         theSuite.addTest(unittest.makeSuite(TestCreateArrayArgs))
         theSuite.addTest(unittest.makeSuite(BroadcastTest))
+        theSuite.addTest(unittest.makeSuite(PrefetchIterTestCase))
 
     return theSuite
 
@@ -1605,7 +1605,12 @@ class UnsupportedAttrTypeTestCase(common.TestFileMixin, TestCase):
     def test00_unsupportedType(self):
         """Checking file with unsupported type."""
 
-        self.assertWarns(DataTypeWarning, repr, self.h5file)
+        # Attributes are only read (and checked) when they are accessed.
+        def read_attrs():
+            for node in self.h5file.walk_nodes():
+                repr(node._v_attrs)
+
+        self.assertWarns(DataTypeWarning, read_attrs)
 
 
 # Test for specific system attributes
@@ -1645,6 +1650,80 @@ class SpecificAttrsTestCase(common.TempFileMixin, TestCase):
         self.assertEqual(self.h5file.root._v_title, title)
 
 
+class LazyAttrsTestCase(common.TempFileMixin, TestCase):
+    """Checks that attributes are read from disk only when needed."""
+
+    def setUp(self):
+        super(LazyAttrsTestCase, self).setUp()
+
+        attrs = self.h5file.create_group('/', 'g')._v_attrs
+        for i in range(50):
+            attrs['attr%02d' % i] = i
+        attrs.pickled = [1, (2, 3)]
+        self.h5file.create_group('/g', 'h')._v_attrs.attr00 = 'h'
+        self._reopen('a')
+
+    def test00_single(self):
+        """Reading an attribute does not list or read the others."""
+
+        attrs = self.h5file.root.g._v_attrs
+        self.assertEqual(attrs.attr10, 10)
+        self.assertTrue('attr20' in attrs)
+        self.assertFalse('attr99' in attrs)
+        self.assertRaises(AttributeError, getattr, attrs, 'attr99')
+        self.assertFalse('_v_attrnames' in attrs.__dict__)
+        self.assertFalse('attr20' in attrs.__dict__)
+
+        self.assertEqual(len(attrs._v_attrnamesuser), 51)
+        self.assertTrue('attr20' in dir(attrs))
+
+    def test01_set_and_remove(self):
+        """Cached values follow assignments and removals."""
+
+        attrs = self.h5file.root.g._v_attrs
+        self.assertEqual(attrs.attr10, 10)
+        attrs.attr10 = 'ten'
+        self.assertEqual(attrs.attr10, 'ten')
+        attrs.newattr = 1
+        del attrs.attr11
+        self.assertFalse('attr11' in attrs)
+        self.assertRaises(AttributeError, getattr, attrs, 'attr11')
+        self.assertFalse('_v_attrnames' in attrs.__dict__)
+
+        names = attrs._v_attrnamesuser
+        self.assertTrue('newattr' in names)
+        self.assertFalse('attr11' in names)
+        attrs.other = 2
+        del attrs.attr12
+        self.assertTrue('other' in attrs._v_attrnamesuser)
+        self.assertFalse('attr12' in attrs._v_attrnamesuser)
+
+        self._reopen()
+        attrs = self.h5file.root.g._v_attrs
+        self.assertEqual(attrs.attr10, 'ten')
+        self.assertEqual(attrs.newattr, 1)
+        self.assertFalse('attr11' in attrs)
+
+    def test02_get_many(self):
+        """Getting several attributes at once."""
+
+        attrs = self.h5file.root.g._v_attrs
+        self.assertEqual(attrs.attr01, 1)
+        values = attrs._f_get_many(['attr01', 'attr02', 'pickled', 'none'])
+        self.assertEqual(values, {'attr01': 1, 'attr02': 2,
+                                  'pickled': [1, (2, 3)]})
+        self.assertEqual(attrs._f_get_many([]), {})
+
+    def test03_walk_node_attr(self):
+        """Reading an attribute from every node in a tree."""
+
+        values = list(self.h5file.walk_node_attr('attr00'))
+        self.assertEqual(values, [('/g', 0), ('/g/h', 'h')])
+        values = list(self.h5file.walk_node_attr('attr00', where='/g/h'))
+        self.assertEqual(values, [('/g/h', 'h')])
+        self.assertEqual(list(self.h5file.walk_node_attr('none')), [])
+
+
 def suite():
     theSuite = unittest.TestSuite()
     niter = 1
@@ -1666,6 +1745,7 @@ def suite():
         theSuite.addTest(unittest.makeSuite(VlenStrAttrTestCase))
         theSuite.addTest(unittest.makeSuite(UnsupportedAttrTypeTestCase))
         theSuite.addTest(unittest.makeSuite(SpecificAttrsTestCase))
+        theSuite.addTest(unittest.makeSuite(LazyAttrsTestCase))
 
     return theSuite
 
@@ -1189,6 +1189,203 @@ class DictNodeCacheOpenFile(OpenFileTestCase):
     open_kwargs = dict(node_cache_slots=node_cache_slots)
 
 
+class NodeCacheTestCase(common.TempFileMixin, TestCase):
+    """Test the LRU cache of nodes."""
+
+    def test00_lru(self):
+        """Least recently used nodes are evicted."""
+
+        cache = tables.lrucacheextension.NodeCache(3)
+        for name in ['a', 'b', 'c']:
+            cache['/' + name] = name
+        self.assertEqual(cache.get('/a'), 'a')  # now '/b' is the LRU
+        cache['/d'] = 'd'
+        self.assertEqual(list(cache), ['/c', '/a', '/d'])
+        self.assertFalse('/b' in cache)
+        self.assertEqual(cache.get('/b'), None)
+        self.assertEqual(cache.pop('/c'), 'c')
+        self.assertRaises(KeyError, cache.pop, '/c')
+        self.assertEqual(cache.pop('/c', None), None)
+        cache['/a'] = 'A'  # replace and promote
+        self.assertEqual(list(cache), ['/d', '/a'])
+        self.assertEqual(len(cache), 2)
+        self.assertEqual((cache.hits, cache.misses, cache.evictions),
+                         (1, 1, 1))
+
+    def test01_many_nodes(self):
+        """Many nodes in the cache of a file."""
+
+        nnodes = 300
+        for i in range(nnodes):
+            self.h5file.create_array('/', 'a%d' % i, [i])
+        self._reopen(node_cache_slots=nnodes // 2)
+        cache = self.h5file._node_manager.cache
+        for loop in range(2):
+            for i in range(nnodes):
+                self.assertEqual(self.h5file.get_node('/a%d' % i)[0], i)
+        self.assertEqual(len(cache), nnodes // 2)
+        self.assertTrue(cache.evictions >= nnodes)
+        for loop in range(2):
+            for i in range(nnodes // 2):
+                self.h5file.get_node('/a%d' % i)
+        self.assertTrue(cache.hits >= nnodes // 2)
+
+
+class ChunkCacheTestCase(common.TempFileMixin, TestCase):
+    """Test the cache of table chunks."""
+
+    def test00_2q(self):
+        """Chunks read again survive scans of chunks read once."""
+
+        cache = tables.lrucacheextension.ChunkCache(1, 'int64', 8 * 8)
+        buf = numpy.zeros(1, dtype='int64')
+        for key in range(9):
+            buf[0] = key
+            cache.setitem(key, buf)
+        self.assertEqual(len(cache), 8)
+        self.assertFalse(0 in cache)
+
+        # Chunk 0 is read again after being evicted, then comes a scan.
+        self.assertFalse(cache.getitem(0, buf))
+        buf[0] = 0
+        cache.setitem(0, buf)
+        for key in range(9, 30):
+            buf[0] = key
+            cache.setitem(key, buf)
+        buf[0] = -1
+        self.assertTrue(cache.getitem(0, buf))
+        self.assertEqual(buf[0], 0)
+        self.assertEqual(cache.size, 8 * 8)
+        self.assertEqual((cache.hits, cache.misses, cache.evictions),
+                         (1, 1, 23))
+
+    def test01_budget(self):
+        """Caches sharing a budget."""
+
+        budget = tables.lrucacheextension.CacheBudget(3 * 8)
+        cache1 = tables.lrucacheextension.ChunkCache(1, 'int64', 64, [budget])
+        cache2 = tables.lrucacheextension.ChunkCache(1, 'int64', 64, [budget])
+        buf = numpy.zeros(1, dtype='int64')
+        for key in range(5):
+            cache1.setitem(key, buf)
+        self.assertEqual(len(cache1), 3)
+        self.assertEqual(budget.size, 3 * 8)
+        # Room is made in the largest cache using the budget.
+        cache2.setitem(0, buf)
+        self.assertEqual((len(cache1), len(cache2)), (2, 1))
+        cache2.setitem(1, buf)
+        self.assertEqual((len(cache1), len(cache2)), (1, 2))
+        cache2.setitem(2, buf)
+        self.assertEqual((len(cache1), len(cache2)), (1, 2))
+        self.assertEqual((cache1.evictions, cache2.evictions), (4, 1))
+        self.assertEqual(budget.size, 3 * 8)
+        cache1.clear()
+        cache2.clear()
+        self.assertEqual(budget.size, 0)
+        cache2.setitem(0, buf)
+        self.assertEqual(len(cache2), 1)
+        self.assertEqual(budget.size, 8)
+
+    def test02_table(self):
+        """Indexed queries reuse the chunks of a table."""
+
+        global_budget = tables.lrucacheextension.chunk_cache_budget
+        used = global_budget.size
+        table = self.h5file.create_table('/', 'table', {'x': tables.IntCol()},
+                                         chunkshape=100)
+        table.append([(i % 100,) for i in range(1000)])
+        table.cols.x.create_index()
+        for value in range(3):
+            coords = table.get_where_list('x == value')
+            self.assertEqual(len(coords), 10)
+        cache = table._chunkcache
+        self.assertTrue(cache.hits > 0)
+        self.assertTrue(global_budget.size > used)
+        self.assertEqual(self.h5file._chunk_cache_budget.size, cache.size)
+        table.close()
+        self.assertEqual(global_budget.size, used)
+
+    def test03_shared_lru(self):
+        """Least recently used chunks are evicted from a shared cache."""
+
+        cache = tables.lrucacheextension.SharedChunkCache(3 * 8)
+        buf = numpy.zeros(1, dtype='int64')
+        for key in ['a', 'b', 'c']:
+            cache.setitem(('f1', key), buf)
+        self.assertTrue(cache.getitem(('f1', 'a'), buf))
+        cache.setitem(('f2', 'd'), buf)
+        self.assertFalse(('f1', 'b') in cache)
+        self.assertEqual(cache.size, 3 * 8)
+        cache.invalidate('f1')
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.size, 8)
+        self.assertEqual((cache.hits, cache.misses, cache.evictions),
+                         (1, 0, 1))
+
+    def test04_shared_files(self):
+        """Read-only handles of a file share its chunks."""
+
+        shared = tables.lrucacheextension.shared_chunk_cache
+        table = self.h5file.create_table('/', 'table', {'x': tables.IntCol()},
+                                         chunkshape=100)
+        table.append([(i % 100,) for i in range(1000)])
+        table.cols.x.create_index()
+        self._reopen(SHARED_CHUNK_CACHE=True)
+        h5file2 = tables.open_file(self.h5fname, SHARED_CHUNK_CACHE=True)
+        try:
+            fileid = self.h5file._shared_cache_id
+            self.assertEqual(h5file2._shared_cache_id, fileid)
+            table1 = self.h5file.root.table
+            table2 = h5file2.root.table
+            self.assertEqual(len(table1.get_where_list('x == 1')), 10)
+            hits = shared.hits
+            self.assertEqual(len(table2.get_where_list('x == 2')), 10)
+            self.assertEqual(shared.hits, hits + 10)
+            self.assertEqual(len(table2._chunkcache), 0)
+        finally:
+            h5file2.close()
+
+        # Modifying the file invalidates its chunks
+        self._reopen('a')
+        self.h5file.root.table.append([(0,)])
+        self._reopen(SHARED_CHUNK_CACHE=True)
+        self.assertNotEqual(self.h5file._shared_cache_id, fileid)
+        self.assertFalse(any(key[0] == fileid for key in shared))
+
+    def test05_shared_root_uep(self):
+        """Handles of a file with different root groups share chunks."""
+
+        for (name, value) in [('a', 1), ('b', 2)]:
+            table = self.h5file.create_table(
+                '/' + name, 't', {'x': tables.IntCol(), 'y': tables.IntCol()},
+                createparents=True)
+            table.append([(i, value) for i in range(10)])
+            table.cols.x.create_index()
+        self._reopen(SHARED_CHUNK_CACHE=True)
+        h5file1 = tables.open_file(self.h5fname, root_uep='/a',
+                                   SHARED_CHUNK_CACHE=True)
+        h5file2 = tables.open_file(self.h5fname, root_uep='/b/',
+                                   SHARED_CHUNK_CACHE=True)
+        h5file3 = self.h5file
+        try:
+            cond = '(x > 5) & (x < 9)'
+            for (h5file, path, value) in [(h5file1, '/t', 1),
+                                          (h5file2, '/t', 2),
+                                          (h5file3, '/a/t', 1),
+                                          (h5file3, '/b/t', 2)]:
+                table = h5file.get_node(path)
+                self.assertEqual([row['y'] for row in table.where(cond)],
+                                 [value] * 3)
+                self.assertEqual(table.get_where_list(cond).tolist(),
+                                 [6, 7, 8])
+                self.assertEqual(table.read_where(cond)['y'].tolist(),
+                                 [value] * 3)
+                self.assertEqual(table[7]['y'], value)
+        finally:
+            h5file1.close()
+            h5file2.close()
+
+
 class CheckFileTestCase(common.TempFileMixin, TestCase):
     def setUp(self):
         super(CheckFileTestCase, self).setUp()
@@ -1414,6 +1611,121 @@ class ThreadingTestCase(common.TempFileMixin, TestCase):
             t.join()
 
 
+class FilePoolTestCase(common.TempFileMixin, TestCase):
+    """Test the pool of reusable read-only file handles."""
+
+    def setUp(self):
+        super(FilePoolTestCase, self).setUp()
+        self.h5file.create_array('/', 'array', [1, 2, 3])
+        self.h5file.close()
+        self.pool = tables.FilePool(idle_timeout=3600)
+
+    def tearDown(self):
+        self.pool.close()
+        super(FilePoolTestCase, self).tearDown()
+
+    def test00_reuse(self):
+        """Released handles are handed out again."""
+
+        h5file = self.pool.acquire(self.h5fname)
+        self.assertEqual(h5file.mode, 'r')
+        node = h5file.root.array
+        self.pool.release(h5file)
+        self.assertTrue(h5file.isopen)
+        with self.pool.open(self.h5fname) as h5file2:
+            self.assertTrue(h5file2 is h5file)
+            self.assertTrue(h5file2.get_node('/array') is node)
+        self.assertEqual(len(self.pool), 1)
+
+    def test01_reentrant(self):
+        """A thread acquiring a file twice gets the same handle."""
+
+        h5file = self.pool.acquire(self.h5fname)
+        h5file2 = self.pool.acquire(self.h5fname)
+        self.assertTrue(h5file2 is h5file)
+        self.pool.release(h5file)
+        self.pool.release(h5file)
+        self.assertRaises(ValueError, self.pool.release, h5file)
+
+    def test02_write_modes(self):
+        """Only read-only handles can be pooled."""
+
+        for mode in ('w', 'a', 'r+'):
+            self.assertRaises(ValueError, self.pool.acquire,
+                              self.h5fname, mode)
+        self.assertEqual(len(self.pool), 0)
+
+    def test03_idle_timeout(self):
+        """Handles idle for too long are closed."""
+
+        self.pool.idle_timeout = 0
+        h5file = self.pool.acquire(self.h5fname)
+        self.assertEqual(self.pool.close_idle(), 0)
+        self.pool.release(h5file)
+        self.assertFalse(h5file.isopen)
+        self.assertEqual(len(self.pool), 0)
+
+    def test04_foreign_handle(self):
+        """Handles not coming from the pool can not be released."""
+
+        h5file = self._reopen()
+        self.assertRaises(ValueError, self.pool.release, h5file)
+
+    def test05_close(self):
+        """Closing the pool closes all its handles."""
+
+        h5file = self.pool.acquire(self.h5fname)
+        self.pool.close()
+        self.assertFalse(h5file.isopen)
+        self.assertRaises(ValueError, self.pool.acquire, self.h5fname)
+
+    def test06_threads(self):
+        """Concurrent threads never share a handle."""
+
+        nthreads = 4
+        barrier = threading.Semaphore(0)
+        lock = threading.Lock()
+        q = Queue.Queue()
+
+        def run():
+            try:
+                with self.pool.open(self.h5fname) as h5file:
+                    q.put(id(h5file))
+                    barrier.acquire()
+                    with lock:
+                        self.assertEqual(h5file.root.array.read(), [1, 2, 3])
+            except Exception:
+                q.put(sys.exc_info())
+
+        threads = [threading.Thread(target=run) for i in xrange(nthreads)]
+        for t in threads:
+            t.start()
+        ids = [q.get() for i in xrange(nthreads)]
+        for t in threads:
+            barrier.release()
+        for t in threads:
+            t.join()
+        self.assertTrue(q.empty())
+        self.assertEqual(len(set(ids)), nthreads)
+        self.assertEqual(len(self.pool), nthreads)
+
+    def test07_unhashable_args(self):
+        """Handles opened with unhashable extra arguments are pooled."""
+
+        filters = tables.Filters(complevel=1)
+        h5file = self.pool.acquire(self.h5fname, filters=filters)
+        self.pool.release(h5file)
+        h5file2 = self.pool.acquire(self.h5fname,
+                                    filters=tables.Filters(complevel=1))
+        self.assertTrue(h5file2 is h5file)
+        self.pool.release(h5file2)
+        h5file3 = self.pool.acquire(self.h5fname,
+                                    filters=tables.Filters(complevel=2))
+        self.assertFalse(h5file3 is h5file)
+        self.pool.release(h5file3)
+        self.assertEqual(len(self.pool), 2)
+
+
 class PythonAttrsTestCase(common.TempFileMixin, TestCase):
     """Test interactions of Python attributes and child nodes."""
 
@@ -2138,6 +2450,41 @@ class BloscSubprocess(TestCase):
             os.remove(h5fname)
 
 
+class LazyImportTestCase(common.TempFileMixin, TestCase):
+    """Test that costly modules are only imported when needed."""
+
+    code = """
+import sys
+import numpy
+import tables
+lazy = ['tables.index', 'tables.conditions', 'tables.tests', 'numexpr',
+        'tables._comp_lzo', 'tables._comp_bzip2']
+print(' '.join(name for name in lazy if name in sys.modules))
+with tables.open_file(r'%s') as h5file:
+    # Index nodes are found even if no table has been loaded yet.
+    print(h5file.get_node('/_i_table/col').__class__.__name__)
+    print('tables.index' in sys.modules)
+    print(len(h5file.root.table.get_where_list('col > 5')))
+print(tables.Expr('2 * a', {'a': numpy.arange(3)}).eval().tolist())
+print('numexpr' in sys.modules)
+"""
+
+    def setUp(self):
+        super(LazyImportTestCase, self).setUp()
+        table = self.h5file.create_table('/', 'table', {'col': IntCol()})
+        table.append([(i,) for i in range(10)])
+        table.cols.col.create_index()
+        self.h5file.close()
+
+    def test_lazy_imports(self):
+        p = subprocess.Popen([sys.executable, '-c', self.code % self.h5fname],
+                             stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        (stdout, stderr) = p.communicate()
+        self.assertEqual(p.returncode, 0, stderr)
+        self.assertEqual(stdout.decode('ascii').splitlines(),
+                         ['', 'Index', 'True', '4', '[0, 2, 4]', 'True'])
+
+
 class HDF5ErrorHandling(TestCase):
     def setUp(self):
         super(HDF5ErrorHandling, self).setUp()
@@ -2478,8 +2825,11 @@ def suite():
         theSuite.addTest(unittest.makeSuite(NodeCacheOpenFile))
         theSuite.addTest(unittest.makeSuite(NoNodeCacheOpenFile))
         theSuite.addTest(unittest.makeSuite(DictNodeCacheOpenFile))
+        theSuite.addTest(unittest.makeSuite(NodeCacheTestCase))
+        theSuite.addTest(unittest.makeSuite(ChunkCacheTestCase))
         theSuite.addTest(unittest.makeSuite(CheckFileTestCase))
         theSuite.addTest(unittest.makeSuite(ThreadingTestCase))
+        theSuite.addTest(unittest.makeSuite(FilePoolTestCase))
         theSuite.addTest(unittest.makeSuite(PythonAttrsTestCase))
         theSuite.addTest(unittest.makeSuite(StateTestCase))
         theSuite.addTest(unittest.makeSuite(FlavorTestCase))
@@ -2487,6 +2837,7 @@ def suite():
         theSuite.addTest(unittest.makeSuite(FilePropertyTestCase))
         theSuite.addTest(unittest.makeSuite(BloscBigEndian))
         theSuite.addTest(unittest.makeSuite(BloscSubprocess))
+        theSuite.addTest(unittest.makeSuite(LazyImportTestCase))
         theSuite.addTest(unittest.makeSuite(HDF5ErrorHandling))
         theSuite.addTest(unittest.makeSuite(TestDescription))
         theSuite.addTest(unittest.makeSuite(TestAtom))
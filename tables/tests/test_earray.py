@@ -8,7 +8,7 @@ import numpy
 
 import tables
 from tables import Int16Atom, Int32Atom, Float64Atom, StringAtom
-from tables.utils import byteorders
+from tables.utils import byteorders, background_io_enabled
 from tables.tests import common
 from tables.tests.common import allequal
 from tables.tests.common import unittest
@@ -2798,6 +2798,61 @@ class TestCreateEArrayArgs(common.TempFileMixin, TestCase):
                           shape=shape)
 
 
+class WriteBehindTestCase(common.TempFileMixin, TestCase):
+    """Test appending to arrays with a background writer."""
+
+    def setUp(self):
+        super(WriteBehindTestCase, self).setUp()
+        self.array = self.h5file.create_earray(
+            '/', 'array', Int32Atom(), (0, 3), chunkshape=(4, 3),
+            filters=tables.Filters(complevel=1))
+
+    def test00_append(self):
+        """Appending batches in the background."""
+
+        self.array.write_behind = 2
+        self.assertEqual(self.array.write_behind, 2)
+        data = numpy.zeros((5, 3), dtype='int32')
+        for i in range(10):
+            data[:] = i  # the queued batches are copies
+            self.array.append(data)
+        self.array.flush()
+        self.assertEqual(self.array.nrows, 50)
+        expected = numpy.repeat(numpy.arange(10, dtype='int32'), 15)
+        self.assertTrue(allequal(self.array[:], expected.reshape(50, 3)))
+        self.array.write_behind = 0
+        self.assertEqual(self.array.write_behind, 0)
+
+    def test01_close(self):
+        """Queued batches are written when closing the file."""
+
+        self.array.write_behind = 4
+        for i in range(10):
+            self.array.append([[i, i, i]])
+        self._reopen()
+        self.assertEqual(self.h5file.root.array[:, 0].tolist(),
+                         list(range(10)))
+
+    def test02_error(self):
+        """Errors in the background writer are raised by flush()."""
+
+        def _append(nparr):
+            raise ValueError("write error")
+
+        self.array.write_behind = 2
+        self.array._append = _append
+        if background_io_enabled():
+            self.array.append([[1, 2, 3]])
+            self.assertRaises(ValueError, self.array.flush)
+        else:
+            # Without a background thread the data is written at once
+            self.assertRaises(ValueError, self.array.append, [[1, 2, 3]])
+        del self.array._append
+        self.array.append([[1, 2, 3]])
+        self.array.flush()
+        self.assertEqual(self.array.nrows, 1)
+
+
 def suite():
     theSuite = unittest.TestSuite()
     niter = 1
@@ -2853,6 +2908,7 @@ def suite():
         theSuite.addTest(unittest.makeSuite(MDAtomNoReopen))
         theSuite.addTest(unittest.makeSuite(MDAtomReopen))
         theSuite.addTest(unittest.makeSuite(AccessClosedTestCase))
+        theSuite.addTest(unittest.makeSuite(WriteBehindTestCase))
         theSuite.addTest(unittest.makeSuite(TestCreateEArrayArgs))
     if common.heavy:
         theSuite.addTest(unittest.makeSuite(Slices3EArrayTestCase))
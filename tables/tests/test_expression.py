@@ -13,6 +13,8 @@
 """Test module for evaluating expressions under PyTables."""
 
 from __future__ import print_function
+import os
+import tempfile
 
 import numpy as np
 
@@ -1489,6 +1491,235 @@ class VeryLargeInputs2(VeryLargeInputsTestCase):
     shape = (2**32 + 1,)    # check that arrays > 32-bit are supported
 
 
+class PipelineTestCase(common.TempFileMixin, TestCase):
+    shape = (200, 30)
+    nrowsinbuf = 7
+
+    def setUp(self):
+        super(PipelineTestCase, self).setUp()
+        N = np.prod(self.shape)
+        self.npa = np.arange(N, dtype='float64').reshape(self.shape)
+        self.npb = np.arange(N, dtype='int32').reshape(self.shape) % 17
+        self.npc = np.arange(self.shape[1], dtype='float64')
+        root = self.h5file.root
+        self.a = self.h5file.create_carray(root, 'a', obj=self.npa)
+        self.b = self.h5file.create_carray(root, 'b', obj=self.npb)
+        self.c = self.h5file.create_array(root, 'c', self.npc)
+
+    def get_expr(self, depth, start=None, stop=None, step=None):
+        expr = tables.Expr("2 * a + b * c",
+                           {'a': self.a, 'b': self.b, 'c': self.c})
+        # Use small blocks, so that there are many of them
+        expr._calc_nrowsinbuf = lambda object_: self.nrowsinbuf
+        expr.set_pipeline(depth)
+        expr.set_inputs_range(start, stop, step)
+        return expr
+
+    def expected(self, start=None, stop=None, step=None):
+        r = 2 * self.npa + self.npb * self.npc
+        return r[start:stop:step]
+
+    def test00_eval(self):
+        """Evaluating a pipelined expression into memory."""
+
+        for depth in (0, 1, 4):
+            r1 = self.get_expr(depth).eval()
+            self.assertTrue(common.areArraysEqual(r1, self.expected()))
+            r1 = self.get_expr(depth, 3, 190, 4).eval()
+            self.assertTrue(common.areArraysEqual(r1,
+                                                  self.expected(3, 190, 4)))
+
+    def test01_out(self):
+        """Evaluating a pipelined expression into an on-disk output."""
+
+        out = self.h5file.create_carray('/', 'out', tables.Float64Atom(),
+                                        self.shape)
+        for depth in (1, 3):
+            out[:] = 0
+            expr = self.get_expr(depth, 5, None, 3)
+            expr.set_output(out)
+            expr.set_output_range(10, None, 2)
+            expr.eval()
+            r2 = np.zeros(self.shape)
+            r = self.expected(5, None, 3)
+            r2[10:10 + 2 * len(r):2] = r
+            self.assertTrue(common.areArraysEqual(out[:], r2))
+
+    def test02_append(self):
+        """Appending the outcome of a pipelined expression."""
+
+        out = self.h5file.create_earray('/', 'out', tables.Float64Atom(),
+                                        (0, self.shape[1]))
+        expr = self.get_expr(2)
+        expr.set_output(out, append_mode=True)
+        expr.eval()
+        self._reopen()
+        out = self.h5file.root.out
+        self.assertTrue(common.areArraysEqual(out[:], self.expected()))
+
+    def test03_iter(self):
+        """Iterating over a pipelined expression."""
+
+        rows = list(self.get_expr(3, 1, None, 2))
+        self.assertTrue(common.areArraysEqual(np.array(rows),
+                                              self.expected(1, None, 2)))
+        # Stopping the iteration early
+        for row in self.get_expr(1):
+            break
+        self.assertTrue(common.areArraysEqual(row, self.expected()[0]))
+
+    def test04_write_error(self):
+        """Errors while writing in the background are raised."""
+
+        filename = tempfile.mktemp(".h5")
+        try:
+            with tables.open_file(filename, 'w') as h5file:
+                h5file.create_carray('/', 'out', tables.Float64Atom(),
+                                     self.shape)
+            with tables.open_file(filename, 'r') as h5file:
+                expr = self.get_expr(2)
+                expr.set_output(h5file.root.out)
+                self.assertRaises(tables.HDF5ExtError, expr.eval)
+        finally:
+            os.remove(filename)
+        self.assertTrue(self.a._v_convert)
+
+    def test05_bad_depth(self):
+        """Negative pipeline depths are refused."""
+
+        self.assertRaises(ValueError, self.get_expr, -1)
+
+
+class ReductionTestCase(common.TempFileMixin, TestCase):
+    shape = (150, 20)
+    nrowsinbuf = 8
+
+    def setUp(self):
+        super(ReductionTestCase, self).setUp()
+        N = np.prod(self.shape)
+        self.npx = np.arange(N, dtype='float64').reshape(self.shape) - N // 3
+        self.npy = np.arange(N, dtype='int32').reshape(self.shape) % 13
+        root = self.h5file.root
+        self.x = self.h5file.create_carray(root, 'x', obj=self.npx)
+        self.y = self.h5file.create_carray(root, 'y', obj=self.npy)
+        self.vars = {'x': self.x, 'y': self.y}
+
+    def get_expr(self, expr, pipeline=0):
+        expr = tables.Expr(expr, self.vars)
+        # Use small blocks, so that there are many of them
+        expr._calc_nrowsinbuf = lambda object_: self.nrowsinbuf
+        expr.set_pipeline(pipeline)
+        return expr
+
+    def check(self, expr, expected, start=None, stop=None, step=None):
+        for pipeline in (0, 2):
+            expr_ = self.get_expr(expr, pipeline)
+            expr_.set_inputs_range(start, stop, step)
+            r1 = expr_.eval()
+            self.assertEqual(np.shape(r1), np.shape(expected))
+            self.assertTrue(np.allclose(r1, expected),
+                            "%s: %r != %r" % (expr, r1, expected))
+
+    def test00_all(self):
+        """Reductions along all the axes."""
+
+        x, y = self.npx, self.npy
+        self.check("sum(x * y)", (x * y).sum())
+        self.check("prod(y % 3 + 1)", (y % 3 + 1).prod())
+        self.check("min(x)", x.min())
+        self.check("max(sqrt(x**2 + y**2))", np.sqrt(x**2 + y**2).max())
+        self.check("mean(y)", y.mean())
+        self.check("count(y > 5)", (y > 5).sum())
+        self.check(" sum( (x + 1) * (y - 1) ) ", ((x + 1) * (y - 1)).sum())
+        self.check("sum(y)", y[3:140:5].sum(), 3, 140, 5)
+
+    def test01_maindim(self):
+        """Reductions along the main dimension."""
+
+        x, y = self.npx, self.npy
+        self.check("sum(x * y, 0)", (x * y).sum(0))
+        self.check("max(x - y, axis=0)", (x - y).max(0))
+        self.check("mean(x, axis=-2)", x.mean(0))
+        self.check("count(y == 0, 0)", (y == 0).sum(0))
+        self.check("min(y, 0)", y[10:120:3].min(0), 10, 120, 3)
+
+    def test02_other_axis(self):
+        """Reductions along other axes."""
+
+        x, y = self.npx, self.npy
+        self.check("sum(x * y, 1)", (x * y).sum(1))
+        self.check("mean(x, axis=-1)", x.mean(1))
+        self.check("prod(y % 2 + 1, 1)", (y % 2 + 1)[7::2].prod(1), 7, None, 2)
+        rows = list(self.get_expr("max(y, 1)"))
+        self.assertTrue(common.areArraysEqual(np.array(rows), y.max(1)))
+
+    def test03_out(self):
+        """Sending reductions along other axes to an output container."""
+
+        out = self.h5file.create_carray('/', 'out', tables.Float64Atom(),
+                                        self.shape[:1])
+        expr = self.get_expr("max(x * y, axis=1)", 1)
+        expr.set_output(out)
+        expr.eval()
+        r2 = (self.npx * self.npy).max(1)
+        self.assertTrue(common.areArraysEqual(out[:], r2))
+        # Outputs are not allowed for reductions along the main dimension
+        expr = self.get_expr("max(x * y)")
+        expr.set_output(out)
+        self.assertRaises(ValueError, expr.eval)
+
+    def test04_empty(self):
+        """Reductions of empty ranges."""
+
+        expr = self.get_expr("sum(x)")
+        expr.set_inputs_range(5, 5)
+        self.assertEqual(expr.eval(), 0)
+        expr = self.get_expr("count(x > 0, 0)")
+        expr.set_inputs_range(5, 5)
+        self.assertEqual(expr.eval().tolist(), [0] * self.shape[1])
+        self.assertEqual(tables.Expr("sum(2 * 3)").eval(), 6)
+
+    def test05_errors(self):
+        """Wrong reductions."""
+
+        for expr in ("sum(x, y)", "sum(x, 0, 1)", "sum(x, axis=2)"):
+            self.assertRaises(ValueError, tables.Expr, expr, self.vars)
+        self.assertRaises(TypeError, list, self.get_expr("sum(x)"))
+
+    def test06_eval_many(self):
+        """Evaluating several expressions at once."""
+
+        x, y = self.npx, self.npy
+        out = self.h5file.create_carray('/', 'out', tables.Float64Atom(),
+                                        self.shape)
+        for pipeline in (0, 2):
+            out[:] = 0
+            exprs = [self.get_expr(expr, pipeline)
+                     for expr in ("sum(x * y)", "x + y", "min(y, 1)",
+                                  "2 * x")]
+            exprs[1].set_output(out)
+            r1 = tables.Expr.eval_many(exprs)
+            self.assertEqual(len(r1), 4)
+            self.assertTrue(np.allclose(r1[0], (x * y).sum()))
+            self.assertTrue(r1[1] is out)
+            self.assertTrue(common.areArraysEqual(out[:], x + y))
+            self.assertTrue(common.areArraysEqual(r1[2], y.min(1)))
+            self.assertTrue(common.areArraysEqual(r1[3], 2 * x))
+        self.assertEqual(tables.Expr.eval_many([]), [])
+
+    def test07_eval_many_ranges(self):
+        """Expressions evaluated at once need the same range of inputs."""
+
+        exprs = [self.get_expr("sum(x)"), self.get_expr("mean(y)")]
+        for expr in exprs:
+            expr.set_inputs_range(2, 100, 3)
+        r1 = tables.Expr.eval_many(exprs)
+        self.assertTrue(np.allclose(r1, [self.npx[2:100:3].sum(),
+                                         self.npy[2:100:3].mean()]))
+        exprs[1].set_inputs_range(2, 100)
+        self.assertRaises(ValueError, tables.Expr.eval_many, exprs)
+
+
 def suite():
     """Return a test suite consisting of all the test cases in the module."""
 
@@ -1545,6 +1776,8 @@ def suite():
         theSuite.addTest(unittest.makeSuite(setOutputRange8))
         theSuite.addTest(unittest.makeSuite(setOutputRange9))
         theSuite.addTest(unittest.makeSuite(VeryLargeInputs1))
+        theSuite.addTest(unittest.makeSuite(PipelineTestCase))
+        theSuite.addTest(unittest.makeSuite(ReductionTestCase))
         if common.heavy:
             theSuite.addTest(unittest.makeSuite(VeryLargeInputs2))
     return theSuite
@@ -2654,6 +2654,65 @@ class TestIndexingNans(TempFileMixin, TestCase):
         self.assertEqual(len(results), 100*2)
 
 
+class ThreadedIndexBuildTestCase(TempFileMixin, TestCase):
+    """Test building indexes with several threads."""
+
+    nrows = 2000
+
+    def setUp(self):
+        super(ThreadedIndexBuildTestCase, self).setUp()
+        numpy.random.seed(7)
+        data = numpy.empty(self.nrows, dtype=[('i', 'i4'), ('f', 'f8')])
+        data['i'] = numpy.random.randint(-100, 100, self.nrows)
+        data['f'] = numpy.random.normal(size=self.nrows)
+        for name in ['table1', 'table2']:
+            self.h5file.create_table('/', name, data)
+
+    def _build(self, tablename, colname, nthreads, csi, **kwargs):
+        params = self.h5file.params
+        params['MAX_INDEX_THREADS'] = nthreads
+        # Keep just a few slices in memory to use several batches
+        params['INDEX_BUILD_MEMORY'] = 3 * small_blocksizes[1] * 16
+        col = self.h5file.get_node('/', tablename).cols._f_col(colname)
+        if csi:
+            col.create_csindex(_blocksizes=small_blocksizes, **kwargs)
+        else:
+            col.create_index(_blocksizes=small_blocksizes, **kwargs)
+        return col.index
+
+    def _check(self, colname, csi=False, **kwargs):
+        index1 = self._build('table1', colname, 1, csi, **kwargs)
+        index2 = self._build('table2', colname, 4, csi, **kwargs)
+        self.assertEqual(index1.nelements, self.nrows)
+        self.assertEqual(index2.is_csi, index1.is_csi)
+        for name in ['sorted', 'indices', 'ranges', 'bounds', 'abounds',
+                     'zbounds', 'mbounds', 'mranges', 'sortedLR',
+                     'indicesLR']:
+            array1 = getattr(index1, name)[:]
+            array2 = getattr(index2, name)[:]
+            self.assertTrue(numpy.array_equal(array1, array2),
+                            "index arrays ``%s`` differ" % name)
+        for table in [self.h5file.root.table1, self.h5file.root.table2]:
+            self.assertEqual(
+                table.read_where('%s < 0' % colname, field=colname).size,
+                (table.col(colname) < 0).sum())
+
+    def test00_kinds(self):
+        """Indexes built with several threads are the same."""
+
+        for (kind, optlevel) in [('ultralight', 3), ('light', 6),
+                                 ('medium', 0), ('full', 9)]:
+            self._check('i', kind=kind, optlevel=optlevel)
+            for table in [self.h5file.root.table1, self.h5file.root.table2]:
+                table.cols.i.remove_index()
+
+    def test01_csi(self):
+        """Completely sorted indexes built with several threads."""
+
+        self._check('f', csi=True)
+        self.assertTrue(self.h5file.root.table2.cols.f.index.is_csi)
+
+
 def suite():
     theSuite = unittest.TestSuite()
 
@@ -2690,6 +2749,7 @@ def suite():
         theSuite.addTest(unittest.makeSuite(Issue119Time32ColTestCase))
         theSuite.addTest(unittest.makeSuite(Issue119Time64ColTestCase))
         theSuite.addTest(unittest.makeSuite(TestIndexingNans))
+        theSuite.addTest(unittest.makeSuite(ThreadedIndexBuildTestCase))
     if heavy:
         # These are too heavy for normal testing
         theSuite.addTest(unittest.makeSuite(AI4bTestCase))
@@ -20,6 +20,7 @@ import functools
 import numpy
 
 import tables
+from tables import conditions
 from tables.utils import SizeType
 from tables.tests import common
 from tables.tests.common import unittest
@@ -1203,6 +1204,283 @@ class IndexedTableUsage32(IndexedTableUsage):
     str_expr = ''
 
 
+class WhereCoordsTestCase(common.TempFileMixin, TestCase):
+    """Test the vectorized collection of coordinates in queries.
+
+    The table spans many I/O buffers so that the coordinate buffer in
+    ``Row`` has to grow several times.
+
+    """
+
+    nrows = 1000
+    conditions = ['c_int32 < 700', '(c_int32 % 3) == 0',
+                  '(c_int32 > 100) & (c_int32 < 110)', 'c_int32 < 0']
+    slices = [(None, None, None), (5, None, None), (3, 977, 7),
+              (0, 1000, 40), (999, None, None)]
+
+    def setUp(self):
+        super(WhereCoordsTestCase, self).setUp()
+        self.table = self.h5file.create_table(
+            '/', 'table', {'c_int32': tables.Int32Col()}, chunkshape=16)
+        self.table.append([(i,) for i in range(self.nrows)])
+        self.table.nrowsinbuf = 64
+
+    def _check(self):
+        table = self.table
+        for cond in self.conditions:
+            for (start, stop, step) in self.slices:
+                rownos = [r.nrow for r in
+                          table.where(cond, {}, start, stop, step)]
+                coords = table.get_where_list(cond, {}, False,
+                                              start, stop, step)
+                self.assertEqual(coords.dtype, SizeType)
+                self.assertEqual(coords.tolist(), rownos)
+                values = table.read_where(cond, {}, 'c_int32',
+                                          start, stop, step)
+                self.assertEqual(values.tolist(), rownos)
+
+    def test00_inkernel(self):
+        """Coordinates of in-kernel queries."""
+
+        self._check()
+
+    def test01_indexed(self):
+        """Coordinates of indexed queries."""
+
+        self.table.cols.c_int32.create_index(_blocksizes=small_blocksizes)
+        self._check()
+        # Repeat to hit the sequence cache.
+        self._check()
+
+    def test02_threaded(self):
+        """Coordinates of in-kernel queries scanned by several threads."""
+
+        for nthreads in [1, 2, 5]:
+            self.h5file.params['MAX_QUERY_THREADS'] = nthreads
+            self._check()
+
+    def test03_threaded_blocks(self):
+        """Threaded scans where each block selects different rows."""
+
+        # Numexpr releases the GIL, so workers sharing a compiled
+        # condition would mix up their intermediate results.
+        table = self.table
+        table.append([(i,) for i in range(self.nrows, 20 * self.nrows)])
+        table.nrowsinbuf = 32
+        values = numpy.arange(20 * self.nrows)
+        cond = '(c_int32 % 7) * (c_int32 % 11) < c_int32 % 50'
+        expected = numpy.flatnonzero(
+            (values % 7) * (values % 11) < values % 50)
+        for nthreads in [2, 4, 8]:
+            self.h5file.params['MAX_QUERY_THREADS'] = nthreads
+            for i in range(5):
+                coords = table.get_where_list(cond)
+                self.assertEqual(coords.tolist(), expected.tolist())
+
+
+class WhereManyTestCase(common.TempFileMixin, TestCase):
+    """Test evaluating several conditions in a single pass."""
+
+    nrows = 1000
+    conditions = ['c_int32 < 700', '(c_int32 % 3) == 0',
+                  '(c_float64 > 100) & (c_float64 < lim)', 'c_int32 < 0',
+                  '(c_int32 > 10) & (c_float64 < 20)']
+    slices = [(None, None, None), (3, 977, 7), (999, None, None),
+              (10, 5, None)]
+
+    def setUp(self):
+        super(WhereManyTestCase, self).setUp()
+        self.table = self.h5file.create_table(
+            '/', 'table', {'c_int32': tables.Int32Col(pos=0),
+                           'c_float64': tables.Float64Col(pos=1),
+                           'c_string': tables.StringCol(32, pos=2)},
+            chunkshape=16)
+        self.table.append([(i, i / 2., str(i)) for i in range(self.nrows)])
+        self.table.nrowsinbuf = 64
+
+    def _check(self):
+        table = self.table
+        lim = 150
+        for (start, stop, step) in self.slices:
+            many = table.where_many(self.conditions, None, start, stop, step)
+            self.assertEqual(len(many), len(self.conditions))
+            for cond, coords in zip(self.conditions, many):
+                expected = table.get_where_list(cond, None, False,
+                                                start, stop, step)
+                self.assertEqual(coords.dtype, SizeType)
+                self.assertEqual(sorted(coords.tolist()), expected.tolist())
+
+    def test00_inkernel(self):
+        """Several in-kernel conditions evaluated at once."""
+
+        self.h5file.params['COND_PROJECTION_RATIO'] = 0
+        self._check()
+
+    def test01_projected(self):
+        """Several in-kernel conditions reading just their columns."""
+
+        self._check()
+
+    def test02_indexed(self):
+        """Mixing indexed and in-kernel conditions."""
+
+        self.table.cols.c_int32.create_index(_blocksizes=small_blocksizes)
+        self._check()
+
+    def test03_empty(self):
+        """No conditions at all."""
+
+        self.assertEqual(self.table.where_many([]), [])
+
+
+class ProjectedQueryTestCase(common.TempFileMixin, TestCase):
+    """Test in-kernel queries reading just the columns in the condition."""
+
+    nrows = 500
+
+    class Record(tables.IsDescription):
+        c_int32 = tables.Int32Col(pos=0)
+        c_time64 = tables.Time64Col(pos=1)
+        c_string = tables.StringCol(64, pos=2)
+
+        class c_nested(tables.IsDescription):
+            _v_pos = 3
+            c_float64 = tables.Float64Col(pos=0)
+            c_padding = tables.Float64Col(shape=(8,), pos=1)
+
+    def setUp(self):
+        super(ProjectedQueryTestCase, self).setUp()
+        self.table = self.h5file.create_table(
+            '/', 'table', self.Record, chunkshape=16)
+        row = self.table.row
+        for i in range(self.nrows):
+            row['c_int32'] = i
+            row['c_time64'] = i + 0.5
+            row['c_string'] = str(i).encode('ascii')
+            row['c_nested/c_float64'] = -i
+            row.append()
+        self.table.flush()
+        self.table.nrowsinbuf = 64
+        self.condvars = {
+            'i': self.table.cols.c_int32,
+            't': self.table.cols.c_time64,
+            'x': self.table.cols._f_col('c_nested/c_float64'),
+        }
+
+    def _query(self, cond, projected):
+        table = self.table
+        ratio = table._v_file.params['COND_PROJECTION_RATIO']
+        table._v_file.params['COND_PROJECTION_RATIO'] = [0, 0.5][projected]
+        try:
+            compiled = table._compile_condition(cond, self.condvars)
+            projection = table._get_where_projection(compiled, self.condvars)
+            self.assertEqual(projection is not None, projected)
+            rows = [(r.nrow, r['c_string'], r['c_time64'])
+                    for r in table.where(cond, self.condvars, 3, None, 2)]
+            coords = table.get_where_list(cond, self.condvars,
+                                          start=3, step=2)
+        finally:
+            table._v_file.params['COND_PROJECTION_RATIO'] = ratio
+        return rows, coords.tolist()
+
+    def test00_results(self):
+        """Projected and complete reads give the same results."""
+
+        for cond in ['(i % 7 == 0) & (t > 100)', 'x < -450', 'i < 0']:
+            rows, coords = self._query(cond, True)
+            self.assertEqual((rows, coords), self._query(cond, False))
+            self.assertEqual([row[0] for row in rows], coords)
+
+    def test01_update(self):
+        """Updating rows in a projected query."""
+
+        for row in self.table.where('i < 10', self.condvars):
+            row['c_string'] = b'updated'
+            row.update()
+        self.table.flush()
+        self.assertEqual(row.nrow, 9)
+        values = self.table.read(0, 12, field='c_string').tolist()
+        self.assertEqual(values, [b'updated'] * 10 + [b'10', b'11'])
+
+
+class SharedConditionCacheTestCase(common.TempFileMixin, TestCase):
+    """Test the compiled condition cache shared by all tables."""
+
+    def setUp(self):
+        super(SharedConditionCacheTestCase, self).setUp()
+        for name in ['table1', 'table2']:
+            table = self.h5file.create_table(
+                '/', name,
+                {'c1': tables.Int32Col(), 'c2': tables.Float64Col()})
+            table.append([(i, i / 2.) for i in range(10)])
+        self.cache = conditions.condition_cache
+        self.cache.clear()
+
+    def tearDown(self):
+        self.cache.clear()
+        self.cache.maxentries = None
+        super(SharedConditionCacheTestCase, self).tearDown()
+
+    def test00_shared(self):
+        """Tables with the same description share compiled conditions."""
+
+        cond = '(c1 > 3) & (c2 < lim)'
+        table1, table2 = self.h5file.root.table1, self.h5file.root.table2
+        coords1 = table1.get_where_list(cond, {'lim': 4})
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 1))
+        coords2 = table2.get_where_list(cond, {'lim': 4})
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+        self.assertEqual(coords1.tolist(), [4, 5, 6, 7])
+        self.assertEqual(coords2.tolist(), [4, 5, 6, 7])
+
+        # A variable of another type needs another compiled condition.
+        table2.get_where_list(cond, {'lim': 4.5})
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 2))
+        self.assertEqual(len(self.cache), 2)
+
+    def test01_reopen(self):
+        """Compiled conditions survive the file being reopened."""
+
+        cond = 'c1 >= 8'
+        self.h5file.root.table1.get_where_list(cond)
+        self._reopen()
+        coords = self.h5file.root.table1.get_where_list(cond)
+        self.assertEqual(coords.tolist(), [8, 9])
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test02_evict(self):
+        """The least recently used conditions are evicted."""
+
+        self.cache.maxentries = 10
+        table1, table2 = self.h5file.root.table1, self.h5file.root.table2
+        for i in range(10):
+            table1.get_where_list('c1 > %d' % i)
+        # Tables keep their own caches, so look up using the other one.
+        table2.get_where_list('c1 > 0')  # make it recently used
+        table1.get_where_list('c1 > 10')
+        self.assertEqual(len(self.cache), 10)
+        table2.get_where_list('c1 > 2')
+        self.assertEqual(self.cache.hits, 2)
+        table2.get_where_list('c1 > 1')
+        self.assertEqual(self.cache.misses, 12)
+
+    def test03_copies(self):
+        """Each lookup gets its own copy of the condition function."""
+
+        typemap = {'c1': conditions._nxtype_from_nptype[numpy.int32]}
+        compiled1 = conditions.compile_condition('c1 > 3', typemap, [])
+        compiled2 = conditions.compile_condition('c1 > 3', typemap, [])
+        compiled3 = conditions.compile_condition('c1 > 3', typemap, [])
+        self.assertEqual((self.cache.hits, self.cache.misses), (2, 1))
+        functions = [compiled1.function, compiled2.function,
+                     compiled3.function]
+        self.assertEqual(len(set(map(id, functions))), 3)
+        values = numpy.arange(6, dtype='int32')
+        for function in functions:
+            self.assertEqual(function(values).tolist(),
+                             [False] * 4 + [True] * 2)
+
+
 # Main part
 # ---------
 def suite():
@@ -1264,6 +1542,10 @@ def suite():
         testSuite.addTest(unittest.makeSuite(IndexedTableUsage30))
         testSuite.addTest(unittest.makeSuite(IndexedTableUsage31))
         testSuite.addTest(unittest.makeSuite(IndexedTableUsage32))
+        testSuite.addTest(unittest.makeSuite(WhereCoordsTestCase))
+        testSuite.addTest(unittest.makeSuite(WhereManyTestCase))
+        testSuite.addTest(unittest.makeSuite(ProjectedQueryTestCase))
+        testSuite.addTest(unittest.makeSuite(SharedConditionCacheTestCase))
 
     return testSuite
 
@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function
+
+import numpy
+import numpy.testing as npt
+
+import tables
+from tables.tests import common
+from tables.tests.common import unittest
+from tables.tests.common import PyTablesTestCase as TestCase
+
+
+class BasicTestCase(common.TempFileMixin, TestCase):
+    nrows = 300
+
+    def setUp(self):
+        super(BasicTestCase, self).setUp()
+        self.rows = [numpy.arange(i % 7, dtype='int32') * i
+                     for i in range(self.nrows)]
+        self.ragged = self.h5file.create_ragged_array(
+            '/', 'ragged', tables.Int32Atom(), "Ragged array",
+            filters=tables.Filters(complevel=1), chunkshape=64)
+        for row in self.rows:
+            self.ragged.append(row)
+
+    def check_rows(self, rows, expected):
+        self.assertEqual(len(rows), len(expected))
+        for row, exp in zip(rows, expected):
+            npt.assert_array_equal(row, exp)
+
+    def test00_attributes(self):
+        """Checking the attributes of a ragged array."""
+
+        self._reopen()
+        ragged = self.h5file.root.ragged
+        self.assertTrue(isinstance(ragged, tables.RaggedArray))
+        self.assertEqual(ragged.atom, tables.Int32Atom())
+        self.assertEqual(ragged.nrows, self.nrows)
+        self.assertEqual(len(ragged), self.nrows)
+        self.assertEqual(ragged.shape, (self.nrows,))
+        self.assertEqual(ragged.filters.complevel, 1)
+        self.assertEqual(ragged._v_title, "Ragged array")
+        self.assertEqual(ragged.values.chunkshape, (64,))
+        self.assertEqual(ragged.values.nrows, sum(len(r) for r in self.rows))
+        self.assertEqual(ragged.offsets.nrows, self.nrows + 1)
+
+    def test01_read(self):
+        """Reading ranges of rows."""
+
+        self._reopen()
+        ragged = self.h5file.root.ragged
+        self.check_rows(ragged.read(), self.rows)
+        self.check_rows(ragged.read(10, 200, 3), self.rows[10:200:3])
+        self.check_rows(ragged.read(5), self.rows[5:])
+        self.assertEqual(ragged.read(20, 20), [])
+
+    def test02_getitem(self):
+        """Getting rows by index, slice or point selection."""
+
+        ragged = self.ragged
+        npt.assert_array_equal(ragged[3], self.rows[3])
+        npt.assert_array_equal(ragged[-1], self.rows[-1])
+        self.check_rows(ragged[100:120:4], self.rows[100:120:4])
+        self.check_rows(ragged[[4, -2, 0]],
+                        [self.rows[4], self.rows[-2], self.rows[0]])
+        key = numpy.zeros(self.nrows, dtype=bool)
+        key[[7, 9]] = True
+        self.check_rows(ragged[key], [self.rows[7], self.rows[9]])
+        self.assertRaises(IndexError, ragged.__getitem__, self.nrows)
+        self.assertRaises(IndexError, ragged.__getitem__, [1, self.nrows])
+        self.assertRaises(IndexError, ragged.__getitem__, key[:-1])
+
+    def test03_iterrows(self):
+        """Iterating over the rows."""
+
+        ragged = self.ragged
+        ragged.nrowsinbuf = 7
+        nrows = []
+        rows = []
+        for row in ragged.iterrows(3, None, 5):
+            nrows.append(ragged.nrow)
+            rows.append(row)
+        self.assertEqual(nrows, list(range(3, self.nrows, 5)))
+        self.check_rows(rows, self.rows[3::5])
+        self.check_rows(list(ragged), self.rows)
+        nrows = 0
+        for values, offsets in ragged.iterrows(as_flat=True):
+            self.assertTrue(len(offsets) <= 8)
+            nrows += len(offsets) - 1
+        self.assertEqual(nrows, self.nrows)
+
+    def test04_flat(self):
+        """Reading and appending flat values and offsets."""
+
+        ragged = self.ragged
+        values, offsets = ragged.read(2, 100, 7, as_flat=True)
+        self.assertEqual(offsets.dtype, numpy.int64)
+        self.check_rows([values[s:e] for s, e in zip(offsets, offsets[1:])],
+                        self.rows[2:100:7])
+        ragged.append_flat(numpy.arange(10), [2, 2, 5, 10])
+        self.assertRaises(ValueError, ragged.append_flat, [1, 2], [0, 3])
+        self._reopen()
+        ragged = self.h5file.root.ragged
+        self.assertEqual(ragged.nrows, self.nrows + 3)
+        self.check_rows(ragged[-3:], [[], [2, 3, 4], [5, 6, 7, 8, 9]])
+
+    def test05_flavor(self):
+        """Reading rows of the python flavor."""
+
+        self.ragged.flavor = 'python'
+        self._reopen()
+        ragged = self.h5file.root.ragged
+        self.assertEqual(ragged.flavor, 'python')
+        self.assertEqual(ragged[1:4], [[0], [0, 2], [0, 3, 6]])
+
+    def test06_hidden_datasets(self):
+        """The datasets of a ragged array are hidden."""
+
+        self._reopen()
+        ragged = self.h5file.root.ragged
+        self.assertEqual(list(ragged._v_children), [])
+        self.assertEqual(sorted(ragged._v_hidden), ['_p_offsets', '_p_values'])
+        self.assertFalse(ragged.values._f_isvisible())
+        self.assertEqual([node._v_pathname
+                          for node in self.h5file.walk_nodes()],
+                         ['/', '/ragged'])
+        self.assertEqual(self.h5file.list_nodes('/ragged'), [])
+
+    def test07_copy_and_remove(self):
+        """Copying and removing a ragged array."""
+
+        copy = self.h5file.copy_node('/ragged', '/', 'copy',
+                                     start=1, step=2)
+        self.assertTrue(isinstance(copy, tables.RaggedArray))
+        self.check_rows(copy.read(), self.rows[1::2])
+        self.h5file.remove_node('/ragged')
+        self.assertFalse('/ragged' in self.h5file)
+        self._reopen()
+        copy = self.h5file.root.copy
+        self.assertTrue(isinstance(copy, tables.RaggedArray))
+        self.check_rows(copy.read(), self.rows[1::2])
+
+
+class AtomsTestCase(common.TempFileMixin, TestCase):
+
+    def test00_multidim(self):
+        """Rows of multidimensional atoms."""
+
+        ragged = self.h5file.create_ragged_array(
+            '/', 'md', tables.Float64Atom(shape=(2,)))
+        ragged.append([[1, 2], [3, 4]])
+        ragged.append([5, 6])
+        ragged.append(numpy.zeros((0, 2)))
+        self.assertRaises(ValueError, ragged.append, [1, 2, 3])
+        self._reopen()
+        ragged = self.h5file.root.md
+        self.assertEqual(ragged.atom.shape, (2,))
+        self.assertEqual([row.tolist() for row in ragged],
+                         [[[1, 2], [3, 4]], [[5, 6]], []])
+
+    def test01_pseudo_atoms(self):
+        """Rows of pseudo-atoms."""
+
+        ragged = self.h5file.create_ragged_array(
+            '/', 'obj', tables.ObjectAtom())
+        ragged.append({'a': 1})
+        ragged.append([1, 2, 3])
+        ragged2 = self.h5file.create_ragged_array(
+            '/', 'str', tables.VLStringAtom())
+        ragged2.append("abc")
+        ragged2.append("")
+        self._reopen()
+        self.assertEqual(self.h5file.root.obj.read(), [{'a': 1}, [1, 2, 3]])
+        self.assertEqual(self.h5file.root.str.read(), [b"abc", b""])
+
+    def test02_obj(self):
+        """Creating a ragged array from an object."""
+
+        ragged = self.h5file.create_ragged_array(
+            '/', 'obj', obj=numpy.array([1, 2, 3], dtype='int16'))
+        self.assertEqual(ragged.atom, tables.Int16Atom())
+        self.assertEqual(ragged[0].tolist(), [1, 2, 3])
+
+
+def suite():
+    theSuite = unittest.TestSuite()
+    theSuite.addTest(unittest.makeSuite(BasicTestCase))
+    theSuite.addTest(unittest.makeSuite(AtomsTestCase))
+    return theSuite
+
+
+if __name__ == '__main__':
+    import sys
+    common.parse_argv(sys.argv)
+    common.print_versions()
+    unittest.main(defaultTest='suite')
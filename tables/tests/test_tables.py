@@ -15,7 +15,7 @@ from tables import (
     Col, StringCol, BoolCol, IntCol, FloatCol, ComplexCol, Cols, Column,
     Int8Col, Int16Col, Int32Col, UInt16Col, Float32Col, Float64Col,
 )
-from tables.utils import SizeType, byteorders
+from tables.utils import SizeType, byteorders, background_io_enabled
 from tables.tests import common
 from tables.tests.common import allequal, areArraysEqual
 from tables.tests.common import unittest
@@ -1883,6 +1883,55 @@ class NonNestedTableReadTestCase(common.TempFileMixin, TestCase):
         except ValueError as exc:
             self.assertTrue('output array size invalid, got' in str(exc))
 
+    def test_columns_out_arg(self):
+        output = {'f1': np.empty((100, ), 'i4'), 'f7': np.empty((100, ), 'i4')}
+        result = self.table.read(out=output)
+        self.assertTrue(result is output)
+        npt.assert_array_equal(output['f1'], self.array['f1'])
+        npt.assert_array_equal(output['f7'], self.array['f7'])
+
+    def test_columns_out_arg_slices(self):
+        self.table.nrowsinbuf = 7
+        for (start, stop, step) in [(3, 97, 1), (1, 100, 6), (99, 10, -4)]:
+            nrows = len(range(start, stop, step))
+            output = {'f2': np.empty((nrows, ), 'i4'),
+                      'f5': np.empty((nrows, ), 'i4')}
+            self.table.read(start, stop, step, out=output)
+            for col in output:
+                npt.assert_array_equal(output[col],
+                                       self.array[col][start:stop:step])
+
+    def test_columns_out_arg_convert(self):
+        for (start, stop, step) in [(0, 100, 1), (1, 100, 6)]:
+            nrows = len(range(start, stop, step))
+            output = {'f4': np.empty((nrows, ), 'f4')}
+            self.table.read(start, stop, step, out=output)
+            npt.assert_array_equal(output['f4'],
+                                   self.array['f4'][start:stop:step])
+
+    def test_columns_out_arg_memmap(self):
+        fname = tempfile.mktemp('.mmap')
+        try:
+            output = np.memmap(fname, 'i4', 'w+', shape=self.shape)
+            self.table.read(out={'f3': output})
+            output.flush()
+            npt.assert_array_equal(np.fromfile(fname, 'i4'), self.array['f3'])
+            del output
+        finally:
+            os.remove(fname)
+
+    def test_columns_out_arg_with_field(self):
+        output = {'f1': np.empty((100, ), 'i4')}
+        self.assertRaises(TypeError, self.table.read, field='f1', out=output)
+
+    def test_columns_out_arg_buffer_too_small(self):
+        output = {'f1': np.empty((100, ), 'i4'), 'f2': np.empty((99, ), 'i4')}
+        self.assertRaises(ValueError, self.table.read, out=output)
+
+    def test_columns_out_arg_unknown_column(self):
+        output = {'f10': np.empty((100, ), 'i4')}
+        self.assertRaises(KeyError, self.table.read, out=output)
+
 
 class TableReadByteorderTestCase(common.TempFileMixin, TestCase):
     def setUp(self):
@@ -6233,6 +6282,297 @@ class TestCreateTableArgs(common.TempFileMixin, TestCase):
                           description=RecordDescriptionDict)
 
 
+class PrefetchIterTestCase(common.TempFileMixin, TestCase):
+    """Test iterating over tables with buffers read ahead."""
+
+    nrows = 100
+
+    def setUp(self):
+        super(PrefetchIterTestCase, self).setUp()
+        self.table = self.h5file.create_table(
+            '/', 'table', {'var1': tables.Int32Col(pos=0),
+                           'var2': tables.Time64Col(pos=1)})
+        self.table.append([(i, i + 0.5) for i in range(self.nrows)])
+        self.table.nrowsinbuf = 7
+
+    def test00_ranges(self):
+        """Iterating with prefetching over ranges of rows."""
+
+        table = self.table
+        for (start, stop, step) in [(None, None, None), (3, 97, 1),
+                                    (2, 90, 6), (1, None, 30), (5, 5, 1)]:
+            for prefetch in [1, 2, 8]:
+                rows = [(row.nrow, row['var1'], row['var2']) for row in
+                        table.iterrows(start, stop, step, prefetch=prefetch)]
+                expected = [(i, i, i + 0.5) for i in
+                            range(self.nrows)[start:stop:step]]
+                self.assertEqual(rows, expected)
+
+    def test01_break(self):
+        """Leaving a prefetching loop before its end."""
+
+        for row in self.table.iterrows(prefetch=2):
+            if row.nrow == 10:
+                break
+        self.assertEqual(row['var1'], 10)
+        self._reopen()
+        self.assertEqual(self.h5file.root.table.nrows, self.nrows)
+
+    def test02_update(self):
+        """Updating rows in a prefetching loop."""
+
+        for row in self.table.iterrows(step=3, prefetch=2):
+            row['var1'] = -row['var1']
+            row.update()
+        self.table.flush()
+        expected = [-i if i % 3 == 0 else i for i in range(self.nrows)]
+        self.assertEqual(self.table.col('var1').tolist(), expected)
+
+    def test03_not_threadsafe(self):
+        """Prefetching loops when HDF5 is not thread-safe."""
+
+        threadsafe = tables.utils._hdf5_threadsafe
+        tables.utils._hdf5_threadsafe = False
+        try:
+            rows = [row['var1'] for row in
+                    self.table.iterrows(2, None, 5, prefetch=2)]
+        finally:
+            tables.utils._hdf5_threadsafe = threadsafe
+        self.assertEqual(rows, list(range(2, self.nrows, 5)))
+
+
+class WriteBehindTestCase(common.TempFileMixin, TestCase):
+    """Test appending to tables with a background writer."""
+
+    def setUp(self):
+        super(WriteBehindTestCase, self).setUp()
+        self.table = self.h5file.create_table(
+            '/', 'table', {'var1': tables.Int32Col(pos=0),
+                           'var2': tables.Time64Col(pos=1)},
+            chunkshape=8, filters=tables.Filters(complevel=1))
+        self.table.nrowsinbuf = 16
+
+    def test00_append(self):
+        """Appending with Table.append() and Row.append() in the background."""
+
+        table = self.table
+        table.write_behind = 2
+        for i in range(0, 50, 5):
+            table.append([(j, j + 0.5) for j in range(i, i + 5)])
+        row = table.row
+        for i in range(50, 100):
+            row['var1'] = i
+            row['var2'] = i + 0.5
+            row.append()
+        table.flush()
+        self.assertEqual(table.nrows, 100)
+        self.assertEqual(table.col('var1').tolist(), list(range(100)))
+        self.assertEqual(table.col('var2').tolist(),
+                         [i + 0.5 for i in range(100)])
+
+    def test01_index(self):
+        """Background appends update the indexes."""
+
+        table = self.table
+        table.cols.var1.create_index()
+        table.write_behind = 3
+        for i in range(0, 100, 10):
+            table.append([(j, 0) for j in range(i, i + 10)])
+        table.flush()
+        self.assertEqual(table.get_where_list('var1 < 15').tolist(),
+                         list(range(15)))
+        self.assertFalse(table.cols.var1.index.dirty)
+
+    def test02_error(self):
+        """Errors in the background writer are raised by flush()."""
+
+        def _append_buffered_rows(wbufRA, lenrows):
+            raise ValueError("write error")
+
+        self.table.write_behind = 2
+        self.table._append_buffered_rows = _append_buffered_rows
+        if background_io_enabled():
+            self.table.append([(1, 1)])
+            self.assertRaises(ValueError, self.table.flush)
+        else:
+            # Without a background thread the rows are written at once
+            self.assertRaises(ValueError, self.table.append, [(1, 1)])
+        del self.table._append_buffered_rows
+        self.table.append([(2, 2)])
+        self._reopen()
+        self.assertEqual(self.h5file.root.table.col('var1').tolist(), [2])
+
+    def test03_zonemap(self):
+        """Background appends update the zone map."""
+
+        table = self.table
+        table.create_zonemap(['var1'])
+        table.write_behind = 2
+        for i in range(0, 100, 10):
+            table.append([(j, 0) for j in range(i, i + 10)])
+        table.flush()
+        self.assertFalse(table.zonemap.dirty)
+        self.assertEqual(table.get_where_list('var1 >= 95').tolist(),
+                         list(range(95, 100)))
+
+    def test03b_zonemap_error(self):
+        """The zone map gets dirty if background appends fail."""
+
+        def _append_buffered_rows(wbufRA, lenrows):
+            raise ValueError("write error")
+
+        table = self.table
+        table.create_zonemap(['var1'])
+        table.write_behind = 2
+        table._append_buffered_rows = _append_buffered_rows
+        if background_io_enabled():
+            table.append([(1, 1)])
+            self.assertRaises(ValueError, table.flush)
+            self.assertTrue(table.zonemap.dirty)
+        else:
+            self.assertRaises(ValueError, table.append, [(1, 1)])
+            self.assertFalse(table.zonemap.dirty)
+        del table._append_buffered_rows
+        table.append([(2, 2)])
+        table.flush()
+        self.assertEqual(table.get_where_list('var1 == 2').tolist(), [0])
+
+    def test04_other_io(self):
+        """Reading other leaves while appending in the background."""
+
+        other = self.h5file.create_array('/', 'other', np.arange(1000))
+        table = self.table
+        table.write_behind = 4
+        for i in range(0, 1000, 10):
+            table.append([(j, 0) for j in range(i, i + 10)])
+            self.assertEqual(other[i:i + 10].tolist(), list(range(i, i + 10)))
+        table.write_behind = 0
+        self.assertEqual(table.col('var1').tolist(), list(range(1000)))
+
+    def test05_not_threadsafe(self):
+        """Appends are written at once when HDF5 is not thread-safe."""
+
+        threadsafe = tables.utils._hdf5_threadsafe
+        tables.utils._hdf5_threadsafe = False
+        try:
+            self.table.write_behind = 2
+        finally:
+            tables.utils._hdf5_threadsafe = threadsafe
+        self.table.append([(1, 1), (2, 2)])
+        self.assertEqual(self.table.nrows, 2)
+        self.table.flush()
+        self.assertEqual(self.table.col('var1').tolist(), [1, 2])
+
+
+class AggregateTestCase(common.TempFileMixin, TestCase):
+    """Test grouped aggregation of table columns."""
+
+    nrows = 500
+
+    class Record(tables.IsDescription):
+        key = tables.Int16Col(pos=0)
+        ivalue = tables.Int32Col(pos=1)
+        fvalue = tables.Float64Col(pos=2)
+
+        class info(tables.IsDescription):
+            _v_pos = 3
+            x = tables.UInt8Col(pos=0)
+
+    aggs = {'n': ('count', None), 'isum': ('sum', 'ivalue'),
+            'fmean': ('mean', 'fvalue'), 'fmin': ('min', 'fvalue'),
+            'imax': ('max', 'ivalue'), 'xsum': ('sum', 'info/x')}
+
+    def setUp(self):
+        super(AggregateTestCase, self).setUp()
+        self.table = self.h5file.create_table(
+            '/', 'table', self.Record, chunkshape=16)
+        self.rows = [((i * 37) % 23 - 5, i, (i % 11) / 4., (i % 200,))
+                     for i in range(self.nrows)]
+        self.table.append(self.rows)
+        self.table.nrowsinbuf = 32
+
+    def _expected(self, rows):
+        groups = {}
+        for row in rows:
+            groups.setdefault(row[0], []).append(row)
+        expected = []
+        for key in sorted(groups):
+            grows = groups[key]
+            expected.append({
+                'key': key, 'n': len(grows),
+                'isum': sum(row[1] for row in grows),
+                'fmean': sum(row[2] for row in grows) / len(grows),
+                'fmin': min(row[2] for row in grows),
+                'imax': max(row[1] for row in grows),
+                'xsum': sum(row[3][0] for row in grows)})
+        return expected
+
+    def _check(self, condition=None, start=None, stop=None, step=None):
+        result = self.table.aggregate('key', self.aggs, condition, {},
+                                      start, stop, step)
+        rows = self.rows[start:stop:step]
+        if condition is not None:
+            rows = [row for row in rows
+                    if eval(condition, {}, {'ivalue': row[1]})]
+        expected = self._expected(rows)
+        self.assertEqual(len(result), len(expected))
+        self.assertEqual(result.dtype['n'], np.dtype('int64'))
+        self.assertEqual(result.dtype['isum'], np.dtype('int64'))
+        self.assertEqual(result.dtype['xsum'], np.dtype('uint64'))
+        self.assertEqual(result.dtype['fmin'], np.dtype('float64'))
+        self.assertEqual(result.dtype['imax'], np.dtype('int32'))
+        for (row, erow) in zip(result, expected):
+            for name in erow:
+                if name == 'fmean':
+                    self.assertAlmostEqual(row[name], erow[name])
+                else:
+                    self.assertEqual(row[name], erow[name])
+
+    def _check_all(self):
+        self._check()
+        self._check(start=3, stop=400, step=7)
+        self._check(start=10, stop=10)
+        self._check('ivalue > 100')
+        self._check('ivalue < 0')
+        self._check('ivalue < 300', start=100, step=2)
+
+    def test00_scan(self):
+        """Aggregating over a scan of the table."""
+
+        self._check_all()
+
+    def test01_csi(self):
+        """Aggregating by a column with a CSI index."""
+
+        self.table.cols.key.create_csindex()
+        # The rows are read following the index, not by scanning.
+        self.table._read_columns = None
+        self._check_all()
+
+    def test01b_dirty_csi(self):
+        """Aggregating by a column with a dirty CSI index."""
+
+        self.table.cols.key.create_csindex()
+        self.table.autoindex = False
+        self.table.append(self.rows[:50])
+        self.table.flush()
+        self.rows += self.rows[:50]
+        self.assertTrue(self.table.cols.key.index.dirty)
+        self._check_all()
+
+    def test02_errors(self):
+        """Aggregating with wrong arguments."""
+
+        self.assertRaises(ValueError, self.table.aggregate,
+                          'key', {'x': ('median', 'ivalue')})
+        self.assertRaises(KeyError, self.table.aggregate,
+                          'key', {'x': ('sum', 'foo')})
+        self.assertRaises(ValueError, self.table.aggregate,
+                          'info', {'x': ('count', None)})
+        self.assertRaises(ValueError, self.table.aggregate,
+                          'key', {'x': ('count', None)}, step=-1)
+
+
 def suite():
     theSuite = unittest.TestSuite()
     niter = 1
@@ -6268,6 +6608,9 @@ def suite():
         theSuite.addTest(unittest.makeSuite(NonNestedTableReadTestCase))
         theSuite.addTest(unittest.makeSuite(TableReadByteorderTestCase))
         theSuite.addTest(unittest.makeSuite(IterRangeTestCase))
+        theSuite.addTest(unittest.makeSuite(PrefetchIterTestCase))
+        theSuite.addTest(unittest.makeSuite(WriteBehindTestCase))
+        theSuite.addTest(unittest.makeSuite(AggregateTestCase))
         theSuite.addTest(unittest.makeSuite(RecArrayRangeTestCase))
         theSuite.addTest(unittest.makeSuite(GetColRangeTestCase))
         theSuite.addTest(unittest.makeSuite(GetItemTestCase))
@@ -768,6 +768,179 @@ class WideTreeTestCase(common.TempFileMixin, TestCase):
             print()  # This flush the stdout buffer
 
 
+class LazyChildrenTestCase(common.TempFileMixin, TestCase):
+    """Checks that children of wide groups are only listed when needed."""
+
+    open_kwargs = {'GROUP_LIST_PAGE_SIZE': 7}
+
+    def setUp(self):
+        super(LazyChildrenTestCase, self).setUp()
+
+        group = self.h5file.create_group('/', 'wide')
+        for i in range(30):
+            self.h5file.create_array(group, 'array%02d' % i, [i])
+            if i % 3 == 0:
+                self.h5file.create_group(group, 'group%02d' % i)
+        self.h5file.create_array(group, '_p_hidden', [0])
+        self.h5file.create_soft_link(group, 'link', '/wide/array00')
+
+    def test00_create_not_listed(self):
+        """Creating children does not list the group."""
+
+        group = self.h5file.root.wide
+        self.assertFalse('_v_children' in group.__dict__)
+        self.h5file.create_array(group, 'other', [1])
+        self.assertFalse('_v_children' in group.__dict__)
+        self.assertTrue('other' in group)
+        self.assertTrue('other' in group._v_children)
+
+    def test01_iter_pages(self):
+        """Iterating in pages yields the same nodes as a full listing."""
+
+        self._reopen(GROUP_LIST_PAGE_SIZE=7)
+        group = self.h5file.root.wide
+        for classname in (None, 'Group', 'Leaf', 'Link', 'Array'):
+            paged = [node._v_pathname
+                     for node in group._f_iter_nodes(classname)]
+            self.assertFalse('_v_children' in group.__dict__)
+
+            group._g_add_children_names()
+            listed = [node._v_pathname
+                      for node in group._f_iter_nodes(classname)]
+            for name in group._c_lazy_children_attrs:
+                del group.__dict__[name]
+
+            self.assertEqual(paged, listed)
+        self.assertEqual(len(list(group)), 41)
+        self.assertFalse('/wide/_p_hidden' in
+                         [node._v_pathname for node in group])
+
+    def test02_remove_while_iterating(self):
+        """Children may be removed while iterating in pages."""
+
+        self._reopen('a', GROUP_LIST_PAGE_SIZE=7)
+        group = self.h5file.root.wide
+        names = []
+        for node in group._f_iter_nodes('Array'):
+            names.append(node._v_name)
+            node.remove()
+        self.assertEqual(names, ['array%02d' % i for i in range(30)])
+        self.assertEqual(sorted(group._v_children.keys()),
+                         ['group%02d' % i for i in range(0, 30, 3)] +
+                         ['link'])
+
+    def test03_width_warning(self):
+        """The group width is checked without listing the group."""
+
+        self._reopen('a', MAX_GROUP_WIDTH=40)
+        group = self.h5file.root.wide
+        with warnings.catch_warnings(record=True) as warns:
+            warnings.simplefilter('always')
+            self.h5file.create_array(group, 'other', [1])
+        self.assertTrue(any(issubclass(w.category,
+                                       tables.PerformanceWarning)
+                            for w in warns))
+        self.assertFalse('_v_children' in group.__dict__)
+
+
+class CatalogTestCase(common.TempFileMixin, TestCase):
+    """Checks the node catalog against the nodes in the tree."""
+
+    def setUp(self):
+        super(CatalogTestCase, self).setUp()
+
+        h5file = self.h5file
+        group = h5file.create_group('/', 'group', "Group title")
+        h5file.create_table(group, 'table', Record, "Table title")
+        h5file.create_array(group, 'array', [[1, 2, 3], [4, 5, 6]])
+        h5file.create_earray(group, 'earray', tables.Float32Atom(), (0, 4))
+        vlarray = h5file.create_vlarray(group, 'vlarray',
+                                        tables.Int16Atom())
+        vlarray.append([1, 2])
+        subgroup = h5file.create_group(group, 'subgroup')
+        subgroup._v_attrs.number = 42
+        h5file.create_array(subgroup, 'scalar', 3.0)
+        h5file.create_array(group, '_p_hidden', [0])
+        h5file.create_soft_link(group, 'link', '/group/table')
+        self._reopen()
+
+    def test00_walk_nodes(self):
+        """The catalog lists the same nodes as `File.walk_nodes()`."""
+
+        catalog = self.h5file.catalog()
+        self.assertFalse('_v_children' in self.h5file.root.__dict__)
+        self.assertEqual(catalog.dtype.names,
+                         ('path', 'class', 'ndim', 'shape', 'dtype'))
+        expected = {}
+        for node in self.h5file.walk_nodes():
+            expected[node._v_pathname.encode('utf-8')] = node
+        self.assertEqual(sorted(catalog['path']), sorted(expected))
+
+        for row in catalog:
+            node = expected[row['path']]
+            self.assertEqual(row['class'].decode('utf-8'),
+                             node.__class__.__name__.replace('Root', ''))
+            if isinstance(node, Leaf):
+                shape = tuple(row['shape'][:row['ndim']])
+                self.assertEqual(shape, node.shape)
+                self.assertEqual(row['dtype'].decode('utf-8'),
+                                 str(node.dtype))
+            else:
+                self.assertEqual(row['ndim'], -1)
+                self.assertEqual(row['dtype'], b'')
+
+    def test01_attributes(self):
+        """Attribute fields hold string values of scalar attributes."""
+
+        catalog = self.h5file.catalog('/group', fields=('TITLE', 'number'))
+        self.assertEqual(catalog.dtype.names, ('path', 'TITLE', 'number'))
+        rows = dict((row['path'], row) for row in catalog)
+        self.assertEqual(rows[b'/group']['TITLE'], b'Group title')
+        self.assertEqual(rows[b'/group/table']['TITLE'], b'Table title')
+        self.assertEqual(rows[b'/group/subgroup']['number'], b'42')
+        self.assertEqual(rows[b'/group/link']['TITLE'], b'')
+        self.assertFalse(b'/group/_p_hidden' in rows)
+        self.assertFalse(b'/' in rows)
+
+    def test02_persist(self):
+        """Persisted catalogs are returned after reopening."""
+
+        self._reopen('a')
+        catalog = self.h5file.catalog(persist=True)
+        self.assertTrue('/_p_catalog' in self.h5file)
+        self.assertFalse('/_p_catalog' in
+                         [node._v_pathname
+                          for node in self.h5file.walk_nodes()])
+
+        self._reopen()
+        persisted = self.h5file.catalog(use_persisted=True)
+        self.assertEqual(persisted.dtype, catalog.dtype)
+        self.assertTrue((persisted == catalog).all())
+
+        # Other fields are not served from the persisted catalog.
+        other = self.h5file.catalog(fields=('path', 'class'),
+                                    use_persisted=True)
+        self.assertEqual(other.dtype.names, ('path', 'class'))
+
+    def test03_not_group(self):
+        """Only groups can be cataloged."""
+
+        self.assertRaises(TypeError, self.h5file.catalog, '/group/table')
+
+    def test04_hidden_subtrees(self):
+        """Hidden subtrees are not visited."""
+
+        self._reopen('a')
+        self.h5file.root.group.table.cols.var2.create_index()
+        hidden = self.h5file.create_group('/group', '_p_subtree')
+        self.h5file.create_array(hidden, 'array', [1])
+        visited = [path for (path, kind, classid, shape, dtype, attrs)
+                   in self.h5file.root._g_visit_catalog([])]
+        self.assertTrue('group/table' in visited)
+        self.assertEqual([path for path in visited
+                          if '_i_' in path or '_p_' in path], [])
+
+
 class HiddenTreeTestCase(common.TempFileMixin, TestCase):
     """Check for hidden groups, leaves and hierarchies."""
 
@@ -1019,6 +1192,8 @@ def suite():
         theSuite.addTest(unittest.makeSuite(TreeTestCase))
         theSuite.addTest(unittest.makeSuite(DeepTreeTestCase))
         theSuite.addTest(unittest.makeSuite(WideTreeTestCase))
+        theSuite.addTest(unittest.makeSuite(LazyChildrenTestCase))
+        theSuite.addTest(unittest.makeSuite(CatalogTestCase))
         theSuite.addTest(unittest.makeSuite(HiddenTreeTestCase))
         theSuite.addTest(unittest.makeSuite(CreateParentsTestCase))
 
@@ -2,6 +2,7 @@
 
 from __future__ import print_function
 import sys
+import cPickle as pickle
 
 import numpy
 import numpy.testing as npt
@@ -4075,6 +4076,236 @@ class PointSelectionTestCase(common.TempFileMixin, TestCase):
             self.assertRaises(IndexError, vlarr.__getitem__, key)
 
 
+class FlatTestCase(common.TempFileMixin, TestCase):
+
+    def setUp(self):
+        super(FlatTestCase, self).setUp()
+        self.rows = [numpy.arange(i % 5, dtype='int32') + i
+                     for i in range(250)]
+        self.vlarr = self.h5file.create_vlarray('/', 'vlarray', Int32Atom())
+        for row in self.rows:
+            self.vlarr.append(row)
+
+    def check_flat(self, rows, values, offsets):
+        self.assertEqual(offsets.dtype, numpy.int64)
+        self.assertEqual(len(offsets), len(rows) + 1)
+        self.assertEqual(offsets[0], 0)
+        for i, row in enumerate(rows):
+            npt.assert_array_equal(values[offsets[i]:offsets[i + 1]], row)
+        self.assertEqual(offsets[-1], len(values))
+
+    def test00_read(self):
+        """Reading rows as flat values and offsets."""
+
+        values, offsets = self.vlarr.read(as_flat=True)
+        self.assertEqual(values.dtype, numpy.int32)
+        self.check_flat(self.rows, values, offsets)
+        values, offsets = self.vlarr.read(3, 200, 7, as_flat=True)
+        self.check_flat(self.rows[3:200:7], values, offsets)
+        values, offsets = self.vlarr.read(10, 10, as_flat=True)
+        self.assertEqual(len(values), 0)
+        self.assertEqual(offsets.tolist(), [0])
+
+    def test01_iterrows(self):
+        """Iterating over blocks of flat rows."""
+
+        nrows = 0
+        for values, offsets in self.vlarr.iterrows(5, None, 2, as_flat=True):
+            nrow = 5 + nrows * 2
+            self.check_flat(self.rows[nrow:nrow + 2 * (len(offsets) - 1):2],
+                            values, offsets)
+            nrows += len(offsets) - 1
+        self.assertEqual(nrows, len(self.rows[5::2]))
+
+    def test02_append(self):
+        """Appending many rows given as flat values and offsets."""
+
+        values = numpy.arange(10, dtype='int32')
+        self.vlarr.append_flat(values, [1, 3, 3, 10])
+        self.vlarr.append_flat([], [0])
+        self.vlarr.append_flat([], [0, 0])
+        self._reopen()
+        vlarr = self.h5file.root.vlarray
+        self.assertEqual(vlarr.nrows, len(self.rows) + 4)
+        self.assertEqual([row.tolist() for row in vlarr[-4:]],
+                         [[1, 2], [], [3, 4, 5, 6, 7, 8, 9], []])
+
+    def test03_append_bad_offsets(self):
+        """Appending with wrong offsets."""
+
+        for offsets in ([], [[0, 1]], [0, 3, 2], [-1, 2], [0, 11]):
+            self.assertRaises(ValueError, self.vlarr.append_flat,
+                              numpy.arange(10), offsets)
+        self.assertEqual(self.vlarr.nrows, len(self.rows))
+
+    def test04_multidim(self):
+        """Flat rows of multidimensional atoms."""
+
+        vlarr = self.h5file.create_vlarray('/', 'md', Int16Atom(shape=(2,)))
+        values = numpy.arange(12, dtype='int16').reshape(6, 2)
+        vlarr.append_flat(values, [0, 1, 4, 6])
+        self.assertEqual(vlarr[1].tolist(), [[2, 3], [4, 5], [6, 7]])
+        values2, offsets = vlarr.read(as_flat=True)
+        npt.assert_array_equal(values2, values)
+        self.assertEqual(offsets.tolist(), [0, 1, 4, 6])
+        self.assertRaises(ValueError, vlarr.append_flat,
+                          numpy.arange(6), [0, 6])
+
+    def test05_vlstring(self):
+        """Flat rows of pseudo-atoms are given in terms of the base atom."""
+
+        vlarr = self.h5file.create_vlarray('/', 'str', VLStringAtom())
+        vlarr.append("abc")
+        vlarr.append_flat(numpy.frombuffer(b'defgh', dtype='uint8'),
+                          [0, 2, 5])
+        self.assertEqual(vlarr.read(), [b'abc', b'de', b'fgh'])
+        values, offsets = vlarr.read(as_flat=True)
+        self.assertEqual(values.tobytes(), b'abcdefgh')
+        self.assertEqual(offsets.tolist(), [0, 3, 5, 8])
+
+
+class ReversedCodec(tables.ObjectCodec):
+    name = 'reversed'
+
+    def dumps(self, object_):
+        return pickle.dumps(object_)[::-1]
+
+    def loads(self, data):
+        return pickle.loads(data[::-1])
+
+
+class ObjectCodecTestCase(common.TempFileMixin, TestCase):
+    objects = [None, True, -3, 2 ** 80, 1.5, 2 - 1j, b'abc', u'\xe1\xe9',
+               [1, [2.5, (u'x', None)]], {'a': [1, 2], 3: {b'b': ()}},
+               numpy.arange(6, dtype='float32').reshape(2, 3),
+               numpy.int16(-7), set([1, 2])]
+
+    def check_objects(self, objects, expected):
+        self.assertEqual(len(objects), len(expected))
+        for obj, exp in zip(objects, expected):
+            self.assertEqual(type(obj), type(exp))
+            if isinstance(exp, numpy.ndarray):
+                self.assertEqual(obj.dtype, exp.dtype)
+                npt.assert_array_equal(obj, exp)
+            else:
+                self.assertEqual(obj, exp)
+
+    def test00_compact(self):
+        """Saving objects with the compact codec."""
+
+        vlarr = self.h5file.create_vlarray(
+            '/', 'obj', ObjectAtom(codec='compact'))
+        for obj in self.objects:
+            vlarr.append(obj)
+        self._reopen()
+        vlarr = self.h5file.root.obj
+        self.assertEqual(vlarr.atom.codec, 'compact')
+        self.assertEqual(vlarr.attrs.OBJECT_CODEC, 'compact')
+        self.check_objects(vlarr.read(), self.objects)
+        self.check_objects(vlarr[3:8:2], self.objects[3:8:2])
+        self.check_objects([vlarr[-2]], self.objects[-2:-1])
+
+    def test01_batch(self):
+        """Encoding and decoding objects in batches."""
+
+        atom = ObjectAtom(codec='compact')
+        values, offsets = atom.toflat(self.objects)
+        self.assertEqual(values.dtype, numpy.uint8)
+        self.assertEqual(len(offsets), len(self.objects) + 1)
+        self.check_objects(atom.fromflat(values, offsets), self.objects)
+        vlarr = self.h5file.create_vlarray('/', 'obj', atom)
+        vlarr.append_flat(values, offsets)
+        self.check_objects(vlarr.read(), self.objects)
+        self.assertRaises(ValueError, atom.fromflat, values[:-1], offsets)
+
+    def test02_pickle(self):
+        """Objects are still pickled by default."""
+
+        vlarr = self.h5file.create_vlarray('/', 'obj', ObjectAtom())
+        vlarr.append({'a': 1})
+        self._reopen()
+        vlarr = self.h5file.root.obj
+        self.assertEqual(vlarr.atom.codec, 'pickle')
+        self.assertFalse('OBJECT_CODEC' in vlarr.attrs)
+        values, offsets = vlarr.read(as_flat=True)
+        self.assertEqual(pickle.loads(values.tostring()), {'a': 1})
+        self.assertEqual(vlarr.read(), [{'a': 1}])
+
+    def test03_register(self):
+        """Saving objects with a registered codec."""
+
+        self.assertRaises(ValueError, ObjectAtom, codec='reversed')
+        tables.register_object_codec(ReversedCodec())
+        try:
+            vlarr = self.h5file.create_vlarray(
+                '/', 'obj', ObjectAtom(codec='reversed'))
+            vlarr.append([1, 2])
+            vlarr.append(u'abc')
+            self._reopen()
+            vlarr = self.h5file.root.obj
+            self.assertEqual(vlarr.read(), [[1, 2], u'abc'])
+        finally:
+            del tables.atom.object_codecs['reversed']
+        self.assertRaises(TypeError, tables.register_object_codec, pickle)
+
+    def test04_unregistered(self):
+        """Nodes saved with an unregistered codec can still be loaded."""
+
+        tables.register_object_codec(ReversedCodec())
+        try:
+            vlarr = self.h5file.create_vlarray(
+                '/', 'obj', ObjectAtom(codec='reversed'))
+            vlarr.append([1, 2])
+            ragged = self.h5file.create_ragged_array(
+                '/', 'ragged', ObjectAtom(codec='reversed'))
+            ragged.append([3])
+        finally:
+            del tables.atom.object_codecs['reversed']
+        self._reopen()
+        self.assertEqual(sorted(node._v_pathname
+                                for node in self.h5file.walk_nodes()),
+                         ['/', '/obj', '/ragged'])
+        self.assertEqual(len(self.h5file.catalog()), 3)
+        vlarr = self.h5file.root.obj
+        ragged = self.h5file.root.ragged
+        self.assertEqual(vlarr.atom.codec, 'reversed')
+        self.assertRaises(ValueError, vlarr.read)
+        self.assertRaises(ValueError, ragged.read)
+        tables.register_object_codec(ReversedCodec())
+        try:
+            self.assertEqual(vlarr.read(), [[1, 2]])
+            self.assertEqual(ragged.read(), [[3]])
+        finally:
+            del tables.atom.object_codecs['reversed']
+
+    def test05_corrupted(self):
+        """Decoding corrupted compact data raises a ValueError."""
+
+        from tables.utilsextension import compact_dumps, compact_loads
+
+        nested = []
+        for i in range(200):
+            nested = [nested]
+        self.assertEqual(compact_loads(compact_dumps(nested)), nested)
+        self.assertRaises(ValueError, compact_loads,
+                          b'\x01' + b'l\x01' * 200000 + b'N')
+        self.assertRaises(ValueError, compact_loads,
+                          b'\x01' + b'm\x01' * 200000 + b'N')
+
+        # Arrays of objects
+        self.assertRaises(ValueError, compact_loads,
+                          b'\x01a\x03|O8\x01\x01' + b'\x00' * 8)
+        self.assertRaises(ValueError, compact_loads,
+                          b'\x01s\x03|O8' + b'\x00' * 8)
+        # Dimensions whose product overflows
+        self.assertRaises(ValueError, compact_loads,
+                          b'\x01a\x03|u1\x02' + b'\x80' * 9 + b'\x01' +
+                          b'\x02')
+        self.assertRaises(ValueError, compact_loads,
+                          b'\x01a\x03<f8\x02' + b'\x80' * 7 + b'\x20' +
+                          b'\x80' * 7 + b'\x20')
+
+
 class SizeInMemoryPropertyTestCase(common.TempFileMixin, TestCase):
     def create_array(self, atom, complevel):
         filters = tables.Filters(complevel=complevel, complib='blosc')
@@ -4379,6 +4610,8 @@ def suite():
         theSuite.addTest(unittest.makeSuite(TruncateOpenTestCase))
         theSuite.addTest(unittest.makeSuite(TruncateCloseTestCase))
         theSuite.addTest(unittest.makeSuite(PointSelectionTestCase))
+        theSuite.addTest(unittest.makeSuite(FlatTestCase))
+        theSuite.addTest(unittest.makeSuite(ObjectCodecTestCase))
         theSuite.addTest(unittest.makeSuite(SizeInMemoryPropertyTestCase))
         theSuite.addTest(unittest.makeSuite(SizeOnDiskPropertyTestCase))
         theSuite.addTest(unittest.makeSuite(AccessClosedTestCase))
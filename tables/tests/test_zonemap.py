@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function
+
+import numpy
+
+import tables
+from tables.tests import common
+from tables.tests.common import unittest
+from tables.tests.common import PyTablesTestCase as TestCase
+
+
+class Record(tables.IsDescription):
+    time = tables.Int64Col(pos=0)
+    value = tables.Float64Col(pos=1)
+    name = tables.StringCol(8, pos=2)
+    vector = tables.Int32Col(shape=2, pos=3)
+
+
+class ZoneMapTestCase(common.TempFileMixin, TestCase):
+    chunksize = 10
+    nrows = 95
+
+    def setUp(self):
+        super(ZoneMapTestCase, self).setUp()
+        self.table = self.h5file.create_table(
+            '/', 'table', Record, chunkshape=(self.chunksize,))
+        self.fill(0, self.nrows)
+
+    def fill(self, start, stop):
+        row = self.table.row
+        for i in range(start, stop):
+            row['time'] = i
+            row['value'] = numpy.nan if i % 7 == 0 else (i * 13) % 50
+            row['name'] = str(i).encode('ascii')
+            row.append()
+        self.table.flush()
+
+    def check_summaries(self, zonemap):
+        """Compare the summaries in `zonemap` with the table data."""
+
+        data = self.table.read()
+        cs = self.chunksize
+        nchunks = (len(data) + cs - 1) // cs
+        self.assertEqual(zonemap.nrows, nchunks)
+        for colname in zonemap.columns:
+            zones = zonemap.summary(colname)
+            for nchunk in range(nchunks):
+                values = data[colname][nchunk * cs:(nchunk + 1) * cs]
+                nnan = numpy.isnan(values).sum() if colname == 'value' else 0
+                self.assertEqual(zones['nnan'][nchunk], nnan)
+                self.assertEqual(zones['min'][nchunk], numpy.nanmin(values))
+                self.assertEqual(zones['max'][nchunk], numpy.nanmax(values))
+
+    def chunks_read(self, condition):
+        """Get the coordinates and the number of chunks read for a query."""
+
+        self._reopen(mode='a')
+        table = self.h5file.root.table
+        coords = table.get_where_list(condition)
+        chunkcache = table.__dict__.get('_chunkcache')
+        if chunkcache is None:
+            return (coords, None)  # the table was fully scanned
+        return (coords, chunkcache.hits + chunkcache.misses)
+
+    def test00_create(self):
+        """Creating a zone map for the default columns."""
+
+        zonemap = self.table.create_zonemap()
+        self.assertEqual(zonemap.columns, ['time', 'value'])
+        self.assertEqual(zonemap.zonesize, self.chunksize)
+        self.assertFalse(zonemap.dirty)
+        self.assertFalse(zonemap._f_isvisible())
+        self.assertTrue(self.table.zonemap is zonemap)
+        self.check_summaries(zonemap)
+
+    def test01_bad_columns(self):
+        """Columns which can not be summarized are refused."""
+
+        self.assertRaises(ValueError, self.table.create_zonemap, ['name'])
+        self.assertRaises(ValueError, self.table.create_zonemap, ['vector'])
+        self.assertRaises(KeyError, self.table.create_zonemap, ['foo'])
+        self.assertTrue(self.table.zonemap is None)
+
+    def test02_append(self):
+        """Appended rows are summarized, also in partial chunks."""
+
+        self.table.create_zonemap(['value'])
+        self.fill(self.nrows, self.nrows + 3)
+        self.table.append([(200, -1.0, b'x', (0, 0))])
+        self.fill(self.nrows + 4, self.nrows + 30)
+        self._reopen(mode='a')
+        self.table = self.h5file.root.table
+        zonemap = self.table.zonemap
+        self.assertEqual(zonemap.columns, ['value'])
+        self.assertTrue(zonemap.is_usable_for(self.table))
+        self.check_summaries(zonemap)
+
+    def test03_where(self):
+        """Queries skip the chunks which can not match."""
+
+        self.table.create_zonemap()
+        conditions = ['time < 12', '(time >= 30) & (time < 40)',
+                      '(time == 55) | (time == 75)', 'time > 1000',
+                      '(time > 50) & (value < 5)', 'value > 48',
+                      'value >= 0']
+        nchunks = [2, 1, 2, 0, 2, 2, None]
+        data = self.table.read()
+        for condition, nchunk in zip(conditions, nchunks):
+            coords, nread = self.chunks_read(condition)
+            expected = numpy.where(eval(condition, {}, {
+                'time': data['time'], 'value': data['value']}))[0]
+            self.assertEqual(coords.tolist(), expected.tolist())
+            self.assertEqual(nread, nchunk)
+            rows = self.h5file.root.table.where(condition)
+            self.assertEqual([row.nrow for row in rows], expected.tolist())
+
+    def test04_dirty(self):
+        """Modified tables are not queried through a dirty zone map."""
+
+        self.table.create_zonemap()
+        self.table.modify_column(5, 6, column=[1000], colname='time')
+        self.assertTrue(self.table.zonemap.dirty)
+        coords, nread = self.chunks_read('time > 500')
+        self.assertEqual(coords.tolist(), [5])
+        self.assertTrue(nread is None)
+
+        # Appended rows are not summarized either
+        table = self.h5file.root.table
+        table.append([(2000, 0, b'', (0, 0))])
+        self.assertTrue(table.zonemap.dirty)
+
+        # Recreate it
+        table.create_zonemap()
+        self.assertFalse(table.zonemap.dirty)
+        coords, nread = self.chunks_read('time > 500')
+        self.assertEqual(coords.tolist(), [5, self.nrows])
+        self.assertEqual(nread, 2)
+
+    def test05_move_and_remove(self):
+        """The zone map follows the table."""
+
+        self.table.create_zonemap()
+        self.h5file.create_group('/', 'group')
+        self.table.move('/group', 'moved')
+        self.assertTrue('/group/_p_zonemap_moved' in self.h5file)
+        self.assertFalse('/_p_zonemap_table' in self.h5file)
+        self.assertEqual(self.table.zonemap._v_pathname,
+                         '/group/_p_zonemap_moved')
+        self.table.remove()
+        self.assertFalse('/group/_p_zonemap_moved' in self.h5file)
+
+    def test06_remove_zonemap(self):
+        """Removing the zone map."""
+
+        self.table.create_zonemap()
+        self.table.remove_zonemap()
+        self.assertTrue(self.table.zonemap is None)
+        self.assertFalse('/_p_zonemap_table' in self.h5file)
+        self._reopen(mode='a')
+        self.assertTrue(self.h5file.root.table.zonemap is None)
+
+    def test07_inverted_equality(self):
+        """Negated equalities are scanned instead of using the zone map."""
+
+        self.table.create_zonemap(['time'])
+        data = self.table.read()
+        for value in (5, 1, 0):
+            condition = '~(time == %d)' % value
+            coords, nread = self.chunks_read(condition)
+            expected = numpy.where(data['time'] != value)[0]
+            self.assertEqual(coords.tolist(), expected.tolist())
+            self.assertTrue(nread is None)
+        coords, nread = self.chunks_read('~(time >= 12)')
+        self.assertEqual(coords.tolist(), list(range(12)))
+        self.assertEqual(nread, 2)
+
+
+class BloomTestCase(common.TempFileMixin, TestCase):
+    chunksize = 100
+    nrows = 1000
+
+    def setUp(self):
+        super(BloomTestCase, self).setUp()
+        self.table = self.h5file.create_table(
+            '/', 'table', Record, chunkshape=(self.chunksize,))
+        self.ids = numpy.random.RandomState(7).permutation(self.nrows * 10)
+        self.append(0, self.nrows)
+
+    def append(self, start, stop):
+        ids = self.ids[start:stop]
+        self.table.append([(i, (i % 3) * 0.5 - 0.5, str(i).encode('ascii'),
+                            (0, 0)) for i in ids])
+
+    def query(self, condition, condvars=None):
+        """Check the results of a query and get the chunks read."""
+
+        self._reopen(mode='a')
+        table = self.h5file.root.table
+        data = table.read()
+        coords = table.get_where_list(condition, condvars)
+        condvars = dict(condvars or {}, time=data['time'],
+                        value=data['value'], name=data['name'])
+        expected = numpy.where(eval(condition, {}, condvars))[0]
+        self.assertEqual(coords.tolist(), expected.tolist())
+        chunkcache = table.__dict__.get('_chunkcache')
+        if chunkcache is None:
+            return None  # the table was fully scanned
+        return chunkcache.hits + chunkcache.misses
+
+    def test00_equality(self):
+        """Equality lookups only read the chunks with the values."""
+
+        self.table.create_zonemap([], bloom=['time', 'name'])
+        zonemap = self.table.zonemap
+        self.assertEqual(zonemap.columns, [])
+        self.assertEqual(zonemap.bloomcolumns, ['time', 'name'])
+        ids = self.ids
+        self.assertTrue(self.query('time == %d' % ids[150]) <= 3)
+        self.assertTrue(
+            self.query('(time == %d) | (time == %d)' % (ids[5], ids[950]))
+            <= 4)
+        self.assertTrue(self.query('name == b"%d"' % ids[420]) <= 3)
+        # Values which can not be in the table
+        self.assertEqual(self.query('name == b"123456789"'), 0)
+        self.assertEqual(self.query('time == 2.5'), 0)
+        # Range conditions can not use the Bloom filters
+        self.assertEqual(self.query('time < 20'), None)
+
+    def test01_append(self):
+        """Values appended later are found in partially filled chunks."""
+
+        self.table.create_zonemap(bloom=['time'], bloombits=4)
+        self.append(self.nrows, self.nrows + 30)
+        self.append(self.nrows + 30, self.nrows + 170)
+        for nrow in (self.nrows - 10, self.nrows + 15, self.nrows + 40,
+                     self.nrows + 169):
+            nread = self.query('time == n', {'n': self.ids[nrow]})
+            self.assertTrue(nread is not None)
+
+    def test02_float_zero(self):
+        """Negative zeros are found in filters of floating point values."""
+
+        self.table.create_zonemap([], bloom=['value'])
+        self.table.modify_column(3, 4, column=[-0.0], colname='value')
+        self.table.create_zonemap([], bloom=['value'])
+        self.assertTrue(self.query('value == 0.0') is None)
+        self.assertTrue(self.query('value == 0.5') is None)
+        self.assertEqual(self.query('value == 0.25'), 0)
+
+    def test03_bad_bloom_columns(self):
+        """Columns which can not have Bloom filters are refused."""
+
+        self.assertRaises(ValueError, self.table.create_zonemap,
+                          bloom=['vector'])
+        self.assertRaises(KeyError, self.table.create_zonemap,
+                          bloom=['foo'])
+        self.assertRaises(ValueError, self.table.create_zonemap,
+                          bloom=['time'], bloombits=0)
+
+
+def suite():
+    theSuite = unittest.TestSuite()
+    theSuite.addTest(unittest.makeSuite(ZoneMapTestCase))
+    theSuite.addTest(unittest.makeSuite(BloomTestCase))
+    return theSuite
+
+
+if __name__ == '__main__':
+    import sys
+    common.parse_argv(sys.argv)
+    common.print_versions()
+    unittest.main(defaultTest='suite')
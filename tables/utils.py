@@ -15,7 +15,9 @@
 from __future__ import print_function
 import os
 import sys
+import Queue
 import warnings
+import threading
 import subprocess
 from time import time
 
@@ -441,6 +443,172 @@ class NailedDict(object):
         cache[key] = value
 
 
+_hdf5_threadsafe = None
+
+
+def background_io_enabled():
+    """Can HDF5 be used by background threads?
+
+    This is only so when the HDF5 library was built thread-safe (which is
+    not the default): otherwise it can not be running a call in one
+    thread while another one calls it, not even for different files.
+    `ReadAhead` and `WriteBehind` do their work synchronously when this
+    is false, so I/O does not overlap with the work of the caller then.
+
+    """
+
+    global _hdf5_threadsafe
+
+    if _hdf5_threadsafe is None:
+        from tables.utilsextension import _hdf5_is_threadsafe
+        _hdf5_threadsafe = _hdf5_is_threadsafe()
+    return _hdf5_threadsafe
+
+
+class ReadAhead(object):
+    """Read blocks of data in a background thread ahead of their use.
+
+    The `read` callable is called as ``read(pos)`` for each position in
+    the `positions` iterable, and up to `nblocks` of its results are kept
+    in a queue, to be taken in order with :meth:`get`.
+
+    Background reads are only done when HDF5 is thread-safe (see
+    :func:`background_io_enabled`).  Otherwise no thread is started and
+    each block is read by :meth:`get` itself, when it is needed.
+
+    """
+
+    def __init__(self, read, positions, nblocks):
+        self._read = read
+        self._positions = positions
+        self._queue = Queue.Queue(nblocks)
+        self._closed = False
+        if not background_io_enabled():
+            self._thread = None
+            self._positions = iter(positions)
+            return
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self):
+        try:
+            for pos in self._positions:
+                if self._closed:
+                    return
+                result = self._read(pos)
+                if not self._put((pos, result, None)):
+                    return
+        except Exception as exc:
+            self._put((None, None, exc))
+        else:
+            self._put((None, None, None))  # no more blocks
+
+    def _put(self, item):
+        # Wait for room in the queue, unless the reader gets closed
+        while not self._closed:
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except Queue.Full:
+                pass
+        return False
+
+    def get(self):
+        """Return the next ``(pos, result)`` pair.
+
+        ``(None, None)`` is returned after the last position.  Exceptions
+        raised while reading are raised here.
+
+        """
+
+        if self._thread is None:
+            for pos in self._positions:
+                if self._closed:
+                    break
+                return (pos, self._read(pos))
+            return (None, None)
+        (pos, result, exc) = self._queue.get()
+        if exc is not None:
+            raise exc
+        return (pos, result)
+
+    def close(self):
+        """Stop reading and wait for the background thread to finish."""
+
+        self._closed = True
+        if self._thread not in (None, threading.current_thread()):
+            self._thread.join()
+
+
+class WriteBehind(object):
+    """Call writing functions in a background thread, in order.
+
+    Up to `maxbatches` calls can wait in the queue; :meth:`put` blocks
+    when it is full.  The first exception raised by a call is kept (the
+    calls queued after it are discarded) and raised by the next
+    :meth:`put`, :meth:`drain` or :meth:`close`.
+
+    Background writes are only done when HDF5 is thread-safe (see
+    :func:`background_io_enabled`).  Otherwise no thread is started and
+    :meth:`put` does the call itself, so the caller waits for it.
+
+    """
+
+    def __init__(self, maxbatches):
+        self.maxbatches = maxbatches
+        self._queue = Queue.Queue(maxbatches)
+        self._error = None
+        if not background_io_enabled():
+            self._thread = None
+            return
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return  # closed
+                if self._error is None:
+                    (write, args) = item
+                    write(*args)
+            except Exception as exc:
+                self._error = exc
+            finally:
+                self._queue.task_done()
+
+    def _raise_error(self):
+        (exc, self._error) = (self._error, None)
+        if exc is not None:
+            raise exc
+
+    def put(self, write, args):
+        """Queue a ``write(*args)`` call."""
+
+        self._raise_error()
+        if self._thread is None:
+            write(*args)
+        else:
+            self._queue.put((write, args))
+
+    def drain(self):
+        """Wait until all the queued calls are done."""
+
+        self._queue.join()
+        self._raise_error()
+
+    def close(self):
+        """Do the queued calls and stop the background thread."""
+
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+        self._raise_error()
+
+
 def detect_number_of_cores():
     """Detects the number of cores on a system.
 
@@ -467,6 +635,42 @@ def detect_number_of_cores():
 detectNumberOfCores = previous_api(detect_number_of_cores)
 
 
+# Numexpr is imported only when PyTables first needs it, so settings
+# made before that are kept here.
+_pending_numexpr_vml_threads = None
+
+
+def set_numexpr_vml_threads(nthreads):
+    """Set the maximum number of threads used by VML in Numexpr.
+
+    If Numexpr has not been imported yet, the setting is applied by
+    `load_numexpr()` when it is.
+
+    """
+
+    global _pending_numexpr_vml_threads
+
+    numexpr = sys.modules.get('numexpr')
+    if numexpr is None:
+        _pending_numexpr_vml_threads = nthreads
+    else:
+        _pending_numexpr_vml_threads = None
+        numexpr.set_vml_num_threads(nthreads)
+
+
+def load_numexpr():
+    """Import Numexpr, apply any pending settings and return it."""
+
+    global _pending_numexpr_vml_threads
+
+    import numexpr
+    nthreads = _pending_numexpr_vml_threads
+    if nthreads is not None:
+        _pending_numexpr_vml_threads = None
+        numexpr.set_vml_num_threads(nthreads)
+    return numexpr
+
+
 # Main part
 # =========
 def _test():
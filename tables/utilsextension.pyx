@@ -21,6 +21,11 @@ try:
 except ImportError:
   zlib_imported = False
 
+try:
+  import cPickle as _pickle
+except ImportError:
+  import pickle as _pickle
+
 import numpy
 
 from tables.description import Description, Col
@@ -33,10 +38,12 @@ from tables._past import previous_api
 
 from cpython cimport PY_MAJOR_VERSION
 from libc.stdio cimport stderr
-from libc.stdlib cimport malloc, free
-from libc.string cimport strchr, strcmp, strncmp, strlen
-from cpython.bytes cimport PyBytes_Check, PyBytes_FromStringAndSize
-from cpython.unicode cimport PyUnicode_DecodeUTF8, PyUnicode_Check
+from libc.stdlib cimport malloc, realloc, free
+from libc.string cimport strchr, strcmp, strncmp, strlen, memcpy
+from cpython.bytes cimport (PyBytes_AS_STRING, PyBytes_Check,
+  PyBytes_FromStringAndSize)
+from cpython.unicode cimport (PyUnicode_AsUTF8String, PyUnicode_DecodeUTF8,
+  PyUnicode_Check)
 
 from numpy cimport (import_array, ndarray, dtype,
   npy_int64, PyArray_DescrFromType, npy_intp,
@@ -71,7 +78,7 @@ from definitions cimport (H5ARRAYget_info, H5ARRAYget_ndims,
   create_ieee_float16, create_ieee_complex192, create_ieee_complex256,
   get_len_of_range, get_order, herr_t, hid_t, hsize_t,
   hssize_t, htri_t, is_complex, register_blosc, set_order,
-  pt_H5free_memory)
+  pt_H5free_memory, pt_H5is_library_threadsafe, hbool_t)
 
 
 # Platform-dependent types
@@ -185,6 +192,11 @@ cdef extern from "utils.h":
                              hid_t *type_id, hid_t *dataset_id) nogil
 
 
+# Limits of the Python C API
+cdef extern from "Python.h":
+  Py_ssize_t PY_SSIZE_T_MAX
+
+
 # Functions from Blosc
 cdef extern from "blosc.h" nogil:
   void blosc_init()
@@ -313,39 +325,59 @@ def set_blosc_max_threads(nthreads):
 setBloscMaxThreads = previous_api(set_blosc_max_threads)
 
 
-if sys.platform == "win32":
-  # We need a different approach in Windows, because it complains when
-  # trying to import the extension that is linked with a dynamic library
-  # that is not installed in the system.
+# The LZO and bzip2 filters are only registered when needed (files are
+# opened or their versions asked), since loading them slows down imports.
+lzo_version = None
+bzip2_version = None
+_extra_filters_registered = False
 
-  # Initialize & register lzo
-  if getLibrary("lzo2") == 0 or getLibrary("lzo1") == 0:
-    import tables._comp_lzo
-    lzo_version = tables._comp_lzo.register_()
-  else:
-    lzo_version = None
 
-  # Initialize & register bzip2
-  if getLibrary("bzip2") == 0 or getLibrary("libbz2") == 0:
-    import tables._comp_bzip2
-    bzip2_version = tables._comp_bzip2.register_()
-  else:
-    bzip2_version = None
+def register_extra_filters():
+  """Register the optional LZO and bzip2 filters in HDF5.
 
-else:  # Unix systems
-  # Initialize & register lzo
-  try:
-    import tables._comp_lzo
-    lzo_version = tables._comp_lzo.register_()
-  except ImportError:
-    lzo_version = None
+  This is done only once, subsequent calls do nothing.
 
-  # Initialize & register bzip2
-  try:
-    import tables._comp_bzip2
-    bzip2_version = tables._comp_bzip2.register_()
-  except ImportError:
-    bzip2_version = None
+  """
+
+  global lzo_version, bzip2_version, _extra_filters_registered
+
+  if _extra_filters_registered:
+    return
+  _extra_filters_registered = True
+
+  if sys.platform == "win32":
+    # We need a different approach in Windows, because it complains when
+    # trying to import the extension that is linked with a dynamic library
+    # that is not installed in the system.
+
+    # Initialize & register lzo
+    if getLibrary("lzo2") == 0 or getLibrary("lzo1") == 0:
+      import tables._comp_lzo
+      lzo_version = tables._comp_lzo.register_()
+    else:
+      lzo_version = None
+
+    # Initialize & register bzip2
+    if getLibrary("bzip2") == 0 or getLibrary("libbz2") == 0:
+      import tables._comp_bzip2
+      bzip2_version = tables._comp_bzip2.register_()
+    else:
+      bzip2_version = None
+
+  else:  # Unix systems
+    # Initialize & register lzo
+    try:
+      import tables._comp_lzo
+      lzo_version = tables._comp_lzo.register_()
+    except ImportError:
+      lzo_version = None
+
+    # Initialize & register bzip2
+    try:
+      import tables._comp_bzip2
+      bzip2_version = tables._comp_bzip2.register_()
+    except ImportError:
+      bzip2_version = None
 
 
 # End of initialization code
@@ -430,6 +462,16 @@ silenceHDF5Messages = previous_api(silence_hdf5_messages)
 silence_hdf5_messages()
 
 
+def _hdf5_is_threadsafe():
+  """Return whether the HDF5 library can be called by several threads."""
+
+  cdef hbool_t is_ts = 0
+
+  if pt_H5is_library_threadsafe(&is_ts) < 0:
+    return False
+  return bool(is_ts)
+
+
 def _broken_hdf5_long_double():
     # HDF5 < 1.8.12 has a bug that prevents correct identification of the
     # long double data type when the code is built with gcc 4.8.
@@ -724,10 +766,12 @@ def which_lib_version(str name):
     if zlib_imported:
       return (1, zlib.ZLIB_VERSION, None)
   elif strcmp(cname, "lzo") == 0:
+    register_extra_filters()
     if lzo_version:
       (lzo_version_string, lzo_version_date) = lzo_version
       return (lzo_version, lzo_version_string, lzo_version_date)
   elif strcmp(cname, "bzip2") == 0:
+    register_extra_filters()
     if bzip2_version:
       (bzip2_version_string, bzip2_version_date) = bzip2_version
       return (bzip2_version, bzip2_version_string, bzip2_version_date)
@@ -1450,6 +1494,428 @@ def create_nested_type(object desc, str byteorder):
 createNestedType = previous_api(create_nested_type)
 
 
+# The compact codec for objects in ObjectAtom rows
+# ------------------------------------------------
+#
+# Every encoded object starts with the version of the format, followed by
+# a tagged encoding of the object: a tag byte and, depending on the tag,
+# either a little-endian float or a varint (for integers, lengths of strings
+# and sizes of containers and arrays) and then the items.  Integers are
+# zigzag encoded so that small negative numbers are short too.  Objects of
+# other types (or too deeply nested) are embedded as pickles.
+
+cdef enum:
+  COMPACT_VERSION = 1
+  COMPACT_MAXDEPTH = 256
+
+cdef struct compact_buffer:
+  unsigned char *data
+  size_t size
+  size_t allocated
+
+
+class _CompactTooDeep(Exception):
+  pass
+
+
+cdef int _cb_reserve(compact_buffer *buf, size_t nbytes) except -1:
+  cdef size_t newsize
+  cdef unsigned char *newdata
+
+  if buf.size + nbytes <= buf.allocated:
+    return 0
+  newsize = 2 * buf.allocated
+  if newsize < buf.size + nbytes:
+    newsize = buf.size + nbytes
+  if newsize < 256:
+    newsize = 256
+  newdata = <unsigned char *>realloc(buf.data, newsize)
+  if newdata == NULL:
+    raise MemoryError("unable to allocate the encoding buffer")
+  buf.data = newdata
+  buf.allocated = newsize
+  return 0
+
+
+cdef inline int _cb_put_tag(compact_buffer *buf, char tag) except -1:
+  _cb_reserve(buf, 1)
+  buf.data[buf.size] = <unsigned char>tag
+  buf.size += 1
+  return 0
+
+
+cdef inline int _cb_put_varint(compact_buffer *buf,
+                               unsigned long long value) except -1:
+  _cb_reserve(buf, 10)
+  while value >= 0x80:
+    buf.data[buf.size] = <unsigned char>((value & 0x7f) | 0x80)
+    buf.size += 1
+    value >>= 7
+  buf.data[buf.size] = <unsigned char>value
+  buf.size += 1
+  return 0
+
+
+cdef inline int _cb_put_double(compact_buffer *buf, double value) except -1:
+  cdef unsigned long long bits
+  cdef int i
+
+  memcpy(&bits, &value, 8)
+  _cb_reserve(buf, 8)
+  for i in range(8):
+    buf.data[buf.size + i] = <unsigned char>((bits >> (8 * i)) & 0xff)
+  buf.size += 8
+  return 0
+
+
+cdef inline int _cb_put_raw(compact_buffer *buf, const char *data,
+                            size_t nbytes) except -1:
+  _cb_reserve(buf, nbytes)
+  memcpy(buf.data + buf.size, data, nbytes)
+  buf.size += nbytes
+  return 0
+
+
+cdef inline int _cb_put_string(compact_buffer *buf, char tag,
+                               bytes data) except -1:
+  cdef size_t nbytes = len(data)
+
+  _cb_put_tag(buf, tag)
+  _cb_put_varint(buf, nbytes)
+  _cb_put_raw(buf, PyBytes_AS_STRING(data), nbytes)
+  return 0
+
+
+cdef bint _is_plain_dtype(object dtype_):
+  return dtype_.fields is None and dtype_.subdtype is None and \
+    not dtype_.hasobject
+
+
+cdef int _cb_put_dtype(compact_buffer *buf, object dtype_) except -1:
+  cdef bytes dstr = dtype_.str.encode('ascii')
+
+  _cb_put_varint(buf, len(dstr))
+  _cb_put_raw(buf, PyBytes_AS_STRING(dstr), len(dstr))
+  return 0
+
+
+cdef int _compact_encode(compact_buffer *buf, object obj,
+                         int depth) except -1:
+  cdef object type_ = type(obj)
+  cdef long long ivalue
+  cdef ndarray arr
+
+  if depth > COMPACT_MAXDEPTH:
+    raise _CompactTooDeep()
+
+  if type_ is unicode:
+    _cb_put_string(buf, b'u', PyUnicode_AsUTF8String(obj))
+  elif obj is None:
+    _cb_put_tag(buf, b'N')
+  elif obj is True:
+    _cb_put_tag(buf, b'T')
+  elif obj is False:
+    _cb_put_tag(buf, b'F')
+  elif type_ is int or type_ is long:
+    try:
+      ivalue = obj
+    except OverflowError:
+      _cb_put_string(buf, b'I', str(obj).encode('ascii'))
+    else:
+      _cb_put_tag(buf, b'i')
+      # Zigzag encoding: 0, -1, 1, -2, 2... map to 0, 1, 2, 3, 4...
+      _cb_put_varint(buf, (<unsigned long long>ivalue << 1) ^
+                     <unsigned long long>(ivalue >> 63))
+  elif type_ is float:
+    _cb_put_tag(buf, b'd')
+    _cb_put_double(buf, obj)
+  elif type_ is bytes:
+    _cb_put_string(buf, b'b', obj)
+  elif type_ is list:
+    _cb_put_tag(buf, b'l')
+    _cb_put_varint(buf, len(<list>obj))
+    for item in <list>obj:
+      _compact_encode(buf, item, depth + 1)
+  elif type_ is dict:
+    _cb_put_tag(buf, b'm')
+    _cb_put_varint(buf, len(<dict>obj))
+    for key, value in (<dict>obj).items():
+      _compact_encode(buf, key, depth + 1)
+      _compact_encode(buf, value, depth + 1)
+  elif type_ is tuple:
+    _cb_put_tag(buf, b't')
+    _cb_put_varint(buf, len(<tuple>obj))
+    for item in <tuple>obj:
+      _compact_encode(buf, item, depth + 1)
+  elif type_ is complex:
+    _cb_put_tag(buf, b'c')
+    _cb_put_double(buf, obj.real)
+    _cb_put_double(buf, obj.imag)
+  elif type_ is numpy.ndarray and _is_plain_dtype(obj.dtype):
+    arr = numpy.ascontiguousarray(obj)
+    _cb_put_tag(buf, b'a')
+    _cb_put_dtype(buf, arr.dtype)
+    _cb_put_varint(buf, arr.ndim)
+    for dim in obj.shape:
+      _cb_put_varint(buf, dim)
+    _cb_put_raw(buf, arr.data, arr.nbytes)
+  elif isinstance(obj, numpy.generic) and _is_plain_dtype(obj.dtype):
+    arr = numpy.asarray(obj)
+    _cb_put_tag(buf, b's')
+    _cb_put_dtype(buf, arr.dtype)
+    _cb_put_raw(buf, arr.data, arr.nbytes)
+  else:
+    _cb_put_string(buf, b'P',
+                   _pickle.dumps(obj, _pickle.HIGHEST_PROTOCOL))
+  return 0
+
+
+cdef int _compact_encode_top(compact_buffer *buf, object obj) except -1:
+  cdef size_t start = buf.size
+
+  _cb_put_tag(buf, COMPACT_VERSION)
+  try:
+    _compact_encode(buf, obj, 0)
+  except (_CompactTooDeep, RuntimeError):
+    # Deeply nested or recursive objects are pickled as a whole
+    buf.size = start
+    _cb_put_tag(buf, COMPACT_VERSION)
+    _cb_put_string(buf, b'P',
+                   _pickle.dumps(obj, _pickle.HIGHEST_PROTOCOL))
+  return 0
+
+
+cdef class _CompactReader:
+  cdef const unsigned char *data
+  cdef size_t pos, end
+
+  cdef inline const unsigned char *take(self, size_t nbytes) except NULL:
+    cdef const unsigned char *p
+
+    if nbytes > self.end - self.pos:
+      raise ValueError("the compact encoded data is truncated or corrupted")
+    p = self.data + self.pos
+    self.pos += nbytes
+    return p
+
+  cdef inline unsigned long long get_varint(self) except? 0xffffffffffffffff:
+    cdef unsigned long long value = 0
+    cdef unsigned char byte
+    cdef int shift = 0
+
+    while True:
+      byte = self.take(1)[0]
+      if shift > 63:
+        raise ValueError("the compact encoded data is truncated or "
+                         "corrupted")
+      value |= (<unsigned long long>(byte & 0x7f)) << shift
+      if byte < 0x80:
+        return value
+      shift += 7
+
+  cdef double get_double(self) except? -1:
+    cdef const unsigned char *p = self.take(8)
+    cdef unsigned long long bits = 0
+    cdef double value
+    cdef int i
+
+    for i in range(8):
+      bits |= (<unsigned long long>p[i]) << (8 * i)
+    memcpy(&value, &bits, 8)
+    return value
+
+  cdef object get_dtype(self):
+    cdef size_t nbytes = self.get_varint()
+    cdef const unsigned char *p = self.take(nbytes)
+
+    try:
+      dtype_ = numpy.dtype(PyBytes_FromStringAndSize(<const char *>p,
+                                                     nbytes).decode('ascii'))
+    except TypeError:
+      dtype_ = None
+    # Only plain dtypes are encoded, and the raw bytes of objects would
+    # become garbage pointers.
+    if dtype_ is None or not _is_plain_dtype(dtype_):
+      raise ValueError("the compact encoded data has an invalid dtype")
+    return dtype_
+
+  cdef object get_array(self, object dtype_, object shape):
+    cdef size_t nbytes = dtype_.itemsize
+    cdef unsigned long long dim
+    cdef const unsigned char *p
+    cdef ndarray arr
+
+    for pydim in shape:
+      dim = pydim
+      if dim > <size_t>PY_SSIZE_T_MAX or (
+          dim != 0 and nbytes > <size_t>PY_SSIZE_T_MAX / dim):
+        raise ValueError("the compact encoded array is too big")
+      nbytes *= dim
+    p = self.take(nbytes)
+    arr = numpy.empty(shape, dtype=dtype_)
+    memcpy(arr.data, p, nbytes)
+    return arr
+
+  cdef object decode(self, int depth):
+    cdef char tag = <char>self.take(1)[0]
+    cdef unsigned long long value
+    cdef size_t i, n
+    cdef const unsigned char *p
+
+    if depth > COMPACT_MAXDEPTH:
+      raise ValueError("the compact encoded data is nested too deeply")
+
+    if tag == b'u':
+      n = self.get_varint()
+      p = self.take(n)
+      return PyUnicode_DecodeUTF8(<const char *>p, n, NULL)
+    elif tag == b'b':
+      n = self.get_varint()
+      p = self.take(n)
+      return PyBytes_FromStringAndSize(<const char *>p, n)
+    elif tag == b'i':
+      value = self.get_varint()
+      return <long long>((value >> 1) ^ (~(value & 1) + 1))
+    elif tag == b'N':
+      return None
+    elif tag == b'T':
+      return True
+    elif tag == b'F':
+      return False
+    elif tag == b'd':
+      return self.get_double()
+    elif tag == b'l' or tag == b't':
+      n = self.get_varint()
+      items = [self.decode(depth + 1) for i in range(n)]
+      return items if tag == b'l' else tuple(items)
+    elif tag == b'm':
+      n = self.get_varint()
+      result = {}
+      for i in range(n):
+        key = self.decode(depth + 1)
+        result[key] = self.decode(depth + 1)
+      return result
+    elif tag == b'c':
+      real = self.get_double()
+      return complex(real, self.get_double())
+    elif tag == b'I':
+      n = self.get_varint()
+      p = self.take(n)
+      return int(PyBytes_FromStringAndSize(<const char *>p, n))
+    elif tag == b'a':
+      dtype_ = self.get_dtype()
+      n = self.get_varint()
+      shape = tuple([self.get_varint() for i in range(n)])
+      return self.get_array(dtype_, shape)
+    elif tag == b's':
+      dtype_ = self.get_dtype()
+      return self.get_array(dtype_, ())[()]
+    elif tag == b'P':
+      n = self.get_varint()
+      p = self.take(n)
+      return _pickle.loads(PyBytes_FromStringAndSize(<const char *>p, n))
+    raise ValueError("unknown tag %r in compact encoded data"
+                     % chr(<unsigned char>tag))
+
+  cdef object decode_top(self):
+    cdef unsigned char version = self.take(1)[0]
+
+    if version != COMPACT_VERSION:
+      raise ValueError("unsupported version %d of compact encoded data"
+                       % version)
+    obj = self.decode(0)
+    if self.pos != self.end:
+      raise ValueError("the compact encoded data has trailing garbage")
+    return obj
+
+
+def compact_dumps(object obj):
+  """Encode `obj` with the compact codec and return the bytes."""
+
+  cdef compact_buffer buf
+  buf.data = NULL
+  buf.size = buf.allocated = 0
+  try:
+    _compact_encode_top(&buf, obj)
+    return PyBytes_FromStringAndSize(<char *>buf.data, buf.size)
+  finally:
+    free(buf.data)
+
+
+def compact_loads(bytes data not None):
+  """Decode an object encoded with the compact codec in `data`."""
+
+  cdef _CompactReader reader = _CompactReader()
+  reader.data = <const unsigned char *>PyBytes_AS_STRING(data)
+  reader.pos = 0
+  reader.end = len(data)
+  return reader.decode_top()
+
+
+def compact_dumps_batch(objects):
+  """Encode the `objects` with the compact codec one after the other.
+
+  A ``(values, offsets)`` tuple is returned, where `values` is a ``uint8``
+  array with all the encoded objects and `offsets` an ``int64`` array
+  with the limits of each of them.
+
+  """
+
+  cdef compact_buffer buf
+  cdef ndarray values, offsets
+  cdef npy_int64 *obuf
+  cdef Py_ssize_t i
+
+  objects = list(objects)
+  offsets = numpy.zeros((len(objects) + 1,), dtype=numpy.int64)
+  obuf = <npy_int64 *>offsets.data
+  buf.data = NULL
+  buf.size = buf.allocated = 0
+  try:
+    for i, obj in enumerate(objects):
+      _compact_encode_top(&buf, obj)
+      obuf[i + 1] = buf.size
+    values = numpy.empty((buf.size,), dtype=numpy.uint8)
+    if buf.size:
+      memcpy(values.data, buf.data, buf.size)
+  finally:
+    free(buf.data)
+  return values, offsets
+
+
+def compact_loads_batch(ndarray values not None, ndarray offsets not None):
+  """Decode the objects encoded with the compact codec in flat `values`.
+
+  `offsets` gives the limits of each encoded object in `values`, as
+  returned by :func:`compact_dumps_batch`.  Empty objects are decoded as
+  ``None``.
+
+  """
+
+  cdef _CompactReader reader = _CompactReader()
+  cdef npy_int64 *obuf
+  cdef Py_ssize_t i, nobjects
+
+  values = numpy.ascontiguousarray(values, dtype=numpy.uint8)
+  offsets = numpy.ascontiguousarray(offsets, dtype=numpy.int64)
+  nobjects = len(offsets) - 1
+  obuf = <npy_int64 *>offsets.data
+  if nobjects > 0 and (obuf[0] < 0 or obuf[nobjects] > len(values)):
+    raise ValueError("the offsets are out of the bounds of the values")
+  reader.data = <const unsigned char *>values.data
+  result = []
+  for i in range(nobjects):
+    if obuf[i + 1] < obuf[i]:
+      raise ValueError("the offsets must be non-decreasing")
+    if obuf[i + 1] == obuf[i]:
+      result.append(None)
+      continue
+    reader.pos = obuf[i]
+    reader.end = obuf[i + 1]
+    result.append(reader.decode_top())
+  return result
+
+
 ## Local Variables:
 ## mode: python
 ## py-indent-offset: 2
@@ -413,6 +413,9 @@ class VLArray(hdf5extension.VLArray, Leaf):
         # can retrieve the proper class after a re-opening operation.
         if not hasattr(atom, 'size'):  # it is a pseudo-atom
             self.attrs.PSEUDOATOM = atom.kind
+            # Objects which are not pickled need their codec back.
+            if atom.kind == 'object' and atom.codec != 'pickle':
+                self.attrs.OBJECT_CODEC = atom.codec
 
         return self._v_objectid
 
@@ -430,7 +433,10 @@ class VLArray(hdf5extension.VLArray, Leaf):
             elif kind == 'vlunicode':
                 atom = VLUnicodeAtom()
             elif kind == 'object':
-                atom = ObjectAtom()
+                codec = 'pickle'
+                if "OBJECT_CODEC" in self.attrs:
+                    codec = self.attrs.OBJECT_CODEC
+                atom = ObjectAtom._from_saved_codec(codec)
             else:
                 raise ValueError(
                     "pseudo-atom name ``%s`` not known." % kind)
@@ -536,12 +542,74 @@ class VLArray(hdf5extension.VLArray, Leaf):
         self._append(nparr, nobjects)
         self.nrows += 1
 
-    def iterrows(self, start=None, stop=None, step=None):
+    def append_flat(self, values, offsets):
+        """Add several rows given as a flat array of values and offsets.
+
+        This is the bulk counterpart of :meth:`VLArray.append`: the atoms of
+        all the new rows are passed one after the other in `values`, and
+        `offsets`, which must have one element more than the number of rows
+        to be added, states where each row starts and ends, i.e. the i-th new
+        row is ``values[offsets[i]:offsets[i+1]]``.  All the rows are written
+        to disk in a single operation.
+
+        For pseudo-atoms, `values` must be given in terms of the base atom
+        (for example, the bytes of the strings for a VLStringAtom), as
+        returned by ``read(as_flat=True)``.
+
+        Examples
+        --------
+
+        ::
+
+            # Append the rows [1, 2], [] and [3, 4, 5]
+            vlarray.append_flat([1, 2, 3, 4, 5], [0, 2, 2, 5])
+
+        .. versionadded:: 3.1.2
+
+        """
+
+        self._g_check_open()
+        self._v_file._check_writable()
+
+        atom = self.atom
+        if not hasattr(atom, 'size'):  # it is a pseudo-atom
+            statom = atom.base
+        else:
+            statom = atom
+
+        offsets = numpy.array(offsets, dtype=numpy.int64)
+        if offsets.ndim != 1 or len(offsets) == 0:
+            raise ValueError("``offsets`` must be a non-empty "
+                             "unidimensional sequence")
+        if len(values) > 0:
+            # The values need to be copied to make the operation safe
+            # to in-place conversion.
+            nparr = numpy.ascontiguousarray(
+                convert_to_np_atom2(values, statom))
+        else:
+            nparr = numpy.empty((0,) + statom.shape, dtype=statom.dtype.base)
+        if nparr.ndim == 0 or nparr.shape[1:] != statom.shape:
+            raise ValueError("The values have shape '%s', which is not "
+                             "compatible with the atom shape ('%s')."
+                             % (nparr.shape, statom.shape))
+        if (offsets[0] < 0 or offsets[-1] > len(nparr) or
+                (numpy.diff(offsets) < 0).any()):
+            raise ValueError("``offsets`` must be non-decreasing and within "
+                             "the bounds of ``values``")
+
+        self._append_flat(nparr, offsets)
+        self.nrows += len(offsets) - 1
+
+    def iterrows(self, start=None, stop=None, step=None, as_flat=False):
         """Iterate over the rows of the array.
 
         This method returns an iterator yielding an object of the current
         flavor for each selected row in the array.
 
+        If `as_flat` is true, the iterator yields instead a
+        ``(values, offsets)`` tuple for each buffer of selected rows, as
+        returned by ``read(as_flat=True)``.
+
         If a range is not supplied, *all the rows* in the array are iterated
         upon. You can also use the :meth:`VLArray.__iter__` special method for
         that purpose.  If you only want to iterate over a given *range of rows*
@@ -560,13 +628,25 @@ class VLArray(hdf5extension.VLArray, Leaf):
            array is iterated from *start* to the last line.
            In PyTables < 3.0 only one element was returned.
 
+        .. versionchanged:: 3.1.2
+           Added the *as_flat* parameter.
+
         """
 
-        (self._start, self._stop, self._step) = self._process_range(
-            start, stop, step)
+        (start, stop, step) = self._process_range(start, stop, step)
+        if as_flat:
+            return self._iter_flat(start, stop, step)
+        (self._start, self._stop, self._step) = (start, stop, step)
         self._init_loop()
         return self
 
+    def _iter_flat(self, start, stop, step):
+        """Iterate over flat blocks of rows for ``iterrows(as_flat=True)``."""
+
+        for start2 in xrange(start, stop, step * self.nrowsinbuf):
+            stop2 = min(start2 + step * self.nrowsinbuf, stop)
+            yield self.read(start2, stop2, step, as_flat=True)
+
     def __iter__(self):
         """Iterate over the rows of the array.
 
@@ -785,7 +865,7 @@ class VLArray(hdf5extension.VLArray, Leaf):
         self._assign_values(coords, value)
 
     # Accessor for the _read_array method in superclass
-    def read(self, start=None, stop=None, step=1):
+    def read(self, start=None, stop=None, step=1, as_flat=False):
         """Get data in the array as a list of objects of the current flavor.
 
         Please note that, as the lengths of the different rows are variable,
@@ -800,23 +880,40 @@ class VLArray(hdf5extension.VLArray, Leaf):
         then stop will be set to start + 1. If you do not specify neither
         start nor stop, then *all the rows* in the array are selected.
 
+        If `as_flat` is true, the selected rows are returned as a
+        ``(values, offsets)`` tuple of NumPy arrays instead, regardless of
+        the flavor: `values` holds the atoms of all the rows one after the
+        other, and `offsets` is an ``int64`` array with one element more than
+        the number of rows, so that the i-th row is
+        ``values[offsets[i]:offsets[i+1]]``.  This avoids creating an object
+        per row, which is much faster for many short rows.  For pseudo-atoms,
+        `values` is given in terms of the base atom (for example, the bytes
+        of the strings for a VLStringAtom).
+
+        .. versionchanged:: 3.1.2
+           Added the *as_flat* parameter.
+
         """
 
         self._g_check_open()
         start, stop, step = self._process_range_read(start, stop, step)
+        if as_flat:
+            return self._read_array_flat(start, stop, step)
+
+        atom = self.atom
+        if not hasattr(atom, 'size'):  # it is a pseudo-atom
+            # All the objects are decoded at once from the flat values
+            values, offsets = self._read_array_flat(start, stop, step)
+            return atom.fromflat(values, offsets)
+
         if start == stop:
             listarr = []
         else:
             listarr = self._read_array(start, stop, step)
 
-        atom = self.atom
-        if not hasattr(atom, 'size'):  # it is a pseudo-atom
-            outlistarr = [atom.fromarray(arr) for arr in listarr]
-        else:
-            # Convert the list to the right flavor
-            flavor = self.flavor
-            outlistarr = [internal_to_flavor(arr, flavor) for arr in listarr]
-        return outlistarr
+        # Convert the list to the right flavor
+        flavor = self.flavor
+        return [internal_to_flavor(arr, flavor) for arr in listarr]
 
     def _read_coordinates(self, coords):
         """Read rows specified in `coords`."""
@@ -0,0 +1,358 @@
+# -*- coding: utf-8 -*-
+
+########################################################################
+#
+# License: BSD
+# Created: October 18, 2026
+# Author:  The PyTables Team
+#
+# $Id$
+#
+########################################################################
+
+"""Here is defined the ZoneMap class."""
+
+import math
+
+import numpy
+
+from tables.node import NotLoggedMixin
+from tables.table import Table
+from tables.utilsextension import get_nested_field
+
+
+# The kinds of columns which can be summarized in a zone map.
+_zonable_kinds = ('int', 'uint', 'float', 'time')
+
+# The kinds of columns which can have Bloom filters.
+_bloomable_kinds = ('bool', 'int', 'uint', 'float', 'complex', 'time',
+                    'enum', 'string')
+
+# The parameters of the 64-bit FNV-1a hash.
+_fnv_offset = numpy.uint64(14695981039346656037)
+_fnv_prime = numpy.uint64(1099511628211)
+
+
+def _is_zonable(coldescr):
+    """Can the column described by `coldescr` be summarized?"""
+
+    return coldescr.kind in _zonable_kinds and coldescr.shape == ()
+
+
+def _is_bloomable(coldescr):
+    """Can the column described by `coldescr` have a Bloom filter?"""
+
+    return coldescr.kind in _bloomable_kinds and coldescr.shape == ()
+
+
+def _zonemap_dtype(table, colpathnames, bloomcolpathnames, bloomsize):
+    """Get the dtype of the zone map for the columns in `table`."""
+
+    fields = []
+    for i, colpathname in enumerate(colpathnames):
+        coldtype = table.coldtypes[colpathname].newbyteorder('=')
+        fields.append(('c%d' % i, [('min', coldtype), ('max', coldtype),
+                                   ('nnan', numpy.int64)]))
+    for i in range(len(bloomcolpathnames)):
+        fields.append(('b%d' % i, numpy.uint8, (bloomsize // 8,)))
+    return numpy.dtype(fields)
+
+
+def _bloom_positions(values, nhashes, bloomsize):
+    """Get the `nhashes` bit positions of each of `values` in a filter.
+
+    An array with shape ``(len(values), nhashes)`` is returned.  The
+    positions are derived from the FNV-1a hash of the bytes in each
+    value, so `values` of the same type give the same positions.
+
+    """
+
+    values = numpy.ascontiguousarray(
+        values, dtype=values.dtype.newbyteorder('='))
+    if values.dtype.kind in 'fc':
+        values = values + 0  # -0.0 and 0.0 are equal values
+    itemsize = values.dtype.itemsize
+    data = values.view(numpy.uint8).reshape((len(values), itemsize))
+    hashes = numpy.empty(len(values), dtype=numpy.uint64)
+    hashes[:] = _fnv_offset
+    for i in range(itemsize):
+        hashes ^= data[:, i]
+        hashes *= _fnv_prime
+    # Double hashing gives the rest of positions
+    hash1 = hashes & numpy.uint64(0xffffffff)
+    hash2 = (hashes >> numpy.uint64(32)) | numpy.uint64(1)
+    steps = numpy.arange(nhashes, dtype=numpy.uint64)
+    positions = (hash1[:, numpy.newaxis]
+                 + hash2[:, numpy.newaxis] * steps) % numpy.uint64(bloomsize)
+    return positions.astype(numpy.int64)
+
+
+class ZoneMap(NotLoggedMixin, Table):
+    """Summaries of the values in each chunk of a table.
+
+    A zone map is a hidden table which keeps a row per chunk of rows in
+    the summarized table.  For each summarized column, the row holds
+    the minimum and maximum values found in the chunk (not counting
+    NaNs) and the number of NaN values in it.  Some columns may also
+    have a Bloom filter of the values in each chunk, which tells which
+    values are surely not in it.  In-kernel queries use these summaries
+    to skip the chunks which can not hold rows fulfilling a range or
+    equality condition.
+
+    Zone maps are created with :meth:`Table.create_zonemap` and they
+    are kept up to date when rows are appended to their table.
+    Modifying or removing rows in the table makes the zone map dirty.
+
+    .. note::
+
+        This class is mainly intended for internal use, but some of its
+        documented attributes and methods may be interesting for the
+        programmer.
+
+    Parameters
+    ----------
+    parentnode
+        The parent :class:`Group` object.
+    name : str
+        The name of this node in its parent group.
+    table : Table
+        The table to be summarized.  If not specified, an existing zone
+        map is opened.
+    columns : list
+        The path names of the columns of `table` to be summarized.
+    bloomcolumns : list
+        The path names of the columns of `table` with Bloom filters.
+    bloombits : int
+        The number of bits per table row in each Bloom filter.
+
+    .. versionadded:: 3.1.2
+
+    """
+
+    _c_classid = 'ZONEMAP'
+
+    # Properties
+    # ~~~~~~~~~~
+    @property
+    def columns(self):
+        """The path names of the summarized columns."""
+
+        return list(self._v_attrs.COLUMNS)
+
+    @property
+    def bloomcolumns(self):
+        """The path names of the columns with Bloom filters."""
+
+        return list(getattr(self._v_attrs, 'BLOOM_COLUMNS', []))
+
+    @property
+    def table(self):
+        """The summarized table."""
+
+        tablename = self._v_name[len('_p_zonemap_'):]
+        return self._v_parent._f_get_child(tablename)
+
+    @property
+    def zonesize(self):
+        """The number of table rows summarized in each row."""
+
+        return int(self._v_attrs.ZONESIZE)
+
+    def _getdirty(self):
+        return bool(getattr(self._v_attrs, 'DIRTY', False))
+
+    def _setdirty(self, dirty):
+        self._v_attrs.DIRTY = bool(dirty)
+
+    dirty = property(
+        _getdirty, _setdirty, None,
+        """Whether the summaries are out of date with the table or not.
+
+        Dirty zone maps are not used in queries, and they are not
+        updated anymore.
+
+        """)
+
+    # Other methods
+    # ~~~~~~~~~~~~~
+    def __init__(self, parentnode, name, table=None, columns=None,
+                 bloomcolumns=(), bloombits=8):
+        description = expectedrows = None
+        self._v_data = None
+        """The cached contents of the zone map."""
+        if table is not None:
+            zonesize = table.chunkshape[0]
+            # Bloom filters take a whole number of bytes
+            bloomsize = int(math.ceil(bloombits * zonesize / 8.)) * 8
+            nhashes = max(int(round(bloombits * math.log(2))), 1)
+            description = _zonemap_dtype(table, columns, bloomcolumns,
+                                         bloomsize)
+            expectedrows = table._v_expectedrows // zonesize + 1
+        super(ZoneMap, self).__init__(parentnode, name, description,
+                                      "Zone map", expectedrows=expectedrows)
+        if table is not None:
+            attrs = self._v_attrs
+            attrs.COLUMNS = list(columns)
+            attrs.BLOOM_COLUMNS = list(bloomcolumns)
+            attrs.BLOOM_SIZE = bloomsize
+            attrs.BLOOM_NHASHES = nhashes
+            attrs.ZONESIZE = zonesize
+            attrs.TABLE_NROWS = 0
+            attrs.DIRTY = False
+
+    def is_usable_for(self, table):
+        """Do the summaries describe the current rows of `table`?"""
+
+        return (not self.dirty and self._v_attrs.TABLE_NROWS == table.nrows
+                and self.zonesize == table.chunkshape[0])
+
+    def _g_read_field(self, name):
+        if self._v_data is None:
+            self._v_data = self._read(0, self.nrows, 1)
+        return self._v_data[name]
+
+    def summary(self, colpathname):
+        """Get the summaries of the column named `colpathname`.
+
+        A structured array is returned with a row per chunk of the
+        table, and ``min``, ``max`` and ``nnan`` fields.  The minimum
+        and maximum values of a chunk with only NaN values are NaN.
+
+        """
+
+        i = self.columns.index(colpathname)
+        return self._g_read_field('c%d' % i)
+
+    def may_contain(self, colpathname, value):
+        """Get the chunks which may hold `value` in a column.
+
+        The column named `colpathname` must have a Bloom filter.  A
+        boolean array is returned with a false value for the chunks
+        where no row has `value` in that column.
+
+        """
+
+        i = self.bloomcolumns.index(colpathname)
+        blooms = self._g_read_field('b%d' % i)
+        coldtype = self.table.coldtypes[colpathname]
+        try:
+            values = numpy.array([value], dtype=coldtype)
+        except (ValueError, OverflowError):
+            return numpy.zeros(len(blooms), dtype=bool)
+        if values[0] != value:
+            # The column can not hold the value
+            return numpy.zeros(len(blooms), dtype=bool)
+        attrs = self._v_attrs
+        positions = _bloom_positions(values, attrs.BLOOM_NHASHES,
+                                     attrs.BLOOM_SIZE)[0]
+        chunkmap = numpy.ones(len(blooms), dtype=bool)
+        for position in positions:
+            bit = 7 - position % 8  # ``numpy.packbits()`` is big-endian
+            chunkmap &= (blooms[:, position // 8] >> bit) & 1 == 1
+        return chunkmap
+
+    def get_chunkmap(self, colpathname, ops, limits):
+        """Get the chunks which may fulfill a comparison with a column.
+
+        The `ops` and `limits` arguments describe the comparison of the
+        column named `colpathname`, as in
+        :meth:`tables.index.Index.get_lookup_range`.  A boolean array
+        is returned with a true value for every chunk where some value
+        may fulfill the comparison.
+
+        """
+
+        chunkmap = numpy.ones(self.nrows, dtype=bool)
+        if ops == ('eq',) and colpathname in self.bloomcolumns:
+            chunkmap &= self.may_contain(colpathname, limits[0])
+        if colpathname not in self.columns:
+            return chunkmap
+
+        zones = self.summary(colpathname)
+        mins, maxs = zones['min'], zones['max']
+        with numpy.errstate(invalid='ignore'):
+            if len(ops) == 1:
+                op, limit = ops[0], limits[0]
+                if op == 'lt':
+                    chunkmap &= mins < limit
+                elif op == 'le':
+                    chunkmap &= mins <= limit
+                elif op == 'gt':
+                    chunkmap &= maxs > limit
+                elif op == 'ge':
+                    chunkmap &= maxs >= limit
+                else:
+                    assert op == 'eq'
+                    chunkmap &= (mins <= limit) & (maxs >= limit)
+                return chunkmap
+            # ``lower <[=] col <[=] upper``
+            (lop, uop), (lower, upper) = ops, limits
+            if lop == 'gt':
+                chunkmap &= maxs > lower
+            else:
+                chunkmap &= maxs >= lower
+            if uop == 'lt':
+                chunkmap &= mins < upper
+            else:
+                chunkmap &= mins <= upper
+            return chunkmap
+
+    def _g_add_rows(self, rows, start):
+        """Summarize `rows`, written at row `start` of the table."""
+
+        attrs = self._v_attrs
+        if self.dirty:
+            return
+        if attrs.TABLE_NROWS != start:
+            # Some rows went unsummarized
+            self.dirty = True
+            return
+
+        # The offsets in `rows` where new zones start
+        zonesize = self.zonesize
+        offsets = numpy.arange(-(start % zonesize), len(rows), zonesize)
+        offsets[0] = 0
+        zones = numpy.empty(len(offsets), dtype=self._v_dtype)
+        for i, colpathname in enumerate(self.columns):
+            zone = zones['c%d' % i]
+            values = get_nested_field(rows, colpathname)
+            zone['min'] = numpy.fmin.reduceat(values, offsets)
+            zone['max'] = numpy.fmax.reduceat(values, offsets)
+            if values.dtype.kind == 'f':
+                isnan = numpy.isnan(values).astype(numpy.int64)
+                zone['nnan'] = numpy.add.reduceat(isnan, offsets)
+            else:
+                zone['nnan'] = 0
+        if self.bloomcolumns:
+            # The zone of each row
+            bloomsize = attrs.BLOOM_SIZE
+            counts = numpy.diff(numpy.append(offsets, len(rows)))
+            zonestarts = numpy.repeat(
+                numpy.arange(len(offsets)) * bloomsize, counts)
+        for i, colpathname in enumerate(self.bloomcolumns):
+            values = get_nested_field(rows, colpathname)
+            positions = _bloom_positions(values, attrs.BLOOM_NHASHES,
+                                         bloomsize)
+            bits = numpy.zeros(len(offsets) * bloomsize, dtype=bool)
+            bits[zonestarts[:, numpy.newaxis] + positions] = True
+            zones['b%d' % i] = numpy.packbits(
+                bits.reshape((len(offsets), bloomsize)), axis=1)
+
+        self._v_data = None
+        if start % zonesize:
+            # The first zone continues the last one in the map
+            nlast = self.nrows - 1
+            last = self._read(nlast, nlast + 1, 1)
+            for name in zones.dtype.names:
+                zone, lastzone = zones[name][:1], last[name]
+                if name.startswith('b'):
+                    zone |= lastzone
+                    continue
+                zone['min'] = numpy.fmin(zone['min'], lastzone['min'])
+                zone['max'] = numpy.fmax(zone['max'], lastzone['max'])
+                zone['nnan'] += lastzone['nnan']
+            self.modify_rows(nlast, nlast + 1, rows=zones[:1])
+            zones = zones[1:]
+        if len(zones) > 0:
+            self.append(zones)
+        attrs.TABLE_NROWS = start + len(rows)